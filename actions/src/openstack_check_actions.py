@@ -2,20 +2,35 @@ import ast
 from typing import Callable, Dict
 import logging
 import sys
-from datetime import datetime
+from exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 from openstack_api.openstack_connection import OpenstackConnection
+from openstack_api.openstack_volume_snapshot import OpenstackVolumeSnapshot
 from st2common.runners.base_action import Action
-from post_ticket import post_ticket
+from result_store import ResultStore
+from ticket_dispatcher import (
+    MAX_CONCURRENT_REQUESTS,
+    REQUESTS_PER_SECOND,
+    TicketDispatcher,
+)
+from ticket_index import DEFAULT_TTL, TicketIndex
 
 
 class CheckActions(Action):
+    def __init__(self, *args, config: Dict = None, **kwargs):
+        """constructor class"""
+        super().__init__(*args, config=config, **kwargs)
+        self._snapshot_api: OpenstackVolumeSnapshot = config.get(
+            "openstack_volume_snapshot_api", OpenstackVolumeSnapshot()
+        )
+
     # pylint: disable=arguments-differ
     def run(self, submodule: str, **kwargs):
         """
         Dynamically dispatches to the method wanted
+        Large results are offloaded to a ResultStore, and a handle to them returned instead
         """
         func: Callable = getattr(self, submodule)
-        return func(**kwargs)
+        return ResultStore().offload(func(**kwargs))
 
     # pylint: disable=too-many-arguments, too-many-locals
     def _check_project_loadbalancers(
@@ -136,86 +151,45 @@ class CheckActions(Action):
         return rules_with_issues
 
     def check_notify_snapshots(
-        self, cloud_account: str, project_id=None, all_projects=False
+        self, cloud_account: str, project_id=None, all_projects=False, days: int = 30
     ):
         """
-        Set off and return check for snapshots older than one month
+        Set off and return check for snapshots that have not changed for a given number of days
         """
+        if not all_projects and not project_id:
+            raise MissingMandatoryParamError(
+                "A project ID is required unless all_projects is set"
+            )
         # pylint: disable=line-too-long
         output = {
             "title": "Project {p[name]} has an old volume snapshot",
             "body": "The volume snapshot was last updated on: {p[updated]}\nSnapshot name: {p[name]}\nSnapshot id: {p[id]}\nProject id: {p[project_id]}",
             "server_list": [],
         }
-        snapshots = []
-        if all_projects:
-            with OpenstackConnection(cloud_name=cloud_account) as conn:
-                projects = conn.list_projects()
-        else:
-            projects = [{"id": project_id}]
-
-        for project in projects:
-            snapshots.extend(
-                self.check_snapshots(project=project["id"], cloud_account=cloud_account)
+        output["server_list"].extend(
+            self._snapshot_api.find_stale_snapshots(
+                cloud_account=cloud_account,
+                days=days,
+                project_id=None if all_projects else project_id,
             )
-        with OpenstackConnection(cloud_name=cloud_account) as conn:
-            for snapshot in snapshots:
-                proj = conn.get_project(name_or_id=snapshot["project_id"])
-
-                output["server_list"].append(
-                    {"dataTitle": {"name": proj["name"]}, "dataBody": snapshot}
-                )
-            # Send email to notify users? projects don't have contact details :/
-
+        )
+        # Send email to notify users? projects don't have contact details :/
         return output
 
-    @staticmethod
-    def check_snapshots(cloud_account, project: str):
-        """
-        Check for snapshots that haven't been updated in more than a month.
-        """
-        snap_list = []
-        with OpenstackConnection(cloud_name=cloud_account) as conn:
-            volume_snapshots = conn.list_volume_snapshots(
-                search_opts={"all_tenants": True, "project_id": project}
-            )
-        for snapshot in volume_snapshots:
-            try:
-                since_updated = datetime.strptime(
-                    snapshot["updated_at"], "%Y-%m-%dT%H:%M:%S.%f"
-                )
-            except KeyError:
-                since_updated = datetime.strptime(
-                    snapshot["created_at"], "%Y-%m-%dT%H:%M:%S.%f"
-                )
-            if since_updated.month != datetime.now().month:
-                try:
-                    snap_list.append(
-                        {
-                            "name": snapshot["name"],
-                            "id": snapshot["id"],
-                            "updated": snapshot["updated_at"],
-                            "project_id": snapshot[
-                                "os-extended-snapshot-attributes:project_id"
-                            ],
-                        }
-                    )
-                except KeyError:
-                    snap_list.append(
-                        {
-                            "name": snapshot["name"],
-                            "id": snapshot["id"],
-                            "updated": snapshot["created_at"],
-                            "project_id": snapshot["location"]["project"]["id"],
-                        }
-                    )
-        return snap_list
-
+    # pylint: disable=too-many-arguments
     @staticmethod
     def create_ticket(
-        tickets_info, email: str, api_key: str, servicedesk_id, requesttype_id
+        tickets_info,
+        email: str,
+        api_key: str,
+        servicedesk_id,
+        requesttype_id,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        requests_per_second: float = REQUESTS_PER_SECOND,
+        resolve_missing: bool = False,
+        index_ttl: float = DEFAULT_TTL,
     ):
-        # pylint: disable=line-too-long
+        # pylint: disable=line-too-long,too-many-locals
         """
         Function to create tickets in an atlassian project. The tickets_info value should be formatted as such:
         {
@@ -228,28 +202,65 @@ class CheckActions(Action):
                 }
             ] This list can be arbitrarily long, it will be iterated and each element will create a ticket based off the title and body keys and modified with the info from dataTitle and dataBody. For an example on how to do this please see deleting_machines_check
         }
+        or a handle to it returned by an upstream action which offloaded it to a ResultStore.
+        Tickets are created concurrently, at most max_concurrent at once and requests_per_second per second.
+        Issues which already have a ticket are skipped, see TicketIndex. If resolve_missing is set, server_list
+        must hold every issue found by the check, and issues ticketed before which aren't in it are resolved so
+        they are ticketed again if they come back. Issues not reported for index_ttl seconds are forgotten, so it
+        should be several times the interval the check runs at.
+        Returns the number of tickets created, failed and skipped, along with the result of each ticket
         """
         print(tickets_info)
         try:
             actual_tickets_info = tickets_info["result"]
         except TypeError:
             actual_tickets_info = ast.literal_eval(tickets_info)
+        actual_tickets_info = ResultStore().resolve(actual_tickets_info)
+
+        title = actual_tickets_info["title"]
+        with TicketIndex(ttl=index_ttl) as index:
+            if resolve_missing:
+                resolved = index.resolve_missing(
+                    title, actual_tickets_info["server_list"]
+                )
+                logging.info("%i issues resolved since last run", resolved)
+            new_entries, known_entries = index.filter_new(actual_tickets_info)
 
         if len(actual_tickets_info["server_list"]) == 0:
             logging.info("No issues found")
             sys.exit()
-        for ticket in actual_tickets_info["server_list"]:
-            # pylint: disable=too-many-function-args
-            issue = post_ticket(
-                actual_tickets_info,
-                ticket,
+        if known_entries:
+            logging.info("Skipping %i issues already ticketed", len(known_entries))
+        with TicketDispatcher(
+            email,
+            api_key,
+            max_concurrent=max_concurrent,
+            requests_per_second=requests_per_second,
+        ) as dispatcher:
+            tickets = dispatcher.create_tickets(
+                {**actual_tickets_info, "server_list": new_entries},
                 servicedesk_id,
                 requesttype_id,
-                email,
-                api_key,
             )
+        with TicketIndex(ttl=index_ttl) as index:
+            for entry, ticket in zip(new_entries, tickets):
+                if ticket["created"]:
+                    index.record(title, entry, ticket["issue_key"])
 
-            if issue.status_code != 201:
-                logging.error("Error creating issue %i", issue.status_code)
-            elif issue.status_code == 201:
-                logging.info("Created issue")
+        for ticket in tickets:
+            if ticket["created"]:
+                logging.info("Created issue %s", ticket["issue_key"])
+            else:
+                logging.error(
+                    "Error creating issue '%s' (status %s): %s",
+                    ticket["summary"],
+                    ticket["status"],
+                    ticket["error"],
+                )
+        created = sum(1 for ticket in tickets if ticket["created"])
+        return {
+            "created": created,
+            "failed": len(tickets) - created,
+            "skipped": len(known_entries),
+            "tickets": tickets,
+        }
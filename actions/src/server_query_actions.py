@@ -2,6 +2,8 @@ from typing import Callable
 from st2common.runners.base_action import Action
 from enums.cloud_domains import CloudDomains
 from openstack_query.managers.server_manager import ServerManager
+from openstack_query.query_daemon_client import run_query
+from result_store import ResultStore
 
 # pylint: disable=too-few-public-methods
 
@@ -11,17 +13,34 @@ class ServerQueryActions(Action):
     Stackstorm Action class that dynamically dispatches actions related to Server Queries to the corresponding
     method in the ServerManager class
     Actions that will be handled by this class follow the format server.search.*
+    If a query daemon is running (see openstack_query.query_daemon), queries are sent to it instead of
+    being run in the action's own process. If offload_result is set, large results are offloaded to a ResultStore,
+    and a handle to them returned instead
     """
 
-    def run(self, submodule: str, cloud_account: str, **kwargs):
+    def run(
+        self,
+        submodule: str,
+        cloud_account: str,
+        offload_result: bool = False,
+        **kwargs,
+    ):
         """
         Dynamically dispatches to the method wanted
         :param submodule: submodule name which corresponds to method in self
         :param cloud_account: A string representing the cloud domain from the clouds configuration to use
+        :param offload_result: If True, return a handle to large results instead - for workflows passing the
+        result to an action which loads handles, such as create_ticket
         :param kwargs: All user-defined kwargs to pass to the query
         """
 
-        cloud_account_enum = CloudDomains.from_string(cloud_account)
-        server_manager = ServerManager(cloud_account=cloud_account_enum)
-        query_func: Callable = getattr(server_manager, submodule)
-        return query_func(**kwargs)
+        def _run_in_process():
+            cloud_account_enum = CloudDomains.from_string(cloud_account)
+            server_manager = ServerManager(cloud_account=cloud_account_enum)
+            query_func: Callable = getattr(server_manager, submodule)
+            return query_func(**kwargs)
+
+        result = run_query(
+            "server", submodule, cloud_account, kwargs, fallback=_run_in_process
+        )
+        return ResultStore().offload(result) if offload_result else result
@@ -1,10 +1,16 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
 from openstack_api.openstack_connection import OpenstackConnection
 import requests
 
-
 DEV_URL = "https://dev-openstack.nubes.rl.ac.uk:9876/v2/octavia/amphorae"
 PROD_URL = "https://openstack.nubes.rl.ac.uk:9876/v2/octavia/amphorae"
 
+# A prober takes an IP and a timeout in seconds and returns True if the IP responded
+Prober = Callable[[str, float], Awaitable[bool]]
+
 
 def get_amphorae(cloud_account: str):
     """
@@ -18,3 +24,102 @@ def get_amphorae(cloud_account: str):
             headers={"X-Auth-Token": conn.auth_token},
             timeout=300,
         )
+
+
+async def ping_ip(ip: str, timeout: float) -> bool:
+    """
+    Pings an IP once without blocking the event loop. The ping is killed if the caller stops waiting for it,
+    e.g. probe_ips timing it out
+    :param ip: The IP to ping
+    :param timeout: Seconds to wait for a reply before treating the IP as down
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ping",
+        "-q",
+        "-c",
+        "1",
+        "-W",
+        str(max(1, int(timeout))),
+        ip,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        return await process.wait() == 0
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+
+def probe_ips(
+    ips: Iterable[str],
+    prober: Prober = ping_ip,
+    max_concurrent: int = 32,
+    timeout: float = 1,
+) -> Dict[str, bool]:
+    """
+    Probes a set of IPs concurrently
+    :param ips: The IPs to probe
+    :param prober: The coroutine used to probe a single IP, see Prober
+    :param max_concurrent: The maximum number of probes in flight at once
+    :param timeout: Seconds each probe may take before it is cancelled and the IP is treated as down
+    :return: A dictionary mapping each IP to True if it responded
+    """
+    unique_ips = list(dict.fromkeys(ips))
+
+    async def _probe_all() -> Dict[str, bool]:
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def _probe(ip: str) -> bool:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(prober(ip, timeout), timeout)
+                except FileNotFoundError:
+                    # the prober can't run at all, e.g. ping isn't installed - every target would look down
+                    raise
+                except (asyncio.TimeoutError, OSError):
+                    return False
+
+        results = await asyncio.gather(*(_probe(ip) for ip in unique_ips))
+        return dict(zip(unique_ips, results))
+
+    if not unique_ips:
+        return {}
+    return asyncio.run(_probe_all())
+
+
+# pylint: disable=too-many-arguments
+def find_unreachable(
+    targets: Dict[str, Optional[str]],
+    *,
+    failure_threshold: int = 3,
+    retry_interval: float = 5,
+    prober: Prober = ping_ip,
+    max_concurrent: int = 32,
+    timeout: float = 1,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Set[str]:
+    """
+    Probes targets concurrently and returns those which failed failure_threshold probes in a row.
+    Targets which fail are re-probed (without the healthy ones) every retry_interval seconds until they either
+    respond or reach the threshold, so a brief outage or a dropped ping does not report a target as down.
+    Nothing is kept between calls, each sweep starts afresh
+    :param targets: A dictionary mapping a target identifier (e.g. amphora ID) to the IP to probe, targets
+    without an IP (e.g. an amphora still booting) are skipped
+    :param failure_threshold: Number of failed probes in a row before a target is reported
+    :param retry_interval: Seconds to wait before re-probing targets which failed
+    :param prober: The coroutine used to probe a single IP, see Prober
+    :param max_concurrent: The maximum number of probes in flight at once
+    :param timeout: Seconds each probe may take before the IP is treated as down
+    :param sleep: Function which waits for a number of seconds
+    """
+    pending = {target: ip for target, ip in targets.items() if ip}
+    for attempt in range(failure_threshold):
+        if attempt:
+            sleep(retry_interval)
+        results = probe_ips(pending.values(), prober, max_concurrent, timeout)
+        pending = {target: ip for target, ip in pending.items() if not results[ip]}
+        if not pending:
+            break
+    return set(pending)
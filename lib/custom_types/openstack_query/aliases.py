@@ -1,8 +1,10 @@
-from typing import List, Callable, Any, Dict, Union
+from typing import TYPE_CHECKING, List, Callable, Any, Dict, Optional, TextIO, Union
 from enums.query.props.prop_enum import PropEnum
 from enums.query.query_presets import QueryPresets
 
-from openstack.identity.v3.project import Project
+if TYPE_CHECKING:
+    # openstacksdk takes a few hundred milliseconds to import, so isn't imported just for type aliases
+    from openstack.identity.v3.project import Project
 
 # A type alias for a single openstack resource - i.e Server, Hypervisor etc
 OpenstackResourceObj = Any
@@ -20,6 +22,10 @@ FilterFunc = Callable[[PropFunc, FilterParams], bool]
 # A type alias for a client-side filter func
 ClientSideFilterFunc = Callable[[OpenstackResourceObj], bool]
 
+# A type alias for a vectorised client-side filter func, which takes a list of openstack resources and returns
+# a NumPy boolean mask of those which pass, or None if it cannot be evaluated for them
+VectorisedFilterFunc = Callable[[List[OpenstackResourceObj]], Optional[Any]]
+
 # A type alias for a dictionary of filters to pass to openstacksdk commands as filter params
 ServerSideFilters = Dict[str, Any]
 
@@ -36,10 +42,15 @@ ServerSideFilterMappings = Dict[QueryPresets, PropToServerSideFilterFunc]
 PresetPropMappings = Union[List[PropEnum], List]
 
 # type alias for project identifier - either name/id or Project object
-ProjectIdentifier = Union[str, Project]
+ProjectIdentifier = Union[str, "Project"]
+
+# type alias for where streamed query output is written - a file path or a text stream
+OutputDestination = Union[str, TextIO]
 
 # type alias for returning a query - any one of:
 #   - A string with values in a tabulate table
 #   - A list of Openstack Resource objects
 #   - A list of dictionaries containing selected properties for each openstack resource
-QueryReturn = Union[str, List[OpenstackResourceObj], List[Dict]]
+#   - A dictionary containing results along with a query profile
+#   - A dictionary referencing a file results were written to
+QueryReturn = Union[str, List[OpenstackResourceObj], List[Dict], Dict[str, Any]]
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+
+from openstack.connection import Connection
+
+DELETING_STATUS = "DELETING"
+UPDATED_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def get_deleting_machines(conn: Connection, minutes: int = 10) -> List[Dict]:
+    """
+    Returns ticket entries for servers that have been stuck deleting for a given number of minutes.
+    Uses a single cloud-wide listing filtered server-side, since status and updated_at are already
+    included in the listing there is no need to fetch each server individually
+    :param conn: An open openstack connection
+    :param minutes: The number of minutes a server must be stuck deleting for to be reported
+    """
+    threshold = datetime.utcnow() - timedelta(minutes=minutes)
+    servers = conn.compute.servers(
+        all_projects=True,
+        status=DELETING_STATUS,
+        changes_before=threshold.strftime(UPDATED_AT_FORMAT),
+    )
+
+    output = []
+    for server in servers:
+        # Older microversions ignore changes-before, so re-check locally as it costs nothing
+        # (uses the last updated time so if changes have been made
+        # to the server while deleting the check may not work.)
+        if server["status"] != DELETING_STATUS:
+            continue
+        if datetime.strptime(server["updated_at"], UPDATED_AT_FORMAT) > threshold:
+            continue
+        output.append(
+            {
+                "dataTitle": {"id": str(server["id"]), "action": str(server["status"])},
+                "dataBody": {"id": server["id"]},
+            }
+        )
+    return output
+
+
+def filter_already_ticketed(
+    entries: List[Dict], ticketed: Set[str]
+) -> Tuple[List[Dict], Set[str]]:
+    """
+    Removes entries for servers that were already dispatched on a previous poll
+    :param entries: Ticket entries found by get_deleting_machines
+    :param ticketed: IDs of servers dispatched on previous polls
+    :return: A tuple of the new entries, and the IDs to remember for the next poll. Servers which are no longer
+    stuck are dropped from the IDs so they will be reported again if they get stuck in future
+    """
+    found = {entry["dataBody"]["id"] for entry in entries}
+    new_entries = [
+        entry for entry in entries if entry["dataBody"]["id"] not in ticketed
+    ]
+    return new_entries, found
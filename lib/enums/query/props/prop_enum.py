@@ -5,3 +5,10 @@ class PropEnum(Enum):
     """
     An enum base class for all openstack resource properties - for type annotation purposes
     """
+
+    def is_numeric(self) -> bool:
+        """
+        Returns True if the values of this property are numbers, which can be summed and compared.
+        Properties are strings unless a subclass overrides this
+        """
+        return False
@@ -0,0 +1,36 @@
+from enum import Enum, auto
+from exceptions.parse_query_error import ParseQueryError
+
+
+# pylint: disable=too-few-public-methods
+class QueryAggregations(Enum):
+    """
+    Enum class which holds a list of supported query aggregations
+    """
+
+    COUNT = auto()
+    SUM = auto()
+    MIN = auto()
+    MAX = auto()
+    TOP_K = auto()
+
+    @staticmethod
+    def from_string(val: str):
+        """
+        Converts a given string in a case-insensitive way to the enum values
+        """
+        try:
+            return QueryAggregations[val.upper()]
+        except KeyError as err:
+            raise ParseQueryError(
+                f"Could not find aggregation {val}. "
+                f"Available aggregations are {','.join([agg.name for agg in QueryAggregations])}"
+            ) from err
+
+
+# Aggregations which add or compare values, so need a numeric property
+NUMERIC_AGGREGATIONS = (
+    QueryAggregations.SUM,
+    QueryAggregations.MIN,
+    QueryAggregations.MAX,
+)
@@ -12,6 +12,9 @@ class QueryOutputTypes(Enum):
     TO_OBJECT_LIST = auto()
     TO_LIST = auto()
     TO_STR = auto()
+    TO_NDJSON = auto()
+    TO_CSV = auto()
+    TO_JSON = auto()
 
     @staticmethod
     def from_string(val: str):
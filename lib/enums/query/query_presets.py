@@ -82,8 +82,10 @@ class QueryPresetsString(QueryPresets):
     """
 
     ANY_IN = auto()
+    CONTAINS = auto()
     MATCHES_REGEX = auto()
     NOT_ANY_IN = auto()
+    NOT_CONTAINS = auto()
 
     @staticmethod
     def from_string(val: str):
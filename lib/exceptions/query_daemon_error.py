@@ -0,0 +1,5 @@
+class QueryDaemonError(RuntimeError):
+    """
+    Exception which is thrown when a query run by the query daemon fails with an error which can't be
+    raised again in the client as its original type
+    """
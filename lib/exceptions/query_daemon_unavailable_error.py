@@ -0,0 +1,5 @@
+class QueryDaemonUnavailableError(ConnectionError):
+    """
+    Exception which is thrown when the query daemon can't be reached, or can't answer a query -
+    the query should be run in-process instead
+    """
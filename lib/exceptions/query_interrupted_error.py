@@ -0,0 +1,9 @@
+class QueryInterruptedError(RuntimeError):
+    """
+    Exception which is thrown when a query fails part way through listing resources.
+    Progress so far has been saved, and the query can be continued by passing resume_token to run()
+    """
+
+    def __init__(self, message: str, resume_token: str):
+        super().__init__(message)
+        self.resume_token = resume_token
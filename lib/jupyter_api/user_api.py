@@ -1,59 +1,203 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Optional
 
 import pytz
 import requests
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
 
 from jupyter_api.api_endpoints import API_ENDPOINTS
+from request_retry import SafeRetry
 from structs.jupyter_last_used import JupyterLastUsed
 from structs.jupyter_users import JupyterUsers
 
+# Number of users operated on concurrently by the batch methods
+MAX_CONCURRENT_REQUESTS = 8
+
+# Number of users requested per page when listing users
+USERS_PAGE_SIZE = 200
+USERS_PAGE_TIMEOUT = 60
+
+# Asks JupyterHub 2.0+ to wrap listings with pagination info
+PAGINATION_HEADERS = {"Accept": "application/jupyterhub-pagination+json"}
+
 
 class UserApi:
+    def __init__(
+        self,
+        endpoints: Optional[Dict[str, str]] = None,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+    ):
+        """
+        :param endpoints: Mapping of environment names to JupyterHub URLs, defaults to API_ENDPOINTS
+        :param max_concurrent: Maximum number of users the batch methods operate on at once
+        :param retries: Number of times a request is retried, see request_retry.SafeRetry
+        :param backoff_factor: Backoff factor between retries, see urllib3.util.retry.Retry
+        """
+        self._endpoints = endpoints if endpoints is not None else API_ENDPOINTS
+        self._max_concurrent = max_concurrent
+        self._retries = retries
+        self._backoff_factor = backoff_factor
+        self._sessions: Dict[str, requests.Session] = {}
+        # batch methods call _get_session from several threads at once
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self, endpoint: str) -> requests.Session:
+        """
+        Returns a keep-alive session for the given endpoint, creating it on first use.
+        The connection pool is sized so every concurrent batch request can reuse a connection
+        """
+        with self._sessions_lock:
+            if endpoint not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self._max_concurrent,
+                    max_retries=SafeRetry(
+                        total=self._retries, backoff_factor=self._backoff_factor
+                    ),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[endpoint] = session
+            return self._sessions[endpoint]
+
+    # pylint: disable=too-many-arguments
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        auth_token: str,
+        path: str,
+        timeout: int,
+        extra_headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Sends a request to the JupyterHub API through the pooled session for the endpoint
+        :param extra_headers: Headers to send in addition to the authorization header
+        :param kwargs: Extra kwargs passed to requests, e.g. params
+        """
+        return self._get_session(endpoint).request(
+            method,
+            url=self._endpoints[endpoint] + path,
+            headers={"Authorization": f"token {auth_token}", **(extra_headers or {})},
+            timeout=timeout,
+            **kwargs,
+        )
+
+    def _run_batch(
+        self, users: JupyterUsers, single_user_func: Callable[[str], None]
+    ) -> None:
+        """
+        Runs a single user function for every user concurrently. Every user is attempted, and if any fail
+        a single error is raised listing the failure for each user
+        :param users: The user(s) to operate on
+        :param single_user_func: A function which takes a username and raises a RuntimeError on failure
+        """
+        user_list = self._get_user_list(users)
+
+        def _run_single(user: str) -> Optional[str]:
+            try:
+                single_user_func(user)
+            except (RuntimeError, RequestException) as err:
+                return str(err)
+            return None
+
+        with ThreadPoolExecutor(max_workers=self._max_concurrent) as executor:
+            failures = [
+                error for error in executor.map(_run_single, user_list) if error
+            ]
+
+        if failures:
+            raise RuntimeError(
+                f"Failed for {len(failures)} of {len(user_list)} user(s):\n"
+                + "\n".join(failures)
+            )
+
     def get_inactive_users(
         self, endpoint: str, auth_token: str, threshold: relativedelta
     ) -> List[JupyterLastUsed]:
         """
         Polls the given endpoint for users and returns the list of users
         """
+        # Force UTC timezone
+        cutoff = pytz.utc.localize(datetime.now() - threshold)
         try:
-            users = self.get_users(endpoint, auth_token)
+            return [
+                user
+                for user in self.iter_users(endpoint, auth_token)
+                if user[1] < cutoff
+            ]
         except RuntimeError:
             return []
 
-        return self._filter_inactive(users, threshold)
-
-    def get_users(self, endpoint: str, auth_token: str) -> List[JupyterLastUsed]:
+    def get_users(
+        self, endpoint: str, auth_token: str, state: Optional[str] = None
+    ) -> List[JupyterLastUsed]:
         """
         Gets the list of all users from the JupyterHub API
+        :param state: (Optional) only return users with servers in this state, see iter_users
         """
-        result = requests.get(
-            url=API_ENDPOINTS[endpoint] + "/hub/api/users",
-            headers={"Authorization": f"token {auth_token}"},
-            timeout=300,
-        )
+        return list(self.iter_users(endpoint, auth_token, state))
 
-        if result.status_code == 200:
-            return self._pack_users(result.json())
-        if result.status_code == 204:
-            return []
-        raise RuntimeError(f"Failed to get users error was:\n{result.text}")
+    def iter_users(
+        self, endpoint: str, auth_token: str, state: Optional[str] = None
+    ) -> Iterator[JupyterLastUsed]:
+        """
+        Yields users from the JupyterHub API a page at a time, so only a single page is held in memory.
+        Hubs which pre-date pagination (JupyterHub < 2.0) return every user in the first response
+        :param state: (Optional) filter users server-side by server state, one of "active", "inactive" or
+        "ready". Requires JupyterHub 2.0+
+        """
+        params = {"offset": 0, "limit": USERS_PAGE_SIZE}
+        if state:
+            params["state"] = state
+
+        while True:
+            result = self._request(
+                "GET",
+                endpoint,
+                auth_token,
+                "/hub/api/users",
+                USERS_PAGE_TIMEOUT,
+                params=params,
+                extra_headers=PAGINATION_HEADERS,
+            )
+            if result.status_code == 204:
+                return
+            if result.status_code != 200:
+                raise RuntimeError(f"Failed to get users error was:\n{result.text}")
+
+            page = result.json()
+            if isinstance(page, list):
+                # Pagination is not supported, so the whole list has been returned
+                yield from self._pack_users(page)
+                return
+
+            yield from self._pack_users(page["items"])
+            next_page = page.get("_pagination", {}).get("next")
+            if not next_page:
+                return
+            params = {**params, "offset": next_page["offset"]}
 
     def delete_users(self, endpoint: str, auth_token: str, users: JupyterUsers) -> None:
         """
         Removes the given user(s) from the JupyterHub API
         """
-        user_list = self._get_user_list(users)
-        for user in user_list:
-            self._delete_single_user(endpoint, auth_token, user)
+        self._run_batch(
+            users, lambda user: self._delete_single_user(endpoint, auth_token, user)
+        )
 
     def _delete_single_user(self, endpoint: str, auth_token: str, user: str):
-        result = requests.delete(
-            url=API_ENDPOINTS[endpoint] + f"/hub/api/users/{user}",
-            headers={"Authorization": f"token {auth_token}"},
-            timeout=300,
+        result = self._request(
+            "DELETE", endpoint, auth_token, f"/hub/api/users/{user}", 300
         )
 
         if result.status_code != 204:
@@ -63,15 +207,13 @@ class UserApi:
         """
         Creates the given user(s) from the JupyterHub API
         """
-        user_list = self._get_user_list(users)
-        for user in user_list:
-            self._create_single_user(endpoint, auth_token, user)
+        self._run_batch(
+            users, lambda user: self._create_single_user(endpoint, auth_token, user)
+        )
 
     def _create_single_user(self, endpoint: str, auth_token: str, user: str):
-        result = requests.post(
-            url=API_ENDPOINTS[endpoint] + f"/hub/api/users/{user}",
-            headers={"Authorization": f"token {auth_token}"},
-            timeout=60,
+        result = self._request(
+            "POST", endpoint, auth_token, f"/hub/api/users/{user}", 60
         )
 
         if result.status_code != 201:
@@ -83,15 +225,13 @@ class UserApi:
         """
         Starts servers for the given user(s) from the JupyterHub API
         """
-        user_list = self._get_user_list(users)
-        for user in user_list:
-            self._start_single_server(endpoint, auth_token, user)
+        self._run_batch(
+            users, lambda user: self._start_single_server(endpoint, auth_token, user)
+        )
 
     def _start_single_server(self, endpoint: str, auth_token: str, user: str):
-        result = requests.post(
-            url=API_ENDPOINTS[endpoint] + f"/hub/api/users/{user}/server",
-            headers={"Authorization": f"token {auth_token}"},
-            timeout=60,
+        result = self._request(
+            "POST", endpoint, auth_token, f"/hub/api/users/{user}/server", 60
         )
 
         if result.status_code not in (201, 202):
@@ -103,15 +243,13 @@ class UserApi:
         """
         Stops servers for the given user(s) from the JupyterHub API
         """
-        user_list = self._get_user_list(users)
-        for user in user_list:
-            self._stop_single_server(endpoint, auth_token, user)
+        self._run_batch(
+            users, lambda user: self._stop_single_server(endpoint, auth_token, user)
+        )
 
     def _stop_single_server(self, endpoint: str, auth_token: str, user: str):
-        result = requests.delete(
-            url=API_ENDPOINTS[endpoint] + f"/hub/api/users/{user}/server",
-            headers={"Authorization": f"token {auth_token}"},
-            timeout=60,
+        result = self._request(
+            "DELETE", endpoint, auth_token, f"/hub/api/users/{user}/server", 60
         )
 
         if result.status_code not in (202, 204):
@@ -136,30 +274,27 @@ class UserApi:
         return user_list
 
     @staticmethod
-    def _pack_users(users: List[Dict]) -> List[JupyterLastUsed]:
+    def _parse_timestamp(value: str) -> datetime:
+        """
+        Parses a JupyterHub timestamp. JupyterHub always sends ISO 8601 in UTC with a trailing Z,
+        which datetime.fromisoformat handles far faster than dateutil once the Z is replaced.
+        Anything else falls back to dateutil
+        """
+        if value.endswith("Z"):
+            try:
+                return datetime.fromisoformat(value[:-1] + "+00:00")
+            except ValueError:
+                pass
+        return parser.parse(value)
+
+    def _pack_users(self, users: List[Dict]) -> List[JupyterLastUsed]:
         """
         Deserializes the JSON into a bespoke struct for easier processing
         """
         to_return = []
         for user in users:
-            last_used = parser.parse(
+            last_used = self._parse_timestamp(
                 user["last_activity"] if user["last_activity"] else user["created"]
             )
             to_return.append((user["name"], last_used))
         return to_return
-
-    def _filter_inactive(
-        self, users: List[JupyterLastUsed], threshold: relativedelta
-    ) -> List[JupyterLastUsed]:
-        """
-        Filters inactive users from the list of all users
-        """
-        return [user for user in users if self._is_inactive(user, threshold)]
-
-    @staticmethod
-    def _is_inactive(user: JupyterLastUsed, threshold: relativedelta) -> bool:
-        """
-        Test if a user is inactive after a given length of time
-        """
-        # Force UTC timezone
-        return user[1] < pytz.utc.localize(datetime.now() - threshold)
@@ -0,0 +1,419 @@
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Prometheus' default histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# path segments which identify a single resource - UUIDs, keystone's 32 character hex IDs and integers
+_ID_SEGMENT = re.compile(
+    r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32}|\d+)$",
+    re.IGNORECASE,
+)
+
+# (service type, HTTP method, endpoint)
+EndpointKey = Tuple[str, str, str]
+
+# attribute set on an instrumented session, holding the accountings which count every request made through it
+_SESSION_ACCOUNTINGS = "_api_call_accountings"
+
+# accountings which count requests made in the current context (i.e. thread) only - see ApiCallAccounting.counting
+_CONTEXT_ACCOUNTINGS: ContextVar[Tuple["ApiCallAccounting", ...]] = ContextVar(
+    "api_call_accountings", default=()
+)
+_INSTRUMENT_LOCK = threading.Lock()
+
+
+def normalise_endpoint(url: str) -> str:
+    """
+    Returns the path of a request URL with resource IDs replaced by {id}, so requests for different
+    resources of the same kind are counted together - e.g. GET /servers/{id} made once per server
+    :param url: The URL, or path relative to the service endpoint, requested
+    """
+    path = urlparse(url).path or "/"
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")
+    )
+
+
+def _escape_label(value: str) -> str:
+    """
+    Escapes a Prometheus label value - backslashes, double quotes and newlines must be escaped
+    :param value: The label value, e.g. an endpoint path, which may contain any characters
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# (name, type, help) of each metric family written, in the order written
+_METRIC_FAMILIES = (
+    ("openstack_api_requests_total", "counter", "Openstack API requests made"),
+    (
+        "openstack_api_request_duration_seconds",
+        "histogram",
+        "Openstack API request latency",
+    ),
+    (
+        "openstack_api_request_bytes_total",
+        "counter",
+        "Bytes sent in Openstack API request bodies",
+    ),
+    (
+        "openstack_api_response_bytes_total",
+        "counter",
+        "Bytes received in Openstack API response bodies",
+    ),
+)
+
+
+def _parse_samples(text: str) -> Dict[str, float]:
+    """
+    Reads the samples of a Prometheus textfile, keyed by metric name and labels
+    :param text: The contents of the file, as written by ApiCallAccounting.to_prometheus
+    """
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def _format_samples(samples: Dict[str, float]) -> str:
+    """
+    Writes samples in the Prometheus text exposition format, grouped by metric family
+    :param samples: Sample values keyed by metric name and labels, see _parse_samples
+    """
+    lines = []
+    for family, metric_type, description in _METRIC_FAMILIES:
+        names = (
+            {f"{family}_bucket", f"{family}_sum", f"{family}_count"}
+            if metric_type == "histogram"
+            else {family}
+        )
+        lines += [f"# HELP {family} {description}", f"# TYPE {family} {metric_type}"]
+        for key, value in samples.items():
+            if key.split("{", 1)[0] in names:
+                lines.append(
+                    f"{key} {int(value) if float(value).is_integer() else value}"
+                )
+    return "\n".join(lines + [""])
+
+
+class _EndpointStats:
+    """
+    Counters for the requests made to a single endpoint
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def add(
+        self, seconds: float, status: str, bytes_sent: int, bytes_received: int
+    ) -> None:
+        self.requests += 1
+        self.seconds += seconds
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        if bucket < len(LATENCY_BUCKETS):
+            self.bucket_counts[bucket] += 1
+        self.statuses[status] += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+
+    def cumulative_buckets(self) -> Dict[str, int]:
+        """
+        Returns the number of requests taking at most each bucket's upper bound, as Prometheus histograms do
+        """
+        buckets = {}
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            total += count
+            buckets[str(bound)] = total
+        buckets["+Inf"] = self.requests
+        return buckets
+
+
+def _request_size(kwargs: Dict[str, Any]) -> int:
+    """
+    Returns the size in bytes of a request body, as given to keystoneauth
+    :param kwargs: kwargs given to Session.request
+    """
+    if kwargs.get("json") is not None:
+        return len(json.dumps(kwargs["json"]).encode())
+    data = kwargs.get("data")
+    if isinstance(data, str):
+        return len(data.encode())
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return 0
+
+
+def _response_size(response) -> int:
+    """
+    Returns the size in bytes of a response body - streamed bodies (e.g. image downloads) are not read,
+    so only counted if the server gave a Content-Length
+    :param response: A requests Response, or None if no response was received
+    """
+    if response is None:
+        return 0
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        return int(content_length)
+    if getattr(response, "_content_consumed", False):
+        return len(response.content or b"")
+    return 0
+
+
+def _instrument_session(session) -> List["ApiCallAccounting"]:
+    """
+    Wraps the request method of a keystoneauth session so every request made through it is counted, by the
+    accountings instrumenting the session and those counting in the current context. The session is only
+    wrapped once, however many accountings count it
+    :param session: A keystoneauth1 Session
+    :return: The list of accountings which count every request made through the session
+    """
+    with _INSTRUMENT_LOCK:
+        accountings = vars(session).get(_SESSION_ACCOUNTINGS)
+        if accountings is None:
+            accountings = []
+            session.request = _counted(session.request, accountings)
+            setattr(session, _SESSION_ACCOUNTINGS, accountings)
+        return accountings
+
+
+def _counted(request, accountings: List["ApiCallAccounting"]):
+    """
+    Returns a keystoneauth Session.request method which counts each request
+    :param request: The session's request method to wrap
+    :param accountings: The accountings which count every request, as well as those counting in the current context
+    """
+
+    def _counted_request(url, method, **kwargs):
+        service = (kwargs.get("endpoint_filter") or {}).get("service_type", "unknown")
+        status = "error"
+        response = None
+        start = time.perf_counter()
+        try:
+            response = request(url, method, **kwargs)
+            status = str(response.status_code)
+            return response
+        except Exception as err:
+            # keystoneauth raises HttpErrors for error statuses unless raise_exc is False
+            status = str(getattr(err, "http_status", None) or "error")
+            response = getattr(err, "response", None)
+            raise
+        finally:
+            counted = (
+                time.perf_counter() - start,
+                status,
+                _request_size(kwargs),
+                _response_size(response),
+            )
+            # an accounting both instrumenting the session and counting in this context counts once
+            for accounting in dict.fromkeys(
+                accountings + list(_CONTEXT_ACCOUNTINGS.get())
+            ):
+                accounting.record(service, method, url, *counted)
+
+    return _counted_request
+
+
+class ApiCallAccounting:
+    """
+    Counts the HTTP requests made through one or more keystoneauth sessions - requests, latency histograms,
+    bytes sent and received, and status codes per service, method and endpoint. Used to find actions which
+    make a request per resource (N+1 patterns) rather than listing them.
+    Counters can be read with to_dict(), or written to a file in the Prometheus textfile format
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[EndpointKey, _EndpointStats] = defaultdict(_EndpointStats)
+        # samples already added to the metrics file, see write_textfile
+        self._write_lock = threading.Lock()
+        self._written: Dict[str, float] = {}
+
+    def instrument(self, session) -> None:
+        """
+        Counts every request made through a keystoneauth session, by whichever thread.
+        Requests made through openstacksdk proxies all pass through the session of the connection
+        :param session: A keystoneauth1 Session, e.g. openstack.connection.Connection.session
+        """
+        accountings = _instrument_session(session)
+        if self not in accountings:
+            accountings.append(self)
+
+    @contextmanager
+    def counting(self, session) -> Iterator[None]:
+        """
+        Context manager which counts requests made through a keystoneauth session by the current thread while
+        inside it - so a session shared by concurrent callers, e.g. a pooled connection, can be counted per caller
+        :param session: A keystoneauth1 Session, e.g. openstack.connection.Connection.session
+        """
+        _instrument_session(session)
+        token = _CONTEXT_ACCOUNTINGS.set(_CONTEXT_ACCOUNTINGS.get() + (self,))
+        try:
+            yield
+        finally:
+            _CONTEXT_ACCOUNTINGS.reset(token)
+
+    # one argument per field of the request counted - grouping them would add an object to build per request
+    # pylint:disable=too-many-arguments
+    def record(
+        self,
+        service: str,
+        method: str,
+        url: str,
+        seconds: float,
+        status: str,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ) -> None:
+        """
+        Counts a single request
+        :param service: The service type the request was made to, e.g. compute
+        :param method: The HTTP method used
+        :param url: The URL or path requested
+        :param seconds: How long the request took
+        :param status: The HTTP status code returned, or "error" if no response was received
+        :param bytes_sent: The size of the request body
+        :param bytes_received: The size of the response body
+        """
+        key = (service, method.upper(), normalise_endpoint(url))
+        with self._lock:
+            self._endpoints[key].add(seconds, status, bytes_sent, bytes_received)
+
+    @property
+    def total_requests(self) -> int:
+        """
+        Returns the number of requests counted across all endpoints
+        """
+        with self._lock:
+            return sum(stats.requests for stats in self._endpoints.values())
+
+    def by_service(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the number of requests and total time spent in them per service
+        """
+        services = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        with self._lock:
+            for (service, _, _), stats in self._endpoints.items():
+                services[service]["calls"] += stats.requests
+                services[service]["seconds"] += stats.seconds
+        return dict(services)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns counters per endpoint, keyed by "<service> <method> <endpoint>"
+        """
+        with self._lock:
+            return {
+                f"{service} {method} {endpoint}": {
+                    "requests": stats.requests,
+                    "seconds": round(stats.seconds, 6),
+                    "latency_buckets": stats.cumulative_buckets(),
+                    "statuses": dict(stats.statuses),
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                }
+                for (service, method, endpoint), stats in sorted(
+                    self._endpoints.items()
+                )
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the counters in the Prometheus text exposition format
+        """
+        return _format_samples(self._samples())
+
+    def _samples(self) -> Dict[str, float]:
+        """
+        Returns the value of every Prometheus sample, keyed by metric name and labels
+        """
+        samples = {}
+        with self._lock:
+            for (service, method, endpoint), stats in sorted(self._endpoints.items()):
+                labels = (
+                    f'service="{_escape_label(service)}",method="{_escape_label(method)}",'
+                    f'endpoint="{_escape_label(endpoint)}"'
+                )
+                for status, count in sorted(stats.statuses.items()):
+                    samples[
+                        f'openstack_api_requests_total{{{labels},status="{_escape_label(status)}"}}'
+                    ] = count
+                for bound, count in stats.cumulative_buckets().items():
+                    samples[
+                        f'openstack_api_request_duration_seconds_bucket{{{labels},le="{bound}"}}'
+                    ] = count
+                samples[f"openstack_api_request_duration_seconds_sum{{{labels}}}"] = (
+                    stats.seconds
+                )
+                samples[f"openstack_api_request_duration_seconds_count{{{labels}}}"] = (
+                    stats.requests
+                )
+                samples[f"openstack_api_request_bytes_total{{{labels}}}"] = (
+                    stats.bytes_sent
+                )
+                samples[f"openstack_api_response_bytes_total{{{labels}}}"] = (
+                    stats.bytes_received
+                )
+        return samples
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Adds the counters to a file in the Prometheus textfile format, e.g. for node_exporter's textfile
+        collector. Every process writing to the file adds what it counted since it last wrote, so the file
+        holds the totals for all of them. The file is locked while it is updated, and replaced atomically so
+        it is never read half written
+        :param path: The file to write
+        """
+        with self._write_lock:
+            samples = self._samples()
+            with open(f"{path}.lock", "w", encoding="utf-8") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    with open(path, encoding="utf-8") as file:
+                        totals = _parse_samples(file.read())
+                except FileNotFoundError:
+                    totals = {}
+                for key, value in samples.items():
+                    totals[key] = totals.get(key, 0) + value - self._written.get(key, 0)
+
+                directory = os.path.dirname(os.path.abspath(path))
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=directory, suffix=".tmp", delete=False
+                ) as file:
+                    file.write(_format_samples(totals))
+                os.replace(file.name, path)
+            self._written = samples
+
+
+_DEFAULT_ACCOUNTING: Optional[ApiCallAccounting] = None
+_DEFAULT_ACCOUNTING_LOCK = threading.Lock()
+
+
+def default_accounting() -> ApiCallAccounting:
+    """
+    Returns the ApiCallAccounting shared by every connection in this process which writes to a metrics file,
+    so the file holds the totals for the whole process rather than the last connection
+    """
+    global _DEFAULT_ACCOUNTING  # pylint:disable=global-statement
+    with _DEFAULT_ACCOUNTING_LOCK:
+        if _DEFAULT_ACCOUNTING is None:
+            _DEFAULT_ACCOUNTING = ApiCallAccounting()
+        return _DEFAULT_ACCOUNTING
@@ -1,7 +1,27 @@
-import openstack.connection
-from openstack import connect
+import os
+from typing import TYPE_CHECKING, Optional
 
 from exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from openstack_api.api_call_accounting import ApiCallAccounting, default_accounting
+
+if TYPE_CHECKING:
+    import openstack.connection
+
+# If set, every connection counts the requests it makes and adds them to the totals in this file
+# in the Prometheus textfile format when it closes
+METRICS_FILE_ENV = "OPENSTACK_API_METRICS_FILE"
+
+
+def connect(**kwargs) -> "openstack.connection.Connection":
+    """
+    Connects to Openstack with openstacksdk, which is imported on first use rather than when actions are
+    loaded, as importing it takes a few hundred milliseconds
+    :param kwargs: kwargs to pass to openstack.connect
+    """
+    # pylint:disable=import-outside-toplevel
+    import openstack
+
+    return openstack.connect(**kwargs)
 
 
 class OpenstackConnection:
@@ -10,17 +30,31 @@ class OpenstackConnection:
     This class is used as follows:
         with(OpenstackConnection()) as <name>:
             name.<openstack_API>.method()
+    Requests made through the connection can be counted by passing an ApiCallAccounting, which is then
+    available from the accounting attribute
     """
 
-    def __init__(self, cloud_name: str):
+    def __init__(
+        self,
+        cloud_name: str,
+        accounting: Optional[ApiCallAccounting] = None,
+        metrics_file: Optional[str] = None,
+    ):
         """
         Starts a connection with the Openstack API when used in a context manager
         :param cloud_name: The name of the cloud found in clouds.yaml
+        :param accounting: An Optional ApiCallAccounting to count requests made through the connection in
+        :param metrics_file: An Optional file to write request counters to in the Prometheus textfile format
+        when the connection closes - defaults to the OPENSTACK_API_METRICS_FILE environment variable
         """
         self._cloud_name = cloud_name.strip() if cloud_name else None
         self._connection = None
+        self._metrics_file = metrics_file or os.environ.get(METRICS_FILE_ENV)
+        if self._metrics_file and not accounting:
+            accounting = default_accounting()
+        self.accounting = accounting
 
-    def __enter__(self) -> openstack.connection.Connection:
+    def __enter__(self) -> "openstack.connection.Connection":
         if not self._cloud_name:
             # If we don't provide a cloud name (or an empty one), Openstack will
             # default to env vars, which may be a security problem if they are incorrectly set
@@ -28,8 +62,12 @@ class OpenstackConnection:
                 "A cloud name is required but was not provided."
             )
         self._connection = connect(cloud=self._cloud_name)
+        if self.accounting:
+            self.accounting.instrument(self._connection.session)
         return self._connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._connection.close()
         self._connection = None
+        if self._metrics_file:
+            self.accounting.write_textfile(self._metrics_file)
@@ -0,0 +1,80 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from openstack_api.api_call_accounting import ApiCallAccounting
+from openstack_api.openstack_connection import connect
+
+if TYPE_CHECKING:
+    import openstack.connection
+
+
+class OpenstackConnectionPool:
+    """
+    Keeps one authenticated connection per cloud open, for long-lived processes such as the query daemon
+    which would otherwise authenticate again for every query. keystoneauth re-authenticates a connection
+    when its token is about to expire, so connections can be kept for the life of the process.
+    Actions run once should use OpenstackConnection, which closes its connection on exit.
+    This class is used as follows:
+        pool = OpenstackConnectionPool()
+        OpenstackServer(pool.connection_cls)
+    """
+
+    def __init__(self, accounting: Optional[ApiCallAccounting] = None):
+        """
+        :param accounting: An Optional ApiCallAccounting to count requests made through pooled connections in
+        """
+        self.accounting = accounting
+        self._lock = threading.Lock()
+        self._connections: Dict[str, "openstack.connection.Connection"] = {}
+
+    def get(self, cloud_name: str) -> "openstack.connection.Connection":
+        """
+        Returns the connection to a cloud, connecting on first use
+        :param cloud_name: The name of the cloud found in clouds.yaml
+        """
+        cloud_name = cloud_name.strip() if cloud_name else None
+        if not cloud_name:
+            # as OpenstackConnection, an empty name would connect with environment variables
+            raise MissingMandatoryParamError(
+                "A cloud name is required but was not provided."
+            )
+        with self._lock:
+            if cloud_name not in self._connections:
+                connection = connect(cloud=cloud_name)
+                if self.accounting:
+                    self.accounting.instrument(connection.session)
+                self._connections[cloud_name] = connection
+            return self._connections[cloud_name]
+
+    def connection_cls(self, cloud_name: str) -> "_PooledConnection":
+        """
+        Can be passed as connection_cls in place of OpenstackConnection, to use pooled connections
+        :param cloud_name: The name of the cloud found in clouds.yaml
+        """
+        return _PooledConnection(self, cloud_name)
+
+    def close(self) -> None:
+        """
+        Closes every pooled connection
+        """
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+
+class _PooledConnection:
+    """
+    Context manager giving a pooled connection, which is left open on exit
+    """
+
+    def __init__(self, pool: OpenstackConnectionPool, cloud_name: str):
+        self._pool = pool
+        self._cloud_name = cloud_name
+
+    def __enter__(self) -> "openstack.connection.Connection":
+        return self._pool.get(self._cloud_name)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
@@ -1,4 +1,5 @@
 import datetime
+from bisect import bisect_right
 from typing import Any, Callable, Dict, List
 
 import openstack
@@ -94,6 +95,33 @@ class OpenstackQuery(OpenstackWrapperBase):
         """
         return [item for item in items if query_func(item)]
 
+    def age_histogram(
+        self,
+        items: List,
+        prop: str,
+        bin_edges_days: List[int],
+        date_time_format: str = "%Y-%m-%dT%H:%M:%SZ",
+    ) -> List[int]:
+        """
+        Counts items by age, e.g. bin_edges_days=[0, 30, 90] counts items up to 30 days old
+        and items between 30 and 90 days old
+        :param items: List of items to count e.g. list of servers
+        :param prop: Timestamp property of the items e.g. created_at
+        :param bin_edges_days: Increasing ages in days marking the edges of each bin
+        :param date_time_format: date-time format of the property
+        :return: Number of items in each bin
+        """
+        now = datetime.datetime.now()
+        counts = [0] * (len(bin_edges_days) - 1)
+        for item in items:
+            if item[prop] is None:
+                continue
+            age = now - datetime.datetime.strptime(item[prop], date_time_format)
+            position = bisect_right(bin_edges_days, age.total_seconds() / 86400) - 1
+            if 0 <= position < len(counts):
+                counts[position] += 1
+        return counts
+
     def apply_queries(
         self, items: List, query_funcs: List[Callable[[Any], bool]]
     ) -> List:
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+from openstack.block_storage.v3.snapshot import Snapshot
+
+from openstack_api.openstack_wrapper_base import OpenstackWrapperBase
+
+# Cinder returns timestamps with or without fractional seconds depending on release
+SNAPSHOT_DATETIME_FORMATS = ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S")
+
+
+# pylint: disable=too-few-public-methods
+class OpenstackVolumeSnapshot(OpenstackWrapperBase):
+    @staticmethod
+    def _parse_timestamp(value: str) -> datetime:
+        """
+        Parses a Cinder timestamp into a naive UTC datetime
+        :param value: The timestamp string returned by the API
+        """
+        for date_time_format in SNAPSHOT_DATETIME_FORMATS:
+            try:
+                return datetime.strptime(value.rstrip("Z"), date_time_format)
+            except ValueError:
+                continue
+        raise ValueError(f"Unrecognised snapshot timestamp '{value}'")
+
+    @staticmethod
+    def _last_changed(snapshot: Snapshot) -> str:
+        """
+        Returns the timestamp a snapshot was last changed, falling back to its creation time
+        :param snapshot: The snapshot to inspect
+        """
+        return snapshot["updated_at"] or snapshot["created_at"]
+
+    def find_stale_snapshots(
+        self, cloud_account: str, days: int, project_id: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Yields ticket entries for volume snapshots which have not changed for a given number of days.
+        Snapshots are listed cloud-wide in a single paginated call and joined against a single project listing,
+        so the number of API calls does not grow with the number of projects or stale snapshots.
+        :param cloud_account: The associated clouds.yaml account
+        :param days: The number of days a snapshot must be unchanged for to be reported
+        :param project_id: (Optional) restricts the check to a single project ID
+        :return: Entries in the {"dataTitle": ..., "dataBody": ...} format used by create_ticket
+        """
+        threshold = datetime.utcnow() - timedelta(days=days)
+        query = {"project_id": project_id} if project_id else {}
+
+        with self._connection_cls(cloud_account) as conn:
+            project_names = {
+                project["id"]: project["name"] for project in conn.identity.projects()
+            }
+            for snapshot in conn.block_storage.snapshots(
+                details=True, all_projects=True, **query
+            ):
+                last_changed = self._last_changed(snapshot)
+                if self._parse_timestamp(last_changed) >= threshold:
+                    continue
+
+                snapshot_project = snapshot["project_id"]
+                yield {
+                    "dataTitle": {
+                        "name": project_names.get(snapshot_project, snapshot_project)
+                    },
+                    "dataBody": {
+                        "name": snapshot["name"],
+                        "id": snapshot["id"],
+                        "updated": last_changed,
+                        "project_id": snapshot_project,
+                    },
+                }
@@ -0,0 +1,142 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from enums.query.props.prop_enum import PropEnum
+from enums.query.query_aggregations import QueryAggregations
+from openstack_query.handlers.prop_handler import PropHandler
+from structs.query.query_aggregate_details import QueryAggregateDetails
+from custom_types.openstack_query.aliases import OpenstackResourceObj
+
+
+# pylint: disable=too-few-public-methods
+class _GroupAccumulator:
+    """
+    Running totals for a single group. Only counts, running sums/minimums/maximums and a Counter per
+    TOP_K property are kept, never the resources themselves
+    """
+
+    def __init__(self, aggregations: List[QueryAggregateDetails]):
+        self.count = 0
+        self.sums: Dict[PropEnum, Any] = {}
+        self.mins: Dict[PropEnum, Any] = {}
+        self.maxs: Dict[PropEnum, Any] = {}
+        self.counters: Dict[PropEnum, Counter] = {
+            details.prop: Counter()
+            for details in aggregations
+            if details.aggregation == QueryAggregations.TOP_K
+        }
+
+
+class QueryAggregator:
+    """
+    Helper class which streams openstack resources through per-group accumulators
+    to calculate counts, sums, minimums, maximums and most common values of properties
+    """
+
+    def __init__(
+        self,
+        prop_handler: PropHandler,
+        aggregations: List[QueryAggregateDetails],
+        group_by: Optional[PropEnum] = None,
+    ):
+        self._prop_handler = prop_handler
+        self._aggregations = aggregations
+        self._group_by = group_by
+        self._groups: Dict[str, _GroupAccumulator] = {}
+
+    def _get_raw_prop(self, item: OpenstackResourceObj, prop: PropEnum) -> Any:
+        """
+        Gets the value of a property without converting it to a string, so it can be summed or compared.
+        Returns None if the property does not exist for the given resource
+        :param item: An openstack resource object
+        :param prop: A prop Enum which represents the property we want to get
+        """
+        prop_func = self._prop_handler.get_prop_func(prop)
+        try:
+            return prop_func(item)
+        except AttributeError:
+            return None
+
+    def add(self, item: OpenstackResourceObj) -> None:
+        """
+        Adds a single openstack resource to the accumulator of its group
+        :param item: An openstack resource object
+        """
+        key = (
+            self._prop_handler.get_prop(item, self._group_by, default_out="Not Found")
+            if self._group_by
+            else None
+        )
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _GroupAccumulator(self._aggregations)
+        group.count += 1
+
+        for details in self._aggregations:
+            if details.aggregation == QueryAggregations.COUNT:
+                continue
+            val = self._get_raw_prop(item, details.prop)
+            if val is None:
+                continue
+            if details.aggregation == QueryAggregations.TOP_K:
+                group.counters[details.prop][val] += 1
+            elif details.aggregation == QueryAggregations.SUM:
+                group.sums[details.prop] = group.sums.get(details.prop, 0) + val
+            elif details.aggregation == QueryAggregations.MIN:
+                current = group.mins.get(details.prop)
+                group.mins[details.prop] = val if current is None else min(current, val)
+            elif details.aggregation == QueryAggregations.MAX:
+                current = group.maxs.get(details.prop)
+                group.maxs[details.prop] = val if current is None else max(current, val)
+
+    def add_all(self, items: Iterable[OpenstackResourceObj]) -> None:
+        """
+        Adds every openstack resource given to the accumulators
+        :param items: openstack resource objects
+        """
+        for item in items:
+            self.add(item)
+
+    def _aggregate_value(
+        self, group: _GroupAccumulator, details: QueryAggregateDetails
+    ) -> Tuple[str, Any]:
+        """
+        Returns the output column name and value of one aggregation for a group
+        :param group: accumulator of the group
+        :param details: the aggregation to output
+        """
+        if details.aggregation == QueryAggregations.COUNT:
+            return "count", group.count
+
+        prop_name = details.prop.name.lower()
+        if details.aggregation == QueryAggregations.TOP_K:
+            return (
+                f"top_{details.k}_{prop_name}",
+                group.counters[details.prop].most_common(details.k),
+            )
+        totals = {
+            QueryAggregations.SUM: group.sums,
+            QueryAggregations.MIN: group.mins,
+            QueryAggregations.MAX: group.maxs,
+        }[details.aggregation]
+        return f"{details.aggregation.name.lower()}_{prop_name}", totals.get(
+            details.prop, "Not Found"
+        )
+
+    def results(self) -> List[Dict[str, Any]]:
+        """
+        Returns a dictionary per group, holding the group value (if grouping) and each aggregation,
+        e.g. [{'server_status': 'ACTIVE', 'count': 10}, {'server_status': 'SHUTOFF', 'count': 2}]
+        """
+        groups = self._groups
+        if not groups and not self._group_by:
+            # without grouping there is always one row, even if there were no resources
+            groups = {None: _GroupAccumulator(self._aggregations)}
+        results = []
+        for key, group in groups.items():
+            row = {self._group_by.name.lower(): key} if self._group_by else {}
+            row.update(
+                self._aggregate_value(group, details) for details in self._aggregations
+            )
+            results.append(row)
+        return results
@@ -0,0 +1,126 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from custom_types.openstack_query.aliases import OpenstackResourceObj, PropFunc
+
+if TYPE_CHECKING:
+    import numpy
+
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """
+    Imports NumPy the first time a vectorised filter needs it, rather than with every query module - it takes
+    tens of milliseconds to import. Returns None if it isn't installed
+    """
+    try:
+        # pylint:disable=import-outside-toplevel,redefined-outer-name
+        import numpy
+    except ImportError:  # pragma: no cover
+        # NumPy is optional, queries fall back to calling filter functions per resource without it
+        return None
+    return numpy
+
+
+def numpy_available() -> bool:
+    """
+    Returns True if NumPy is installed, so vectorised filters can be used
+    """
+    return _load_numpy() is not None
+
+
+def to_column(
+    items: List[OpenstackResourceObj], prop_func: PropFunc
+) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+    """
+    Gets a property of every resource as a NumPy object array, along with a boolean array which is False
+    where the property could not be found - matching ClientSideHandler._filter_func_wrapper
+    :param items: openstack resources to get the property from
+    :param prop_func: function to get the property from a single resource
+    """
+    numpy = _load_numpy()
+    values = []
+    present = []
+    for item in items:
+        try:
+            values.append(prop_func(item))
+            present.append(True)
+        except AttributeError:
+            values.append(None)
+            present.append(False)
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = values
+    return column, numpy.array(present, dtype=bool)
+
+
+def to_categorical(
+    column: "numpy.ndarray",
+) -> Optional[Tuple[Dict[Any, int], "numpy.ndarray"]]:
+    """
+    Encodes a column as integer codes, one per distinct value, so that equality and set membership
+    become integer comparisons. Returns None if the values cannot be hashed
+    :param column: column of property values
+    """
+    numpy = _load_numpy()
+    categories: Dict[Any, int] = {}
+    try:
+        codes = numpy.fromiter(
+            (categories.setdefault(val, len(categories)) for val in column),
+            dtype=numpy.int64,
+            count=len(column),
+        )
+    except TypeError:
+        return None
+    return categories, codes
+
+
+def isin_mask(column: "numpy.ndarray", values: List[Any]) -> Optional["numpy.ndarray"]:
+    """
+    Returns a boolean array which is True where the column value is one of the given values,
+    using integer codes rather than comparing objects. Returns None if the values cannot be hashed
+    :param column: column of property values
+    :param values: values to look for
+    """
+    numpy = _load_numpy()
+    encoded = to_categorical(column)
+    if encoded is None:
+        return None
+    categories, codes = encoded
+    try:
+        wanted = [categories[val] for val in values if val in categories]
+    except TypeError:
+        return None
+    return numpy.isin(codes, wanted)
+
+
+def to_datetime64(column: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Parses a column of "%Y-%m-%dT%H:%M:%SZ" timestamps into naive datetime64 seconds in one pass,
+    missing values become NaT which compares False with everything
+    :param column: column of timestamp strings
+    """
+    numpy = _load_numpy()
+    # pylint: disable=no-member
+    strings = numpy.where(numpy.equal(column, None), "NaT", column).astype(str)
+    return numpy.char.rstrip(strings, "Z").astype("datetime64[s]")
+
+
+def to_float(column: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Converts a column of numbers to floats, missing values become NaN which compares False with everything
+    :param column: column of numeric values
+    """
+    numpy = _load_numpy()
+    # pylint: disable=no-member
+    return numpy.where(numpy.equal(column, None), numpy.nan, column).astype(float)
+
+
+def datetime64_scalar(value: datetime) -> "numpy.datetime64":
+    """
+    Converts a naive datetime into a datetime64 to compare against a column from to_datetime64,
+    keeping microseconds so comparisons match comparing timestamps
+    :param value: datetime to convert
+    """
+    numpy = _load_numpy()
+    return numpy.datetime64(value, "us")
@@ -1,12 +1,14 @@
 import inspect
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, Union, get_args, get_origin
 
 from openstack_query.handlers.handler_base import HandlerBase
+from openstack_query.columnar import numpy_available, to_column
 from custom_types.openstack_query.aliases import (
     FilterFunc,
     PresetPropMappings,
     ClientSideFilterFunc,
     PropFunc,
+    VectorisedFilterFunc,
     FilterParams,
     OpenstackResourceObj,
 )
@@ -25,6 +27,8 @@ class ClientSideHandler(HandlerBase):
 
     def __init__(self, filter_func_mappings: PresetPropMappings):
         self._filter_function_mappings = filter_func_mappings
+        # subclasses may map presets to functions which evaluate a whole column of property values at once
+        self._vectorised_functions = {}
 
     def check_supported(self, preset: QueryPresets, prop: PropEnum) -> bool:
         """
@@ -88,10 +92,63 @@ class ClientSideHandler(HandlerBase):
                 f"Preset Argument Error: failed to build filter_function for preset '{preset.name}', reason: {reason}"
             )
 
+        if filter_func_kwargs:
+            filter_func_kwargs = self._compile_filter_func_kwargs(
+                preset, filter_func_kwargs
+            )
+
         return lambda resource: self._filter_func_wrapper(
             resource, filter_func, prop_func, filter_func_kwargs
         )
 
+    def get_vectorised_filter(
+        self,
+        preset: QueryPresets,
+        prop: PropEnum,
+        prop_func: PropFunc,
+        filter_func_kwargs: Optional[FilterParams] = None,
+    ) -> Optional[VectorisedFilterFunc]:
+        """
+        Method that returns a vectorised version of the filter function for a preset-property pair, which takes
+        a list of openstack resources and returns a NumPy boolean mask of those which pass. Returns None if NumPy
+        is not installed or the preset has no vectorised form - the filter function should be used instead.
+        Should be called after get_filter_func, which validates filter_func_kwargs
+        :param preset: A QueryPreset Enum for which a vectorised function mapping may exist for
+        :param prop: A property Enum for which a vectorised function mapping may exist for
+        :param prop_func: A function to get a property of an openstack resource when given it as input
+        :param filter_func_kwargs: A dictionary of keyword: argument pairs to pass into vectorised function
+        """
+        vectorised_func = self._vectorised_functions.get(preset, None)
+        if (
+            not numpy_available()
+            or not vectorised_func
+            or not self.check_supported(preset, prop)
+        ):
+            return None
+
+        def _vectorised_filter(items):
+            column, present = to_column(items, prop_func)
+            mask = vectorised_func(column, **(filter_func_kwargs or {}))
+            if mask is None:
+                return None
+            # resources without the property never pass, as in _filter_func_wrapper
+            return mask & present
+
+        return _vectorised_filter
+
+    def _compile_filter_func_kwargs(
+        self, preset: QueryPresets, filter_func_kwargs: FilterParams
+    ) -> FilterParams:
+        """
+        Method called once when a filter function is built, before it is run against every resource.
+        Subclasses can override this to turn validated kwargs into a form that is cheaper to evaluate
+        repeatedly (e.g. compiling a regex). By default, kwargs are passed through unchanged
+        :param preset: The QueryPreset Enum the filter function is being built for
+        :param filter_func_kwargs: The validated kwargs for the filter function
+        """
+        # pylint:disable=unused-argument
+        return filter_func_kwargs
+
     @staticmethod
     def _filter_func_wrapper(
         item: OpenstackResourceObj,
@@ -140,7 +197,11 @@ class ClientSideHandler(HandlerBase):
                 param_name = param.name
                 if param_name in func_kwargs:
                     kwargs_value = func_kwargs[param_name]
-                    param_type = param.annotation
+                    # check against the origin of generic annotations, e.g. list for List[str],
+                    # and any of the types in a Union
+                    param_type = get_origin(param.annotation) or param.annotation
+                    if param_type is Union:
+                        param_type = get_args(param.annotation)
                     if param_type != Any and not isinstance(kwargs_value, param_type):
                         return (
                             False,
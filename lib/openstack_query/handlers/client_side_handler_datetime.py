@@ -1,9 +1,11 @@
 from datetime import datetime
+from typing import Union
 
 from enums.query.query_presets import QueryPresetsDateTime
 
 from custom_types.openstack_query.aliases import PresetPropMappings
 
+from openstack_query.columnar import datetime64_scalar, to_datetime64
 from openstack_query.time_utils import TimeUtils
 from openstack_query.handlers.client_side_handler import ClientSideHandler
 
@@ -27,6 +29,39 @@ class ClientSideHandlerDateTime(ClientSideHandler):
             QueryPresetsDateTime.YOUNGER_THAN_OR_EQUAL_TO: self._prop_younger_than_or_equal_to,
         }
 
+        self._vectorised_functions = {
+            QueryPresetsDateTime.OLDER_THAN: lambda column, **kwargs: (
+                to_datetime64(column) > self._column_cutoff(**kwargs)
+            ),
+            QueryPresetsDateTime.YOUNGER_THAN: lambda column, **kwargs: (
+                to_datetime64(column) < self._column_cutoff(**kwargs)
+            ),
+            QueryPresetsDateTime.OLDER_THAN_OR_EQUAL_TO: lambda column, **kwargs: (
+                to_datetime64(column) >= self._column_cutoff(**kwargs)
+            ),
+            QueryPresetsDateTime.YOUNGER_THAN_OR_EQUAL_TO: lambda column, **kwargs: (
+                to_datetime64(column) <= self._column_cutoff(**kwargs)
+            ),
+        }
+
+    @staticmethod
+    def _column_cutoff(
+        days: int = 0, hours: int = 0, minutes: int = 0, seconds: Union[int, float] = 0
+    ):
+        """
+        Returns the time to compare a column of props against in vectorised functions. Props are naive
+        timestamps compared as local time by the filter functions, so the cutoff is converted the same way
+        :param days: (Optional) relative number of days since current time to compare against
+        :param hours: (Optional) relative number of hours since current time to compare against
+        :param minutes: (Optional) relative number of minutes since current time to compare against
+        :param seconds: (Optional) relative number of seconds since current time to compare against
+        """
+        return datetime64_scalar(
+            datetime.fromtimestamp(
+                TimeUtils.get_timestamp_in_seconds(days, hours, minutes, seconds)
+            )
+        )
+
     # pylint: disable=too-many-arguments
     def _prop_older_than(
         self,
@@ -34,7 +69,7 @@ class ClientSideHandlerDateTime(ClientSideHandler):
         days: int = 0,
         hours: int = 0,
         minutes: int = 0,
-        seconds: int = 0,
+        seconds: Union[int, float] = 0,
     ):
         """
         Filter function which returns True if property older than a relative amount of time since current time.
@@ -63,7 +98,7 @@ class ClientSideHandlerDateTime(ClientSideHandler):
         days: int = 0,
         hours: int = 0,
         minutes: int = 0,
-        seconds: int = 0,
+        seconds: Union[int, float] = 0,
     ):
         """
         Filter function which returns True if property younger than or equal to a relative amount of time since
@@ -87,7 +122,7 @@ class ClientSideHandlerDateTime(ClientSideHandler):
         days: int = 0,
         hours: int = 0,
         minutes: int = 0,
-        seconds: int = 0,
+        seconds: Union[int, float] = 0,
     ):
         """
         Filter function which returns True if property younger than a relative amount of time since current time
@@ -113,7 +148,7 @@ class ClientSideHandlerDateTime(ClientSideHandler):
         days: int = 0,
         hours: int = 0,
         minutes: int = 0,
-        seconds: int = 0,
+        seconds: Union[int, float] = 0,
     ):
         """
         Filter function which returns True if property older than or equal to a relative amount of time since current
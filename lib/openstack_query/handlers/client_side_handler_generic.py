@@ -2,6 +2,7 @@ from typing import Any
 from custom_types.openstack_query.aliases import PresetPropMappings
 
 from enums.query.query_presets import QueryPresetsGeneric
+from openstack_query.columnar import isin_mask
 from openstack_query.handlers.client_side_handler import ClientSideHandler
 
 # pylint: disable=too-few-public-methods
@@ -22,6 +23,11 @@ class ClientSideHandlerGeneric(ClientSideHandler):
             QueryPresetsGeneric.NOT_EQUAL_TO: self._prop_not_equal_to,
         }
 
+        self._vectorised_functions = {
+            QueryPresetsGeneric.EQUAL_TO: self._column_equal_to,
+            QueryPresetsGeneric.NOT_EQUAL_TO: self._column_not_equal_to,
+        }
+
     def _prop_not_equal_to(self, prop: Any, value: Any) -> bool:
         """
         Filter function which returns true if a prop is not equal to a given value
@@ -37,3 +43,21 @@ class ClientSideHandlerGeneric(ClientSideHandler):
         :param value: given value to check against
         """
         return prop == value
+
+    @staticmethod
+    def _column_equal_to(column, value: Any):
+        """
+        Vectorised function which returns a boolean mask of props equal to a given value
+        :param column: NumPy array of prop values to check against
+        :param value: given value to check against
+        """
+        return isin_mask(column, [value])
+
+    def _column_not_equal_to(self, column, value: Any):
+        """
+        Vectorised function which returns a boolean mask of props not equal to a given value
+        :param column: NumPy array of prop values to check against
+        :param value: given value to check against
+        """
+        mask = self._column_equal_to(column, value)
+        return None if mask is None else ~mask
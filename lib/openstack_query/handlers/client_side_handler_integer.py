@@ -2,6 +2,7 @@ from typing import Union
 from custom_types.openstack_query.aliases import PresetPropMappings
 
 from enums.query.query_presets import QueryPresetsInteger
+from openstack_query.columnar import to_float
 from openstack_query.handlers.client_side_handler import ClientSideHandler
 
 # pylint: disable=too-few-public-methods
@@ -24,6 +25,14 @@ class ClientSideHandlerInteger(ClientSideHandler):
             QueryPresetsInteger.LESS_THAN_OR_EQUAL_TO: self._prop_less_than_or_equal_to,
         }
 
+        # the filter functions only use comparison operators, so work on whole NumPy arrays as they are
+        self._vectorised_functions = {
+            preset: lambda column, filter_func=filter_func, **kwargs: filter_func(
+                to_float(column), **kwargs
+            )
+            for preset, filter_func in self._filter_functions.items()
+        }
+
     @staticmethod
     def _prop_less_than(prop: Union[int, float], value: Union[int, float]) -> bool:
         """
@@ -1,20 +1,89 @@
 import re
+from collections import defaultdict
 
-from typing import List, Any
-from custom_types.openstack_query.aliases import PresetPropMappings
+from typing import List, Any, Dict, Iterable, Iterator
+from custom_types.openstack_query.aliases import PresetPropMappings, FilterParams
 
 from enums.query.query_presets import QueryPresetsString
+from openstack_query.columnar import isin_mask
 from openstack_query.handlers.client_side_handler import ClientSideHandler
 from exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 
 # pylint: disable=too-few-public-methods
 
 
+def _group_by_length(values: Iterable[str]) -> Dict[int, frozenset]:
+    """
+    Groups strings into sets by length, so a string can be checked against all of them
+    with one set lookup per distinct length
+    :param values: strings to group
+    """
+    by_length = defaultdict(set)
+    for val in values:
+        by_length[len(val)].add(val)
+    return {length: frozenset(bucket) for length, bucket in by_length.items()}
+
+
+class _SnippetMatcher:
+    """
+    Matches a list of snippets against a string without scanning the string once per snippet.
+    A few snippets are searched for directly, larger lists are bucketed by length so each
+    window of the string costs one set lookup per distinct snippet length
+    """
+
+    # up to this many snippets, substring search per snippet is faster than windowed lookups
+    DIRECT_SEARCH_LIMIT = 16
+
+    def __init__(self, snippets: List[str], ignore_case: bool = False):
+        self._ignore_case = ignore_case
+        self._snippets = frozenset(self._key(snippet) for snippet in snippets)
+        self._by_length = _group_by_length(self._snippets)
+
+    def _key(self, val: str) -> str:
+        return val.casefold() if self._ignore_case else val
+
+    def _iter_found(self, prop: str) -> Iterator[str]:
+        """
+        Yields snippets found in the given string, possibly more than once
+        :param prop: string to search
+        """
+        prop = self._key(prop)
+        if len(self._snippets) <= self.DIRECT_SEARCH_LIMIT:
+            yield from (snippet for snippet in self._snippets if snippet in prop)
+            return
+        for length, bucket in self._by_length.items():
+            for i in range(len(prop) - length + 1):
+                window = prop[i : i + length]
+                if window in bucket:
+                    yield window
+
+    def contains_any(self, prop: str) -> bool:
+        """
+        Returns True if the given string contains at least one of the snippets
+        :param prop: string to search
+        """
+        return any(True for _ in self._iter_found(prop))
+
+    def contains_all(self, prop: str) -> bool:
+        """
+        Returns True if the given string contains every one of the snippets
+        :param prop: string to search
+        """
+        found = set()
+        for snippet in self._iter_found(prop):
+            found.add(snippet)
+            if len(found) == len(self._snippets):
+                return True
+        return False
+
+
 class ClientSideHandlerString(ClientSideHandler):
     """
     Client Side handler for String related queries.
     This class stores a dictionary which maps a String preset/prop pairs to a filter function
-    Filter functions which map to QueryPresetsString are defined here
+    Filter functions which map to QueryPresetsString are defined here.
+    Values, patterns and snippets given to a query are compiled once when the filter function is built -
+    see _compile_filter_func_kwargs - rather than for every resource
     """
 
     def __init__(self, filter_function_mappings: PresetPropMappings):
@@ -22,34 +91,201 @@ class ClientSideHandlerString(ClientSideHandler):
 
         self._filter_functions = {
             QueryPresetsString.ANY_IN: self._prop_any_in,
+            QueryPresetsString.CONTAINS: self._prop_contains,
             QueryPresetsString.MATCHES_REGEX: self._prop_matches_regex,
             QueryPresetsString.NOT_ANY_IN: self._prop_not_any_in,
+            QueryPresetsString.NOT_CONTAINS: self._prop_not_contains,
+        }
+
+        self._kwarg_compilers = {
+            QueryPresetsString.ANY_IN: self._compile_values,
+            QueryPresetsString.CONTAINS: self._compile_snippets,
+            QueryPresetsString.MATCHES_REGEX: self._compile_regex,
+            QueryPresetsString.NOT_ANY_IN: self._compile_values,
+            QueryPresetsString.NOT_CONTAINS: self._compile_snippets,
+        }
+
+        self._vectorised_functions = {
+            QueryPresetsString.ANY_IN: self._column_any_in,
+            QueryPresetsString.NOT_ANY_IN: self._column_not_any_in,
         }
 
-    def _prop_matches_regex(self, prop: Any, regex_string: str) -> bool:
+    def _compile_filter_func_kwargs(
+        self, preset: QueryPresetsString, filter_func_kwargs: FilterParams
+    ) -> FilterParams:
         """
-        Filter function which returns true if a prop matches a regex pattern
-        :param prop: prop value to check against
-        :param regex_string: a string which can be converted into a valid regex pattern to run
+        Method which compiles the kwargs given for a string preset once, before filtering
+        :param preset: The QueryPresetsString Enum the filter function is being built for
+        :param filter_func_kwargs: The validated kwargs for the filter function
         """
-        return bool(re.match(re.compile(regex_string), prop))
+        compiler = self._kwarg_compilers.get(preset, None)
+        if not compiler:
+            return filter_func_kwargs
+        return compiler(**filter_func_kwargs)
 
-    def _prop_any_in(self, prop: Any, values: List[str]) -> bool:
+    @staticmethod
+    def _compile_values(
+        values: List[str], ignore_case: bool = False, prefix: bool = False
+    ) -> FilterParams:
         """
-        Filter function which returns true if a prop matches any in a given list
-        :param prop: prop value to check against
+        Compiles a list of values into a frozenset for exact matches, or into sets of prefixes grouped by length
         :param values: a list of values to check against
+        :param ignore_case: if True, values are case-folded
+        :param prefix: if True, values are treated as prefixes
         """
         if len(values) == 0:
             raise MissingMandatoryParamError(
                 "values list must contain at least one item to match against"
             )
-        return any(prop == val for val in values)
+        if ignore_case:
+            values = [val.casefold() for val in values]
+        return {
+            "values": _group_by_length(values) if prefix else frozenset(values),
+            "ignore_case": ignore_case,
+            "prefix": prefix,
+        }
+
+    @staticmethod
+    def _compile_regex(regex_string: str, ignore_case: bool = False) -> FilterParams:
+        """
+        Compiles a regex pattern, invalid patterns raise re.error before any resources are listed
+        :param regex_string: a string which can be converted into a valid regex pattern to run
+        :param ignore_case: if True, the pattern is compiled case-insensitively
+        """
+        return {
+            "regex_string": re.compile(
+                regex_string, re.IGNORECASE if ignore_case else 0
+            )
+        }
 
-    def _prop_not_any_in(self, prop: Any, values: List[str]) -> bool:
+    @staticmethod
+    def _compile_snippets(
+        snippets: List[str], ignore_case: bool = False
+    ) -> FilterParams:
+        """
+        Compiles a list of snippets into a single-pass matcher
+        :param snippets: a list of snippets to search for
+        :param ignore_case: if True, snippets are matched case-insensitively
+        """
+        if len(snippets) == 0:
+            raise MissingMandatoryParamError(
+                "snippets list must contain at least one item to search for"
+            )
+        return {"snippets": _SnippetMatcher(snippets, ignore_case)}
+
+    def _prop_matches_regex(
+        self, prop: Any, regex_string: str, ignore_case: bool = False
+    ) -> bool:
+        """
+        Filter function which returns true if a prop matches a regex pattern
+        :param prop: prop value to check against
+        :param regex_string: a string which can be converted into a valid regex pattern to run,
+        or a pattern already compiled by _compile_regex
+        :param ignore_case: if True, match case-insensitively
+        """
+        return bool(re.match(regex_string, prop, re.IGNORECASE if ignore_case else 0))
+
+    def _prop_any_in(
+        self,
+        prop: Any,
+        values: List[str],
+        ignore_case: bool = False,
+        prefix: bool = False,
+    ) -> bool:
+        """
+        Filter function which returns true if a prop matches any in a given list
+        :param prop: prop value to check against
+        :param values: a list of values to check against - compiled into a frozenset (or prefixes grouped
+        by length) by _compile_values, and expected to be case-folded already if ignore_case is set
+        :param ignore_case: if True, compare case-insensitively
+        :param prefix: if True, return true if prop starts with any of the values
+        """
+        # values are strings, so anything else (e.g. a list of IDs) never matches
+        if not isinstance(prop, str):
+            return False
+        if ignore_case:
+            prop = prop.casefold()
+        if prefix:
+            if not isinstance(values, dict):
+                values = _group_by_length(values)
+            return any(prop[:length] in bucket for length, bucket in values.items())
+        return prop in values
+
+    def _prop_not_any_in(
+        self,
+        prop: Any,
+        values: List[str],
+        ignore_case: bool = False,
+        prefix: bool = False,
+    ) -> bool:
         """
         Filter function which returns true if a prop does not match any in a given list
         :param prop: prop value to check against
+        :param values: a list of values to check against, see _prop_any_in
+        :param ignore_case: if True, compare case-insensitively
+        :param prefix: if True, return true if prop starts with none of the values
+        """
+        return not self._prop_any_in(prop, values, ignore_case, prefix)
+
+    def _prop_contains(
+        self, prop: Any, snippets: List[str], ignore_case: bool = False
+    ) -> bool:
+        """
+        Filter function which returns true if a prop contains all the snippets given
+        :param prop: prop value to check against
+        :param snippets: a list of snippets to search for, or a matcher built by _compile_snippets
+        :param ignore_case: if True, search case-insensitively
+        """
+        if prop is None:
+            return False
+        if not isinstance(snippets, _SnippetMatcher):
+            snippets = _SnippetMatcher(snippets, ignore_case)
+        return snippets.contains_all(prop)
+
+    def _prop_not_contains(
+        self, prop: Any, snippets: List[str], ignore_case: bool = False
+    ) -> bool:
+        """
+        Filter function which returns true if a prop contains none of the snippets given
+        :param prop: prop value to check against
+        :param snippets: a list of snippets to search for, or a matcher built by _compile_snippets
+        :param ignore_case: if True, search case-insensitively
+        """
+        if prop is None:
+            return True
+        if not isinstance(snippets, _SnippetMatcher):
+            snippets = _SnippetMatcher(snippets, ignore_case)
+        return not snippets.contains_any(prop)
+
+    @staticmethod
+    def _column_any_in(
+        column, values: List[str], ignore_case: bool = False, prefix: bool = False
+    ):
+        """
+        Vectorised function which returns a boolean mask of props matching any in a given list.
+        Only exact matches are vectorised, returns None for case-insensitive or prefix matches
+        :param column: NumPy array of prop values to check against
+        :param values: a list of values to check against
+        :param ignore_case: if True, compare case-insensitively
+        :param prefix: if True, match props which start with any of the values
+        """
+        if ignore_case or prefix:
+            return None
+        return isin_mask(column, values)
+
+    def _column_not_any_in(
+        self,
+        column,
+        values: List[str],
+        ignore_case: bool = False,
+        prefix: bool = False,
+    ):
+        """
+        Vectorised function which returns a boolean mask of props not matching any in a given list
+        :param column: NumPy array of prop values to check against
         :param values: a list of values to check against
+        :param ignore_case: if True, compare case-insensitively
+        :param prefix: if True, match props which start with any of the values
         """
-        return not self._prop_any_in(prop, values)
+        mask = self._column_any_in(column, values, ignore_case, prefix)
+        return None if mask is None else ~mask
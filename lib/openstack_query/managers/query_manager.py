@@ -31,25 +31,41 @@ class QueryManager:
         """
         method to build the query, execute it, and return the results
         :param preset_details: A dataclass containing query preset config information
-        :param output_details: A dataclass containing config on how to output results of query
+        :param output_details: A dataclass containing config on how to output results of query.
+        If output_details.profile is set, the results are returned along with the query profile.
+        If output_details.resume_token is set, the query saves its progress under it - see ServerRunner
         """
 
         self._populate_query(
             preset_details=preset_details,
             properties_to_select=output_details.properties_to_select,
         )
-        self._query.run(self._cloud_account)
-        return self._get_query_output(
-            output_details.output_type,
-        )
+        run_kwargs = {}
+        if output_details.resume_token:
+            run_kwargs["resume_token"] = output_details.resume_token
+        if not output_details.profile:
+            self._query.run(self._cloud_account, **run_kwargs)
+            return self._get_query_output(
+                output_details.output_type, output_details.output_path
+            )
+
+        self._query.run(self._cloud_account, profile=True, **run_kwargs)
+        profile = self._query.profile
+        with profile.stage("render"):
+            output = self._get_query_output(
+                output_details.output_type, output_details.output_path
+            )
+        return {"results": output, "profile": profile.to_dict()}
 
     def _get_query_output(
         self,
         output_type: QueryOutputTypes,
+        output_path: Optional[str] = None,
     ) -> QueryReturn:
         """
         method that returns the output of query
         :param output_type: An Enum representing how to output query results
+        :param output_path: The file to write results to, for output types which write to a file
         """
         return {
             QueryOutputTypes.TO_STR: self._query.to_string,
@@ -58,6 +74,9 @@ class QueryManager:
             QueryOutputTypes.TO_OBJECT_LIST: lambda: self._query.to_list(
                 as_objects=True
             ),
+            QueryOutputTypes.TO_NDJSON: lambda: self._query.to_ndjson(output_path),
+            QueryOutputTypes.TO_CSV: lambda: self._query.to_csv(output_path),
+            QueryOutputTypes.TO_JSON: lambda: self._query.to_json(output_path),
         }.get(output_type, None)()
 
     def _populate_query(
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 import re
 from custom_types.openstack_query.aliases import QueryReturn
 
@@ -12,6 +12,7 @@ from enums.cloud_domains import CloudDomains
 
 from openstack_query.queries.server_query import ServerQuery
 from openstack_query.managers.query_manager import QueryManager
+from openstack_query.runners.server_runner import ServerRunner
 
 from structs.query.query_preset_details import QueryPresetDetails
 from structs.query.query_output_details import QueryOutputDetails
@@ -24,8 +25,16 @@ class ServerManager(QueryManager):
     Manager for querying Openstack Server objects.
     """
 
-    def __init__(self, cloud_account: CloudDomains):
-        QueryManager.__init__(self, query=ServerQuery(), cloud_account=cloud_account)
+    def __init__(
+        self, cloud_account: CloudDomains, runner: Optional[ServerRunner] = None
+    ):
+        """
+        :param cloud_account: An Enum for the account from the clouds configuration to use
+        :param runner: An Optional ServerRunner for the query to use, see ServerQuery
+        """
+        QueryManager.__init__(
+            self, query=ServerQuery(runner), cloud_account=cloud_account
+        )
 
     def search_all(self, **kwargs) -> QueryReturn:
         """
@@ -33,6 +42,9 @@ class ServerManager(QueryManager):
         :param kwargs: A set of optional kwargs to pass to the query
             - properties_to_select - list of strings representing which properties to select
             - output_type - string representing how to output the query
+            - profile - if True, return results along with a profile of how the query was run
+            - output_path - file to write results to, for output types to_ndjson, to_csv and to_json
+            - resume_token - token to save the query's progress under, or to resume an interrupted query from
         """
         return self._build_and_run_query(
             preset_details=None,
@@ -65,6 +77,9 @@ class ServerManager(QueryManager):
         :param kwargs: A set of optional kwargs to pass to the query
             - properties_to_select - list of strings representing which properties to select
             - output_type - string representing how to output the query
+            - profile - if True, return results along with a profile of how the query was run
+            - output_path - file to write results to, for output types to_ndjson, to_csv and to_json
+            - resume_token - token to save the query's progress under, or to resume an interrupted query from
         """
         preset_details = QueryPresetDetails(
             preset=QueryPresetsDateTime.from_string(search_mode),
@@ -73,7 +88,7 @@ class ServerManager(QueryManager):
                 "days": days,
                 "hours": hours,
                 "minutes": minutes,
-                "seconds": float(seconds),
+                "seconds": seconds,
             },
         )
 
@@ -98,6 +113,9 @@ class ServerManager(QueryManager):
         :param kwargs: A set of optional kwargs to pass to the query
             - properties_to_select - list of strings representing which properties to select
             - output_type - string representing how to output the query
+            - profile - if True, return results along with a profile of how the query was run
+            - output_path - file to write results to, for output types to_ndjson, to_csv and to_json
+            - resume_token - token to save the query's progress under, or to resume an interrupted query from
         """
         args = {"values": values}
         preset = (
@@ -133,6 +151,9 @@ class ServerManager(QueryManager):
         :param kwargs: A set of optional kwargs to pass to the query
             - properties_to_select - list of strings representing which properties to select
             - output_type - string representing how to output the query
+            - profile - if True, return results along with a profile of how the query was run
+            - output_path - file to write results to, for output types to_ndjson, to_csv and to_json
+            - resume_token - token to save the query's progress under, or to resume an interrupted query from
         """
 
         re.compile(pattern)
@@ -17,13 +17,13 @@ class QueryWrapper(QueryMethods, QueryBase):
 
     def __init__(self, runner: QueryRunner):
         prop_handler = self._get_prop_handler()
-
-        self.runner = runner
-        self._query_results = []
-
-        self.output = QueryOutput(prop_handler)
-        self.builder = QueryBuilder(
-            prop_handler,
-            self._get_client_side_handlers().to_list(),
-            self._get_server_side_handler(),
+        QueryMethods.__init__(
+            self,
+            builder=QueryBuilder(
+                prop_handler,
+                self._get_client_side_handlers().to_list(),
+                self._get_server_side_handler(),
+            ),
+            runner=runner,
+            output=QueryOutput(prop_handler),
         )
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from structs.query.query_client_side_handlers import QueryClientSideHandlers
 
 from enums.query.props.server_properties import ServerProperties
@@ -51,7 +53,7 @@ class ServerQuery(QueryWrapper):
                 ServerProperties.SERVER_LAST_UPDATED_DATE: lambda a: a["updated_at"],
                 ServerProperties.FLAVOR_ID: lambda a: ["flavor_id"],
                 ServerProperties.IMAGE_ID: lambda a: ["image_id"],
-                ServerProperties.PROJECT_ID: lambda a: a["location"]["project"]["id"],
+                ServerProperties.PROJECT_ID: lambda a: a["project_id"],
             }
         )
 
@@ -110,7 +112,36 @@ class ServerQuery(QueryWrapper):
             ),
             # set string query preset mappings
             string_handler=ClientSideHandlerString(
-                {QueryPresetsString.MATCHES_REGEX: [ServerProperties.SERVER_NAME]}
+                {
+                    QueryPresetsString.ANY_IN: [
+                        # FLAVOR_ID and IMAGE_ID are left out, as they are lists
+                        ServerProperties.USER_ID,
+                        ServerProperties.HYPERVISOR_ID,
+                        ServerProperties.SERVER_ID,
+                        ServerProperties.SERVER_NAME,
+                        ServerProperties.SERVER_DESCRIPTION,
+                        ServerProperties.SERVER_STATUS,
+                        ServerProperties.PROJECT_ID,
+                    ],
+                    QueryPresetsString.NOT_ANY_IN: [
+                        ServerProperties.USER_ID,
+                        ServerProperties.HYPERVISOR_ID,
+                        ServerProperties.SERVER_ID,
+                        ServerProperties.SERVER_NAME,
+                        ServerProperties.SERVER_DESCRIPTION,
+                        ServerProperties.SERVER_STATUS,
+                        ServerProperties.PROJECT_ID,
+                    ],
+                    QueryPresetsString.CONTAINS: [
+                        ServerProperties.SERVER_NAME,
+                        ServerProperties.SERVER_DESCRIPTION,
+                    ],
+                    QueryPresetsString.NOT_CONTAINS: [
+                        ServerProperties.SERVER_NAME,
+                        ServerProperties.SERVER_DESCRIPTION,
+                    ],
+                    QueryPresetsString.MATCHES_REGEX: [ServerProperties.SERVER_NAME],
+                }
             ),
             # set datetime query preset mappings
             datetime_handler=ClientSideHandlerDateTime(
@@ -137,5 +168,9 @@ class ServerQuery(QueryWrapper):
             integer_handler=None,
         )
 
-    def __init__(self):
-        super().__init__(runner=ServerRunner())
+    def __init__(self, runner: Optional[ServerRunner] = None):
+        """
+        :param runner: An Optional ServerRunner to list servers with, e.g. one sharing connections and
+        cached listings between queries - a new ServerRunner by default
+        """
+        super().__init__(runner=runner or ServerRunner())
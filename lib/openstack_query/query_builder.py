@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
 
 from openstack_query.handlers.client_side_handler import ClientSideHandler
 from openstack_query.handlers.prop_handler import PropHandler
@@ -7,11 +7,19 @@ from openstack_query.handlers.server_side_handler import ServerSideHandler
 from enums.query.query_presets import QueryPresets
 from enums.query.props.prop_enum import PropEnum
 
+from structs.query.query_preset_details import QueryPresetDetails
+
 from exceptions.parse_query_error import ParseQueryError
 from exceptions.query_preset_mapping_error import QueryPresetMappingError
 from exceptions.query_property_mapping_error import QueryPropertyMappingError
 
-from custom_types.openstack_query.aliases import ClientSideFilterFunc, ServerSideFilters
+from custom_types.openstack_query.aliases import (
+    ClientSideFilterFunc,
+    ServerSideFilters,
+    VectorisedFilterFunc,
+)
+
+# pylint:disable=too-many-instance-attributes
 
 
 class QueryBuilder:
@@ -31,7 +39,10 @@ class QueryBuilder:
         self._server_side_handler = server_side_handler
 
         self._client_side_filter = None
+        self._vectorised_filter = None
         self._server_side_filters = None
+        self._filter_props = set()
+        self._preset_details = None
 
     @property
     def client_side_filter(self) -> Optional[ClientSideFilterFunc]:
@@ -40,6 +51,13 @@ class QueryBuilder:
         """
         return self._client_side_filter
 
+    @property
+    def vectorised_filter(self) -> Optional[VectorisedFilterFunc]:
+        """
+        a getter method to return the vectorised version of the client-side filter function, if there is one
+        """
+        return self._vectorised_filter
+
     @property
     def server_side_filters(self) -> Optional[ServerSideFilters]:
         """
@@ -47,6 +65,20 @@ class QueryBuilder:
         """
         return self._server_side_filters
 
+    @property
+    def filter_props(self) -> Set[PropEnum]:
+        """
+        a getter method to return the properties the query filters on
+        """
+        return self._filter_props
+
+    @property
+    def preset_details(self) -> Optional[QueryPresetDetails]:
+        """
+        a getter method to return the preset, property and arguments given to where(), if it has been called
+        """
+        return self._preset_details
+
     def parse_where(
         self,
         preset: QueryPresets,
@@ -82,9 +114,19 @@ class QueryBuilder:
             prop_func=prop_func,
             filter_func_kwargs=preset_kwargs,
         )
+        self._vectorised_filter = preset_handler.get_vectorised_filter(
+            preset=preset,
+            prop=prop,
+            prop_func=prop_func,
+            filter_func_kwargs=preset_kwargs,
+        )
         self._server_side_filters = self._server_side_handler.get_filters(
             preset=preset, prop=prop, params=preset_kwargs
         )
+        self._filter_props = {prop}
+        self._preset_details = QueryPresetDetails(
+            preset=preset, prop=prop, args=preset_kwargs or {}
+        )
 
     def _get_preset_handler(
         self, preset: QueryPresets, prop: PropEnum
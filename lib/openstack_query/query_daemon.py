@@ -0,0 +1,216 @@
+"""
+A long-lived local daemon which runs queries for StackStorm actions, so they don't each pay for importing
+openstacksdk, authenticating and listing the inventory again. Connections are kept open in an
+OpenstackConnectionPool, and listings are shared between queries for cache_ttl seconds by a SingleFlight.
+Actions send queries with openstack_query.query_daemon_client, and run them in-process if the daemon isn't
+running. Start it with:
+    PYTHONPATH=lib python -m openstack_query.query_daemon --socket /run/openstack-query.sock
+and set OPENSTACK_QUERY_DAEMON_SOCKET to the same path for the actions
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from enums.cloud_domains import CloudDomains
+from enums.query.query_output_types import QueryOutputTypes
+from exceptions.query_daemon_unavailable_error import QueryDaemonUnavailableError
+from openstack_api.openstack_connection_pool import OpenstackConnectionPool
+from openstack_query.managers.query_manager import QueryManager
+from openstack_query.managers.server_manager import ServerManager
+from openstack_query.query_daemon_client import SOCKET_ENV
+from openstack_query.runners.query_runner import QueryRunner
+from openstack_query.runners.server_runner import ServerRunner
+from openstack_query.runners.single_flight import SingleFlight
+
+# manager name sent by clients -> the manager and runner it is built with
+MANAGERS: Dict[str, Tuple[Type[QueryManager], Type[QueryRunner]]] = {
+    "server": (ServerManager, ServerRunner),
+}
+# seconds listings are shared between queries for, unless given
+DEFAULT_CACHE_TTL = 60.0
+
+
+class QueryDaemon:
+    """
+    Serves queries on a Unix socket, one thread per connection. Used as a context manager, which serves in a
+    background thread, or with serve_forever()
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        connection_cls: Optional[Callable] = None,
+    ):
+        """
+        :param socket_path: The Unix socket to listen on, only the user running the daemon can connect to it
+        :param cache_ttl: Seconds a listing is reused by later queries for, 0 to only share listings between
+        queries running at the same time
+        :param connection_cls: An Optional connection class, connections are pooled by default
+        """
+        self.socket_path = socket_path
+        self.pool = OpenstackConnectionPool()
+        self._connection_cls = connection_cls or self.pool.connection_cls
+        self.single_flight = SingleFlight(ttl=cache_ttl or None)
+        self._remove_stale_socket()
+        self._server = socketserver.ThreadingUnixStreamServer(
+            socket_path, self._make_handler()
+        )
+        self._server.daemon_threads = True
+        os.chmod(socket_path, 0o600)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _remove_stale_socket(self) -> None:
+        """
+        Removes the socket left behind by a daemon which didn't shut down cleanly, refusing to start if
+        another daemon is still listening on it
+        """
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+                return
+        raise RuntimeError(f"A query daemon is already listening on {self.socket_path}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        """
+        Stops serving, and closes the socket and pooled connections
+        """
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+        self.pool.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _make_handler(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                response = daemon.handle_request(line)
+                self.wfile.write(response.encode("utf-8") + b"\n")
+
+        return Handler
+
+    def handle_request(self, line: bytes) -> str:
+        """
+        Runs a query sent by a client, returning the response to send back - see query_daemon_client
+        :param line: The request as sent by the client
+        """
+        try:
+            result = self._run(**json.loads(line))
+        except QueryDaemonUnavailableError as err:
+            return self._error(err, fallback=True)
+        except Exception as err:  # pylint:disable=broad-except
+            return self._error(err)
+        try:
+            return json.dumps({"result": result})
+        except TypeError as err:
+            # results which aren't JSON serialisable are run again in-process by the client
+            return self._error(err, fallback=True)
+
+    def _run(
+        self,
+        manager: str,
+        method: str,
+        cloud_account: str,
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Builds a manager with a runner sharing this daemon's connections and listings, and calls a query method
+        :param manager: The manager to run the query with, e.g. server for ServerManager
+        :param method: The manager method to call, e.g. search_by_property
+        :param cloud_account: The account from the clouds configuration to use
+        :param kwargs: kwargs to pass to the manager method
+        """
+        if manager not in MANAGERS:
+            raise ValueError(f"Unknown query manager '{manager}'")
+        manager_cls, runner_cls = MANAGERS[manager]
+        if not method.startswith("search_") or not hasattr(manager_cls, method):
+            raise ValueError(f"Unknown query method '{method}' for {manager}")
+        output_type = (kwargs or {}).get("output_type")
+        if (
+            isinstance(output_type, str)
+            and QueryOutputTypes.from_string(output_type)
+            == QueryOutputTypes.TO_OBJECT_LIST
+        ):
+            # openstacksdk objects would arrive in the client as plain dictionaries
+            raise QueryDaemonUnavailableError(
+                "Query daemon can't return openstack objects"
+            )
+        query_manager = manager_cls(
+            cloud_account=CloudDomains.from_string(cloud_account),
+            runner=runner_cls(
+                connection_cls=self._connection_cls, single_flight=self.single_flight
+            ),
+        )
+        return getattr(query_manager, method)(**(kwargs or {}))
+
+    @staticmethod
+    def _error(err: Exception, fallback: bool = False) -> str:
+        return json.dumps(
+            {
+                "error": {
+                    "type": f"{type(err).__module__}:{type(err).__qualname__}",
+                    "message": str(err),
+                },
+                "fallback": fallback,
+            }
+        )
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Runs the query daemon until interrupted
+    """
+    parser = argparse.ArgumentParser(description="Runs the query daemon")
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get(SOCKET_ENV),
+        help=f"Unix socket to listen on, defaults to ${SOCKET_ENV}",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="seconds listings are reused by later queries for",
+    )
+    args = parser.parse_args(sys.argv[1:] if args is None else args)
+    if not args.socket:
+        parser.error(f"--socket or ${SOCKET_ENV} is required")
+
+    daemon = QueryDaemon(args.socket, args.cache_ttl)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Client for the query daemon - see openstack_query.query_daemon. Only imports the standard library and the
+pack's exceptions, so actions which send their queries to the daemon don't pay for importing openstacksdk.
+
+Queries and results are sent over a Unix socket as one line of JSON each:
+    request:  {"manager": "server", "method": "search_by_property", "cloud_account": "dev", "kwargs": {...}}
+    response: {"result": ...}
+          or: {"error": {"type": "<module>:<class>", "message": "..."}, "fallback": false}
+A response with "fallback" set means the daemon can't answer that query, e.g. its results can't be
+serialised, so it should be run in-process instead
+"""
+
+import builtins
+import importlib
+import json
+import os
+import socket
+from typing import Any, Callable, Dict, Optional
+
+from exceptions.query_daemon_error import QueryDaemonError
+from exceptions.query_daemon_unavailable_error import QueryDaemonUnavailableError
+
+# If set, actions send queries to the daemon listening on this socket, falling back to running them
+# in-process if it isn't running
+SOCKET_ENV = "OPENSTACK_QUERY_DAEMON_SOCKET"
+
+
+def _rebuild_error(error: Dict[str, str]) -> Exception:
+    """
+    Returns the error a query failed with in the daemon, as its original type if it is a builtin or one of
+    the pack's exceptions, otherwise as a QueryDaemonError
+    :param error: The error as sent by the daemon
+    """
+    module_name, _, cls_name = error.get("type", "").partition(":")
+    message = error.get("message", "")
+    cls = None
+    if module_name == "builtins":
+        cls = getattr(builtins, cls_name, None)
+    elif module_name.startswith("exceptions."):
+        try:
+            cls = getattr(importlib.import_module(module_name), cls_name, None)
+        except ImportError:
+            cls = None
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        try:
+            return cls(message)
+        except TypeError:
+            # exceptions which need more than a message to be built
+            pass
+    return QueryDaemonError(f"{error.get('type')}: {message}")
+
+
+# pylint:disable=too-few-public-methods
+
+
+class QueryDaemonClient:
+    """
+    Sends queries to the query daemon and returns their results
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 600.0):
+        """
+        :param socket_path: The Unix socket the daemon listens on
+        :param timeout: Seconds to wait for a query to finish
+        """
+        self._socket_path = socket_path
+        self._timeout = timeout
+
+    def run(self, manager: str, method: str, cloud_account: str, **kwargs) -> Any:
+        """
+        Runs a query method of a manager in the daemon, returning what it returns
+        :param manager: The manager to run the query with, e.g. server for ServerManager
+        :param method: The manager method to call, e.g. search_by_property
+        :param cloud_account: The account from the clouds configuration to use
+        :param kwargs: kwargs to pass to the manager method, must be JSON serialisable
+        """
+        if kwargs.get("output_path"):
+            # the daemon writes output files from its own working directory
+            kwargs["output_path"] = os.path.abspath(kwargs["output_path"])
+        try:
+            request = json.dumps(
+                {
+                    "manager": manager,
+                    "method": method,
+                    "cloud_account": cloud_account,
+                    "kwargs": kwargs,
+                }
+            )
+        except TypeError as err:
+            raise QueryDaemonUnavailableError(
+                f"Query can't be sent to the daemon: {err}"
+            ) from err
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self._timeout)
+                sock.connect(self._socket_path)
+                sock.sendall(request.encode("utf-8") + b"\n")
+                with sock.makefile("rb") as file:
+                    line = file.readline()
+        except OSError as err:
+            raise QueryDaemonUnavailableError(
+                f"Query daemon at {self._socket_path} is unavailable: {err}"
+            ) from err
+        if not line:
+            # queries only read, so one cut short when the daemon stopped can be run again
+            raise QueryDaemonUnavailableError(
+                f"Query daemon at {self._socket_path} closed the connection"
+            )
+
+        response = json.loads(line)
+        if "error" not in response:
+            return response["result"]
+        if response.get("fallback"):
+            raise QueryDaemonUnavailableError(response["error"].get("message"))
+        raise _rebuild_error(response["error"])
+
+
+# pylint:disable=too-many-arguments
+def run_query(
+    manager: str,
+    method: str,
+    cloud_account: str,
+    kwargs: Dict[str, Any],
+    fallback: Callable[[], Any],
+    socket_path: Optional[str] = None,
+) -> Any:
+    """
+    Runs a query in the query daemon if one is configured and running, otherwise calls fallback to run it
+    in-process
+    :param manager: The manager to run the query with, e.g. server for ServerManager
+    :param method: The manager method to call, e.g. search_by_property
+    :param cloud_account: The account from the clouds configuration to use
+    :param kwargs: kwargs to pass to the manager method
+    :param fallback: Function which runs the query in-process
+    :param socket_path: The Unix socket the daemon listens on - defaults to the OPENSTACK_QUERY_DAEMON_SOCKET
+    environment variable, the query is run in-process if neither is set
+    """
+    socket_path = socket_path or os.environ.get(SOCKET_ENV)
+    if socket_path:
+        try:
+            return QueryDaemonClient(socket_path).run(
+                manager, method, cloud_account, **kwargs
+            )
+        except QueryDaemonUnavailableError:
+            pass
+    return fallback()
@@ -4,12 +4,18 @@ from enums.query.props.prop_enum import PropEnum
 from enums.query.query_presets import QueryPresets
 from enums.cloud_domains import CloudDomains
 
+from openstack_query.columnar import numpy_available
 from openstack_query.query_output import QueryOutput
+from openstack_query.query_profile import QueryProfile
 from openstack_query.query_builder import QueryBuilder
 from openstack_query.runners.server_runner import QueryRunner
+from structs.query.query_aggregate_details import QueryAggregateDetails
 
 from exceptions.parse_query_error import ParseQueryError
-from custom_types.openstack_query.aliases import OpenstackResourceObj
+from custom_types.openstack_query.aliases import (
+    OpenstackResourceObj,
+    OutputDestination,
+)
 
 
 class QueryMethods:
@@ -22,6 +28,15 @@ class QueryMethods:
         self.runner = runner
         self.output = output
         self._query_results = []
+        self._limit = None
+        self._profile = None
+
+    @property
+    def profile(self) -> Optional[QueryProfile]:
+        """
+        Returns the profile recorded by the last call to run(profile=True), if any
+        """
+        return self._profile
 
     def select(self, *props: PropEnum):
         """
@@ -77,26 +92,188 @@ class QueryMethods:
         """
         raise NotImplementedError
 
+    def aggregate(
+        self, *aggregations: QueryAggregateDetails, group_by: Optional[PropEnum] = None
+    ):
+        """
+        Public method used to output aggregations - count, sum, min, max or top-k of a property -
+        instead of the selected properties of each result. Unless a limit is set, resources are streamed
+        through per-group accumulators as they are listed, so neither the listing nor a row for every
+        resource is kept - to_list(as_objects=True) returns an empty list
+        :param aggregations: one or more aggregations to calculate, described as QueryAggregateDetails
+        :param group_by: An optional property to group results by, one output row is returned per group
+        """
+        if not aggregations:
+            raise ParseQueryError("provide at least one aggregation")
+
+        self.output.parse_aggregate(*aggregations, group_by=group_by)
+        return self
+
+    def limit(self, limit: int):
+        """
+        Public method used to return at most the given number of results.
+        The query stops listing resources once enough have matched, and the limit is passed to openstack
+        as the page size when no client-side filtering is needed
+        :param limit: maximum number of results to return
+        """
+        if limit < 1:
+            raise ParseQueryError("limit must be at least 1")
+        self._limit = limit
+        return self
+
+    def explain(
+        self, vectorise: bool = False, lightweight: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Public method which describes how the query would be run, without running it - the filters sent to
+        openstack, the client-side predicate and whether it is applied, and the strategy used to list resources
+        :param vectorise: describe the plan as if run(vectorise=True) was called
+        :param lightweight: describe the plan as if run(lightweight=True) was called
+        """
+        server_filters = self.builder.server_side_filters
+        preset_details = self.builder.preset_details
+        apply_client_side_filter = bool(
+            self.builder.client_side_filter and not server_filters
+        )
+        streamed = self._streams_results()
+        vectorised = bool(
+            apply_client_side_filter
+            and vectorise
+            and not streamed
+            and self.builder.vectorised_filter
+            and numpy_available()
+        )
+
+        if self._limit:
+            strategy = f"lazy listing, stopping after {self._limit} results"
+            if not apply_client_side_filter:
+                strategy += f" with a page size of {self._limit}"
+        elif streamed:
+            strategy = "streamed listing, aggregated as resources are listed"
+        else:
+            strategy = "full listing"
+        if server_filters:
+            strategy += ", filtered server-side"
+        elif apply_client_side_filter:
+            strategy += ", filtered client-side"
+            if vectorised:
+                strategy += " (vectorised where possible)"
+        if lightweight:
+            required_props = self.output.required_props | self.builder.filter_props
+            strategy += (
+                f", listing only {', '.join(sorted(p.name for p in required_props))}"
+            )
+
+        if self.output.aggregations:
+            output = {
+                "aggregate": [
+                    {
+                        "aggregation": details.aggregation.name,
+                        "prop": details.prop.name if details.prop else None,
+                    }
+                    for details in self.output.aggregations
+                ],
+                "group_by": (
+                    self.output.aggregate_group_by.name
+                    if self.output.aggregate_group_by
+                    else None
+                ),
+            }
+        else:
+            output = {"select": sorted(p.name for p in self.output.selected_props)}
+
+        return {
+            "server_side_filters": server_filters or {},
+            "client_side_filter": (
+                {
+                    "preset": preset_details.preset.name,
+                    "prop": preset_details.prop.name,
+                    "args": preset_details.args,
+                }
+                if preset_details
+                else None
+            ),
+            "client_side_filter_applied": apply_client_side_filter,
+            "vectorised": vectorised,
+            "strategy": strategy,
+            "limit": self._limit,
+            "output": output,
+        }
+
+    def _streams_results(
+        self, from_subset: Optional[List[OpenstackResourceObj]] = None
+    ) -> bool:
+        """
+        Returns True if resources are aggregated as they are listed rather than listed in full first -
+        when aggregations are set, and no limit or subset is given
+        :param from_subset: A subset of openstack resources the query is run on, see run()
+        """
+        return bool(self.output.aggregations and not self._limit and not from_subset)
+
     def run(
         self,
         cloud_account: CloudDomains,
         from_subset: Optional[List[OpenstackResourceObj]] = None,
-        **kwargs
+        vectorise: bool = False,
+        lightweight: bool = False,
+        profile: bool = False,
+        **kwargs,
     ):
         """
         Public method that runs the query provided and outputs
         :param cloud_account: An Enum for the account from the clouds configuration to use
         :param from_subset: A subset of openstack resources to run query on instead of querying openstacksdk
+        :param vectorise: If True, evaluate the query over all resources at once with NumPy where possible,
+        which is faster for large listings. Falls back to filtering each resource if NumPy is not installed
+        :param lightweight: If True, only the properties selected and filtered on are requested - resources are
+        listed in the lightest mode which includes them and returned as compact records (e.g. ServerRecord) rather
+        than openstacksdk objects, so to_list(as_objects=True) returns records
+        :param profile: If True, record wall time per stage, API calls per service and items scanned and returned,
+        available afterwards from the profile property
         :param kwargs: keyword args that can be used to configure details of how query is run
             - valid kwargs specific to resource
         """
         local_filters = self.builder.client_side_filter
         server_filters = self.builder.server_side_filters
+        if lightweight:
+            kwargs["required_props"] = (
+                self.output.required_props | self.builder.filter_props
+            )
+        self._profile = None
+        if profile:
+            self._profile = QueryProfile()
+            self._profile.strategy = self.explain(vectorise, lightweight)["strategy"]
+
+        if self._streams_results(from_subset):
+            # resources are aggregated as they are listed, so they aren't kept
+            self._query_results = []
+            resources = self.runner.iter_run(
+                cloud_account, local_filters, server_filters, self._profile, **kwargs
+            )
+            if self._profile:
+                with self._profile.stage("fetch"):
+                    self.output.generate_output(resources)
+            else:
+                self.output.generate_output(resources)
+            return self
 
         self._query_results = self.runner.run(
-            cloud_account, local_filters, server_filters, from_subset, **kwargs
+            cloud_account,
+            local_filters,
+            server_filters,
+            from_subset,
+            vectorised_filter_func=(
+                self.builder.vectorised_filter if vectorise else None
+            ),
+            limit=self._limit,
+            profile=self._profile,
+            **kwargs,
         )
-        self.output.generate_output(self._query_results)
+        if self._profile:
+            with self._profile.stage("generate_output"):
+                self.output.generate_output(self._query_results)
+        else:
+            self.output.generate_output(self._query_results)
 
         return self
 
@@ -123,3 +300,26 @@ class QueryMethods:
         :param kwargs: kwargs to pass to generate table
         """
         return self.output.to_html(**kwargs)
+
+    def to_ndjson(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        Public method to write results as newline-delimited JSON, one object per line.
+        Results are held in memory once the query has run, so this saves serialising them into one string,
+        not listing them all
+        :param dest: A file path or text stream to write to
+        """
+        return self.output.to_ndjson(dest)
+
+    def to_csv(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        Public method to write results as CSV, with a header row of property names
+        :param dest: A file path or text stream to write to
+        """
+        return self.output.to_csv(dest)
+
+    def to_json(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        Public method to write results as a JSON array
+        :param dest: A file path or text stream to write to
+        """
+        return self.output.to_json(dest)
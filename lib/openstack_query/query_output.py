@@ -1,10 +1,20 @@
-from typing import Any, List, Dict
-from tabulate import tabulate
+import csv
+import json
+import os
+import tempfile
+from typing import Any, Callable, Iterable, List, Dict, Optional, Set, TextIO
 
 from enums.query.props.prop_enum import PropEnum
+from enums.query.query_aggregations import NUMERIC_AGGREGATIONS, QueryAggregations
 from exceptions.query_property_mapping_error import QueryPropertyMappingError
+from exceptions.parse_query_error import ParseQueryError
+from openstack_query.aggregator import QueryAggregator
 from openstack_query.handlers.prop_handler import PropHandler
-from custom_types.openstack_query.aliases import OpenstackResourceObj
+from structs.query.query_aggregate_details import QueryAggregateDetails
+from custom_types.openstack_query.aliases import (
+    OpenstackResourceObj,
+    OutputDestination,
+)
 
 
 class QueryOutput:
@@ -19,11 +29,47 @@ class QueryOutput:
         self._prop_handler = prop_handler
         self._props = set()
         self._results = []
+        self._aggregations: List[QueryAggregateDetails] = []
+        self._aggregate_group_by: Optional[PropEnum] = None
 
     @property
     def results(self) -> List[OpenstackResourceObj]:
         return self._results
 
+    @property
+    def aggregations(self) -> List[QueryAggregateDetails]:
+        """
+        Returns the aggregations to output instead of selected properties, if any
+        """
+        return self._aggregations
+
+    @property
+    def aggregate_group_by(self) -> Optional[PropEnum]:
+        """
+        Returns the property aggregations are grouped by, if any
+        """
+        return self._aggregate_group_by
+
+    @property
+    def selected_props(self) -> Set[PropEnum]:
+        """
+        Returns the properties selected to output
+        """
+        return self._props
+
+    @property
+    def required_props(self) -> Set[PropEnum]:
+        """
+        Returns the properties needed to generate output - those selected, aggregated or grouped by
+        """
+        props = set(self._props)
+        props.update(
+            details.prop for details in self._aggregations if details.prop is not None
+        )
+        if self._aggregate_group_by:
+            props.add(self._aggregate_group_by)
+        return props
+
     def sort_by(self, sort_by: PropEnum, reverse=False) -> List[OpenstackResourceObj]:
         """
         Public method used to configure sorting results
@@ -53,6 +99,82 @@ class QueryOutput:
         """
         return self._generate_table(self._results, return_html=True, **kwargs)
 
+    def to_ndjson(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        method to write results as newline-delimited JSON, one object per line. This is not streamed - results
+        are already held in memory by generate_output, only the file is written a row at a time
+        :param dest: A file path or text stream to write to
+        """
+
+        def write(file: TextIO):
+            for row in self._results:
+                file.write(json.dumps(row, default=str))
+                file.write("\n")
+
+        return self._write_output(dest, "ndjson", write)
+
+    def to_csv(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        method to write results as CSV, with a header row of property names. Nothing is written if there are
+        no results. Like to_ndjson, results are already held in memory
+        :param dest: A file path or text stream to write to
+        """
+
+        def write(file: TextIO):
+            if self._results:
+                writer = csv.DictWriter(file, fieldnames=list(self._results[0].keys()))
+                writer.writeheader()
+                writer.writerows(self._results)
+
+        return self._write_output(dest, "csv", write)
+
+    def to_json(self, dest: OutputDestination) -> Dict[str, Any]:
+        """
+        method to write results as a JSON array. Like to_ndjson, results are already held in memory
+        :param dest: A file path or text stream to write to
+        """
+
+        def write(file: TextIO):
+            file.write("[")
+            for i, row in enumerate(self._results):
+                file.write(",\n" if i else "\n")
+                file.write(json.dumps(row, default=str))
+            file.write("\n]\n" if self._results else "]\n")
+
+        return self._write_output(dest, "json", write)
+
+    def _write_output(
+        self,
+        dest: OutputDestination,
+        output_format: str,
+        write: Callable[[TextIO], None],
+    ) -> Dict[str, Any]:
+        """
+        Writes results one row at a time, so a string holding every result is never built, and returns a
+        reference to where they were written instead of the results.
+        A file path is written to a temporary file in the same directory first then moved into place, so readers
+        never see a partly written file
+        :param dest: A file path or text stream to write to
+        :param output_format: name of the format written, returned in the reference
+        :param write: function which writes results to an open text stream
+        """
+        if not isinstance(dest, str):
+            write(dest)
+            path = getattr(dest, "name", None)
+        else:
+            path = os.path.abspath(dest)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(path), prefix=".", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+                    write(file)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return {"path": path, "format": output_format, "rows": len(self._results)}
+
     def parse_select(self, *props: PropEnum, select_all=False) -> None:
         """
         Method which is used to set which properties to output once results are gathered
@@ -67,6 +189,47 @@ class QueryOutput:
                 self._check_prop_valid(prop)
                 self._props.add(prop)
 
+    def parse_aggregate(
+        self,
+        *aggregations: QueryAggregateDetails,
+        group_by: Optional[PropEnum] = None,
+    ) -> None:
+        """
+        Method which is used to set aggregations to calculate once results are gathered, instead of
+        outputting selected properties for each result.
+        This method checks that each property given is valid and populates internal attribute self._aggregations
+        :param aggregations: any number of aggregations to calculate for each group
+        :param group_by: An optional Enum representing a property to group results by before aggregating,
+        which must be the same for every call
+        """
+        for details in aggregations:
+            if details.aggregation != QueryAggregations.COUNT:
+                if details.prop is None:
+                    raise ParseQueryError(
+                        f"aggregation {details.aggregation.name} requires a property"
+                    )
+                self._check_prop_valid(details.prop)
+                if (
+                    details.aggregation in NUMERIC_AGGREGATIONS
+                    and not details.prop.is_numeric()
+                ):
+                    raise ParseQueryError(
+                        f"aggregation {details.aggregation.name} requires a numeric property, "
+                        f"{details.prop.name} is not numeric"
+                    )
+            if details.aggregation == QueryAggregations.TOP_K and details.k < 1:
+                raise ParseQueryError("k must be at least 1 for TOP_K aggregations")
+        if self._aggregations and group_by != self._aggregate_group_by:
+            raise ParseQueryError(
+                "aggregations are already grouped by "
+                f"{self._aggregate_group_by.name if self._aggregate_group_by else 'nothing'}, "
+                "all aggregations must be grouped by the same property"
+            )
+        if group_by:
+            self._check_prop_valid(group_by)
+        self._aggregations.extend(aggregations)
+        self._aggregate_group_by = group_by
+
     def _check_prop_valid(self, prop: PropEnum):
         """
         method which checks if the given property is valid - i.e. has an associated function mapping in
@@ -79,7 +242,7 @@ class QueryOutput:
             )
 
     def generate_output(
-        self, openstack_resources: List[OpenstackResourceObj]
+        self, openstack_resources: Iterable[OpenstackResourceObj]
     ) -> List[Dict[str, str]]:
         """
         Generates a dictionary of queried properties from a list of openstack objects e.g. servers
@@ -88,7 +251,17 @@ class QueryOutput:
         (if we selected 'server_name' and 'server_id' as properties
         :param openstack_resources: List of openstack objects to obtain properties from - e.g. [Server1, Server2]
         :return: List containing dictionaries of the requested properties obtained from the items
+        If aggregations have been set, resources are streamed through a QueryAggregator instead - so they can
+        be given as an iterator of resources as they are listed - and one dictionary is returned per group
         """
+        if self._aggregations:
+            aggregator = QueryAggregator(
+                self._prop_handler, self._aggregations, self._aggregate_group_by
+            )
+            aggregator.add_all(openstack_resources)
+            self._results = aggregator.results()
+            return self._results
+
         self._results = [self._parse_property(item) for item in openstack_resources]
         return self._results
 
@@ -118,6 +291,9 @@ class QueryOutput:
         :return: String (html or plaintext table of results)
         """
         if results:
+            # pylint:disable=import-outside-toplevel
+            from tabulate import tabulate
+
             headers = list(results[0].keys())
             rows = [list(row.values()) for row in results]
             return tabulate(
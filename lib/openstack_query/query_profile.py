@@ -0,0 +1,72 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterable, Iterator, Optional
+
+from openstack_api.api_call_accounting import ApiCallAccounting
+
+
+class QueryProfile:
+    """
+    Records where the time went when running a query - wall time per stage (fetching, client-side filtering,
+    generating output, rendering), API calls and time per service (e.g. identity vs compute), requests made,
+    and how many items were scanned and returned
+    """
+
+    def __init__(self):
+        self.strategy: Optional[str] = None
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.api_calls = ApiCallAccounting()
+        self.items_scanned = 0
+        self.items_returned = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Context manager which adds the wall time spent inside it to a stage
+        :param name: name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def count_scanned(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Passes items through, counting them as scanned - for resources which are listed lazily
+        :param items: items to count
+        """
+        for item in items:
+            self.items_scanned += 1
+            yield item
+
+    def instrument(self, conn) -> ContextManager[None]:
+        """
+        Context manager which counts, and times, every request made through an openstacksdk connection by the
+        current thread while inside it, against the service it was made to. Requests made by other queries
+        sharing the connection, e.g. a pooled connection in the query daemon, are not counted
+        :param conn: An openstacksdk connection, as returned by OpenstackConnection
+        """
+        return self.api_calls.counting(conn.session)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the profile as a dictionary which can be attached to an action result
+        """
+        return {
+            "strategy": self.strategy,
+            "stages": {
+                name: round(seconds, 6) for name, seconds in self.stages.items()
+            },
+            "api_calls": {
+                service: {
+                    "calls": calls["calls"],
+                    "seconds": round(calls["seconds"], 6),
+                }
+                for service, calls in self.api_calls.by_service().items()
+            },
+            "requests": self.api_calls.total_requests,
+            "items_scanned": self.items_scanned,
+            "items_returned": self.items_returned,
+        }
@@ -0,0 +1,287 @@
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Type
+
+from exceptions.parse_query_error import ParseQueryError
+from custom_types.openstack_query.aliases import (
+    OpenstackResourceObj,
+    ServerSideFilters,
+)
+
+# Directory checkpoints are written to, unless QueryCheckpoint.CHECKPOINT_DIR is set
+CHECKPOINT_DIR_ENV = "OPENSTACK_QUERY_CHECKPOINT_DIR"
+DEFAULT_CHECKPOINT_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "stackstorm_openstack", "query_checkpoints"
+)
+
+# Number of resources listed between writes to the checkpoint
+CHECKPOINT_INTERVAL = 1000
+
+# Seconds a checkpoint is kept after it was last written, if its query is never resumed
+CHECKPOINT_RETENTION = 7 * 24 * 60 * 60
+
+# Resume tokens are used as file names
+RESUME_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# pylint:disable=too-many-instance-attributes
+
+
+class QueryCheckpoint:
+    """
+    Records the progress of a query which lists resources project by project - resources from projects
+    which have been fully listed, and resources listed so far from the current project (whose last ID is
+    the pagination marker to continue from). Progress is appended to a file as the query runs - after every
+    CHECKPOINT_INTERVAL resources and every completed project - so it survives the query being killed, and can
+    be loaded again by its resume token. Lightweight (raw) records are saved using their to_dict() method.
+    Checkpoints are kept in a directory only readable by the current user
+    """
+
+    # directory checkpoints are written to, overrides CHECKPOINT_DIR_ENV
+    CHECKPOINT_DIR: Optional[str] = None
+
+    # pylint:disable=too-many-arguments
+    def __init__(
+        self,
+        resource_cls: Type,
+        filter_kwargs: Optional[ServerSideFilters] = None,
+        resume_token: Optional[str] = None,
+        raw: bool = False,
+        interval: int = CHECKPOINT_INTERVAL,
+    ):
+        if resume_token is not None and not RESUME_TOKEN_PATTERN.match(resume_token):
+            raise ParseQueryError(
+                "resume_token must be 1 to 64 letters, numbers, '-' or '_'"
+            )
+        self._resource_cls = resource_cls
+        self._filter_kwargs = filter_kwargs or {}
+        self._raw = raw
+        self._interval = interval
+        self.resume_token = resume_token or uuid.uuid4().hex
+        self._completed: Dict[str, List[OpenstackResourceObj]] = {}
+        self._partial: Dict[str, List[OpenstackResourceObj]] = {}
+        # resources listed since the checkpoint was last written, by project
+        self._unwritten: Dict[str, List[OpenstackResourceObj]] = {}
+        self._unwritten_count = 0
+        self._file = None
+
+    @classmethod
+    def _dir(cls) -> str:
+        return (
+            cls.CHECKPOINT_DIR
+            or os.environ.get(CHECKPOINT_DIR_ENV)
+            or DEFAULT_CHECKPOINT_DIR
+        )
+
+    @classmethod
+    def _path(cls, resume_token: str) -> str:
+        return os.path.join(cls._dir(), f"{resume_token}.ndjson")
+
+    @classmethod
+    def open(
+        cls,
+        resume_token: Optional[str],
+        resource_cls: Type,
+        filter_kwargs: Optional[ServerSideFilters] = None,
+        raw: bool = False,
+    ) -> "QueryCheckpoint":
+        """
+        Loads the checkpoint saved under a resume token, or starts a new checkpoint saved under it if there
+        is none - so a query given a token up front can be resumed with it even if it is killed
+        :param resume_token: The token to resume from or save under, a new one is generated if not given
+        :param resource_cls: The openstacksdk resource class to restore resources as
+        :param filter_kwargs: The server side filters of the query, see load()
+        :param raw: Whether the query lists lightweight records, see load()
+        """
+        if resume_token and os.path.exists(cls._path(resume_token)):
+            return cls.load(resume_token, resource_cls, filter_kwargs, raw)
+        return cls(resource_cls, filter_kwargs, resume_token, raw)
+
+    @classmethod
+    def load(
+        cls,
+        resume_token: str,
+        resource_cls: Type,
+        filter_kwargs: Optional[ServerSideFilters] = None,
+        raw: bool = False,
+    ) -> "QueryCheckpoint":
+        """
+        Loads a checkpoint saved by an interrupted query
+        :param resume_token: The token given when the query was interrupted
+        :param resource_cls: The openstacksdk resource class to restore resources as
+        :param filter_kwargs: The server side filters of the query being resumed, which must match the saved query
+        :param raw: Whether the query being resumed lists lightweight records, which must match
+        the saved query
+        """
+        checkpoint = cls(resource_cls, filter_kwargs, resume_token, raw)
+        try:
+            with open(cls._path(resume_token), "rb") as file:
+                lines = file.readlines()
+            header = json.loads(lines[0])
+        except (OSError, ValueError, IndexError) as err:
+            raise ParseQueryError(
+                f"Could not find a saved query to resume for token {resume_token}"
+            ) from err
+
+        if header["filter_kwargs"] != json.loads(json.dumps(checkpoint._filter_kwargs)):
+            raise ParseQueryError(
+                "Cannot resume query - filters do not match the interrupted query"
+            )
+        if header.get("raw", False) != raw:
+            raise ParseQueryError(
+                "Cannot resume query - listing mode does not match the interrupted query"
+            )
+
+        valid_size = len(lines[0])
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # the query was killed part way through writing this line
+                break
+            valid_size += len(line)
+            if "completed" in record:
+                checkpoint._completed[record["completed"]] = checkpoint._partial.pop(
+                    record["completed"], []
+                )
+            else:
+                checkpoint._partial.setdefault(record["project"], []).extend(
+                    checkpoint._restore(record["resources"])
+                )
+        os.truncate(cls._path(resume_token), valid_size)
+        return checkpoint
+
+    def _restore(self, resources: List[Dict[str, Any]]) -> List[OpenstackResourceObj]:
+        if self._raw:
+            return [self._resource_cls(**resource) for resource in resources]
+        return [self._resource_cls.existing(**resource) for resource in resources]
+
+    def _dump(self, resources: List[OpenstackResourceObj]) -> List[Dict[str, Any]]:
+        if self._raw:
+            return [resource.to_dict() for resource in resources]
+        return [resource.to_dict(computed=False) for resource in resources]
+
+    def is_completed(self, project_id: str) -> bool:
+        """
+        Returns True if every resource in the project has already been listed
+        :param project_id: ID of the project
+        """
+        return project_id in self._completed
+
+    def completed(self, project_id: str) -> List[OpenstackResourceObj]:
+        """
+        Returns resources of a project which has been fully listed
+        :param project_id: ID of the project
+        """
+        return self._completed[project_id]
+
+    def partial(self, project_id: str) -> List[OpenstackResourceObj]:
+        """
+        Returns the resources listed so far from a project which is part way through being listed
+        :param project_id: ID of the project
+        """
+        return self._partial.get(project_id, [])
+
+    def marker(self, project_id: str) -> Optional[str]:
+        """
+        Returns the pagination marker to continue listing a project from - the ID of the last resource listed
+        :param project_id: ID of the project
+        """
+        resources = self._partial.get(project_id)
+        return resources[-1]["id"] if resources else None
+
+    def add(self, project_id: str, resource: OpenstackResourceObj) -> None:
+        """
+        Records a resource listed from a project, writing the checkpoint every CHECKPOINT_INTERVAL resources
+        :param project_id: ID of the project
+        :param resource: The resource listed
+        """
+        self._partial.setdefault(project_id, []).append(resource)
+        self._unwritten.setdefault(project_id, []).append(resource)
+        self._unwritten_count += 1
+        if self._unwritten_count >= self._interval:
+            self.save()
+
+    def complete(self, project_id: str) -> None:
+        """
+        Marks a project as fully listed, and writes the checkpoint
+        :param project_id: ID of the project
+        """
+        self._completed[project_id] = self._partial.pop(project_id, [])
+        self._write([{"completed": project_id}])
+
+    def save(self) -> str:
+        """
+        Writes any resources listed since the checkpoint was last written, and returns the token to resume from it
+        """
+        self._write([])
+        return self.resume_token
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Appends resources listed since the last write, followed by the records given, to the checkpoint file
+        :param records: Records to write after the resources
+        """
+        lines = [
+            {"project": project_id, "resources": self._dump(resources)}
+            for project_id, resources in self._unwritten.items()
+        ] + records
+        self._unwritten = {}
+        self._unwritten_count = 0
+        if self._file is None:
+            self._file = self._open_file()
+        self._file.write("".join(f"{json.dumps(line)}\n" for line in lines))
+        self._file.flush()
+
+    def _open_file(self):
+        """
+        Opens the checkpoint file to append to, readable only by the current user. A new file starts with the
+        details of the query, which must match when it is resumed
+        """
+        directory = self._dir()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.purge()
+        path = self._path(self.resume_token)
+        # pylint:disable=consider-using-with
+        file = os.fdopen(
+            os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600),
+            "a",
+            encoding="utf-8",
+        )
+        if file.tell() == 0:
+            file.write(
+                f"{json.dumps({'filter_kwargs': self._filter_kwargs, 'raw': self._raw})}\n"
+            )
+        return file
+
+    @classmethod
+    def purge(cls, retention: float = CHECKPOINT_RETENTION) -> None:
+        """
+        Removes checkpoints which haven't been written for the retention period, from queries never resumed
+        :param retention: Seconds to keep checkpoints for after they were last written
+        """
+        cutoff = time.time() - retention
+        try:
+            entries = list(os.scandir(cls._dir()))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.endswith(".ndjson") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def discard(self) -> None:
+        """
+        Removes the checkpoint from disk once the query it belongs to has finished
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self._path(self.resume_token))
+        except FileNotFoundError:
+            pass
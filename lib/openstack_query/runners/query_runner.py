@@ -1,73 +1,283 @@
 from abc import abstractmethod
-from typing import Optional, List, Any
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from typing import Optional, List, Any, Iterator, Dict, Hashable
 
 from enums.cloud_domains import CloudDomains
 
 from openstack_api.openstack_wrapper_base import OpenstackWrapperBase
 from openstack_api.openstack_connection import OpenstackConnection
+from openstack_query.query_profile import QueryProfile
+from openstack_query.runners.single_flight import SingleFlight, SINGLE_FLIGHT
 from custom_types.openstack_query.aliases import (
     ServerSideFilters,
     ClientSideFilterFunc,
     OpenstackResourceObj,
+    VectorisedFilterFunc,
 )
 
 # pylint:disable=too-few-public-methods
 
 
+def _freeze(value: Any) -> Any:
+    """
+    Converts dictionaries and lists (e.g. server-side filters) into tuples so they can be part of a hashable key
+    :param value: value to convert
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
 class QueryRunner(OpenstackWrapperBase):
     """
     Base class for Runner classes.
-    Runner classes encapsulate running any openstacksdk commands
+    Runner classes encapsulate running any openstacksdk commands.
+    Identical queries (same cloud, resource and server-side filters) running at the same time share one fetch,
+    see SingleFlight - client-side filters are still applied separately for each caller
     """
 
-    def __init__(self, connection_cls=OpenstackConnection):
+    def __init__(
+        self,
+        connection_cls=OpenstackConnection,
+        single_flight: Optional[SingleFlight] = None,
+    ):
         OpenstackWrapperBase.__init__(self, connection_cls)
+        self._single_flight = single_flight or SINGLE_FLIGHT
 
+    # pylint: disable=too-many-arguments
     def run(
         self,
         cloud_account: CloudDomains,
         client_side_filter_func: Optional[ClientSideFilterFunc] = None,
         server_side_filters: Optional[ServerSideFilters] = None,
         from_subset: Optional[List[Any]] = None,
+        vectorised_filter_func: Optional[VectorisedFilterFunc] = None,
+        limit: Optional[int] = None,
+        profile: Optional[QueryProfile] = None,
         **kwargs
     ) -> List[OpenstackResourceObj]:
         """
         Public method that runs the query by querying openstacksdk and then applying a filter function.
+        If a limit is given, resources are pulled lazily and no more pages are requested once enough
+        resources match.
         :param cloud_account: An Enum for the account from the clouds configuration to use
         :param client_side_filter_func: An Optional function that we can use to limit the results after querying
         openstacksdk
         :param server_side_filters: An Optional set of filter kwargs to limit the results by when querying openstacksdk
         :param from_subset: A subset of openstack resources to run query on instead of querying openstacksdk
+        :param vectorised_filter_func: An Optional vectorised version of client_side_filter_func, used instead of it
+        where it can be evaluated
+        :param limit: An Optional maximum number of resources to return
+        :param profile: An Optional QueryProfile to record stage timings, API calls and items scanned in
         :param kwargs: An extra set of kwargs to pass to internal _run_query method that changes what/how the
         openstacksdk query is run
             - valid kwargs to _run_query is specific to the runner object - see docstrings for _run_query() on the
             runner of interest.
         """
+        apply_client_side_filter = client_side_filter_func and not server_side_filters
+        stage = profile.stage if profile else lambda _: nullcontext()
 
-        with self._connection_cls(cloud_account.name.lower()) as conn:
-            resource_objects = (
-                self._parse_subset(conn, from_subset)
-                if from_subset
-                else self._run_query(conn, server_side_filters, **kwargs)
-            )
-
-        if client_side_filter_func and not server_side_filters:
-            resource_objects = self._apply_client_side_filter(
-                resource_objects, client_side_filter_func
-            )
+        with stage("fetch"):
+            if not from_subset and not limit:
+                resource_objects = self._run_shared_query(
+                    cloud_account, server_side_filters, profile, **kwargs
+                )
+            else:
+                with self._connect(cloud_account, profile) as conn:
+                    if not from_subset:
+                        resource_objects = self._run_limited_query(
+                            conn,
+                            limit,
+                            (
+                                client_side_filter_func
+                                if apply_client_side_filter
+                                else None
+                            ),
+                            server_side_filters,
+                            profile=profile,
+                            **kwargs
+                        )
+                        if profile:
+                            profile.items_returned = len(resource_objects)
+                        return resource_objects
+                    resource_objects = self._parse_subset(conn, from_subset)
+
+        if profile:
+            profile.items_scanned = len(resource_objects)
+        if apply_client_side_filter:
+            with stage("client_side_filter"):
+                resource_objects = self._apply_client_side_filter(
+                    resource_objects, client_side_filter_func, vectorised_filter_func
+                )
+        resource_objects = resource_objects[:limit] if limit else resource_objects
+        if profile:
+            profile.items_returned = len(resource_objects)
         return resource_objects
 
+    def iter_run(
+        self,
+        cloud_account: CloudDomains,
+        client_side_filter_func: Optional[ClientSideFilterFunc] = None,
+        server_side_filters: Optional[ServerSideFilters] = None,
+        profile: Optional[QueryProfile] = None,
+        **kwargs
+    ) -> Iterator[OpenstackResourceObj]:
+        """
+        Public method that runs the query like run(), but yields resources which pass the filter function as
+        they are listed rather than returning a list of them - for callers which only need to see each
+        resource once, e.g. to aggregate them, so every resource listed is not held in memory at once.
+        Resources are listed with _iter_query, so the listing is not shared with identical queries in flight
+        :param cloud_account: An Enum for the account from the clouds configuration to use
+        :param client_side_filter_func: An Optional function that we can use to limit the results after querying
+        openstacksdk
+        :param server_side_filters: An Optional set of filter kwargs to limit the results by when querying openstacksdk
+        :param profile: An Optional QueryProfile to count API calls and items scanned and returned in
+        :param kwargs: An extra set of kwargs to pass to _iter_query
+        """
+        apply_client_side_filter = client_side_filter_func and not server_side_filters
+        with self._connect(cloud_account, profile) as conn:
+            resources = self._iter_query(conn, server_side_filters, **kwargs)
+            if profile:
+                resources = profile.count_scanned(resources)
+            if apply_client_side_filter:
+                resources = filter(client_side_filter_func, resources)
+            for resource in resources:
+                if profile:
+                    profile.items_returned += 1
+                yield resource
+
+    @contextmanager
+    def _connect(
+        self, cloud_account: CloudDomains, profile: Optional[QueryProfile] = None
+    ) -> Iterator[OpenstackConnection]:
+        """
+        Opens a connection to a cloud, counting the requests this query makes through it in profile if given
+        :param cloud_account: An Enum for the account from the clouds configuration to use
+        :param profile: An Optional QueryProfile to count API calls in
+        """
+        with self._connection_cls(cloud_account.name.lower()) as conn:
+            with profile.instrument(conn) if profile else nullcontext():
+                yield conn
+
+    def _run_shared_query(
+        self,
+        cloud_account: CloudDomains,
+        server_side_filters: Optional[ServerSideFilters] = None,
+        profile: Optional[QueryProfile] = None,
+        **kwargs
+    ) -> List[OpenstackResourceObj]:
+        """
+        Runs _run_query, sharing the fetch with any identical query already in flight
+        :param cloud_account: An Enum for the account from the clouds configuration to use
+        :param server_side_filters: An Optional set of filter kwargs to limit the results by when querying openstacksdk
+        :param profile: An Optional QueryProfile to count API calls in - calls are only counted by the caller
+        which makes the fetch, not those sharing it
+        :param kwargs: An extra set of kwargs to pass to internal _run_query method
+        """
+
+        def _fetch():
+            with self._connect(cloud_account, profile) as conn:
+                return self._run_query(conn, server_side_filters, **kwargs)
+
+        key = self._fetch_key(cloud_account, server_side_filters, kwargs)
+        if key is None:
+            return _fetch()
+        return self._single_flight.do(key, _fetch)
+
+    def _fetch_key(
+        self,
+        cloud_account: CloudDomains,
+        server_side_filters: Optional[ServerSideFilters],
+        run_kwargs: Dict[str, Any],
+    ) -> Optional[Hashable]:
+        """
+        Returns a key identifying a fetch - the runner, cloud, server-side filters and extra kwargs,
+        or None if the kwargs cannot be hashed (e.g. openstack objects given), so the fetch is not shared
+        :param cloud_account: An Enum for the account from the clouds configuration to use
+        :param server_side_filters: An Optional set of filter kwargs to limit the results by when querying openstacksdk
+        :param run_kwargs: extra kwargs to pass to internal _run_query method
+        """
+        key = (
+            type(self).__name__,
+            cloud_account.name.lower(),
+            _freeze(server_side_filters),
+            _freeze(run_kwargs),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    # pylint: disable=too-many-arguments
+    def _run_limited_query(
+        self,
+        conn: OpenstackConnection,
+        limit: int,
+        filter_func: Optional[ClientSideFilterFunc] = None,
+        filter_kwargs: Optional[ServerSideFilters] = None,
+        profile: Optional[QueryProfile] = None,
+        **kwargs
+    ) -> List[OpenstackResourceObj]:
+        """
+        Runs the query, stopping as soon as limit resources have passed the filter function.
+        Without a filter function every resource listed is returned, so the limit is also used as the page size
+        :param conn: An OpenstackConnection object - used to connect to openstacksdk
+        :param limit: The maximum number of resources to return
+        :param filter_func: An Optional function that we can use to limit the results after querying openstacksdk
+        :param filter_kwargs: An Optional set of filter kwargs to limit the results by when querying openstacksdk
+        :param profile: An Optional QueryProfile to count resources scanned in
+        :param kwargs: An extra set of kwargs to pass to _iter_query
+        """
+        resources = self._iter_query(
+            conn, filter_kwargs, page_size=None if filter_func else limit, **kwargs
+        )
+        if profile:
+            resources = profile.count_scanned(resources)
+        if filter_func:
+            resources = filter(filter_func, resources)
+        return list(islice(resources, limit))
+
+    def _iter_query(
+        self,
+        conn: OpenstackConnection,
+        filter_kwargs: Optional[ServerSideFilters] = None,
+        page_size: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[OpenstackResourceObj]:
+        """
+        This method runs the query, yielding resources as they are listed so that callers can stop early.
+        Runners which can list resources lazily should override this - by default it runs _run_query
+        :param conn: An OpenstackConnection object - used to connect to openstacksdk
+        :param filter_kwargs: An Optional set of filter kwargs to limit the results by when querying openstacksdk
+        :param page_size: An Optional number of resources to request per page
+        :param kwargs: An extra set of kwargs to pass to internal _run_query method
+        """
+        # pylint:disable=unused-argument
+        return iter(self._run_query(conn, filter_kwargs, **kwargs))
+
     @staticmethod
     def _apply_client_side_filter(
-        items: List[OpenstackResourceObj], filter_func: ClientSideFilterFunc
+        items: List[OpenstackResourceObj],
+        filter_func: ClientSideFilterFunc,
+        vectorised_filter_func: Optional[VectorisedFilterFunc] = None,
     ) -> List[OpenstackResourceObj]:
         """
         Removes items from a list by running a given filter function
         :param items: List of items to query e.g. list of servers
         :param filter_func: An Optional function that we can use to limit the results after querying openstacksdk,
             - function takes an openstack resource object and returns True if it passes the filter, false if not
+        :param vectorised_filter_func: An Optional function which evaluates the filter over all items at once,
+            - function takes the list of items and returns a NumPy boolean mask, or None to use filter_func instead
         :return: List of items that match the1 given query
         """
+        if vectorised_filter_func and items:
+            mask = vectorised_filter_func(items)
+            if mask is not None:
+                return [items[i] for i in mask.nonzero()[0]]
         return [item for item in items if filter_func(item)]
 
     @abstractmethod
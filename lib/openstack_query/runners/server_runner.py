@@ -1,56 +1,130 @@
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, Any, Optional, Dict, List, Iterator, Set, Tuple, Type
 
-from openstack.compute.v2.server import Server
-from openstack.identity.v3.project import Project
-from openstack.exceptions import ResourceNotFound
+from enums.query.props.prop_enum import PropEnum
+from enums.query.props.server_properties import ServerProperties
 
 from openstack_api.openstack_connection import OpenstackConnection
+from openstack_query.runners.query_checkpoint import QueryCheckpoint
 from openstack_query.runners.query_runner import QueryRunner
 
 from exceptions.parse_query_error import ParseQueryError
+from exceptions.query_interrupted_error import QueryInterruptedError
+from structs.query.server_record import ServerRecord
 from custom_types.openstack_query.aliases import ProjectIdentifier
 
+if TYPE_CHECKING:
+    from openstack.compute.v2.server import Server
+    from openstack.identity.v3.project import Project
+
+# openstacksdk is imported when a query runs rather than with this module, as it takes a few hundred
+# milliseconds to import - see OpenstackConnection
+
 # pylint:disable=too-few-public-methods
 
 
+def _transient_errors() -> Tuple[Type[Exception], ...]:
+    """
+    Returns the errors listing servers can fail with part way through which are worth resuming from -
+    errors from the API and losing the connection to it, rather than errors in the query itself
+    """
+    # pylint:disable=import-outside-toplevel
+    from keystoneauth1.exceptions import ConnectionError as KeystoneConnectionError
+    from openstack.exceptions import HttpException
+
+    return HttpException, KeystoneConnectionError, ConnectionError, TimeoutError
+
+
 class ServerRunner(QueryRunner):
     """
     Runner class for openstack Server resource.
     ServerRunner encapsulates running any openstacksdk Server commands
     """
 
+    # properties returned by Nova when listing servers without details
+    SUMMARY_PROPS = {ServerProperties.SERVER_ID, ServerProperties.SERVER_NAME}
+
+    # pylint:disable=too-many-arguments
     def _run_query(
         self,
         conn: OpenstackConnection,
         filter_kwargs: Optional[Dict[str, str]] = None,
         from_projects: Optional[List[ProjectIdentifier]] = None,
-    ) -> List[Server]:
+        resume_token: Optional[str] = None,
+        required_props: Optional[Set[PropEnum]] = None,
+    ) -> List["Server"]:
         """
         This method runs the query by running openstacksdk commands
 
         For ServerQuery, this command gets all projects available and iteratively finds servers that belong to that
-        project
+        project. If a resume_token is given, servers are saved to a checkpoint under it as they are listed - if
+        listing fails part way through with a transient error, a QueryInterruptedError is raised holding the token,
+        and if the query is killed instead, it can be resumed with the same token
         :param conn: An OpenstackConnection object - used to connect to openstacksdk
         :param filter_kwargs: An Optional set of filter kwargs to pass to conn.compute.servers()
             to limit the servers being returned. - see https://docs.openstack.org/api-ref/compute/#list-servers
         :param from_projects: takes a list of openstack projects to run the query on
+        :param resume_token: An Optional token to save progress under, or to continue an interrupted query from.
+        If not given, no checkpoint is kept
+        :param required_props: An Optional set of the only properties the query needs - if given, servers are
+        listed as ServerRecords in the lightest mode which includes them, see _iter_query_on_project
 
         """
+        # pylint:disable=import-outside-toplevel
+        from openstack.compute.v2.server import Server
+
         projects = self._get_projects(conn, from_projects)
-        query_res = self._run_query_on_projects(conn, projects, filter_kwargs).values()
+        raw = required_props is not None
+        resource_cls = ServerRecord if raw else Server
+        checkpoint = (
+            QueryCheckpoint.open(resume_token, resource_cls, filter_kwargs, raw=raw)
+            if resume_token
+            else None
+        )
+        query_res = self._run_query_on_projects(
+            conn, projects, filter_kwargs, checkpoint, required_props
+        ).values()
+        if checkpoint:
+            checkpoint.discard()
         return [server for project_servers in query_res for server in project_servers]
 
+    def _iter_query(
+        self,
+        conn: OpenstackConnection,
+        filter_kwargs: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+        **kwargs,
+    ) -> Iterator["Server"]:
+        """
+        This method runs the query lazily - servers are listed one project and one page at a time,
+        so no further pages or projects are requested once the caller stops iterating
+        :param conn: An OpenstackConnection object - used to connect to openstacksdk
+        :param filter_kwargs: An Optional set of filter kwargs to pass to conn.compute.servers()
+        :param page_size: An Optional number of servers to request per page - passed as Nova's 'limit'
+        :param kwargs: The options given to run(), of which:
+            - from_projects: takes a list of openstack projects to run the query on
+            - required_props: An Optional set of the only properties the query needs
+        """
+        required_props: Optional[Set[PropEnum]] = kwargs.get("required_props")
+        for project in self._get_projects(conn, kwargs.get("from_projects")):
+            yield from self._iter_query_on_project(
+                conn, project, filter_kwargs, page_size, required_props
+            )
+
     def _get_projects(
         self,
         conn: OpenstackConnection,
         projects: Optional[List[ProjectIdentifier]] = None,
-    ) -> List[Project]:
+    ) -> List["Project"]:
         """
         This method gets openstack projects from a list of project identifiers
         :param conn: An OpenstackConnection object - used to connect to openstacksdk
         :param projects: A list of project identifiers to get the associated openstack project object,
         if None, gets all projects
         """
+        # pylint:disable=import-outside-toplevel
+        from openstack.exceptions import ResourceNotFound
+        from openstack.identity.v3.project import Project
+
         if not projects:
             return list(conn.identity.projects())
 
@@ -69,48 +143,155 @@ class ServerRunner(QueryRunner):
                     ) from err
         return all_projects
 
+    # pylint:disable=too-many-arguments
     def _run_query_on_projects(
         self,
         conn: OpenstackConnection,
-        projects: List[Project],
+        projects: List["Project"],
         filter_kwargs: Optional[Dict[str, str]] = None,
-    ) -> Dict[str, List[Server]]:
+        checkpoint: Optional[QueryCheckpoint] = None,
+        required_props: Optional[Set[PropEnum]] = None,
+    ) -> Dict[str, List["Server"]]:
         """
         This method is a helper function that will run the query on a list of openstack projects given and return
         a dictionary of servers that match the query grouped by project ids for which the servers belong to
         :param conn: An OpenstackConnection object - used to connect to openstacksdk
         :param projects: A list of openstacksdk projects to run query on
         :param filter_kwargs: An Optional set of filter kwargs to pass to conn.compute.servers()
+        :param checkpoint: An Optional checkpoint to record progress in, projects it has already
+        completed are not listed again. Transient errors listing servers are raised as a QueryInterruptedError
+        holding its token, any other error is raised unchanged
+        :param required_props: An Optional set of the only properties the query needs
         """
-        return {
-            project["id"]: self._run_query_on_project(conn, project, filter_kwargs)
-            for project in projects
-        }
+        results = {}
+        for project in projects:
+            try:
+                results[project["id"]] = self._run_query_on_project(
+                    conn, project, filter_kwargs, checkpoint, required_props
+                )
+            except KeyboardInterrupt:
+                if checkpoint is not None:
+                    checkpoint.save()
+                raise
+            except Exception as err:
+                if checkpoint is None or not isinstance(err, _transient_errors()):
+                    raise
+                resume_token = checkpoint.save()
+                raise QueryInterruptedError(
+                    f"Query interrupted while listing servers in project {project['id']}, "
+                    f"resume it by running with resume_token='{resume_token}'",
+                    resume_token,
+                ) from err
+        return results
 
     @staticmethod
     def _run_query_on_project(
         conn: OpenstackConnection,
-        project: Project,
+        project: "Project",
         filter_kwargs: Optional[Dict[str, str]] = None,
-    ) -> List[Server]:
+        checkpoint: Optional[QueryCheckpoint] = None,
+        required_props: Optional[Set[PropEnum]] = None,
+    ) -> List["Server"]:
         """
         This method is a helper function that will list all servers that belong to a given openstack projects
         :param conn: An OpenstackConnection object - used to connect to openstacksdk
         :param project: An openstacksdk project to run query on
         :param filter_kwargs: An Optional set of filter kwargs to pass to conn.compute.servers()
+        :param checkpoint: An Optional checkpoint to save servers to as they are listed - listing continues
+        from the checkpoint's pagination marker if the project was part way through when the query was interrupted
+        :param required_props: An Optional set of the only properties the query needs
+        """
+        if checkpoint is None:
+            return list(
+                ServerRunner._iter_query_on_project(
+                    conn, project, filter_kwargs, required_props=required_props
+                )
+            )
+        if checkpoint.is_completed(project["id"]):
+            return checkpoint.completed(project["id"])
+
+        marker = checkpoint.marker(project["id"])
+        if marker:
+            filter_kwargs = {**(filter_kwargs or {}), "marker": marker}
+        for server in ServerRunner._iter_query_on_project(
+            conn, project, filter_kwargs, required_props=required_props
+        ):
+            checkpoint.add(project["id"], server)
+        checkpoint.complete(project["id"])
+        return checkpoint.completed(project["id"])
+
+    @staticmethod
+    def _iter_query_on_project(
+        conn: OpenstackConnection,
+        project: "Project",
+        filter_kwargs: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+        required_props: Optional[Set[PropEnum]] = None,
+    ) -> Iterator["Server"]:
+        """
+        This method is a helper function that will lazily list servers that belong to a given openstack project,
+        openstacksdk only requests the next page when the previous one has been consumed
+        :param conn: An OpenstackConnection object - used to connect to openstacksdk
+        :param project: An openstacksdk project to run query on
+        :param filter_kwargs: An Optional set of filter kwargs to pass to conn.compute.servers()
+        :param page_size: An Optional number of servers to request per page - passed as Nova's 'limit'
+        :param required_props: An Optional set of the only properties the query needs. If given, servers are
+        listed as ServerRecords rather than Server objects - without details if only summary properties are needed
         """
         server_filters = {"project_id": project["id"], "all_tenants": True}
         server_filters.update(filter_kwargs if filter_kwargs else {})
-        return list(conn.compute.servers(all_projects=False, **server_filters))
+        if page_size:
+            server_filters["limit"] = page_size
+        if required_props is not None:
+            return ServerRunner._iter_raw_servers(
+                conn,
+                server_filters,
+                details=not required_props <= ServerRunner.SUMMARY_PROPS,
+            )
+        return conn.compute.servers(all_projects=False, **server_filters)
+
+    @staticmethod
+    def _iter_raw_servers(
+        conn: OpenstackConnection, server_filters: Dict[str, Any], details: bool
+    ) -> Iterator[ServerRecord]:
+        """
+        This method is a helper function that will lazily list servers straight from Nova's JSON responses,
+        without building openstacksdk Server objects. Each server is converted into a compact ServerRecord,
+        which property functions can read like a Server - fields which were not returned are None
+        :param conn: An OpenstackConnection object - used to connect to openstacksdk
+        :param server_filters: filter kwargs as would be passed to conn.compute.servers()
+        :param details: if False, list servers without details - only their ID and name are returned
+        """
+        # pylint:disable=protected-access,import-outside-toplevel
+        from openstack.compute.v2.server import Server
+        from openstack.exceptions import raise_from_response
+
+        params = Server._query_mapping._transpose(server_filters, Server)
+        microversion = Server._get_microversion(conn.compute)
+        path = "/servers/detail" if details else "/servers"
+        while True:
+            response = conn.compute.get(path, params=params, microversion=microversion)
+            raise_from_response(response)
+            body = response.json()
+            servers = body.get("servers", [])
+            yield from map(ServerRecord.from_nova, servers)
+            if not servers or not any(
+                link.get("rel") == "next" for link in body.get("servers_links", [])
+            ):
+                return
+            params = {**params, "marker": servers[-1]["id"]}
 
     def _parse_subset(
-        self, _: OpenstackConnection, subset: List[Server]
-    ) -> List[Server]:
+        self, _: OpenstackConnection, subset: List["Server"]
+    ) -> List["Server"]:
         """
         This method is a helper function that will check a list of servers to ensure that they are valid Server
         objects
         :param subset: A list of openstack Server objects
         """
+        # pylint:disable=import-outside-toplevel
+        from openstack.compute.v2.server import Server
+
         if any(not isinstance(i, Server) for i in subset):
             raise ParseQueryError("'from_subset' only accepts Server openstack objects")
         return subset
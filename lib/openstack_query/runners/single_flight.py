@@ -0,0 +1,221 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Type
+
+from custom_types.openstack_query.aliases import OpenstackResourceObj
+from structs.query.server_record import ServerRecord
+
+# Seconds lock and result files are kept in lock_dir after they were last used. Results are only read by
+# processes which were waiting while they were written, so are no use long after
+LOCK_FILE_RETENTION = 60 * 60
+
+
+def _resource_classes() -> Dict[str, Type]:
+    """
+    Returns the classes results saved in lock_dir can be rebuilt as, by name. Only these are loaded, so
+    a file written to lock_dir cannot make a process import or call anything else
+    """
+    # pylint:disable=import-outside-toplevel
+    from openstack.compute.v2.server import Server
+
+    return {"Server": Server, "ServerRecord": ServerRecord}
+
+
+# pylint:disable=too-few-public-methods
+
+
+class _Call:
+    """
+    A fetch which is in flight, that callers with the same key wait on
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[List[OpenstackResourceObj]] = None
+        self.error: Optional[BaseException] = None
+
+
+def _dump_resources(resources: List[OpenstackResourceObj]) -> List[Dict[str, Any]]:
+    """
+    Converts resources into JSON serialisable dictionaries tagged with their class, so another process can
+    rebuild them - openstacksdk resources are not picklable
+    :param resources: openstacksdk resources or lightweight records with a to_dict() method
+    """
+    # pylint:disable=import-outside-toplevel
+    from openstack.resource import Resource
+
+    return [
+        {
+            "cls": type(resource).__name__,
+            "attrs": (
+                resource.to_dict(computed=False)
+                if isinstance(resource, Resource)
+                else resource.to_dict()
+            ),
+        }
+        for resource in resources
+    ]
+
+
+def _load_resources(dumped: List[Dict[str, Any]]) -> List[OpenstackResourceObj]:
+    """
+    Rebuilds resources converted by _dump_resources, raises ValueError for a class not in _resource_classes()
+    :param dumped: list of tagged dictionaries
+    """
+    # pylint:disable=import-outside-toplevel
+    from openstack.resource import Resource
+
+    classes = _resource_classes()
+    resources = []
+    for item in dumped:
+        cls = classes.get(item["cls"])
+        if cls is None:
+            raise ValueError(f"Cannot load saved result of type {item['cls']}")
+        resources.append(
+            cls.existing(**item["attrs"])
+            if issubclass(cls, Resource)
+            else cls(**item["attrs"])
+        )
+    return resources
+
+
+class SingleFlight:
+    """
+    Coalesces identical fetches which are in flight at the same time, so that they share one set of API calls
+    and one result. Within a process, callers with the same key wait for the first caller's fetch.
+    If lock_dir is given, fetches are also coalesced across processes - a file lock per key makes other processes
+    wait, and the result is written to lock_dir for those which started waiting before it finished. Files in
+    lock_dir which haven't been used for LOCK_FILE_RETENTION are removed.
+    If ttl is given, a finished fetch's result is also reused by callers with the same key for ttl seconds -
+    for long-lived processes, such as the query daemon, which run the same queries repeatedly
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, ttl: Optional[float] = None):
+        self._lock_dir = lock_dir
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # key -> (time the result expires, result)
+        self._results: Dict[Hashable, Tuple[float, List[OpenstackResourceObj]]] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fetch: Callable[[], List[OpenstackResourceObj]],
+    ) -> List[OpenstackResourceObj]:
+        """
+        Runs fetch, unless a fetch with the same key is already in flight - then waits for it (or raises its
+        error). Every caller gets its own copy of the result
+        :param key: key identifying the fetch, e.g. cloud, resource type and server-side filters
+        :param fetch: function which lists the resources
+        """
+        with self._lock:
+            expires, result = self._results.get(key, (0, None))
+            if time.monotonic() < expires:
+                return list(result)
+            self._results.pop(key, None)
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return list(call.result)
+
+        try:
+            call.result = (
+                self._do_cross_process(key, fetch) if self._lock_dir else fetch()
+            )
+            if self._ttl:
+                with self._lock:
+                    now = time.monotonic()
+                    # drop results which have expired, so keys which aren't requested again are not kept
+                    for expired in [
+                        k for k, (expires, _) in self._results.items() if expires <= now
+                    ]:
+                        del self._results[expired]
+                    self._results[key] = (now + self._ttl, call.result)
+            # followers and later callers get copies too, so the leader can't change the list they share
+            return list(call.result)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def clear(self) -> None:
+        """
+        Forgets every result kept for the ttl, so the next call for each key fetches again
+        """
+        with self._lock:
+            self._results.clear()
+
+    def _do_cross_process(
+        self,
+        key: Hashable,
+        fetch: Callable[[], List[OpenstackResourceObj]],
+    ) -> List[OpenstackResourceObj]:
+        """
+        Runs fetch holding a file lock for the key. If another process finished the same fetch while this
+        one was waiting for the lock, its saved result is used instead
+        :param key: key identifying the fetch
+        :param fetch: function which lists the resources
+        """
+        os.makedirs(self._lock_dir, mode=0o700, exist_ok=True)
+        self._purge()
+        name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        result_path = os.path.join(self._lock_dir, f"{name}.json")
+        started = time.time()
+
+        with open(
+            os.path.join(self._lock_dir, f"{name}.lock"), "w", encoding="utf-8"
+        ) as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if (
+                    os.path.exists(result_path)
+                    and os.path.getmtime(result_path) >= started
+                ):
+                    with open(result_path, "r", encoding="utf-8") as file:
+                        return _load_resources(json.load(file))
+
+                result = fetch()
+                with open(f"{result_path}.tmp", "w", encoding="utf-8") as file:
+                    json.dump(_dump_resources(result), file)
+                os.replace(f"{result_path}.tmp", result_path)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _purge(self) -> None:
+        """
+        Removes lock and result files in lock_dir which haven't been used for LOCK_FILE_RETENTION.
+        Lock files which are held are kept - one removed just as another process opens it only means that
+        process's fetch is not coalesced
+        """
+        cutoff = time.time() - LOCK_FILE_RETENTION
+        for entry in os.scandir(self._lock_dir):
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith(".lock"):
+                    with open(entry.path, "r", encoding="utf-8") as lock_file:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        os.remove(entry.path)
+                else:
+                    os.remove(entry.path)
+            except (BlockingIOError, FileNotFoundError):
+                pass
+
+
+# shared by all runners in the process, unless a runner is given its own
+SINGLE_FLIGHT = SingleFlight()
@@ -1,6 +1,11 @@
+from typing import Dict
+
 import requests
 from requests.auth import HTTPBasicAuth
 
+# Jira Service Desk endpoint tickets are created with
+TICKETS_URL = "https://stfc.atlassian.net/rest/servicedeskapi/request"
+
 
 # pylint: disable=too-many-arguments
 def post_ticket(
@@ -14,21 +19,34 @@ def post_ticket(
     """
 
     return requests.post(
-        "https://stfc.atlassian.net/rest/servicedeskapi/request",
+        TICKETS_URL,
         auth=HTTPBasicAuth(email, api_key),
         headers={
             "Accept": "application/json",
             "Content-Type": "application/json",
         },
-        json={
-            "requestFieldValues": {
-                "summary": tickets_info["title"].format(p=ticket_details["dataTitle"]),
-                "description": tickets_info["body"].format(
-                    p=ticket_details["dataBody"]
-                ),
-            },
-            "serviceDeskId": service_desk_id,  # Point this at relevant service desk
-            "requestTypeId": request_type_id,
-        },
+        json=ticket_payload(
+            tickets_info, ticket_details, service_desk_id, request_type_id
+        ),
         timeout=300,
     )
+
+
+def ticket_payload(
+    tickets_info, ticket_details, service_desk_id, request_type_id
+) -> Dict:
+    """
+    Returns the request body which creates a ticket in atlassian
+    :param dict tickets_info: Basic data that is needed to create the ticket - the title and body templates
+    :param dict ticket_details: The values to format the title and body templates with
+    :param str service_desk_id: The service desk to send the ticket to
+    :param str request_type_id: The type of ticket to create
+    """
+    return {
+        "requestFieldValues": {
+            "summary": tickets_info["title"].format(p=ticket_details["dataTitle"]),
+            "description": tickets_info["body"].format(p=ticket_details["dataBody"]),
+        },
+        "serviceDeskId": service_desk_id,  # Point this at relevant service desk
+        "requestTypeId": request_type_id,
+    }
@@ -0,0 +1,53 @@
+from typing import Callable, Optional
+
+from urllib3.util.retry import Retry
+
+# Requests failing with these statuses are retried with an exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Statuses a request is turned away with before it is acted on, so it is safe to retry any request
+REJECTED_STATUSES = (429,)
+
+# Methods which don't change anything on the server, so repeating them has no effect
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class SafeRetry(Retry):
+    """
+    A urllib3 retry policy which never repeats a change the server may have already made.
+    Connection errors (the request was never sent) and REJECTED_STATUSES responses are retried for every
+    method. Read errors and other RETRY_STATUSES responses are only retried for SAFE_METHODS - a POST or DELETE
+    which times out or fails with a 5xx may have been carried out anyway, and retrying it would create a
+    duplicate or fail with a conflict
+    """
+
+    def __init__(
+        self, *args, before_retry: Optional[Callable[[], None]] = None, **kwargs
+    ):
+        """
+        Takes the same arguments as urllib3.util.retry.Retry, with defaults for the statuses and methods
+        :param before_retry: Function called before every retry, e.g. to wait for a rate limiter
+        """
+        kwargs.setdefault("status_forcelist", RETRY_STATUSES)
+        kwargs.setdefault("allowed_methods", SAFE_METHODS)
+        kwargs.setdefault("respect_retry_after_header", True)
+        kwargs.setdefault("raise_on_status", False)
+        super().__init__(*args, **kwargs)
+        self.before_retry = before_retry
+
+    def new(self, **kw) -> "SafeRetry":
+        retry = super().new(**kw)
+        retry.before_retry = self.before_retry
+        return retry
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code in REJECTED_STATUSES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.before_retry:
+            self.before_retry()
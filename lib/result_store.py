@@ -0,0 +1,162 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from exceptions.item_not_found_error import ItemNotFoundError
+
+# Directory offloaded results are written to. Actions which load results may run on a different action runner
+# to the one which offloaded them, so on multi-node deployments this should be shared storage. Results are
+# only offloaded if it is set
+STORE_DIR_ENV = "OPENSTACK_RESULT_STORE_DIR"
+# Results larger than this many bytes of JSON are offloaded, unless given
+THRESHOLD_ENV = "OPENSTACK_RESULT_OFFLOAD_BYTES"
+DEFAULT_THRESHOLD = 256 * 1024
+# seconds offloaded results are kept for, older ones are removed when another result is offloaded
+DEFAULT_RETENTION = 7 * 24 * 60 * 60
+
+# key identifying an offloaded result in an action's output
+HANDLE_KEY = "result_handle"
+_HANDLE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ResultStore:
+    """
+    Stores large action results as compressed files, so actions can return a small handle and summary instead
+    of passing the whole result through StackStorm's database and message bus. Downstream actions load results
+    from handles with resolve(), which returns anything else given unchanged. Results are only offloaded when a
+    store directory is configured - there is no default, as a node-local directory can't be read by actions
+    running on another node.
+    This class is used as follows:
+        return ResultStore().offload(result)
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        threshold: Optional[int] = None,
+        retention: float = DEFAULT_RETENTION,
+    ):
+        """
+        :param root: Directory to write results to - defaults to the OPENSTACK_RESULT_STORE_DIR environment
+        variable. If neither is set, results are never offloaded
+        :param threshold: Results larger than this many bytes of JSON are offloaded - defaults to the
+        OPENSTACK_RESULT_OFFLOAD_BYTES environment variable, or 256KiB
+        :param retention: Seconds offloaded results are kept for
+        """
+        self.root = root or os.environ.get(STORE_DIR_ENV)
+        if threshold is None:
+            threshold = int(os.environ.get(THRESHOLD_ENV, DEFAULT_THRESHOLD))
+        self.threshold = threshold
+        self.retention = retention
+
+    def offload(self, result: Any) -> Any:
+        """
+        Returns the result unchanged if it is small enough to return inline, otherwise writes it to the store
+        and returns a handle to it along with a summary. Results which can't be serialised as JSON, or any
+        result if no store directory is configured, are returned unchanged
+        :param result: An action's result
+        """
+        if not self.root:
+            return result
+        try:
+            serialised = json.dumps(result).encode("utf-8")
+        except (TypeError, ValueError):
+            return result
+        if len(serialised) <= self.threshold:
+            return result
+
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        self.purge()
+        handle_id = uuid.uuid4().hex
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file, gzip.GzipFile(
+                fileobj=file, mode="wb"
+            ) as compressed:
+                compressed.write(serialised)
+            os.replace(tmp_path, self._path(handle_id))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return {
+            HANDLE_KEY: handle_id,
+            "bytes": len(serialised),
+            "summary": summarise(result),
+        }
+
+    def resolve(self, value: Any) -> Any:
+        """
+        Returns the result a handle refers to, or the value unchanged if it isn't a handle
+        :param value: A handle returned by offload, or a result returned inline
+        """
+        if not is_handle(value):
+            return value
+        if not self.root:
+            raise ItemNotFoundError(
+                f"Offloaded result {value[HANDLE_KEY]} could not be loaded, {STORE_DIR_ENV} is not set"
+            )
+        path = self._path(value[HANDLE_KEY])
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError as err:
+            raise ItemNotFoundError(
+                f"Offloaded result {value[HANDLE_KEY]} could not be found, it may have expired"
+            ) from err
+
+    def purge(self) -> None:
+        """
+        Removes offloaded results older than the retention period
+        """
+        cutoff = time.time() - self.retention
+        for entry in os.scandir(self.root):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                # removed by another action at the same time
+                pass
+
+    def _path(self, handle_id: str) -> str:
+        if not _HANDLE_ID.match(handle_id):
+            raise ValueError(f"Invalid result handle {handle_id!r}")
+        return os.path.join(self.root, f"{handle_id}.json.gz")
+
+
+def is_handle(value: Any) -> bool:
+    """
+    Returns True if a value is a handle to an offloaded result
+    :param value: An action's result
+    """
+    return isinstance(value, dict) and isinstance(value.get(HANDLE_KEY), str)
+
+
+def summarise(result: Any) -> Dict[str, Any]:
+    """
+    Returns a short description of a result to return along with its handle - the number of items in a list,
+    or for a dictionary, the number of items in each of its lists and dictionaries along with its other values
+    :param result: The result offloaded
+    """
+    if isinstance(result, list):
+        return {"items": len(result)}
+    if isinstance(result, dict):
+        return {
+            key: (
+                {"items": len(value)}
+                if isinstance(value, (list, dict))
+                else _truncate(value)
+            )
+            for key, value in result.items()
+        }
+    return {"type": type(result).__name__}
+
+
+def _truncate(value: Any, length: int = 200) -> Any:
+    if isinstance(value, str) and len(value) > length:
+        return value[:length] + "..."
+    return value
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from enums.query.props.prop_enum import PropEnum
+from enums.query.query_aggregations import QueryAggregations
+
+
+@dataclass
+class QueryAggregateDetails:
+    """
+    Structured data passed to a Query<Resource> object when calling the aggregate() function
+    describes one aggregation to calculate per group.
+    COUNT needs no prop, TOP_K uses k to set how many of the most common values to keep
+    """
+
+    aggregation: QueryAggregations
+    prop: Optional[PropEnum] = None
+    k: int = 10
@@ -2,6 +2,14 @@ from dataclasses import dataclass
 from typing import Optional, List
 from enums.query.query_output_types import QueryOutputTypes
 from enums.query.props.prop_enum import PropEnum
+from exceptions.parse_query_error import ParseQueryError
+
+# output types which are written to output_path, returning a reference to the file instead of the results
+FILE_OUTPUT_TYPES = {
+    QueryOutputTypes.TO_NDJSON,
+    QueryOutputTypes.TO_CSV,
+    QueryOutputTypes.TO_JSON,
+}
 
 
 @dataclass
@@ -14,6 +22,9 @@ class QueryOutputDetails:
 
     properties_to_select: Optional[List[PropEnum]] = None
     output_type: Optional[QueryOutputTypes] = None
+    profile: bool = False
+    output_path: Optional[str] = None
+    resume_token: Optional[str] = None
 
     @staticmethod
     def from_kwargs(prop_cls: PropEnum, **kwargs):
@@ -24,4 +35,15 @@ class QueryOutputDetails:
         """
         props = [prop_cls.from_string(prop) for prop in kwargs["properties_to_select"]]
         output_type = QueryOutputTypes.from_string(kwargs["output_type"])
-        return QueryOutputDetails(properties_to_select=props, output_type=output_type)
+        output_path = kwargs.get("output_path")
+        if output_type in FILE_OUTPUT_TYPES and not output_path:
+            raise ParseQueryError(
+                f"output_path is required for output type {output_type.name.lower()}"
+            )
+        return QueryOutputDetails(
+            properties_to_select=props,
+            output_type=output_type,
+            profile=kwargs.get("profile", False),
+            output_path=output_path,
+            resume_token=kwargs.get("resume_token"),
+        )
@@ -0,0 +1,56 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+# Nova's JSON key for each ServerRecord field
+NOVA_SERVER_KEYS = {
+    "id": "id",
+    "name": "name",
+    "description": "description",
+    "status": "status",
+    "created_at": "created",
+    "updated_at": "updated",
+    "user_id": "user_id",
+    "host_id": "hostId",
+    "project_id": "tenant_id",
+}
+
+# Position of each ServerRecord field in the tuple, in the same order as NOVA_SERVER_KEYS
+FIELD_INDEXES = {field: index for index, field in enumerate(NOVA_SERVER_KEYS)}
+
+
+class ServerRecord(NamedTuple):
+    """
+    Compact, immutable record of the server fields that ServerProperties are read from.
+    Used instead of openstacksdk Server objects for lightweight queries - a record is a plain tuple,
+    with no per-instance attribute dicts, resource components or computed location.
+    Fields can be read by name as attributes or by subscript (record["name"]), like a Server object
+    """
+
+    id: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    user_id: Optional[str] = None
+    host_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            # only fields can be read by name - not tuple methods such as count or index
+            return tuple.__getitem__(self, FIELD_INDEXES[key])
+        return tuple.__getitem__(self, key)
+
+    @classmethod
+    def from_nova(cls, server: Dict[str, Any]) -> "ServerRecord":
+        """
+        Creates a record from a server as returned in Nova's JSON, fields not returned are None
+        :param server: A dictionary of a server from a list servers response
+        """
+        return cls(*(server.get(key) for key in NOVA_SERVER_KEYS.values()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the record as a dictionary of field names to values
+        """
+        return dict(zip(FIELD_INDEXES, self))
@@ -0,0 +1,194 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from requests.exceptions import RequestException
+
+from post_ticket import TICKETS_URL, ticket_payload
+from request_retry import SafeRetry
+
+# Number of tickets created concurrently
+MAX_CONCURRENT_REQUESTS = 4
+
+# Jira Cloud rate limits requests per user, keep well below it so large batches aren't throttled
+REQUESTS_PER_SECOND = 5.0
+
+# Seconds to wait for Jira to create a single ticket
+TICKET_TIMEOUT = 60
+
+# pylint: disable=too-few-public-methods
+
+
+class TokenBucket:
+    """
+    Limits how often an operation runs across threads - tokens are added at a fixed rate up to capacity,
+    and each call to acquire() takes one, waiting until it is available
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        :param rate: Tokens added per second
+        :param capacity: Maximum tokens held, the number of calls which can run at once after being idle.
+        Defaults to rate, so at most one second's worth of calls can burst
+        :param clock: Function returning the current time in seconds
+        :param sleep: Function which waits for a number of seconds
+        """
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self._capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Takes a token, waiting until one is available. Tokens are reserved in order, so waiting callers are
+        let through at the rate given rather than all at once
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+        if wait:
+            self._sleep(wait)
+
+
+class TicketDispatcher:
+    """
+    Creates tickets in Jira Service Desk concurrently over a shared keep-alive session, limited to a number of
+    requests per second. Requests turned away with a 429 response or which fail to connect are retried, taking
+    another token from the rate limit each time - other failures aren't, as Jira may have created the ticket
+    anyway and retrying would create a duplicate, see SafeRetry.
+    This class is used as follows:
+        TicketDispatcher(email, api_key).create_tickets(tickets_info, service_desk_id, request_type_id)
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        url: str = TICKETS_URL,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        requests_per_second: float = REQUESTS_PER_SECOND,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+    ):
+        """
+        :param email: Email of the account used to log in to atlassian
+        :param api_key: API token of the account used to log in to atlassian
+        :param url: The endpoint tickets are created with
+        :param max_concurrent: Maximum number of tickets created at once
+        :param requests_per_second: Maximum number of tickets created per second
+        :param retries: Number of times a request is retried on a connection error or a 429 response
+        :param backoff_factor: Backoff factor between retries, see urllib3.util.retry.Retry
+        """
+        self._url = url
+        self._max_concurrent = max_concurrent
+        self._bucket = TokenBucket(requests_per_second)
+        self._session = requests.Session()
+        self._session.auth = HTTPBasicAuth(email, api_key)
+        self._session.headers.update(
+            {"Accept": "application/json", "Content-Type": "application/json"}
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_concurrent,
+            max_retries=SafeRetry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                before_retry=self._bucket.acquire,
+            ),
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def create_tickets(
+        self, tickets_info: Dict, service_desk_id: str, request_type_id: str
+    ) -> List[Dict]:
+        """
+        Creates a ticket for every entry in tickets_info["server_list"], returning the result of each in the
+        same order. Every ticket is attempted, failures are returned rather than raised
+        :param tickets_info: The title and body templates along with the values for each ticket,
+        see CheckActions.create_ticket
+        :param service_desk_id: The service desk to send the tickets to
+        :param request_type_id: The type of ticket to create
+        """
+        with ThreadPoolExecutor(max_workers=self._max_concurrent) as executor:
+            return list(
+                executor.map(
+                    lambda ticket: self.create_ticket(
+                        tickets_info, ticket, service_desk_id, request_type_id
+                    ),
+                    tickets_info["server_list"],
+                )
+            )
+
+    def create_ticket(
+        self,
+        tickets_info: Dict,
+        ticket_details: Dict,
+        service_desk_id: str,
+        request_type_id: str,
+    ) -> Dict:
+        """
+        Creates a single ticket, returning its summary, whether it was created, the last status returned,
+        the key of the issue created and the error if it failed
+        :param tickets_info: The title and body templates
+        :param ticket_details: The values to format the templates with for this ticket
+        :param service_desk_id: The service desk to send the ticket to
+        :param request_type_id: The type of ticket to create
+        """
+        payload = ticket_payload(
+            tickets_info, ticket_details, service_desk_id, request_type_id
+        )
+        result = {
+            "summary": payload["requestFieldValues"]["summary"],
+            "created": False,
+            "status": None,
+            "issue_key": None,
+            "error": None,
+        }
+        self._bucket.acquire()
+        try:
+            response = self._session.post(
+                self._url, json=payload, timeout=TICKET_TIMEOUT
+            )
+        except RequestException as err:
+            result["error"] = str(err)
+            return result
+
+        result["status"] = response.status_code
+        if response.status_code != 201:
+            result["error"] = response.text
+            return result
+        result["created"] = True
+        try:
+            result["issue_key"] = response.json().get("issueKey")
+        except ValueError:
+            pass
+        return result
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
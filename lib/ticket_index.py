@@ -0,0 +1,168 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# File the index is kept in, unless given
+INDEX_FILE_ENV = "OPENSTACK_TICKET_INDEX_FILE"
+DEFAULT_INDEX_FILE = os.path.join(
+    os.path.expanduser("~"), ".cache", "stackstorm_openstack", "ticket_index.json"
+)
+# seconds an issue is remembered for after it was last reported. The slowest sensors reporting issues poll
+# weekly, so this is a few poll intervals - an issue still found on the next poll, even one which runs late
+# or is missed, is still known and isn't ticketed again
+DEFAULT_TTL = 3 * 7 * 24 * 60 * 60
+
+
+def fingerprint(title: str, entry: Dict) -> str:
+    """
+    Returns an ID for an issue, the same every time it is reported - a hash of the title template it is
+    reported with, the values the title is formatted with and the ID of the resource in the body if it has one,
+    so resources which share a title (e.g. snapshots with the same name) are different issues
+    :param title: The title template, e.g. tickets_info["title"]
+    :param entry: The values for this issue, e.g. tickets_info["server_list"][0]
+    """
+    resource_id = (entry.get("dataBody") or {}).get("id")
+    key = json.dumps(
+        [title, entry["dataTitle"], resource_id], sort_keys=True, default=str
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class TicketIndex:
+    """
+    Remembers which issues have been ticketed, so checks and sensors which report the same issues on every run
+    don't create duplicate tickets. Issues are forgotten once they haven't been reported for the ttl, or once
+    they are resolved - either of which lets them be ticketed again if they come back.
+    The index is a file shared between processes, locked while in use. This class is used as follows:
+        with TicketIndex() as index:
+            new_entries, known_entries = index.filter_new(tickets_info)
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        :param path: File to keep the index in - defaults to the OPENSTACK_TICKET_INDEX_FILE environment
+        variable, or a file in the user's cache directory
+        :param ttl: Seconds an issue is remembered for after it was last reported - should be several times the
+        interval the issue is checked for, so it is reported again before it is forgotten
+        :param clock: Function returning the current time in seconds
+        """
+        self.path = path or os.environ.get(INDEX_FILE_ENV) or DEFAULT_INDEX_FILE
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: Dict[str, Dict] = {}
+        self._lock_file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # pylint:disable=consider-using-with
+        self._lock_file = open(f"{self.path}.lock", "w", encoding="utf-8")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._entries = self._load()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self._save()
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def is_known(self, issue: str) -> bool:
+        """
+        Returns True if an issue has been ticketed and isn't resolved
+        :param issue: The issue's fingerprint
+        """
+        entry = self._entries.get(issue)
+        return entry is not None and not entry.get("resolved")
+
+    def filter_new(self, tickets_info: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Splits the issues reported into those which need a ticket and those which already have one, noting
+        that the known issues are still being reported
+        :param tickets_info: The title and body templates along with the values for each issue,
+        see CheckActions.create_ticket
+        :return: A tuple of the new entries, and the entries for issues already ticketed
+        """
+        new_entries, known_entries = [], []
+        now = self._clock()
+        for entry in tickets_info["server_list"]:
+            issue = fingerprint(tickets_info["title"], entry)
+            if self.is_known(issue):
+                self._entries[issue]["last_seen"] = now
+                known_entries.append(entry)
+            else:
+                new_entries.append(entry)
+        return new_entries, known_entries
+
+    def record(self, title: str, entry: Dict, issue_key: Optional[str] = None) -> None:
+        """
+        Remembers that a ticket was created for an issue
+        :param title: The title template the issue was reported with
+        :param entry: The values for the issue, an entry of tickets_info["server_list"]
+        :param issue_key: The key of the ticket created
+        """
+        now = self._clock()
+        self._entries[fingerprint(title, entry)] = {
+            "title": title,
+            "issue_key": issue_key,
+            "first_seen": now,
+            "last_seen": now,
+            "resolved": None,
+        }
+
+    def resolve_missing(self, title: str, entries: Iterable[Dict]) -> int:
+        """
+        Marks issues reported with a title template as resolved if they aren't in a complete set of the issues
+        found for it, so they are ticketed again if they come back. Returns the number of issues resolved
+        :param title: The title template issues were reported with
+        :param entries: The values for every issue found, e.g. tickets_info["server_list"]
+        """
+        found = {fingerprint(title, entry) for entry in entries}
+        now = self._clock()
+        resolved = 0
+        for issue, entry in self._entries.items():
+            if entry["title"] == title and issue not in found and not entry["resolved"]:
+                entry["resolved"] = now
+                resolved += 1
+        return resolved
+
+    def _load(self) -> Dict[str, Dict]:
+        """
+        Reads the index, leaving out issues which haven't been reported for the ttl
+        """
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return {}
+        cutoff = self._clock() - self.ttl
+        return {
+            issue: entry
+            for issue, entry in entries.items()
+            if max(entry["last_seen"], entry["resolved"] or 0) >= cutoff
+        }
+
+    def _save(self) -> None:
+        """
+        Writes the index to a temporary file in the same directory, then moves it into place
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)), prefix=".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self._entries, file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,7 +1,10 @@
-from datetime import datetime
+import json
 from st2reactor.sensor.base import PollingSensor
 from st2reactor.container.sensor_wrapper import SensorService
 from openstack_api.openstack_connection import OpenstackConnection
+from deleting_machines import get_deleting_machines, filter_already_ticketed
+
+TICKETED_KEY = "deletingmachines.ticketed"
 
 
 class DeletingMachinesSensor(PollingSensor):
@@ -12,6 +15,8 @@ class DeletingMachinesSensor(PollingSensor):
         )
         self.sensor_service: SensorService = sensor_service
         self._logger = self.sensor_service.get_logger(name=self.__class__.__name__)
+        # IDs of servers that have already been dispatched, so they are not ticketed twice
+        self._ticketed = set()
 
     # pylint: disable=missing-function-docstring
     def add_trigger(self, trigger):
@@ -27,7 +32,8 @@ class DeletingMachinesSensor(PollingSensor):
         pass
 
     def setup(self):
-        pass
+        stored = self.sensor_service.get_value(TICKETED_KEY, local=True)
+        self._ticketed = set(json.loads(stored)) if stored else set()
 
     def poll(self, cloud_account: str = "dev-admin"):
         """
@@ -41,12 +47,14 @@ class DeletingMachinesSensor(PollingSensor):
         }
 
         with OpenstackConnection(cloud_name=cloud_account) as conn:
-            projects = conn.list_projects()
-        for project in projects:
-            deleted = self._check_deleted(project=project["id"], cloud=cloud_account)
-            print(output["server_list"])
-            output["server_list"].extend(deleted)
-        print(output["server_list"])
+            deleting = get_deleting_machines(conn, minutes=10)
+
+        new_entries, self._ticketed = filter_already_ticketed(deleting, self._ticketed)
+        self.sensor_service.set_value(
+            TICKETED_KEY, json.dumps(sorted(self._ticketed)), local=True
+        )
+
+        output["server_list"].extend(new_entries)
         if output["server_list"]:
             self.sensor_service.dispatch_with_context(
                 payload=output,
@@ -54,41 +62,5 @@ class DeletingMachinesSensor(PollingSensor):
             )
             return output
 
-        print("checks complete, no servers found")
-        print(output)
-        return output
-
-    @staticmethod
-    def _check_deleted(cloud: str, project: str):
-        """
-        Runs the check for deleting machines on a per-project basis
-        """
-        output = []
-
-        print("Checking project", project)
-        with OpenstackConnection(cloud_name=cloud) as conn:
-            server_list = conn.compute.servers(all_tenants=True, project_id=project)
-
-            # Loop through each server in the project/list
-            for i in server_list:
-                server = conn.compute.get_server(i["id"])
-                # Take current time and check difference between updated time
-                since_update = datetime.utcnow() - datetime.strptime(
-                    server.updated_at, "%Y-%m-%dT%H:%M:%Sz"
-                )
-                # Check if server has been stuck in deleting for too long.
-                # (uses the last updated time so if changes have been made
-                # to the server while deleting the check may not work.)
-                if server.status == "DELETING" and since_update.total_seconds() >= 600:
-                    # Append data to output array
-                    output.append(
-                        {
-                            "dataTitle": {
-                                "id": str(server.id),
-                                "action": str(server.status),
-                            },
-                            "dataBody": {"id": server.id},
-                        }
-                    )
-                    print(output)
+        self._logger.info("checks complete, no new servers found")
         return output
@@ -1,9 +1,15 @@
-import subprocess
 import logging
 import requests
 from st2reactor.sensor.base import Sensor
 from st2reactor.container.sensor_wrapper import SensorService
-from amphorae import get_amphorae
+from amphorae import get_amphorae, find_unreachable
+
+# Number of consecutive failed pings before an amphora is reported
+PING_FAILURE_THRESHOLD = 3
+# Seconds between pings of an amphora which didn't respond
+PING_RETRY_INTERVAL = 5
+# Maximum number of pings in flight at once
+PING_MAX_CONCURRENT = 32
 
 
 # pylint: disable=abstract-method
@@ -40,10 +46,11 @@ class LoadbalancerSensor(Sensor):
             logging.critical("The status code was: %s ", str(amphorae.status_code))
             logging.critical("The JSON response was: \n %s", str(amph_json))
 
-        # Gets list of amphorae and iterates through it to check the loadbalancer and amphora status.
+        # Pings every amphora concurrently, then iterates through them to check the loadbalancer and amphora status.
+        unreachable = self._ping_amphorae(amph_json["amphorae"])
         for i in amph_json["amphorae"]:
             status = self._check_status(i)
-            ping_result = self._ping_lb(i["lb_network_ip"])
+            ping_result = "error" if i["id"] in unreachable else "success"
             # This section builds out the ticket for each one with an error
             if status[0].lower() == "error" and ping_result.lower() == "error":
                 output["server_list"].append(
@@ -133,18 +140,17 @@ class LoadbalancerSensor(Sensor):
 
         return ["error", status]
 
-    # pylint: disable=invalid-name
-    @staticmethod
-    def _ping_lb(ip):
-        # Runs the ping command to check that loadbalancer is up
-        response = subprocess.run(["ping", "-q", "-c", "1", ip], check=False)
-        # Checks output of ping command
-        if response.returncode == 0:
-            logging.info(msg="Successfully pinged " + ip)
-            return "success"
-
-        logging.info(msg=ip + " is down")
-        return "error"
+    def _ping_amphorae(self, amphorae):
+        # Pings the loadbalancer network IP of each amphora, returning the IDs of those that are down
+        unreachable = find_unreachable(
+            {amphora["id"]: amphora["lb_network_ip"] for amphora in amphorae},
+            failure_threshold=PING_FAILURE_THRESHOLD,
+            retry_interval=PING_RETRY_INTERVAL,
+            max_concurrent=PING_MAX_CONCURRENT,
+        )
+        for amphora_id in unreachable:
+            logging.info(msg="Amphora " + amphora_id + " is down")
+        return unreachable
 
     def add_trigger(self, trigger):
         pass
@@ -45,3 +45,54 @@ class TestServerQueryActions(OpenstackActionTestBase):
         )
         mock_server_manager.assert_called_once_with(cloud_account=CloudDomains.DEV)
         mock_method.assert_called_once_with(**self.args)
+
+    @patch("src.server_query_actions.ServerManager")
+    @patch("src.server_query_actions.run_query")
+    def test_run_sends_query_to_daemon(self, mock_run_query, mock_server_manager):
+        """
+        Tests that queries are sent to the query daemon, with running in-process as the fallback
+        """
+        res = self.action.run(
+            submodule="search_all", cloud_account=self.mock_cloud_account, **self.args
+        )
+        mock_run_query.assert_called_once()
+        args, kwargs = mock_run_query.call_args
+        self.assertEqual(args, ("server", "search_all", "dev", self.args))
+        self.assertEqual(res, mock_run_query.return_value)
+        mock_server_manager.assert_not_called()
+
+        kwargs["fallback"]()
+        mock_server_manager.return_value.search_all.assert_called_once_with(**self.args)
+
+    @patch("src.server_query_actions.ResultStore")
+    @patch("src.server_query_actions.run_query")
+    def test_run_offloads_result(self, mock_run_query, mock_result_store):
+        """
+        Tests that with offload_result, query results are passed to a ResultStore, which returns them inline
+        or a handle to them
+        """
+        res = self.action.run(
+            submodule="search_all",
+            cloud_account=self.mock_cloud_account,
+            offload_result=True,
+            **self.args,
+        )
+        mock_run_query.assert_called_once()
+        self.assertEqual(mock_run_query.call_args[0][3], self.args)
+        mock_offload = mock_result_store.return_value.offload
+        mock_offload.assert_called_once_with(mock_run_query.return_value)
+        self.assertEqual(res, mock_offload.return_value)
+
+    @patch("src.server_query_actions.ResultStore")
+    @patch("src.server_query_actions.run_query")
+    def test_run_result_not_offloaded_by_default(
+        self, mock_run_query, mock_result_store
+    ):
+        """
+        Tests that query results are returned inline unless offload_result is set
+        """
+        res = self.action.run(
+            submodule="search_all", cloud_account=self.mock_cloud_account, **self.args
+        )
+        mock_result_store.assert_not_called()
+        self.assertEqual(res, mock_run_query.return_value)
@@ -0,0 +1,89 @@
+"""
+Benchmarks string filter functions over a large number of resources.
+These are not collected as tests - run with:
+    PYTHONPATH=lib python -m tests.benchmarks.bench_client_side_handler_string
+"""
+
+import random
+import string
+import timeit
+
+from enums.query.query_presets import QueryPresetsString
+from openstack_query.handlers.client_side_handler_string import ClientSideHandlerString
+
+from tests.lib.openstack_query.mocks.mocked_props import MockProperties
+
+NUM_NAMES = 100_000
+NUM_VALUES = 1_000
+
+
+def _random_names(count: int, seed: int = 0):
+    rand = random.Random(seed)
+    return [
+        "".join(rand.choices(string.ascii_lowercase + string.digits, k=12))
+        for _ in range(count)
+    ]
+
+
+def _time(label: str, filter_func, names) -> float:
+    elapsed = timeit.timeit(lambda: [filter_func(name) for name in names], number=1)
+    print(f"{label:<50} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main():
+    """
+    Times each string preset against NUM_NAMES names, with NUM_VALUES values where the preset takes a list
+    """
+    names = _random_names(NUM_NAMES)
+    values = names[:: NUM_NAMES // NUM_VALUES][:NUM_VALUES]
+    handler = ClientSideHandlerString(
+        {preset: [MockProperties.PROP_1] for preset in QueryPresetsString}
+    )
+
+    def _build(preset, **kwargs):
+        return handler.get_filter_func(
+            preset, MockProperties.PROP_1, lambda item: item, kwargs
+        )
+
+    print(f"{NUM_NAMES} names, {NUM_VALUES} values")
+    _time(
+        "ANY_IN, linear scan, first 1000 names only",
+        lambda prop: any(prop == val for val in values),
+        names[:1000],
+    )
+    _time("ANY_IN", _build(QueryPresetsString.ANY_IN, values=values), names)
+    _time(
+        "ANY_IN ignore_case",
+        _build(QueryPresetsString.ANY_IN, values=values, ignore_case=True),
+        names,
+    )
+    _time(
+        "ANY_IN prefix",
+        _build(QueryPresetsString.ANY_IN, values=[v[:4] for v in values], prefix=True),
+        names,
+    )
+    _time(
+        "MATCHES_REGEX",
+        _build(QueryPresetsString.MATCHES_REGEX, regex_string="[a-f]+[0-9]"),
+        names,
+    )
+    _time(
+        "NOT_CONTAINS, per snippet, first 1000 names only",
+        lambda prop: all(snippet not in prop for snippet in values),
+        names[:1000],
+    )
+    _time(
+        "NOT_CONTAINS",
+        _build(QueryPresetsString.NOT_CONTAINS, snippets=values),
+        names,
+    )
+    _time(
+        "CONTAINS",
+        _build(QueryPresetsString.CONTAINS, snippets=[v[:3] for v in values[:5]]),
+        names,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmarks how long each python action takes to import, as StackStorm starts a new Python process for every
+action run and pays for its imports before the action does anything. These are not collected as tests - run with:
+    PYTHONPATH=lib:actions python -m tests.benchmarks.bench_import_time [--only src/server_query_actions.py]
+
+Each entry point found in actions/*.yaml has its top-level imports run in a fresh interpreter with
+python -X importtime, taking the median of several runs. st2common isn't installed here and costs the same
+for every action, so imports of it are left out - pack modules which import it are measured by their own
+imports instead.
+
+An entry point regresses if it takes longer to import than its budget by more than the tolerance, and by more
+than MIN_REGRESSION_MS - a single slow run on a busy machine can take twice as long. Budgets are stored in
+baselines/import_time.json - after a change which is expected to alter them, re-run with --save-baseline and
+commit the updated budgets file
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SOURCE_DIRS = [os.path.join(ROOT, "lib"), os.path.join(ROOT, "actions")]
+BASELINES_FILE = os.path.join(
+    os.path.dirname(__file__), "baselines", "import_time.json"
+)
+# imports of the StackStorm runner itself, which isn't installed outside of StackStorm
+EXCLUDED_PACKAGES = {"st2common"}
+# fraction slower than its budget an entry point can import before it regresses
+DEFAULT_TOLERANCE = 0.5
+# differences smaller than this are noise from the interpreter starting up and the machine being busy
+MIN_REGRESSION_MS = 100.0
+# times each entry point is imported, the median is taken
+DEFAULT_REPEAT = 9
+
+
+def find_entry_points() -> List[str]:
+    """
+    Returns the python scripts run by the pack's actions, relative to the actions directory
+    """
+    entry_points = set()
+    for path in glob.glob(os.path.join(ROOT, "actions", "*.yaml")):
+        with open(path, encoding="utf-8") as file:
+            action = yaml.safe_load(file) or {}
+        if action.get("runner_type") == "python-script":
+            entry_points.add(action["entry_point"])
+    return sorted(entry_points)
+
+
+def _pack_module_path(module: str) -> Optional[str]:
+    """
+    Returns the source file of a module in the pack, or None if it is a third party or standard library module
+    :param module: The dotted module name
+    """
+    relative = module.replace(".", os.sep)
+    for source_dir in SOURCE_DIRS:
+        for path in (
+            os.path.join(source_dir, f"{relative}.py"),
+            os.path.join(source_dir, relative, "__init__.py"),
+        ):
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def _top_level_imports(path: str) -> List[ast.stmt]:
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=path)
+    return [
+        node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def _imported_modules(node: ast.stmt) -> List[str]:
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    return [node.module] if node.module and not node.level else []
+
+
+def _is_excluded(module: str) -> bool:
+    return module.split(".")[0] in EXCLUDED_PACKAGES
+
+
+def collect_imports(path: str, seen: Optional[Set[str]] = None) -> List[str]:
+    """
+    Returns the top-level import statements of a module, leaving out imports of excluded packages. Pack
+    modules which import an excluded package can't be imported themselves, so their own imports are collected
+    instead
+    :param path: The module's source file
+    :param seen: Source files already collected, to stop at circular imports
+    """
+    seen = set() if seen is None else seen
+    seen.add(path)
+    statements = []
+    for node in _top_level_imports(path):
+        modules = _imported_modules(node)
+        if any(_is_excluded(module) for module in modules):
+            continue
+        for module in modules:
+            module_path = _pack_module_path(module)
+            if (
+                module_path
+                and module_path not in seen
+                and _needs_expanding(module_path)
+            ):
+                statements.extend(collect_imports(module_path, seen))
+                break
+        else:
+            statements.append(ast.unparse(node))
+    return statements
+
+
+def _needs_expanding(path: str) -> bool:
+    return any(
+        _is_excluded(module)
+        for node in _top_level_imports(path)
+        for module in _imported_modules(node)
+    )
+
+
+def measure(statements: List[str], repeat: int) -> Dict:
+    """
+    Runs import statements in fresh interpreters, returning the median total in milliseconds along with the
+    milliseconds spent importing each top-level package in the median run
+    :param statements: The import statements to run
+    :param repeat: How many times to run them
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(SOURCE_DIRS)}
+    results = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+            env=env,
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(_parse_importtime(completed.stderr))
+    median_ms = statistics.median_low(result["ms"] for result in results)
+    return next(result for result in results if result["ms"] == median_ms)
+
+
+def _parse_importtime(stderr: str) -> Dict:
+    """
+    Parses the output of python -X importtime, totalling the modules imported by the statements run -
+    site and the modules it imports happen before them on every run
+    :param stderr: The interpreter's stderr
+    """
+    total_us = 0
+    packages: Dict[str, int] = defaultdict(int)
+    after_site = False
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        if not after_site:
+            after_site = name == "site" and depth == 1
+            continue
+        packages[name.split(".")[0]] += int(self_us)
+        if depth == 1:
+            total_us += int(cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:3]
+    return {
+        "ms": round(total_us / 1000, 1),
+        "heaviest": [f"{name} {us / 1000:.0f}ms" for name, us in heaviest],
+    }
+
+
+def compare(
+    results: Dict[str, float], budgets: Dict[str, float], tolerance: float
+) -> List[str]:
+    """
+    Returns a description of each entry point which imports slower than its budget
+    :param results: Milliseconds each entry point took to import
+    :param budgets: The stored budgets
+    :param tolerance: The fraction slower than its budget an entry point can be before it regresses
+    """
+    regressions = []
+    for name, ms in results.items():
+        if name not in budgets:
+            continue
+        slower = ms - budgets[name]
+        if slower > budgets[name] * tolerance and slower > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: {ms:.1f}ms, budget {budgets[name]:.1f}ms")
+    return regressions
+
+
+def _load_baselines() -> Dict[str, float]:
+    if not os.path.exists(BASELINES_FILE):
+        return {}
+    with open(BASELINES_FILE, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save_baselines(baselines: Dict[str, float]) -> None:
+    os.makedirs(os.path.dirname(BASELINES_FILE), exist_ok=True)
+    with open(BASELINES_FILE, "w", encoding="utf-8") as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def _parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--only", action="append", help="measure entry points starting with this"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the budget for each entry point measured",
+    )
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Measures how long each action entry point takes to import and compares it with its budget
+    """
+    args = _parse_args(sys.argv[1:] if args is None else args)
+    baselines = _load_baselines()
+    results: Dict[str, float] = {}
+    print(f"{'entry point':<36}{'ms':>8}{'budget':>8}  heaviest packages")
+    for entry_point in find_entry_points():
+        if args.only and not any(entry_point.startswith(p) for p in args.only):
+            continue
+        path = os.path.join(ROOT, "actions", entry_point)
+        if not os.path.exists(path):
+            print(f"{entry_point:<36}skipped - not found")
+            continue
+        statements = collect_imports(path)
+        result = measure(statements, args.repeat)
+        results[entry_point] = result["ms"]
+        print(
+            f"{entry_point:<36}{result['ms']:>8}{baselines.get(entry_point, '-'):>8}"
+            f"  {', '.join(result['heaviest'])}"
+        )
+
+    if args.save_baseline:
+        _save_baselines({**baselines, **results})
+        print(f"\nSaved budgets to {BASELINES_FILE}")
+        return 0
+    regressions = compare(results, baselines, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Benchmarks memory per resource and filter throughput of openstacksdk Server objects against ServerRecords.
+These are not collected as tests - run with:
+    PYTHONPATH=lib python -m tests.benchmarks.bench_server_records [rows ...]
+"""
+
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+from openstack.compute.v2.server import Server
+
+from enums.query.props.server_properties import ServerProperties
+from enums.query.query_presets import QueryPresetsString
+from openstack_query.queries.server_query import ServerQuery
+from openstack_query.runners.query_runner import QueryRunner
+from structs.query.server_record import ServerRecord
+
+DEFAULT_ROWS = [100_000]
+# building Server objects is slow, so they are only built for this many rows and reported per server
+SERVER_OBJECT_ROWS = 2_000
+STATUSES = ["ACTIVE", "SHUTOFF", "ERROR", "BUILD", "DELETED"]
+
+
+def _synthetic_nova_servers(rows: int, seed: int = 0):
+    """
+    Servers as returned by GET /servers/detail, with the nested fields which make up most of the payload
+    """
+    rand = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    return [
+        {
+            "id": f"server-{i}",
+            "name": f"vm-{i}",
+            "status": rand.choice(STATUSES),
+            "tenant_id": f"project-{rand.randrange(500)}",
+            "user_id": f"user-{rand.randrange(2000)}",
+            "hostId": f"host-{rand.randrange(300)}",
+            "created": (start + timedelta(minutes=rand.randrange(2_000_000))).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "updated": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "addresses": {
+                "private": [{"addr": f"10.0.{i % 256}.{i % 200}", "version": 4}]
+            },
+            "flavor": {"id": "flavor-1", "links": []},
+            "image": {"id": "image-1", "links": []},
+            "metadata": {"owner": "bench"},
+            "links": [{"rel": "self", "href": f"http://nova/servers/server-{i}"}],
+        }
+        for i in range(rows)
+    ]
+
+
+def _bytes_per_resource(build, nova_servers, sample: int = 500):
+    """
+    Returns the bytes held per resource, measured on a sample as tracing allocations slows building a lot
+    """
+    nova_servers = nova_servers[:sample]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    resources = build(nova_servers)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(resources)
+
+
+def _time_build_and_filter(build, sample, filter_func):
+    """
+    Returns the seconds taken to build the sample and to filter what was built, and the IDs which matched
+    """
+    built = []
+    results = []
+    build_seconds = timeit.timeit(lambda: built.extend(build(sample)), number=1)
+    filter_seconds = timeit.timeit(
+        lambda: results.extend(
+            resource["id"]
+            # pylint:disable=protected-access
+            for resource in QueryRunner._apply_client_side_filter(built, filter_func)
+        ),
+        number=1,
+    )
+    return build_seconds, filter_seconds, results
+
+
+def main(rows_to_run):
+    """
+    Builds each number of servers as Server objects and as ServerRecords, then times filtering them
+    """
+    query = ServerQuery()
+    prop_handler = query._get_prop_handler()  # pylint:disable=protected-access
+    filter_func = query.builder._get_preset_handler(  # pylint:disable=protected-access
+        QueryPresetsString.ANY_IN, ServerProperties.PROJECT_ID
+    ).get_filter_func(
+        QueryPresetsString.ANY_IN,
+        ServerProperties.PROJECT_ID,
+        prop_handler.get_prop_func(ServerProperties.PROJECT_ID),
+        {"values": [f"project-{i}" for i in range(50)]},
+    )
+
+    for rows in rows_to_run:
+        nova_servers = _synthetic_nova_servers(rows)
+        print(
+            f"\n{str(rows) + ' rows':<16}{'rows built':>12}{'build/server':>15}"
+            f"{'bytes/server':>15}{'filtered/s':>14}"
+        )
+        results = {}
+        for label, build, sample in [
+            (
+                "Server",
+                lambda servers: [Server.existing(**srv) for srv in servers],
+                nova_servers[:SERVER_OBJECT_ROWS],
+            ),
+            (
+                "ServerRecord",
+                lambda servers: list(map(ServerRecord.from_nova, servers)),
+                nova_servers,
+            ),
+        ]:
+            build_seconds, filter_seconds, results[label] = _time_build_and_filter(
+                build, sample, filter_func
+            )
+            print(
+                f"{label:<16}{len(sample):12}{build_seconds / len(sample) * 1e6:12.1f} us"
+                f"{_bytes_per_resource(build, sample):15.0f}"
+                f"{len(sample) / filter_seconds:14.0f}"
+            )
+        assert results["Server"] == results["ServerRecord"][: len(results["Server"])]
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
@@ -0,0 +1,341 @@
+"""
+Benchmarks the query and check paths end to end against a synthetic cloud, measuring wall time and API calls
+made for each, and compares them with stored baseline results. These are not collected as tests - run with:
+    PYTHONPATH=lib:actions python -m tests.benchmarks.bench_synthetic_cloud [--latency 0.002] [--save-baseline]
+With --http, the cloud is served by FakeOpenstackApi and benchmarks connect to it through the real
+OpenstackConnection, so authentication, pagination and building openstacksdk resources are measured too
+
+A benchmark regresses if it makes more API calls than its baseline, finds a different number of results,
+or takes longer than the baseline by more than the tolerance. Baselines are stored per cloud size and latency,
+as timings depend on both - after a change which is expected to alter results, re-run with --save-baseline and
+commit the updated baselines file
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from unittest.mock import patch
+
+from enums.cloud_domains import CloudDomains
+from openstack_api.openstack_floating_ip import OpenstackFloatingIP
+from openstack_api.openstack_image import OpenstackImage
+from openstack_api.openstack_server import OpenstackServer
+from openstack_query.managers.server_manager import ServerManager
+from openstack_query.runners.server_runner import ServerRunner
+from openstack_query.runners.single_flight import SingleFlight
+
+from tests.benchmarks.fake_openstack_api import FakeOpenstackApi
+from tests.benchmarks.synthetic_cloud import (
+    OPEN_SSH_RULE,
+    SyntheticCloud,
+    SyntheticCloudSpec,
+)
+
+BASELINES_FILE = os.path.join(
+    os.path.dirname(__file__), "baselines", "synthetic_cloud.json"
+)
+DEFAULT_TOLERANCE = 0.5
+# benchmarks taking a few milliseconds are noisy, so they must also be this much slower to regress
+MIN_REGRESSION_SECONDS = 0.02
+
+# a SyntheticCloud, or a FakeOpenstackApi serving one - either gives connection_cls and accounting
+Cloud = Union[SyntheticCloud, FakeOpenstackApi]
+# name -> function taking the cloud and returning a result to size
+Benchmark = Callable[[Cloud], object]
+
+
+def _server_manager(cloud: Cloud) -> ServerManager:
+    """
+    Returns a ServerManager whose query lists servers from the synthetic cloud. A manager only runs one query,
+    so a new one is needed for each run
+    """
+    manager = ServerManager(CloudDomains.DEV)
+    # pylint:disable=protected-access
+    manager._query.runner = ServerRunner(
+        connection_cls=cloud.connection_cls, single_flight=SingleFlight()
+    )
+    return manager
+
+
+def _security_groups_check(cloud: Cloud):
+    """
+    Runs security_groups_check over every project, with the action's connections made to the synthetic cloud
+    """
+    # pylint:disable=import-outside-toplevel
+    from src.openstack_check_actions import CheckActions
+
+    # the check only uses its own methods, so the StackStorm action doesn't need setting up
+    action = CheckActions.__new__(CheckActions)
+    with patch(
+        "src.openstack_check_actions.OpenstackConnection", cloud.connection_cls
+    ), patch("builtins.print"):
+        return action.security_groups_check(
+            cloud_account="dev",
+            max_port=OPEN_SSH_RULE["port_range_max"],
+            min_port=OPEN_SSH_RULE["port_range_min"],
+            ip_prefix=OPEN_SSH_RULE["remote_ip_prefix"],
+            all_projects=True,
+        )["server_list"]
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "query.search_by_property.client_side": lambda cloud: _server_manager(
+        cloud
+    ).search_by_property(
+        search_mode=True,
+        property_to_search_by="server_status",
+        values=["ERROR", "SHUTOFF"],
+        properties_to_select=["server_id", "server_name"],
+        output_type="to_list",
+    ),
+    "query.search_by_property.server_side": lambda cloud: _server_manager(
+        cloud
+    ).search_by_property(
+        search_mode=True,
+        property_to_search_by="user_id",
+        values=["user-00001"],
+        properties_to_select=["server_id", "server_name"],
+        output_type="to_list",
+    ),
+    "query.search_by_datetime": lambda cloud: _server_manager(cloud).search_by_datetime(
+        search_mode="older_than",
+        property_to_search_by="server_creation_date",
+        days=365,
+        properties_to_select=["server_id", "server_creation_date"],
+        output_type="to_list",
+    ),
+    "query.search_by_regex": lambda cloud: _server_manager(cloud).search_by_regex(
+        property_to_search_by="server_name",
+        pattern="jupyter-[0-9]+",
+        properties_to_select=["server_id", "server_name"],
+        output_type="to_list",
+    ),
+    "legacy.servers_older_than": lambda cloud: OpenstackServer(
+        cloud.connection_cls
+    ).search_servers_older_than("dev", "", days=365),
+    "legacy.servers_errored_and_shutoff": lambda cloud: OpenstackServer(
+        cloud.connection_cls
+    ).search_servers_errored_and_shutoff("dev", ""),
+    "legacy.servers_name_contains": lambda cloud: OpenstackServer(
+        cloud.connection_cls
+    ).search_servers_name_contains("dev", "", name_snippets=["jupyter"]),
+    "find_non_existent.servers": lambda cloud: OpenstackServer(
+        cloud.connection_cls
+    ).find_non_existent_servers("dev", ""),
+    "find_non_existent.server_projects": lambda cloud: OpenstackServer(
+        cloud.connection_cls
+    ).find_non_existent_projects("dev"),
+    "find_non_existent.images": lambda cloud: OpenstackImage(
+        cloud.connection_cls
+    ).find_non_existent_images("dev", ""),
+    "find_non_existent.fips": lambda cloud: OpenstackFloatingIP(
+        cloud.connection_cls
+    ).find_non_existent_fips("dev", ""),
+    "check.security_groups_check": _security_groups_check,
+}
+
+
+def _size(result) -> int:
+    """
+    Returns the number of results found, so runs with different results are easy to spot
+    """
+    if isinstance(result, dict):
+        return sum(len(value) for value in result.values())
+    return len(result)
+
+
+def run_benchmark(cloud: Cloud, benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    """
+    Runs a benchmark repeatedly, returning the best wall time, the API calls made per run and the results found
+    :param cloud: The synthetic cloud to run against
+    :param benchmark: The benchmark to run
+    :param repeat: The number of times to run it
+    """
+    best = None
+    for _ in range(repeat):
+        cloud.accounting = type(cloud.accounting)()
+        # as timeit does, so collections triggered by earlier runs don't land in this one
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = benchmark(cloud)
+            seconds = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = seconds if best is None else min(best, seconds)
+    return {
+        "seconds": round(best, 4),
+        "api_calls": cloud.accounting.total_requests,
+        "results": _size(result),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Returns a description of each benchmark which regressed against its baseline
+    :param results: The results of this run
+    :param baseline: The stored baseline results for the same cloud size and latency
+    :param tolerance: The fraction slower than baseline a benchmark can be before it regresses
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if result["api_calls"] > expected["api_calls"]:
+            regressions.append(
+                f"{name}: {result['api_calls']} API calls, baseline {expected['api_calls']}"
+            )
+        if result["results"] != expected["results"]:
+            regressions.append(
+                f"{name}: {result['results']} results, baseline {expected['results']}"
+            )
+        slower = result["seconds"] - expected["seconds"]
+        if slower > expected["seconds"] * tolerance and slower > MIN_REGRESSION_SECONDS:
+            regressions.append(
+                f"{name}: {result['seconds']:.4f}s, baseline {expected['seconds']:.4f}s"
+            )
+    return regressions
+
+
+def _baseline_key(spec: SyntheticCloudSpec, http: bool = False) -> str:
+    key = (
+        f"projects={spec.projects},servers={spec.servers},"
+        f"latency={spec.latency},page_size={spec.page_size}"
+    )
+    return f"{key},transport=http" if http else key
+
+
+def _load_baselines() -> Dict[str, Dict[str, Dict[str, float]]]:
+    if not os.path.exists(BASELINES_FILE):
+        return {}
+    with open(BASELINES_FILE, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save_baselines(baselines: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    os.makedirs(os.path.dirname(BASELINES_FILE), exist_ok=True)
+    with open(BASELINES_FILE, "w", encoding="utf-8") as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def _parse_args(args: List[str]) -> argparse.Namespace:
+    spec = SyntheticCloudSpec()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--projects", type=int, default=spec.projects)
+    parser.add_argument("--servers", type=int, default=spec.servers)
+    parser.add_argument(
+        "--latency", type=float, default=spec.latency, help="seconds per API call"
+    )
+    parser.add_argument("--page-size", type=int, default=spec.page_size)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", action="append", help="run benchmarks whose name starts with this"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        help="serve the cloud over HTTP and connect with the real OpenstackConnection",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the baseline for this cloud size and latency",
+    )
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Generates a synthetic cloud, runs each benchmark against it and compares the results with the baseline
+    """
+    args = _parse_args(sys.argv[1:] if args is None else args)
+    spec = SyntheticCloudSpec(
+        projects=args.projects,
+        servers=args.servers,
+        latency=args.latency,
+        page_size=args.page_size,
+    )
+    start = time.perf_counter()
+    cloud = SyntheticCloud(spec)
+    print(
+        f"Generated {spec.projects} projects, {spec.servers} servers, {spec.images} images "
+        f"and {spec.fips} floating IPs in {time.perf_counter() - start:.1f}s"
+    )
+
+    target: Cloud = cloud
+    with ExitStack() as stack:
+        if args.http:
+            # the server sleeps for the latency before answering each request
+            api = stack.enter_context(FakeOpenstackApi(cloud, latency=spec.latency))
+            target = api
+            clouds_yaml = os.path.join(
+                stack.enter_context(tempfile.TemporaryDirectory()), "clouds.yaml"
+            )
+            api.write_clouds_yaml(clouds_yaml)
+            stack.enter_context(
+                patch.dict(os.environ, {"OS_CLIENT_CONFIG_FILE": clouds_yaml})
+            )
+            print(f"Serving the cloud on {api.url}")
+        return _run_benchmarks(target, spec, args)
+
+
+def _run_benchmarks(cloud: Cloud, spec: SyntheticCloudSpec, args) -> int:
+    """
+    Runs each benchmark selected against the cloud and compares the results with the baseline
+    """
+    baselines = _load_baselines()
+    key = _baseline_key(spec, args.http)
+    baseline = baselines.get(key, {})
+    results: Dict[str, Dict[str, float]] = {}
+    print(
+        f"\n{'benchmark':<40}{'seconds':>10}{'baseline':>10}{'API calls':>11}"
+        f"{'baseline':>10}{'results':>9}"
+    )
+    for name, benchmark in BENCHMARKS.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        try:
+            results[name] = run_benchmark(cloud, benchmark, args.repeat)
+        except ImportError as err:
+            # security_groups_check is a StackStorm action, so needs st2common installed
+            print(f"{name:<40}skipped - {err}")
+            continue
+        expected: Tuple = (
+            (baseline[name]["seconds"], baseline[name]["api_calls"])
+            if name in baseline
+            else ("-", "-")
+        )
+        print(
+            f"{name:<40}{results[name]['seconds']:>10}{expected[0]:>10}"
+            f"{results[name]['api_calls']:>11}{expected[1]:>10}{results[name]['results']:>9}"
+        )
+
+    if args.save_baseline:
+        baselines[key] = {**baseline, **results}
+        _save_baselines(baselines)
+        print(f"\nSaved baseline to {BASELINES_FILE}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Benchmarks filtering synthetic server listings per resource and vectorised with NumPy.
+These are not collected as tests - run with:
+    PYTHONPATH=lib python -m tests.benchmarks.bench_vectorised_filters [rows ...]
+"""
+
+import operator
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from enums.query.query_presets import (
+    QueryPresetsDateTime,
+    QueryPresetsGeneric,
+    QueryPresetsInteger,
+    QueryPresetsString,
+)
+from openstack_query.columnar import numpy_available
+from openstack_query.handlers.client_side_handler_datetime import (
+    ClientSideHandlerDateTime,
+)
+from openstack_query.handlers.client_side_handler_generic import (
+    ClientSideHandlerGeneric,
+)
+from openstack_query.handlers.client_side_handler_integer import (
+    ClientSideHandlerInteger,
+)
+from openstack_query.handlers.client_side_handler_string import ClientSideHandlerString
+from openstack_query.runners.query_runner import QueryRunner
+
+from tests.lib.openstack_query.mocks.mocked_props import MockProperties
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+STATUSES = ["ACTIVE", "SHUTOFF", "ERROR", "BUILD", "DELETED"]
+
+
+def _synthetic_servers(rows: int, seed: int = 0):
+    rand = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    return [
+        {
+            "status": rand.choice(STATUSES),
+            "project_id": f"project-{rand.randrange(500)}",
+            "created_at": (
+                start + timedelta(minutes=rand.randrange(2_000_000))
+            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "vcpus": rand.choice([1, 2, 4, 8, 16, 32]),
+        }
+        for _ in range(rows)
+    ]
+
+
+def _mappings(presets):
+    return {preset: [MockProperties.PROP_1] for preset in presets}
+
+
+def _cases():
+    return [
+        (
+            "EQUAL_TO status",
+            ClientSideHandlerGeneric(_mappings(QueryPresetsGeneric)),
+            QueryPresetsGeneric.EQUAL_TO,
+            "status",
+            {"value": "SHUTOFF"},
+        ),
+        (
+            "ANY_IN project_id (50 values)",
+            ClientSideHandlerString(_mappings(QueryPresetsString)),
+            QueryPresetsString.ANY_IN,
+            "project_id",
+            {"values": [f"project-{i}" for i in range(50)]},
+        ),
+        (
+            "OLDER_THAN created_at",
+            ClientSideHandlerDateTime(_mappings(QueryPresetsDateTime)),
+            QueryPresetsDateTime.OLDER_THAN,
+            "created_at",
+            {"days": 365},
+        ),
+        (
+            "GREATER_THAN vcpus",
+            ClientSideHandlerInteger(_mappings(QueryPresetsInteger)),
+            QueryPresetsInteger.GREATER_THAN,
+            "vcpus",
+            {"value": 4},
+        ),
+    ]
+
+
+def _time_filters(servers, filter_func, vectorised_func):
+    """
+    Returns the seconds taken to filter the servers per resource and vectorised, checking both match
+    """
+    results = {}
+
+    def _run(vectorised):
+        # pylint:disable=protected-access
+        results[vectorised] = QueryRunner._apply_client_side_filter(
+            servers, filter_func, vectorised_func if vectorised else None
+        )
+
+    per_resource = timeit.timeit(lambda: _run(False), number=1)
+    vectorised = timeit.timeit(lambda: _run(True), number=1)
+    assert results[False] == results[True]
+    return per_resource, vectorised
+
+
+def main(rows_to_run):
+    """
+    Times each preset filtering per resource and vectorised for each number of rows
+    """
+    if not numpy_available():
+        print("NumPy is not installed, nothing to compare")
+        return
+
+    for rows in rows_to_run:
+        servers = _synthetic_servers(rows)
+        print(
+            f"\n{str(rows) + ' rows':<40}{'per resource':>13}{'vectorised':>13}{'speed-up':>11}"
+        )
+        for label, handler, preset, key, kwargs in _cases():
+            prop_func = operator.itemgetter(key)
+            filter_func = handler.get_filter_func(
+                preset, MockProperties.PROP_1, prop_func, kwargs
+            )
+            vectorised_func = handler.get_vectorised_filter(
+                preset, MockProperties.PROP_1, prop_func, kwargs
+            )
+            per_resource, vectorised = _time_filters(
+                servers, filter_func, vectorised_func
+            )
+            print(
+                f"{label:<40}{per_resource * 1000:10.1f} ms{vectorised * 1000:10.1f} ms"
+                f"{per_resource / vectorised:10.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
@@ -0,0 +1,560 @@
+"""
+A local fake of the Openstack APIs the pack uses, serving a synthetic cloud over HTTP so the real
+OpenstackConnection and openstacksdk path - authentication, version discovery, pagination, JSON decoding and
+resource construction - can be load-tested offline. Implements the Keystone, Nova, Neutron, Glance, Cinder and
+Octavia list and get endpoints, with optional latency and error injection.
+Run it standalone, writing a clouds.yaml to point the pack at it, with:
+    PYTHONPATH=lib:actions python -m tests.benchmarks.fake_openstack_api --clouds-yaml clouds.yaml [--latency 0.01]
+then export OS_CLIENT_CONFIG_FILE=clouds.yaml and use the cloud name "fake"
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import yaml
+
+from openstack_api.api_call_accounting import ApiCallAccounting
+from openstack_api.openstack_connection import OpenstackConnection
+
+from tests.benchmarks.synthetic_cloud import SyntheticCloud, SyntheticCloudSpec
+
+CLOUD_NAME = "fake"
+USERNAME = "admin"
+PASSWORD = "password"
+ADMIN_PROJECT_ID = "admin-project"
+REGION = "RegionOne"
+
+# query parameters which control listings rather than filter them
+_LIST_PARAMS = {
+    "limit",
+    "marker",
+    "all_tenants",
+    "all_projects",
+    "sort_key",
+    "sort_dir",
+    "fields",
+    "changes-since",
+    "changes-before",
+}
+# query parameters with a different name to the attribute they filter by
+_FILTER_ALIASES = {
+    "project_id": (
+        "tenant_id",
+        "project_id",
+        "os-extended-snapshot-attributes:project_id",
+    ),
+    "uuid": ("id",),
+}
+
+# fields the API always returns which the synthetic cloud doesn't generate, openstacksdk's cloud layer
+# expects them
+_DEFAULT_FIELDS = {
+    "servers": {
+        "addresses": {},
+        "metadata": {},
+        "image": "",
+        "flavor": {"original_name": "m1.small", "vcpus": 1, "ram": 2048, "disk": 20},
+        "security_groups": [{"name": "default"}],
+    },
+}
+
+# (status, body, extra headers)
+Reply = Tuple[int, Any, Dict[str, str]]
+
+
+def _wire(resource) -> Dict[str, Any]:
+    """
+    Returns a resource as the API would send it - openstacksdk resources keep the attributes they were built
+    from in their wire format, e.g. a Server's project_id as tenant_id
+    :param resource: An openstacksdk resource, or a dict already in the wire format
+    """
+    # pylint:disable=protected-access
+    return dict(resource._body.attributes) if hasattr(resource, "_body") else resource
+
+
+def _matches(item: Dict[str, Any], query: Dict[str, str]) -> bool:
+    """
+    Returns True if a resource matches every filter in a listing query, filters for attributes the resource
+    doesn't have are ignored as most Openstack APIs do
+    :param item: The resource in its wire format
+    :param query: The query parameters given
+    """
+    for param, value in query.items():
+        if param in _LIST_PARAMS:
+            continue
+        keys = [key for key in _FILTER_ALIASES.get(param, (param,)) if key in item]
+        if keys and not any(str(item[key]) == value for key in keys):
+            return False
+    return True
+
+
+# pylint:disable=too-many-instance-attributes
+class FakeOpenstackApi:
+    """
+    Serves a SyntheticCloud over HTTP on a local port, used as a context manager.
+    Every service is served from the same port under its own path prefix, which the token's service catalog
+    points openstacksdk at. Resources the synthetic cloud lists as deleted are listed but can't be fetched.
+    Errors can be injected at random with error_rate, or for a path with a queue of status codes
+    in injected_statuses, as StubJupyterHub does
+    """
+
+    def __init__(
+        self,
+        cloud: Optional[SyntheticCloud] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+    ):
+        """
+        :param cloud: The synthetic cloud to serve, generated with the default spec if not given
+        :param latency: Seconds each request takes before it is answered
+        :param error_rate: The fraction of requests answered with a 503 at random
+        :param port: The port to listen on, a free one if 0
+        """
+        self.cloud = cloud or SyntheticCloud()
+        self.latency = latency
+        self.error_rate = error_rate
+        # counts the requests clients make through connection_cls, reset by benchmarks between runs
+        self.accounting = ApiCallAccounting()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.injected_statuses: Dict[str, List[int]] = defaultdict(list)
+        self._tokens = set()
+        self._rand = random.Random(self.cloud.spec.seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        cloud = self.cloud
+        resources = {
+            "projects": cloud.projects,
+            "users": cloud.users,
+            "domains": [{"id": "default", "name": "Default", "enabled": True}],
+            "servers": cloud.servers,
+            "floatingips": cloud.fips,
+            "security-groups": [
+                group for groups in cloud.security_groups.values() for group in groups
+            ],
+            "images": cloud.images,
+            "snapshots": cloud.snapshots,
+            "lbaas/loadbalancers": cloud.load_balancers,
+            "octavia/amphorae": cloud.amphorae,
+        }
+        # the path next page links are relative to and the page size if no limit is given, for APIs which
+        # paginate by default - Keystone doesn't paginate, and Neutron only does when given a limit
+        self._pagination = {
+            "compute": ("/compute/v2.1", cloud.spec.page_size),
+            "network": ("/network/v2.0", None),
+            "image": ("/v2", 25),
+            "volume": (f"/volume/v3/{ADMIN_PROJECT_ID}", cloud.spec.page_size),
+        }
+        self._collections = {
+            path: _Collection(resources.get(path, []), _DEFAULT_FIELDS.get(path))
+            for paths in _COLLECTIONS.values()
+            for path in paths
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def clouds_yaml(self, cloud_name: str = CLOUD_NAME) -> Dict[str, Any]:
+        """
+        Returns a clouds.yaml which points the given cloud name at this server
+        :param cloud_name: The name to give the cloud
+        """
+        return {
+            "clouds": {
+                cloud_name: {
+                    "auth": {
+                        "auth_url": f"{self.url}/identity/v3",
+                        "username": USERNAME,
+                        "password": PASSWORD,
+                        "project_id": ADMIN_PROJECT_ID,
+                        "user_domain_name": "Default",
+                    },
+                    "region_name": REGION,
+                    "interface": "public",
+                    "identity_api_version": 3,
+                }
+            }
+        }
+
+    def write_clouds_yaml(self, path: str, cloud_name: str = CLOUD_NAME) -> None:
+        """
+        Writes a clouds.yaml which points the given cloud name at this server, for use with
+        OS_CLIENT_CONFIG_FILE
+        :param path: The file to write
+        :param cloud_name: The name to give the cloud
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            yaml.safe_dump(self.clouds_yaml(cloud_name), file)
+
+    def connection_cls(self, _: str) -> OpenstackConnection:
+        """
+        Can be passed as connection_cls in place of OpenstackConnection - returns a real OpenstackConnection
+        to this server, counting its requests in accounting. Needs OS_CLIENT_CONFIG_FILE to point at a file
+        written by write_clouds_yaml
+        """
+        return OpenstackConnection(CLOUD_NAME, accounting=self.accounting)
+
+    def _make_handler(self):
+        api = self
+
+        # the handler shares the API's state, so reaches into its private members
+        # pylint:disable=protected-access
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            # pylint: disable=redefined-builtin
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body=None, headers=None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self, method: str):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                if api.latency:
+                    time.sleep(api.latency)
+                with api._lock:
+                    api.requests[f"{method} {url.path}"] += 1
+                    injected = api.injected_statuses[url.path]
+                    status = injected.pop(0) if injected else None
+                    if status is None and api._rand.random() < api.error_rate:
+                        status = 503
+                if status is not None:
+                    self._reply(status, {"error": {"code": status}})
+                    return
+                self._reply(
+                    *api._route(
+                        method,
+                        url.path,
+                        {
+                            key: values[-1]
+                            for key, values in parse_qs(url.query).items()
+                        },
+                        self.headers.get("X-Auth-Token"),
+                        body,
+                    )
+                )
+
+            # pylint:disable=invalid-name
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
+
+    def _route(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        token: Optional[str],
+        body: Optional[Dict],
+    ) -> Reply:
+        service, *parts = [part for part in path.split("/") if part]
+        if service not in _COLLECTIONS:
+            return 404, None, {}
+        # version discovery documents don't need a token
+        if not parts or (len(parts) == 1 and parts[0].startswith("v")):
+            return 200, self._versions(service, parts), {}
+        if service == "identity" and parts[1:] == ["auth", "tokens"]:
+            return self._issue_token(body) if method == "POST" else (405, None, {})
+        if token not in self._tokens:
+            return 401, {"error": {"code": 401, "message": "Unauthorized"}}, {}
+        if method != "GET":
+            return 405, None, {}
+        # the version, and project ID for Cinder, come before the resource path
+        return self._route_collection(
+            service, parts[2 if service == "volume" else 1 :], query
+        )
+
+    def _endpoint(self, service: str) -> str:
+        return {
+            "identity": f"{self.url}/identity/v3",
+            "compute": f"{self.url}/compute/v2.1",
+            "network": f"{self.url}/network",
+            "image": f"{self.url}/image",
+            "volume": f"{self.url}/volume/v3/{ADMIN_PROJECT_ID}",
+            "load-balancer": f"{self.url}/load-balancer",
+        }[service]
+
+    def _versions(self, service: str, parts: List[str]) -> Dict[str, Any]:
+        """
+        Returns a version discovery document - the supported version if one was requested, otherwise all of them
+        """
+        version, number = {
+            "identity": ("v3", "3.14"),
+            "compute": ("v2.1", "2.79"),
+            "network": ("v2.0", "2.0"),
+            "image": ("v2", "2.9"),
+            "volume": ("v3", "3.60"),
+            "load-balancer": ("v2.0", "2.0"),
+        }[service]
+        document = {
+            "id": version,
+            "status": "CURRENT",
+            "links": [{"rel": "self", "href": f"{self.url}/{service}/{version}/"}],
+        }
+        if service in ("compute", "volume"):
+            # microversioned APIs
+            document.update({"version": number, "min_version": f"{number[0]}.0"})
+        if parts:
+            return {"version": document}
+        if service == "identity":
+            return {"versions": {"values": [document]}}
+        return {"versions": [document]}
+
+    def _issue_token(self, body: Optional[Dict]) -> Reply:
+        password = (
+            ((body or {}).get("auth", {}).get("identity", {}).get("password", {}))
+            .get("user", {})
+            .get("password")
+        )
+        if password != PASSWORD:
+            return 401, {"error": {"code": 401, "message": "Invalid credentials"}}, {}
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens.add(token)
+        now = datetime.now(timezone.utc)
+        domain = {"id": "default", "name": "Default"}
+        catalog = [
+            {
+                "id": service,
+                "type": service_type,
+                "name": service,
+                "endpoints": [
+                    {
+                        "id": f"{service}-public",
+                        "interface": "public",
+                        "region": REGION,
+                        "region_id": REGION,
+                        "url": self._endpoint(service),
+                    }
+                ],
+            }
+            for service, service_type in (
+                ("identity", "identity"),
+                ("compute", "compute"),
+                ("network", "network"),
+                ("image", "image"),
+                ("volume", "block-storage"),
+                ("load-balancer", "load-balancer"),
+            )
+        ]
+        return (
+            201,
+            {
+                "token": {
+                    "methods": ["password"],
+                    "issued_at": now.strftime("%Y-%m-%dT%H:%M:%S.000000Z"),
+                    "expires_at": (now + timedelta(hours=1)).strftime(
+                        "%Y-%m-%dT%H:%M:%S.000000Z"
+                    ),
+                    "user": {"id": "admin-user", "name": USERNAME, "domain": domain},
+                    "project": {
+                        "id": ADMIN_PROJECT_ID,
+                        "name": "admin",
+                        "domain": domain,
+                    },
+                    "roles": [{"id": "admin-role", "name": "admin"}],
+                    "catalog": catalog,
+                }
+            },
+            {"X-Subject-Token": token},
+        )
+
+    def _list(
+        self,
+        collection: "_Collection",
+        query: Dict[str, str],
+        key: str,
+        next_url: Optional[str] = None,
+        default_limit: Optional[int] = None,
+    ) -> Reply:
+        """
+        Returns a page of resources matching the query's filters, starting after the marker if given.
+        If the page is full, links to the next page as the API does
+        :param collection: The resources to list
+        :param query: The query parameters given
+        :param key: The key the resources are listed under, e.g. servers
+        :param next_url: The URL to link the next page from, if the API paginates
+        :param default_limit: The page size if no limit is given - None lists everything
+        """
+        items = collection.items
+        if "marker" in query:
+            if query["marker"] not in collection.positions:
+                return 400, {"error": {"code": 400, "message": "Bad marker"}}, {}
+            items = items[collection.positions[query["marker"]] + 1 :]
+        items = [item for item in items if _matches(item, query)]
+        limit = int(query["limit"]) if "limit" in query else default_limit
+        body: Dict[str, Any] = {key: items[:limit] if limit else items}
+        if limit and next_url and len(items) > limit:
+            next_query = urlencode({**query, "marker": items[limit - 1]["id"]})
+            if key == "images":
+                # glance links the next page relative to its endpoint
+                body["next"] = f"{next_url}?{next_query}"
+            else:
+                body[f"{key}_links"] = [
+                    {"rel": "next", "href": f"{self.url}{next_url}?{next_query}"}
+                ]
+        return 200, body, {}
+
+    def _get(self, collection: "_Collection", resource_id: str, key: str) -> Reply:
+        """
+        Returns a single resource, or a 404 if it doesn't exist or the synthetic cloud lists it as deleted
+        """
+        if (
+            resource_id not in collection.positions
+            or resource_id in self.cloud.deleted_ids
+        ):
+            return 404, {"itemNotFound": {"code": 404, "message": "Not found"}}, {}
+        return 200, {key: collection.items[collection.positions[resource_id]]}, {}
+
+    def _route_collection(
+        self,
+        service: str,
+        parts: List[str],
+        query: Dict[str, str],
+    ) -> Reply:
+        """
+        Routes a listing, or get by ID, of one of a service's collections
+        :param service: The service requested
+        :param parts: The path segments after the service's version
+        :param query: The query parameters given
+        """
+        for path, singular in _COLLECTIONS[service].items():
+            segments = path.split("/")
+            if parts[: len(segments)] != segments:
+                continue
+            collection = self._collections[path]
+            rest = parts[len(segments) :]
+            if rest in ([], ["detail"]):
+                next_prefix, default_limit = self._pagination.get(service, (None, None))
+                return self._list(
+                    collection,
+                    query,
+                    segments[-1].replace("-", "_"),
+                    f"{next_prefix}/{'/'.join(parts)}" if next_prefix else None,
+                    default_limit,
+                )
+            if len(rest) == 1:
+                status, body, headers = self._get(collection, rest[0], singular)
+                if service == "image" and status == 200:
+                    # glance returns images unwrapped
+                    body = body[singular]
+                return status, body, headers
+            if path == "servers" and rest[1:] == ["os-security-groups"]:
+                if rest[0] not in self.cloud.server_security_groups:
+                    return 404, None, {}
+                groups = self.cloud.server_security_groups[rest[0]]
+                return 200, {"security_groups": groups}, {}
+        return 404, None, {}
+
+
+# pylint:disable=too-few-public-methods
+class _Collection:
+    """
+    Resources of one kind in their wire format, indexed by ID
+    """
+
+    def __init__(self, resources: List[Any], defaults: Optional[Dict[str, Any]] = None):
+        self.items = [{**(defaults or {}), **_wire(resource)} for resource in resources]
+        self.positions = {item["id"]: i for i, item in enumerate(self.items)}
+
+
+# collection paths under each service's version, and the key a single resource is returned under
+_COLLECTIONS = {
+    "identity": {"projects": "project", "users": "user", "domains": "domain"},
+    "compute": {"servers": "server", "flavors": "flavor"},
+    "network": {
+        "floatingips": "floatingip",
+        "security-groups": "security_group",
+        "rbac-policies": "rbac_policy",
+        "networks": "network",
+        "subnets": "subnet",
+        "ports": "port",
+    },
+    "image": {"images": "image"},
+    "volume": {"snapshots": "snapshot", "volumes": "volume"},
+    "load-balancer": {
+        "lbaas/loadbalancers": "loadbalancer",
+        "octavia/amphorae": "amphora",
+    },
+}
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Serves a synthetic cloud until interrupted
+    """
+    spec = SyntheticCloudSpec()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--projects", type=int, default=spec.projects)
+    parser.add_argument("--servers", type=int, default=spec.servers)
+    parser.add_argument("--page-size", type=int, default=spec.page_size)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of requests answered with a 503",
+    )
+    parser.add_argument(
+        "--clouds-yaml", help="write a clouds.yaml for the cloud 'fake' to this file"
+    )
+    args = parser.parse_args(sys.argv[1:] if args is None else args)
+
+    cloud = SyntheticCloud(
+        SyntheticCloudSpec(
+            projects=args.projects, servers=args.servers, page_size=args.page_size
+        )
+    )
+    with FakeOpenstackApi(cloud, args.latency, args.error_rate, args.port) as api:
+        if args.clouds_yaml:
+            api.write_clouds_yaml(args.clouds_yaml)
+        print(f"Serving on {api.url}, press Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
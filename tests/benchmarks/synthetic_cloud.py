@@ -0,0 +1,495 @@
+"""
+A synthetic cloud for benchmarks - projects, servers, users, images, floating IPs, security groups, volume
+snapshots and load balancers generated with realistic distributions, served through a fake connection class
+which can be passed as connection_cls to the openstack_api wrappers and query runners in place of
+OpenstackConnection.
+Every call the fake connection answers sleeps for a configurable latency (per page for listings) and is counted
+in an ApiCallAccounting, so benchmarks measure both time and the number of API calls made
+"""
+
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from openstack.block_storage.v3.snapshot import Snapshot
+from openstack.compute.v2.server import Server
+from openstack.exceptions import ResourceNotFound
+from openstack.identity.v3.project import Project
+from openstack.identity.v3.user import User
+from openstack.image.v2.image import Image
+from openstack.load_balancer.v2.amphora import Amphora
+from openstack.load_balancer.v2.load_balancer import LoadBalancer
+from openstack.network.v2.floating_ip import FloatingIP
+
+from openstack_api.api_call_accounting import ApiCallAccounting
+
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# weights roughly matching a production cloud - mostly active, a tail of shutoff and errored servers
+SERVER_STATUSES = {
+    "ACTIVE": 80,
+    "SHUTOFF": 12,
+    "ERROR": 5,
+    "BUILD": 2,
+    "VERIFY_RESIZE": 1,
+}
+FIP_STATUSES = {"ACTIVE": 85, "DOWN": 15}
+IMAGE_STATUSES = {"active": 95, "deactivated": 5}
+SNAPSHOT_STATUSES = {"available": 95, "error": 5}
+AMPHORA_STATUSES = {"ALLOCATED": 95, "ERROR": 5}
+# the rule security_groups_check looks for, some projects have it
+OPEN_SSH_RULE = {
+    "port_range_min": 22,
+    "port_range_max": 22,
+    "remote_ip_prefix": "0.0.0.0/0",
+}
+# Nova and Neutron's default maximum page size
+DEFAULT_PAGE_SIZE = 1000
+
+
+# pylint:disable=too-many-instance-attributes
+@dataclass
+class SyntheticCloudSpec:
+    """
+    The size and shape of a synthetic cloud
+    """
+
+    projects: int = 20
+    servers: int = 2000
+    users: int = 200
+    images: int = 200
+    fips: int = 500
+    security_groups_per_project: int = 3
+    snapshots: int = 300
+    # each load balancer has an active and standby amphora
+    load_balancers: int = 20
+    # fraction of servers, images and fips which belong to deleted projects, or which are listed but
+    # no longer exist - what the find_non_existent_* checks look for
+    orphan_fraction: float = 0.01
+    # seconds each API call takes, per page for listings
+    latency: float = 0.0
+    page_size: int = DEFAULT_PAGE_SIZE
+    seed: int = 0
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime(DATETIME_FORMAT)
+
+
+class SyntheticCloud:
+    """
+    Generates the resources of a synthetic cloud once, they are shared by every connection made to it.
+    Building openstacksdk resources takes a few milliseconds each, so this is done before timing anything.
+    Creation dates are skewed towards recent, with a long tail going back three years, and last updated
+    dates fall between creation and now
+    """
+
+    def __init__(self, spec: Optional[SyntheticCloudSpec] = None):
+        self.spec = spec or SyntheticCloudSpec()
+        self.accounting = ApiCallAccounting()
+        self._rand = random.Random(self.spec.seed)
+        # ages are relative to now, so presets relative to now find the same resources whenever this is run
+        self._now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        self.projects = [
+            Project.existing(
+                id=f"project-{i:05d}",
+                name=f"project-{i}",
+                description=f"Synthetic project {i}",
+                domain_id="default",
+                is_enabled=True,
+            )
+            for i in range(self.spec.projects)
+        ]
+        self.users = [
+            User.existing(
+                id=f"user-{i:05d}",
+                name=f"user-{i}",
+                email=f"user-{i}@example.com",
+                domain_id="default",
+            )
+            for i in range(self.spec.users)
+        ]
+        self._projects_by_id = {project.id: project for project in self.projects}
+
+        self.servers = [self._server(i) for i in range(self.spec.servers)]
+        self.images = [self._image(i) for i in range(self.spec.images)]
+        self.fips = [self._fip(i) for i in range(self.spec.fips)]
+        self.security_groups = defaultdict(list)
+        for project in self.projects:
+            for i in range(self.spec.security_groups_per_project):
+                self.security_groups[project.id].append(
+                    self._security_group(project.id, i)
+                )
+        self.server_security_groups = {
+            server.id: self._rand.sample(
+                self.security_groups.get(server.project_id, []),
+                k=min(1, len(self.security_groups.get(server.project_id, []))),
+            )
+            for server in self.servers
+        }
+
+        # resources listed but which can't be fetched - deleted between listing and checking
+        self.deleted_ids = {
+            resource.id
+            for resource in self.servers + self.images + self.fips
+            if self._rand.random() < self.spec.orphan_fraction
+        }
+        self.servers_by_project = defaultdict(list)
+        for server in self.servers:
+            self.servers_by_project[server.project_id].append(server)
+        self._by_id = {
+            resource.id: resource
+            for resource in self.users + self.servers + self.images + self.fips
+        }
+
+        # generated last with their own random numbers, so adding them didn't change the resources above
+        self._rand = random.Random(f"{self.spec.seed}-block-storage-load-balancer")
+        self.snapshots = [self._snapshot(i) for i in range(self.spec.snapshots)]
+        self.load_balancers = [
+            self._load_balancer(i) for i in range(self.spec.load_balancers)
+        ]
+        self.amphorae = [
+            self._amphora(load_balancer, role)
+            for load_balancer in self.load_balancers
+            for role in ("MASTER", "BACKUP")
+        ]
+        self._by_id.update(
+            (resource.id, resource)
+            for resource in self.snapshots + self.load_balancers + self.amphorae
+        )
+
+    def _weighted(self, weights: Dict[str, int]) -> str:
+        return self._rand.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _project_id(self) -> str:
+        """
+        Returns the project a resource belongs to - a few belong to projects which no longer exist
+        """
+        if self._rand.random() < self.spec.orphan_fraction:
+            return f"deleted-project-{self._rand.randrange(10)}"
+        return self.projects[self._rand.randrange(len(self.projects))].id
+
+    def _created_and_updated(self):
+        """
+        Returns creation and last updated timestamps - creation is exponentially distributed into the past
+        with a mean of six months, capped at three years
+        """
+        age = min(self._rand.expovariate(1 / 180), 3 * 365)
+        created = self._now - timedelta(days=age)
+        updated = created + timedelta(days=self._rand.uniform(0, age))
+        return _timestamp(created), _timestamp(updated)
+
+    def _server(self, i: int) -> Server:
+        created, updated = self._created_and_updated()
+        return Server.existing(
+            id=f"server-{i:07d}",
+            name=f"{self._rand.choice(['vm', 'worker', 'jupyter', 'ci'])}-{i}",
+            description=f"Synthetic server {i}" if i % 3 else None,
+            status=self._weighted(SERVER_STATUSES),
+            project_id=self._project_id(),
+            user_id=self.users[self._rand.randrange(len(self.users))].id,
+            host_id=f"host-{self._rand.randrange(max(1, self.spec.servers // 40))}",
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def _image(self, i: int) -> Image:
+        created, updated = self._created_and_updated()
+        return Image.existing(
+            id=f"image-{i:05d}",
+            name=f"image-{i}",
+            owner=self._project_id(),
+            status=self._weighted(IMAGE_STATUSES),
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def _fip(self, i: int) -> FloatingIP:
+        created, updated = self._created_and_updated()
+        return FloatingIP.existing(
+            id=f"fip-{i:05d}",
+            floating_ip_address=f"130.246.{i // 256 % 256}.{i % 256}",
+            project_id=self._project_id(),
+            status=self._weighted(FIP_STATUSES),
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def _snapshot(self, i: int) -> Snapshot:
+        created, updated = self._created_and_updated()
+        return Snapshot.existing(
+            id=f"snapshot-{i:05d}",
+            name=f"snapshot-{i}",
+            volume_id=f"volume-{self._rand.randrange(max(1, self.spec.snapshots // 2)):05d}",
+            project_id=self._project_id(),
+            size=self._rand.choice([10, 20, 50, 100, 500]),
+            status=self._weighted(SNAPSHOT_STATUSES),
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def _load_balancer(self, i: int) -> LoadBalancer:
+        created, updated = self._created_and_updated()
+        return LoadBalancer.existing(
+            id=f"loadbalancer-{i:05d}",
+            name=f"loadbalancer-{i}",
+            project_id=self._project_id(),
+            vip_address=f"172.16.{i // 256 % 256}.{i % 256}",
+            provisioning_status="ACTIVE",
+            operating_status="ONLINE",
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def _amphora(self, load_balancer: LoadBalancer, role: str) -> Amphora:
+        index = self._rand.randrange(1 << 16)
+        return Amphora.existing(
+            id=f"amphora-{load_balancer.id}-{role.lower()}",
+            loadbalancer_id=load_balancer.id,
+            compute_id=f"amphora-server-{index:05d}",
+            lb_network_ip=f"10.10.{index // 256}.{index % 256}",
+            status=self._weighted(AMPHORA_STATUSES),
+            role=role,
+            created_at=load_balancer.created_at,
+            updated_at=load_balancer.updated_at,
+        )
+
+    def _security_group(self, project_id: str, i: int) -> Dict[str, Any]:
+        group_id = f"{project_id}-secgroup-{i}"
+        rules = [
+            {
+                "security_group_id": group_id,
+                "port_range_min": port,
+                "port_range_max": port,
+                "remote_ip_prefix": "10.0.0.0/8",
+            }
+            for port in (80, 443)
+        ]
+        if self._rand.random() < 0.2:
+            rules.append({"security_group_id": group_id, **OPEN_SSH_RULE})
+        return {
+            "id": group_id,
+            "name": "default" if i == 0 else f"secgroup-{i}",
+            "project_id": project_id,
+            "security_group_rules": rules,
+        }
+
+    def connection_cls(self, cloud_name: str) -> "SyntheticConnection":
+        """
+        Can be passed as connection_cls in place of OpenstackConnection
+        :param cloud_name: The cloud name, ignored
+        """
+        return SyntheticConnection(self, cloud_name)
+
+    def call(self, service: str, method: str, path: str, pages: int = 1) -> None:
+        """
+        Sleeps for the latency of a call and counts it, once per page for listings
+        :param service: The service type the call would be made to
+        :param method: The HTTP method the call would use
+        :param path: The path the call would request
+        :param pages: The number of pages the call would fetch
+        """
+        for _ in range(max(1, pages)):
+            if self.spec.latency:
+                time.sleep(self.spec.latency)
+            self.accounting.record(service, method, path, self.spec.latency, "200")
+
+    def pages(self, items: List[Any], page_size: Optional[int] = None) -> int:
+        """
+        Returns the number of pages a listing would take
+        """
+        page_size = page_size or self.spec.page_size
+        return len(items) // page_size + 1
+
+    def get_project(self, project_id: str) -> Project:
+        self.call("identity", "GET", f"/v3/projects/{project_id}")
+        if project_id not in self._projects_by_id:
+            raise ResourceNotFound(f"No Project found for {project_id}")
+        return self._projects_by_id[project_id]
+
+    def get_resource(self, service: str, path: str, resource_id: str):
+        self.call(service, "GET", f"{path}/{resource_id}")
+        if resource_id in self.deleted_ids or resource_id not in self._by_id:
+            raise ResourceNotFound(f"No resource found for {resource_id}")
+        return self._by_id[resource_id]
+
+
+# maps server-side filters which can be passed to conn.compute.servers() to Server attributes
+_SERVER_FILTERS = {
+    "project_id": "project_id",
+    "user_id": "user_id",
+    "uuid": "id",
+    "hostname": "name",
+    "vm_state": "status",
+    "description": "description",
+    "created_at": "created_at",
+}
+
+
+# pylint:disable=too-few-public-methods
+class _Proxy:
+    """
+    Base for fake service proxies, e.g. conn.compute
+    """
+
+    def __init__(self, cloud: SyntheticCloud):
+        self._cloud = cloud
+
+
+class _IdentityProxy(_Proxy):
+    def projects(self, **_) -> Iterator[Project]:
+        self._cloud.call(
+            "identity", "GET", "/v3/projects", self._cloud.pages(self._cloud.projects)
+        )
+        return iter(self._cloud.projects)
+
+    def find_project(self, name_or_id: str, ignore_missing: bool = True, **_):
+        self._cloud.call("identity", "GET", "/v3/projects")
+        for project in self._cloud.projects:
+            if name_or_id in (project.id, project.name):
+                return project
+        if ignore_missing:
+            return None
+        raise ResourceNotFound(f"No Project found for {name_or_id}")
+
+    def get_project(self, project_id: str) -> Project:
+        return self._cloud.get_project(project_id)
+
+    def users(self, **_) -> Iterator[User]:
+        self._cloud.call(
+            "identity", "GET", "/v3/users", self._cloud.pages(self._cloud.users)
+        )
+        return iter(self._cloud.users)
+
+    def get_user(self, user_id: str) -> User:
+        return self._cloud.get_resource("identity", "/v3/users", user_id)
+
+
+class _ComputeProxy(_Proxy):
+    # all_projects is accepted like openstacksdk, every server is listed regardless
+    # pylint:disable=unused-argument
+    def servers(self, details: bool = True, all_projects: bool = False, **filters):
+        """
+        Lazily lists servers a page at a time, as openstacksdk does - each page is one call
+        """
+        page_size = filters.pop("limit", None) or self._cloud.spec.page_size
+        marker = filters.pop("marker", None)
+        filters.pop("all_tenants", None)
+        for key in ("changes-since", "changes-before"):
+            filters.pop(key, None)
+        unknown = set(filters) - set(_SERVER_FILTERS)
+        if unknown:
+            raise NotImplementedError(
+                f"Synthetic cloud can't filter servers by {unknown}"
+            )
+
+        servers = (
+            self._cloud.servers_by_project.get(filters["project_id"], [])
+            if "project_id" in filters
+            else self._cloud.servers
+        )
+        if marker:
+            servers = servers[[server.id for server in servers].index(marker) + 1 :]
+        matching = (
+            server
+            for server in servers
+            if all(
+                server[_SERVER_FILTERS[key]] == value for key, value in filters.items()
+            )
+        )
+        path = "/servers/detail" if details else "/servers"
+        while True:
+            self._cloud.call("compute", "GET", path)
+            page = list(islice(matching, page_size))
+            yield from page
+            if len(page) < page_size:
+                return
+
+    def get_server(self, server_id: str) -> Server:
+        return self._cloud.get_resource("compute", "/servers", server_id)
+
+
+class _ImageProxy(_Proxy):
+    def images(self, owner: Optional[str] = None, **_) -> Iterator[Image]:
+        images = [
+            image
+            for image in self._cloud.images
+            if owner is None or image.owner == owner
+        ]
+        self._cloud.call("image", "GET", "/v2/images", self._cloud.pages(images))
+        return iter(images)
+
+    def get_image(self, image_id: str) -> Image:
+        return self._cloud.get_resource("image", "/v2/images", image_id)
+
+
+class _NetworkProxy(_Proxy):
+    def get_ip(self, fip_id: str) -> FloatingIP:
+        return self._cloud.get_resource("network", "/v2.0/floatingips", fip_id)
+
+
+class SyntheticConnection:
+    """
+    A fake openstacksdk connection to a synthetic cloud, used as a context manager like OpenstackConnection.
+    Implements the proxy methods and cloud layer list_* methods the pack uses
+    """
+
+    def __init__(self, cloud: SyntheticCloud, cloud_name: str):
+        self._cloud = cloud
+        self.cloud_name = cloud_name
+        self.identity = _IdentityProxy(cloud)
+        self.compute = _ComputeProxy(cloud)
+        self.image = _ImageProxy(cloud)
+        self.network = _NetworkProxy(cloud)
+
+    def __enter__(self) -> "SyntheticConnection":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def close(self):
+        pass
+
+    def list_projects(self, **_) -> List[Project]:
+        return list(self.identity.projects())
+
+    def list_servers(self, detailed: bool = True, filters=None, **_) -> List[Server]:
+        return list(self.compute.servers(details=detailed, **dict(filters or {})))
+
+    def list_images(self, **_) -> List[Image]:
+        return list(self.image.images())
+
+    def list_floating_ips(self, filters=None) -> List[FloatingIP]:
+        project_id = (filters or {}).get("project_id")
+        fips = [
+            fip
+            for fip in self._cloud.fips
+            if project_id is None or fip.project_id == project_id
+        ]
+        self._cloud.call("network", "GET", "/v2.0/floatingips", self._cloud.pages(fips))
+        return fips
+
+    def list_security_groups(self, filters=None) -> List[Dict[str, Any]]:
+        project_id = (filters or {}).get("project_id")
+        groups = (
+            self._cloud.security_groups.get(project_id, [])
+            if project_id
+            else [
+                group
+                for groups in self._cloud.security_groups.values()
+                for group in groups
+            ]
+        )
+        self._cloud.call(
+            "network", "GET", "/v2.0/security-groups", self._cloud.pages(groups)
+        )
+        return groups
+
+    def list_server_security_groups(self, server_id: str) -> List[Dict[str, Any]]:
+        self._cloud.call("compute", "GET", f"/servers/{server_id}/os-security-groups")
+        return self._cloud.server_security_groups.get(server_id, [])
@@ -0,0 +1,29 @@
+from parameterized import parameterized
+
+from enums.query.query_aggregations import QueryAggregations
+from nose.tools import raises
+from exceptions.parse_query_error import ParseQueryError
+
+
+@parameterized(["count", "CoUnT", "COUNT"])
+def test_count_serialization(val):
+    """
+    Tests that variants of COUNT can be serialized
+    """
+    assert QueryAggregations.from_string(val) is QueryAggregations.COUNT
+
+
+@parameterized(["top_k", "Top_K", "TOP_K"])
+def test_top_k_serialization(val):
+    """
+    Tests that variants of TOP_K can be serialized
+    """
+    assert QueryAggregations.from_string(val) is QueryAggregations.TOP_K
+
+
+@raises(ParseQueryError)
+def test_invalid_serialization():
+    """
+    Tests that error is raised when passes invalid string
+    """
+    QueryAggregations.from_string("some-invalid-string")
@@ -37,6 +37,30 @@ def test_to_str_serialization(val):
     assert QueryOutputTypes.from_string(val) is QueryOutputTypes.TO_STR
 
 
+@parameterized(["to_NDJSON", "To_NdJsOn", "to_ndjson"])
+def test_to_ndjson_serialization(val):
+    """
+    Tests that variants of TO_NDJSON can be serialized
+    """
+    assert QueryOutputTypes.from_string(val) is QueryOutputTypes.TO_NDJSON
+
+
+@parameterized(["to_CSV", "To_CsV", "to_csv"])
+def test_to_csv_serialization(val):
+    """
+    Tests that variants of TO_CSV can be serialized
+    """
+    assert QueryOutputTypes.from_string(val) is QueryOutputTypes.TO_CSV
+
+
+@parameterized(["to_JSON", "To_JsOn", "to_json"])
+def test_to_json_serialization(val):
+    """
+    Tests that variants of TO_JSON can be serialized
+    """
+    assert QueryOutputTypes.from_string(val) is QueryOutputTypes.TO_JSON
+
+
 @raises(ParseQueryError)
 def test_invalid_serialization():
     """
@@ -190,6 +190,32 @@ class QueryPresetsTests(unittest.TestCase):
         """
         assert QueryPresetsString.from_string(val) is QueryPresetsString.MATCHES_REGEX
 
+    @parameterized.expand(
+        [
+            ("lowercase", "contains"),
+            ("capitalized", "Contains"),
+            ("mix_case", "CoNtAiNs"),
+        ]
+    )
+    def test_contains_serialization(self, _, val):
+        """
+        Tests that variants of CONTAINS can be serialized
+        """
+        assert QueryPresetsString.from_string(val) is QueryPresetsString.CONTAINS
+
+    @parameterized.expand(
+        [
+            ("lowercase", "not_contains"),
+            ("capitalized", "Not_Contains"),
+            ("mix_case", "NoT_CoNtAiNs"),
+        ]
+    )
+    def test_not_contains_serialization(self, _, val):
+        """
+        Tests that variants of NOT_CONTAINS can be serialized
+        """
+        assert QueryPresetsString.from_string(val) is QueryPresetsString.NOT_CONTAINS
+
     def test_invalid_serialization(self):
         """
         Tests that error is raised when passes invalid string to all preset classes
@@ -0,0 +1,135 @@
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+
+# pylint:disable=too-many-instance-attributes
+class StubJupyterHub:
+    """
+    A minimal local stand-in for the JupyterHub users API, used to test UserApi over real HTTP.
+    Supports listing, creating and deleting users and starting/stopping their servers.
+    Responses for a path can be overridden with a queue of status codes to inject errors
+    """
+
+    def __init__(self):
+        self.users: Dict[str, Dict] = {}
+        self.connections = 0
+        self.requests: List[str] = []
+        self.injected_statuses: Dict[str, List[int]] = defaultdict(list)
+        # Mimics JupyterHub 2.0+ when True, and older hubs which return every user when False
+        self.paginate = True
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        hub = self
+
+        # the handler shares the hub's state, so reaches into its private members
+        # pylint:disable=protected-access
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with hub._lock:
+                    hub.connections += 1
+
+            # pylint: disable=redefined-builtin
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body=None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self, method: str):
+                url = urlsplit(self.path)
+                with hub._lock:
+                    hub.requests.append(f"{method} {url.path}")
+                    injected = hub.injected_statuses[url.path]
+                    if injected:
+                        self._reply(injected.pop(0))
+                        return
+                    parts = url.path.strip("/").split("/")[3:]
+                    if not parts and method == "GET" and hub.paginate:
+                        self._reply(200, hub._page(parse_qs(url.query)))
+                        return
+                    self._reply(*hub._route(method, parts))
+
+            # pylint:disable=invalid-name
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
+
+    def _page(self, query: Dict[str, List[str]]) -> Dict:
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["200"])[0])
+        users = list(self.users.values())
+        next_offset = offset + limit
+        return {
+            "items": users[offset:next_offset],
+            "_pagination": {
+                "offset": offset,
+                "limit": limit,
+                "total": len(users),
+                "next": {"offset": next_offset} if next_offset < len(users) else None,
+            },
+        }
+
+    # pylint:disable=too-many-return-statements
+    def _route(self, method: str, parts: List[str]):
+        if not parts and method == "GET":
+            return 200, list(self.users.values())
+        if len(parts) == 1:
+            name = parts[0]
+            if method == "POST":
+                if name in self.users:
+                    return (409,)
+                self.users[name] = {
+                    "name": name,
+                    "created": "2023-01-01T00:00:00.000000Z",
+                    "last_activity": None,
+                    "server": None,
+                }
+                return 201, self.users[name]
+            if method == "DELETE":
+                return (204,) if self.users.pop(name, None) else (404,)
+        if len(parts) == 2 and parts[1] == "server" and parts[0] in self.users:
+            user = self.users[parts[0]]
+            if method == "POST":
+                user["server"] = "/user/" + parts[0]
+                return (201,)
+            if method == "DELETE":
+                user["server"] = None
+                return (204,)
+        return (404,)
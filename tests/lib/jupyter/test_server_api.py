@@ -19,10 +19,11 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.post.return_value.status_code = 201
+        requests.Session.return_value.request.return_value.status_code = 201
 
         self.api.start_servers("dev", token, user_names)
-        requests.post.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "POST",
             url=API_ENDPOINTS["dev"] + "/hub/api/users/test/server",
             headers={"Authorization": f"token {token}"},
             timeout=60,
@@ -38,16 +39,25 @@ class UserApiTests(unittest.TestCase):
         user_names = JupyterUsers(
             name="test", start_index=start_index, end_index=end_index
         )
-        requests.post.return_value.status_code = 201
+        requests.Session.return_value.request.return_value.status_code = 201
 
         self.api.start_servers("dev", token, user_names)
-        for i, user_index in enumerate(range(start_index, end_index + 1)):
-            assert requests.post.call_args_list[i] == call(
-                url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}/server",
-                headers={"Authorization": f"token {token}"},
-                timeout=60,
-            )
-        assert requests.post.call_count == (end_index - start_index + 1)
+        requests.Session.return_value.request.assert_has_calls(
+            [
+                call(
+                    "POST",
+                    url=API_ENDPOINTS["dev"]
+                    + f"/hub/api/users/test-{user_index}/server",
+                    headers={"Authorization": f"token {token}"},
+                    timeout=60,
+                )
+                for user_index in range(start_index, end_index + 1)
+            ],
+            any_order=True,
+        )
+        assert requests.Session.return_value.request.call_count == (
+            end_index - start_index + 1
+        )
 
     @raises(RuntimeError)
     def test_start_servers_missing_start_index(self, _):
@@ -79,7 +89,7 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.post.return_value.status_code = 500
+        requests.Session.return_value.request.return_value.status_code = 500
 
         with self.assertRaisesRegex(RuntimeError, "Failed to request server"):
             self.api.start_servers("dev", token, user_names)
@@ -90,10 +100,11 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.delete.return_value.status_code = 204
+        requests.Session.return_value.request.return_value.status_code = 204
 
         self.api.stop_servers("dev", token, user_names)
-        requests.delete.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "DELETE",
             url=API_ENDPOINTS["dev"] + "/hub/api/users/test/server",
             headers={"Authorization": f"token {token}"},
             timeout=60,
@@ -109,16 +120,25 @@ class UserApiTests(unittest.TestCase):
         user_names = JupyterUsers(
             name="test", start_index=start_index, end_index=end_index
         )
-        requests.delete.return_value.status_code = 204
+        requests.Session.return_value.request.return_value.status_code = 204
 
         self.api.stop_servers("dev", token, user_names)
-        for i, user_index in enumerate(range(start_index, end_index + 1)):
-            assert requests.delete.call_args_list[i] == call(
-                url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}/server",
-                headers={"Authorization": f"token {token}"},
-                timeout=60,
-            )
-        assert requests.delete.call_count == (end_index - start_index + 1)
+        requests.Session.return_value.request.assert_has_calls(
+            [
+                call(
+                    "DELETE",
+                    url=API_ENDPOINTS["dev"]
+                    + f"/hub/api/users/test-{user_index}/server",
+                    headers={"Authorization": f"token {token}"},
+                    timeout=60,
+                )
+                for user_index in range(start_index, end_index + 1)
+            ],
+            any_order=True,
+        )
+        assert requests.Session.return_value.request.call_count == (
+            end_index - start_index + 1
+        )
 
     @raises(RuntimeError)
     def test_stop_servers_missing_start_index(self, _):
@@ -150,7 +170,7 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.delete.return_value.status_code = 500
+        requests.Session.return_value.request.return_value.status_code = 500
 
         with self.assertRaisesRegex(RuntimeError, "Failed to stop server"):
             self.api.stop_servers("dev", token, user_names)
@@ -12,6 +12,8 @@ from jupyter_api.api_endpoints import API_ENDPOINTS
 from jupyter_api.user_api import UserApi
 from structs.jupyter_users import JupyterUsers
 
+# pylint:disable=protected-access
+
 
 @patch("jupyter_api.user_api.requests")
 class UserApiTests(unittest.TestCase):
@@ -28,17 +30,22 @@ class UserApiTests(unittest.TestCase):
         expected_name = "test"
         expected_time = "2020-01-01T00:00:00Z"
 
-        requests.get.return_value.status_code = 200
-        requests.get.return_value.json.return_value = [
+        requests.Session.return_value.request.return_value.status_code = 200
+        requests.Session.return_value.request.return_value.json.return_value = [
             {"name": expected_name, "last_activity": expected_time}
         ]
 
         returned = self.api.get_users(endpoint, token)
 
-        requests.get.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "GET",
             url=API_ENDPOINTS[endpoint] + "/hub/api/users",
-            headers={"Authorization": f"token {token}"},
-            timeout=300,
+            headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/jupyterhub-pagination+json",
+            },
+            timeout=60,
+            params={"offset": 0, "limit": 200},
         )
         assert len(returned) == 1
         assert returned[0][0] == expected_name
@@ -51,15 +58,20 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
 
-        requests.get.return_value.status_code = 204
-        requests.get.return_value.json.return_value = []
+        requests.Session.return_value.request.return_value.status_code = 204
+        requests.Session.return_value.request.return_value.json.return_value = []
 
         returned = self.api.get_users(endpoint, token)
 
-        requests.get.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "GET",
             url=API_ENDPOINTS[endpoint] + "/hub/api/users",
-            headers={"Authorization": f"token {token}"},
-            timeout=300,
+            headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/jupyterhub-pagination+json",
+            },
+            timeout=60,
+            params={"offset": 0, "limit": 200},
         )
         assert len(returned) == 0
 
@@ -67,12 +79,60 @@ class UserApiTests(unittest.TestCase):
         """
         Tests that the get_users method logs an error if the request fails
         """
-        requests.get.return_value.status_code = 500
-        requests.get.return_value.json.return_value = []
+        requests.Session.return_value.request.return_value.status_code = 500
+        requests.Session.return_value.request.return_value.json.return_value = []
 
         with self.assertRaisesRegex(RuntimeError, "Failed to get users"):
             self.api.get_users("dev", "token")
 
+    def test_get_users_paginated(self, requests):
+        """
+        Tests that get_users follows JupyterHub's pagination until there is no next page
+        """
+        session = requests.Session.return_value
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.side_effect = [
+            {
+                "items": [{"name": "user1", "last_activity": "2020-01-01T00:00:00Z"}],
+                "_pagination": {"offset": 0, "limit": 1, "next": {"offset": 1}},
+            },
+            {
+                "items": [
+                    {
+                        "name": "user2",
+                        "last_activity": None,
+                        "created": "2020-01-02T00:00:00.123456Z",
+                    }
+                ],
+                "_pagination": {"offset": 1, "limit": 1, "next": None},
+            },
+        ]
+
+        returned = self.api.get_users("dev", "token", state="inactive")
+
+        assert [call_.kwargs["params"] for call_ in session.request.call_args_list] == [
+            {"offset": 0, "limit": 200, "state": "inactive"},
+            {"offset": 1, "limit": 200, "state": "inactive"},
+        ]
+        assert returned == [
+            ("user1", parser.parse("2020-01-01T00:00:00Z")),
+            ("user2", parser.parse("2020-01-02T00:00:00.123456Z")),
+        ]
+
+    @parameterized.expand(
+        [
+            ("no fraction", "2020-01-01T10:20:30Z"),
+            ("microseconds", "2020-01-01T10:20:30.123456Z"),
+            ("milliseconds", "2020-01-01T10:20:30.123Z"),
+            ("offset", "2020-01-01T10:20:30+01:00"),
+        ]
+    )
+    def test_parse_timestamp(self, _, __, timestamp):
+        """
+        Tests that the fast timestamp parser agrees with dateutil
+        """
+        assert UserApi._parse_timestamp(timestamp) == parser.parse(timestamp)
+
     def test_get_inactive_users(self, _):
         """
         Tests the get_inactive_users filters out active users
@@ -86,10 +146,10 @@ class UserApiTests(unittest.TestCase):
             pytz.utc.localize(datetime.now() - relativedelta(seconds=2)),
         )
 
-        self.api.get_users = Mock(return_value=[active_user, inactive_user])
+        self.api.iter_users = Mock(return_value=iter([active_user, inactive_user]))
         returned = self.api.get_inactive_users("dev", "token", threshold)
 
-        self.api.get_users.assert_called_once_with("dev", "token")
+        self.api.iter_users.assert_called_once_with("dev", "token")
 
         assert len(returned) == 1
         assert returned[0] == inactive_user
@@ -98,10 +158,10 @@ class UserApiTests(unittest.TestCase):
         """
         Tests the get_inactive_users method returns an empty list if no users are found
         """
-        self.api.get_users = Mock(return_value=[])
+        self.api.iter_users = Mock(return_value=iter([]))
         returned = self.api.get_inactive_users("dev", "token", relativedelta(seconds=1))
 
-        self.api.get_users.assert_called_once_with("dev", "token")
+        self.api.iter_users.assert_called_once_with("dev", "token")
         assert not returned
 
     def test_remove_users_single_user(self, requests):
@@ -110,10 +170,11 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.delete.return_value.status_code = 204
+        requests.Session.return_value.request.return_value.status_code = 204
 
         self.api.delete_users("dev", token, user_names)
-        requests.delete.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "DELETE",
             url=API_ENDPOINTS["dev"] + "/hub/api/users/test",
             headers={"Authorization": f"token {token}"},
             timeout=300,
@@ -129,16 +190,24 @@ class UserApiTests(unittest.TestCase):
         user_names = JupyterUsers(
             name="test", start_index=start_index, end_index=end_index
         )
-        requests.delete.return_value.status_code = 204
+        requests.Session.return_value.request.return_value.status_code = 204
 
         self.api.delete_users("dev", token, user_names)
-        for i, user_index in enumerate(range(start_index, end_index + 1)):
-            assert requests.delete.call_args_list[i] == call(
-                url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}",
-                headers={"Authorization": f"token {token}"},
-                timeout=300,
-            )
-        assert requests.delete.call_count == (end_index - start_index + 1)
+        requests.Session.return_value.request.assert_has_calls(
+            [
+                call(
+                    "DELETE",
+                    url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}",
+                    headers={"Authorization": f"token {token}"},
+                    timeout=300,
+                )
+                for user_index in range(start_index, end_index + 1)
+            ],
+            any_order=True,
+        )
+        assert requests.Session.return_value.request.call_count == (
+            end_index - start_index + 1
+        )
 
     @raises(RuntimeError)
     def test_remove_users_missing_start_index(self, _):
@@ -170,10 +239,11 @@ class UserApiTests(unittest.TestCase):
         """
         token = NonCallableMock()
         user_names = JupyterUsers(name="test", start_index=None, end_index=None)
-        requests.post.return_value.status_code = 201
+        requests.Session.return_value.request.return_value.status_code = 201
 
         self.api.create_users("dev", token, user_names)
-        requests.post.assert_called_once_with(
+        requests.Session.return_value.request.assert_called_once_with(
+            "POST",
             url=API_ENDPOINTS["dev"] + "/hub/api/users/test",
             headers={"Authorization": f"token {token}"},
             timeout=60,
@@ -189,16 +259,24 @@ class UserApiTests(unittest.TestCase):
         user_names = JupyterUsers(
             name="test", start_index=start_index, end_index=end_index
         )
-        requests.post.return_value.status_code = 201
+        requests.Session.return_value.request.return_value.status_code = 201
 
         self.api.create_users("dev", token, user_names)
-        for i, user_index in enumerate(range(start_index, end_index + 1)):
-            assert requests.post.call_args_list[i] == call(
-                url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}",
-                headers={"Authorization": f"token {token}"},
-                timeout=60,
-            )
-        assert requests.post.call_count == (end_index - start_index + 1)
+        requests.Session.return_value.request.assert_has_calls(
+            [
+                call(
+                    "POST",
+                    url=API_ENDPOINTS["dev"] + f"/hub/api/users/test-{user_index}",
+                    headers={"Authorization": f"token {token}"},
+                    timeout=60,
+                )
+                for user_index in range(start_index, end_index + 1)
+            ],
+            any_order=True,
+        )
+        assert requests.Session.return_value.request.call_count == (
+            end_index - start_index + 1
+        )
 
     @raises(RuntimeError)
     def test_create_users_missing_start_index(self, _):
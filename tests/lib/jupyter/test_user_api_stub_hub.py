@@ -0,0 +1,104 @@
+import unittest
+from contextlib import ExitStack
+
+from jupyter_api.user_api import UserApi
+from structs.jupyter_users import JupyterUsers
+from tests.lib.jupyter.stub_jupyterhub import StubJupyterHub
+
+
+class UserApiStubHubTests(unittest.TestCase):
+    """
+    Runs UserApi against a local stub JupyterHub to check connection reuse,
+    retries and per-user error aggregation over real HTTP
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.hub = stack.enter_context(StubJupyterHub())
+        self.api = UserApi(
+            endpoints={"dev": self.hub.url}, max_concurrent=4, backoff_factor=0
+        )
+
+    def test_create_users_reuses_connections(self):
+        """
+        Tests that a batch of users is created over a bounded, reused set of connections
+        """
+        self.api.create_users("dev", "token", JupyterUsers("test", 1, 50))
+
+        self.assertEqual(set(self.hub.users), {f"test-{i}" for i in range(1, 51)})
+        self.assertLessEqual(self.hub.connections, 4)
+
+    def test_full_lifecycle(self):
+        """
+        Tests creating users, starting and stopping servers, listing and deleting them
+        """
+        users = JupyterUsers("test", 1, 5)
+        self.api.create_users("dev", "token", users)
+        self.api.start_servers("dev", "token", users)
+        self.assertTrue(all(user["server"] for user in self.hub.users.values()))
+        self.api.stop_servers("dev", "token", users)
+        self.assertFalse(any(user["server"] for user in self.hub.users.values()))
+
+        self.assertEqual(len(self.api.get_users("dev", "token")), 5)
+        self.api.delete_users("dev", "token", users)
+        self.assertEqual(self.hub.users, {})
+
+    def test_retries_rate_limited_and_server_errors(self):
+        """
+        Tests that 429 responses are retried until the request succeeds, and 5xx responses are retried
+        for listing users
+        """
+        self.hub.injected_statuses["/hub/api/users/test"] = [429, 429]
+        self.api.create_users("dev", "token", JupyterUsers("test", None, None))
+
+        self.assertIn("test", self.hub.users)
+        self.assertEqual(self.hub.requests.count("POST /hub/api/users/test"), 3)
+
+        self.hub.injected_statuses["/hub/api/users"] = [503, 502]
+        self.assertEqual(len(self.api.get_users("dev", "token")), 1)
+
+    def test_changes_not_retried_on_server_error(self):
+        """
+        Tests that creating or deleting a user isn't retried on a 5xx response, as the hub may have already
+        made the change
+        """
+        self.hub.injected_statuses["/hub/api/users/test"] = [503]
+        with self.assertRaisesRegex(RuntimeError, "Failed for 1 of 1 user"):
+            self.api.create_users("dev", "token", JupyterUsers("test", None, None))
+        self.assertEqual(self.hub.requests.count("POST /hub/api/users/test"), 1)
+
+        self.api.create_users("dev", "token", JupyterUsers("test", None, None))
+        self.hub.injected_statuses["/hub/api/users/test"] = [502]
+        with self.assertRaisesRegex(RuntimeError, "Failed for 1 of 1 user"):
+            self.api.delete_users("dev", "token", JupyterUsers("test", None, None))
+        self.assertEqual(self.hub.requests.count("DELETE /hub/api/users/test"), 1)
+
+    def test_failures_are_aggregated(self):
+        """
+        Tests that every user is attempted and all failures are reported together
+        """
+        self.hub.injected_statuses["/hub/api/users/test-2"] = [400]
+        self.hub.injected_statuses["/hub/api/users/test-4"] = [403]
+
+        with self.assertRaisesRegex(RuntimeError, "Failed for 2 of 5 user") as err:
+            self.api.create_users("dev", "token", JupyterUsers("test", 1, 5))
+
+        self.assertIn("test-2", str(err.exception))
+        self.assertIn("test-4", str(err.exception))
+        self.assertEqual(set(self.hub.users), {"test-1", "test-3", "test-5"})
+
+    def test_get_users_paginated(self):
+        """
+        Tests that users are listed across several pages, and from hubs without pagination
+        """
+        self.api.create_users("dev", "token", JupyterUsers("test", 1, 450))
+
+        self.hub.requests.clear()
+        paged = self.api.get_users("dev", "token")
+        self.assertEqual(self.hub.requests.count("GET /hub/api/users"), 3)
+
+        self.hub.paginate = False
+        self.assertEqual(self.api.get_users("dev", "token"), paged)
+        self.assertEqual(len(paged), 450)
@@ -1,5 +1,5 @@
 import unittest
-from typing import Any
+from typing import Any, List, Union
 from unittest.mock import MagicMock, patch, NonCallableMock
 from parameterized import parameterized
 
@@ -297,3 +297,60 @@ class ClientSideHandlerBaseTests(unittest.TestCase):
             mock_filter_func, func_kwargs={"arg1": "string"}
         )
         self.assertEqual(True, res[0])
+
+    def test_check_filter_func_with_generic_typing(self):
+        """
+        Tests that check_filter_func method works expectedly - for filter_func which takes a param
+        annotated with a generic type, e.g. List[str], the origin type is checked
+        """
+
+        # pylint:disable=unused-argument
+        def mock_filter_func(prop, arg1: List[str]):
+            return None
+
+        res = self.instance._check_filter_func(
+            mock_filter_func, func_kwargs={"arg1": ["val1"]}
+        )
+        self.assertEqual(True, res[0])
+
+        res = self.instance._check_filter_func(
+            mock_filter_func, func_kwargs={"arg1": "val1"}
+        )
+        self.assertEqual(False, res[0])
+
+        # pylint:disable=unused-argument
+        def mock_union_filter_func(prop, arg1: Union[int, float]):
+            return None
+
+        for val, expected in ((1, True), (1.5, True), ("1", False)):
+            res = self.instance._check_filter_func(
+                mock_union_filter_func, func_kwargs={"arg1": val}
+            )
+            self.assertEqual(expected, res[0])
+
+    @patch("openstack_query.handlers.client_side_handler.numpy_available")
+    def test_get_vectorised_filter_unavailable(self, mock_numpy_available):
+        """
+        Tests that get_vectorised_filter returns None when NumPy is not installed,
+        or when the preset has no vectorised function
+        """
+        self.instance._vectorised_functions = {MockQueryPresets.ITEM_1: MagicMock()}
+
+        mock_numpy_available.return_value = False
+        self.assertIsNone(
+            self.instance.get_vectorised_filter(
+                MockQueryPresets.ITEM_1, MockProperties.PROP_1, MagicMock()
+            )
+        )
+
+        mock_numpy_available.return_value = True
+        self.assertIsNone(
+            self.instance.get_vectorised_filter(
+                MockQueryPresets.ITEM_2, MockProperties.PROP_1, MagicMock()
+            )
+        )
+        self.assertIsNotNone(
+            self.instance.get_vectorised_filter(
+                MockQueryPresets.ITEM_1, MockProperties.PROP_1, MagicMock()
+            )
+        )
@@ -3,6 +3,7 @@ from datetime import datetime
 from unittest.mock import patch
 from parameterized import parameterized
 
+from openstack_query.columnar import numpy_available
 from openstack_query.handlers.client_side_handler_datetime import (
     ClientSideHandlerDateTime,
 )
@@ -177,3 +178,24 @@ class ClientSideHandlerDateTimeTests(unittest.TestCase):
         kwargs = self.test_cases[name]
         out = self.instance._prop_younger_than_or_equal_to(**kwargs)
         assert out == expected_out
+
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorised_filters_match_filter_functions(self, mock_current_time):
+        """
+        Tests that vectorised filters give the same results as running the filter function on each prop
+        """
+        props = [case["prop"] for case in self.test_cases.values()] + [None]
+        for preset in QueryPresetsDateTime:
+            for case in self.test_cases.values():
+                kwargs = {key: val for key, val in case.items() if key != "prop"}
+                filter_func = self.instance.get_filter_func(
+                    preset, MockProperties.PROP_1, lambda item: item, kwargs
+                )
+                vectorised_func = self.instance.get_vectorised_filter(
+                    preset, MockProperties.PROP_1, lambda item: item, kwargs
+                )
+                self.assertEqual(
+                    vectorised_func(props[:-1]).tolist(),
+                    [filter_func(prop) for prop in props[:-1]],
+                )
+                self.assertFalse(vectorised_func(props)[-1])
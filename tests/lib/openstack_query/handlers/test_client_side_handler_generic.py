@@ -1,6 +1,7 @@
 import unittest
 from parameterized import parameterized
 
+from openstack_query.columnar import numpy_available
 from openstack_query.handlers.client_side_handler_generic import (
     ClientSideHandlerGeneric,
 )
@@ -68,3 +69,39 @@ class ClientSideHandlerGenericTests(unittest.TestCase):
         Returns True if prop and value are not equal
         """
         assert self.instance._prop_not_equal_to(prop, value) == expected_out
+
+    @parameterized.expand(
+        [
+            (f"{preset.name} {name}", preset, value)
+            for preset in QueryPresetsGeneric
+            for name, value in (("str", "ACTIVE"), ("int", 1), ("missing", "none"))
+        ]
+    )
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorised_filters_match_filter_functions(self, _, preset, value):
+        """
+        Tests that vectorised filters give the same results as running the filter function on each prop
+        """
+        props = ["ACTIVE", "SHUTOFF", 1, 1.0, None, "ACTIVE"]
+        filter_func = self.instance.get_filter_func(
+            preset, MockProperties.PROP_1, lambda item: item, {"value": value}
+        )
+        vectorised_func = self.instance.get_vectorised_filter(
+            preset, MockProperties.PROP_1, lambda item: item, {"value": value}
+        )
+        self.assertEqual(
+            vectorised_func(props).tolist(), [filter_func(prop) for prop in props]
+        )
+
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorised_filter_unhashable(self):
+        """
+        Tests that vectorised filters return None for unhashable props, so filter functions are used instead
+        """
+        vectorised_func = self.instance.get_vectorised_filter(
+            QueryPresetsGeneric.EQUAL_TO,
+            MockProperties.PROP_1,
+            lambda item: item,
+            {"value": "a"},
+        )
+        self.assertIsNone(vectorised_func([["a"], "a"]))
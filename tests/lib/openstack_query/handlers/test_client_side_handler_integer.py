@@ -6,6 +6,7 @@ from enums.query.query_presets import QueryPresetsInteger
 from openstack_query.handlers.client_side_handler_integer import (
     ClientSideHandlerInteger,
 )
+from openstack_query.columnar import numpy_available
 from tests.lib.openstack_query.mocks.mocked_props import MockProperties
 
 # pylint:disable=protected-access,
@@ -90,3 +91,22 @@ class ClientSideHandlerIntegerTests(unittest.TestCase):
         Returns True if val1 is greater than or equal to val2
         """
         assert self.instance._prop_greater_than_or_equal_to(val1, val2) == expected_out
+
+    @parameterized.expand(
+        [(f"test {preset.name}", preset) for preset in QueryPresetsInteger]
+    )
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorised_filters_match_filter_functions(self, _, preset):
+        """
+        Tests that vectorised filters give the same results as running the filter function on each prop
+        """
+        props = [8, 10, 10.5, 12, -1]
+        filter_func = self.instance.get_filter_func(
+            preset, MockProperties.PROP_1, lambda item: item, {"value": 10}
+        )
+        vectorised_func = self.instance.get_vectorised_filter(
+            preset, MockProperties.PROP_1, lambda item: item, {"value": 10}
+        )
+        self.assertEqual(
+            vectorised_func(props).tolist(), [filter_func(prop) for prop in props]
+        )
@@ -1,9 +1,11 @@
+import re
 import unittest
-from unittest.mock import patch, NonCallableMock
+from unittest.mock import patch
 from parameterized import parameterized
 
 from nose.tools import raises
 
+from openstack_query.columnar import numpy_available
 from openstack_query.handlers.client_side_handler_string import ClientSideHandlerString
 
 from enums.query.query_presets import QueryPresetsString
@@ -29,6 +31,16 @@ class ClientSideHandlerStringTests(unittest.TestCase):
         }
         self.instance = ClientSideHandlerString(_filter_function_mappings)
 
+    def _run_filter(self, preset, test_props, **kwargs):
+        """
+        Helper which builds a filter function through get_filter_func, so kwargs are compiled,
+        and runs it against each test prop
+        """
+        filter_func = self.instance.get_filter_func(
+            preset, MockProperties.PROP_1, lambda item: item, kwargs
+        )
+        return [filter_func(prop) for prop in test_props]
+
     @parameterized.expand(
         [(f"test {preset.name}", preset) for preset in QueryPresetsString]
     )
@@ -40,28 +52,53 @@ class ClientSideHandlerStringTests(unittest.TestCase):
 
     @parameterized.expand(
         [
-            ("Numeric digits only", "[0-9]+", "123"),
-            ("Alphabetic characters only", "[A-Za-z]+", "abc"),
-            ("No alphabetic characters", "[A-Za-z]+", "123"),
-            ("Alphabetic and numeric characters", "[A-Za-z0-9]+", "abc123"),
-            ("Empty string, no match", "[A-Za-z]+", ""),
+            ("Numeric digits only", "[0-9]+", "123", True),
+            ("Alphabetic characters only", "[A-Za-z]+", "abc", True),
+            ("No alphabetic characters", "[A-Za-z]+", "123", False),
+            ("Alphabetic and numeric characters", "[A-Za-z0-9]+", "abc123", True),
+            ("Empty string, no match", "[A-Za-z]+", "", False),
         ]
     )
-    @patch("re.match")
-    @patch("re.compile")
-    def test_prop_matches_regex_valid(
-        self, _, regex_string, test_prop, mock_regex_compile, mock_regex_match
-    ):
+    def test_prop_matches_regex_valid(self, _, regex_string, test_prop, expected_out):
         """
         Tests that method prop_matches_regex functions expectedly - with valid regex patterns
         Returns True if test_prop matches given regex pattern regex_string
         """
-        mock_compile = NonCallableMock()
-        mock_regex_match.return_value = test_prop
-        mock_regex_compile.return_value = mock_compile
-        self.instance._prop_matches_regex(test_prop, regex_string)
-        mock_regex_match.assert_called_once_with(mock_compile, test_prop)
-        mock_regex_compile.assert_called_once_with(regex_string)
+        assert (
+            self.instance._prop_matches_regex(test_prop, regex_string) == expected_out
+        )
+        assert self._run_filter(
+            QueryPresetsString.MATCHES_REGEX, [test_prop], regex_string=regex_string
+        ) == [expected_out]
+
+    def test_prop_matches_regex_ignore_case(self):
+        """
+        Tests that regex matching can be made case-insensitive
+        """
+        assert self._run_filter(
+            QueryPresetsString.MATCHES_REGEX,
+            ["ABC", "abc"],
+            regex_string="abc",
+            ignore_case=True,
+        ) == [True, True]
+
+    @patch(
+        "openstack_query.handlers.client_side_handler_string.re.compile",
+        wraps=re.compile,
+    )
+    def test_regex_compiled_once(self, mock_compile):
+        """
+        Tests that the regex is compiled once when the filter function is built, not per resource
+        """
+        filter_func = self.instance.get_filter_func(
+            QueryPresetsString.MATCHES_REGEX,
+            MockProperties.PROP_1,
+            lambda item: item,
+            {"regex_string": "[0-9]+"},
+        )
+        for prop in ("1", "2", "3"):
+            filter_func(prop)
+        mock_compile.assert_called_once_with("[0-9]+", 0)
 
     @parameterized.expand(
         [
@@ -74,15 +111,69 @@ class ClientSideHandlerStringTests(unittest.TestCase):
         Tests that method prop_any_in functions expectedly
         Returns True if test_prop matches any values in a given list val_list
         """
-        out = self.instance._prop_any_in(test_prop, val_list)
-        assert out == expected_out
+        assert self.instance._prop_any_in(test_prop, val_list) == expected_out
+        assert self._run_filter(
+            QueryPresetsString.ANY_IN, [test_prop], values=val_list
+        ) == [expected_out]
 
     @raises(MissingMandatoryParamError)
     def test_prop_any_in_empty_list(self):
         """
         Tests that method prop_any_in functions expectedly - when given empty list raise error
         """
-        self.instance._prop_any_in("some-prop-val", [])
+        self._run_filter(QueryPresetsString.ANY_IN, ["some-prop-val"], values=[])
+
+    @parameterized.expand(
+        [
+            ("exact", False, False, [True, False, False, False]),
+            ("ignore case", True, False, [True, True, False, False]),
+            ("prefix", False, True, [True, False, True, False]),
+            ("ignore case prefix", True, True, [True, True, True, True]),
+        ]
+    )
+    def test_prop_any_in_modes(self, _, ignore_case, prefix, expected_out):
+        """
+        Tests that prop_any_in supports case-insensitive and prefix matching
+        """
+        assert (
+            self._run_filter(
+                QueryPresetsString.ANY_IN,
+                ["host-1", "HOST-1", "host-12", "HOST-12"],
+                values=["host-1", "other"],
+                ignore_case=ignore_case,
+                prefix=prefix,
+            )
+            == expected_out
+        )
+
+    @parameterized.expand(
+        [
+            (f"{name}, {mode}", prop, ignore_case, prefix)
+            for name, prop in (
+                ("list", ["val1"]),
+                ("dict", {"val1": "val1"}),
+                ("none", None),
+                ("integer", 1),
+            )
+            for mode, ignore_case, prefix in (
+                ("exact", False, False),
+                ("ignore case", True, False),
+                ("prefix", False, True),
+            )
+        ]
+    )
+    def test_prop_any_in_not_string(self, _, test_prop, ignore_case, prefix):
+        """
+        Tests that prop_any_in returns False for props which aren't strings, including unhashable ones,
+        rather than raising an error
+        """
+        kwargs = {"values": ["val1", "1"], "ignore_case": ignore_case, "prefix": prefix}
+        assert self._run_filter(QueryPresetsString.ANY_IN, [test_prop], **kwargs) == [
+            False
+        ]
+        assert not self.instance._prop_any_in(
+            test_prop, ["val1", "1"], ignore_case, prefix
+        )
 
     @parameterized.expand(
         [
@@ -95,5 +186,89 @@ class ClientSideHandlerStringTests(unittest.TestCase):
         Tests that method prop_any_not_in functions expectedly
         Returns True if test_prop does not match any values in a given list val_list
         """
-        out = self.instance._prop_not_any_in(test_prop, val_list)
-        assert out == expected_out
+        assert self.instance._prop_not_any_in(test_prop, val_list) == expected_out
+        assert self._run_filter(
+            QueryPresetsString.NOT_ANY_IN, [test_prop], values=val_list
+        ) == [expected_out]
+
+    @parameterized.expand(
+        [
+            ("all found", ["ab", "cd"], "xabcdx", True),
+            ("one missing", ["ab", "cd"], "xabx", False),
+            ("overlapping", ["abc", "bcd"], "abcd", True),
+            ("same start", ["ab", "abc"], "abc", True),
+            ("same start, longer missing", ["ab", "abcd"], "abc", False),
+            ("missing prop", ["ab"], None, False),
+        ]
+    )
+    def test_prop_contains(self, _, snippets, test_prop, expected_out):
+        """
+        Tests that method prop_contains returns True only if every snippet is found
+        """
+        assert self.instance._prop_contains(test_prop, snippets) == expected_out
+        assert self._run_filter(
+            QueryPresetsString.CONTAINS, [test_prop], snippets=snippets
+        ) == [expected_out]
+
+    @parameterized.expand(
+        [
+            ("none found", ["ab", "cd"], "xyz", True),
+            ("one found", ["ab", "cd"], "xcdx", False),
+            ("missing prop", ["ab"], None, True),
+        ]
+    )
+    def test_prop_not_contains(self, _, snippets, test_prop, expected_out):
+        """
+        Tests that method prop_not_contains returns True only if no snippet is found
+        """
+        assert self.instance._prop_not_contains(test_prop, snippets) == expected_out
+        assert self._run_filter(
+            QueryPresetsString.NOT_CONTAINS, [test_prop], snippets=snippets
+        ) == [expected_out]
+
+    def test_prop_contains_ignore_case(self):
+        """
+        Tests that snippets can be searched for case-insensitively
+        """
+        assert self._run_filter(
+            QueryPresetsString.CONTAINS,
+            ["Web-Server-01", "web-db-01"],
+            snippets=["WEB", "server"],
+            ignore_case=True,
+        ) == [True, False]
+
+    @raises(MissingMandatoryParamError)
+    def test_prop_contains_empty_list(self):
+        """
+        Tests that an empty list of snippets raises an error
+        """
+        self._run_filter(QueryPresetsString.CONTAINS, ["some-prop-val"], snippets=[])
+
+    @parameterized.expand(
+        [
+            ("any in", QueryPresetsString.ANY_IN),
+            ("not any in", QueryPresetsString.NOT_ANY_IN),
+        ]
+    )
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorised_filters_match_filter_functions(self, _, preset):
+        """
+        Tests that vectorised filters give the same results as running the filter function on each prop,
+        and are not used for case-insensitive or prefix matches
+        """
+        props = ["val1", "val2", "val3", "VAL1"]
+        kwargs = {"values": ["val1", "val3", "val4"]}
+        filter_func = self.instance.get_filter_func(
+            preset, MockProperties.PROP_1, lambda item: item, kwargs
+        )
+        vectorised_func = self.instance.get_vectorised_filter(
+            preset, MockProperties.PROP_1, lambda item: item, kwargs
+        )
+        self.assertEqual(
+            vectorised_func(props).tolist(), [filter_func(prop) for prop in props]
+        )
+
+        vectorised_func = self.instance.get_vectorised_filter(
+            preset, MockProperties.PROP_1, lambda item: item, {**kwargs, "prefix": True}
+        )
+        self.assertIsNone(vectorised_func(props))
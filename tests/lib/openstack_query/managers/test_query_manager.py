@@ -1,4 +1,5 @@
 import unittest
+from dataclasses import replace
 from unittest.mock import MagicMock, patch, NonCallableMock
 from parameterized import parameterized
 
@@ -45,9 +46,49 @@ class QueryManagerTests(unittest.TestCase):
             properties_to_select=MOCKED_OUTPUT_DETAILS.properties_to_select,
         )
         self.query.run.assert_called_once_with("test_account")
-        mock_get_query_output.assert_called_once_with(MOCKED_OUTPUT_DETAILS.output_type)
+        mock_get_query_output.assert_called_once_with(
+            MOCKED_OUTPUT_DETAILS.output_type, MOCKED_OUTPUT_DETAILS.output_path
+        )
         self.assertEqual(res, mock_query_return)
 
+    @patch("openstack_query.managers.query_manager.QueryManager._populate_query")
+    @patch("openstack_query.managers.query_manager.QueryManager._get_query_output")
+    def test_build_and_run_query_with_profile(
+        self, mock_get_query_output, _mock_populate_query
+    ):
+        """
+        Tests that _build_and_run_query method runs the query with profiling when output_details.profile is set,
+        and returns results along with the profile
+        """
+        mock_query_return = NonCallableMock()
+        mock_get_query_output.return_value = mock_query_return
+        output_details = replace(MOCKED_OUTPUT_DETAILS, profile=True)
+
+        res = self.instance._build_and_run_query(MOCKED_PRESET_DETAILS, output_details)
+        self.query.run.assert_called_once_with("test_account", profile=True)
+        self.query.profile.stage.assert_called_once_with("render")
+        self.assertEqual(
+            res,
+            {
+                "results": mock_query_return,
+                "profile": self.query.profile.to_dict.return_value,
+            },
+        )
+
+    @patch("openstack_query.managers.query_manager.QueryManager._populate_query")
+    @patch("openstack_query.managers.query_manager.QueryManager._get_query_output")
+    def test_build_and_run_query_with_resume_token(
+        self, mock_get_query_output, _mock_populate_query
+    ):
+        """
+        Tests that _build_and_run_query method passes output_details.resume_token to the query
+        """
+        output_details = replace(MOCKED_OUTPUT_DETAILS, resume_token="nightly")
+
+        res = self.instance._build_and_run_query(MOCKED_PRESET_DETAILS, output_details)
+        self.query.run.assert_called_once_with("test_account", resume_token="nightly")
+        self.assertEqual(res, mock_get_query_output.return_value)
+
     @parameterized.expand(
         [(f"test {outtype.name.lower()}", outtype) for outtype in QueryOutputTypes]
     )
@@ -88,3 +129,11 @@ class QueryManagerTests(unittest.TestCase):
             prop=MOCKED_PRESET_DETAILS.prop,
             **MOCKED_PRESET_DETAILS.args,
         )
+
+    def test_get_query_output_streamed(self):
+        """
+        Tests that _get_query_output method passes the output path to output types which write to a file
+        """
+        res = self.instance._get_query_output(QueryOutputTypes.TO_CSV, "out.csv")
+        self.query.to_csv.assert_called_once_with("out.csv")
+        self.assertEqual(res, self.query.to_csv.return_value)
@@ -1,7 +1,11 @@
+import os
+import subprocess
+import sys
 import unittest
 from unittest.mock import MagicMock, patch, NonCallableMock
 
 from openstack_query.managers.server_manager import ServerManager
+from openstack_query.queries.server_query import ServerQuery
 
 from enums.query.query_presets import (
     QueryPresetsDateTime,
@@ -97,6 +101,36 @@ class ServerManagerTests(unittest.TestCase):
         )
         self.assertEqual(res, mock_query_return)
 
+    def test_search_by_datetime_seconds(
+        self, mock_query_output_details, mock_build_and_run_query
+    ):
+        """
+        Tests that search_by_datetime passes seconds through unchanged - whether an integer or a float -
+        and the datetime preset it builds accepts them
+        """
+        mock_query_output_details.from_kwargs.return_value = MagicMock()
+        # pylint:disable=protected-access
+        datetime_handler = ServerQuery()._get_client_side_handlers().datetime_handler
+        for seconds in (30, 1.5):
+            self.instance.search_by_datetime(
+                search_mode="older_than",
+                property_to_search_by="server_creation_date",
+                seconds=seconds,
+            )
+            preset_details = mock_build_and_run_query.call_args.kwargs["preset_details"]
+            self.assertEqual(preset_details.args["seconds"], seconds)
+            self.assertIsInstance(preset_details.args["seconds"], type(seconds))
+
+            filter_func = datetime_handler.get_filter_func(
+                preset_details.preset,
+                preset_details.prop,
+                lambda server: server["created_at"],
+                preset_details.args,
+            )
+            self.assertIsInstance(
+                filter_func({"created_at": "2020-01-01T00:00:00Z"}), bool
+            )
+
     def test_search_by_property_with_single_value(
         self, mock_query_output_details, mock_build_and_run_query
     ):
@@ -207,3 +241,33 @@ class ServerManagerTests(unittest.TestCase):
         )
 
         self.assertEqual(res, mock_query_return)
+
+
+class ServerManagerImportTests(unittest.TestCase):
+    """
+    Runs tests to ensure that importing ServerManager stays cheap
+    """
+
+    def test_import_leaves_out_heavy_dependencies(self):
+        """
+        Tests that importing ServerManager doesn't import openstacksdk, NumPy or tabulate, which are only needed
+        once a query runs
+        """
+        code = (
+            "import sys\n"
+            "from openstack_query.managers.server_manager import ServerManager\n"
+            "print(sorted({'openstack', 'numpy', 'tabulate'} & set(sys.modules)))"
+        )
+        res = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={
+                **os.environ,
+                "PYTHONPATH": os.path.join(
+                    os.path.dirname(__file__), "../../../../lib"
+                ),
+            },
+        )
+        self.assertEqual(res.stdout.strip(), "[]")
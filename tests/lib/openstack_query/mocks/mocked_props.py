@@ -12,3 +12,6 @@ class MockProperties(PropEnum):
     PROP_2 = 2
     PROP_3 = 3
     PROP_4 = 4
+
+    def is_numeric(self) -> bool:
+        return self == MockProperties.PROP_2
@@ -1,8 +1,10 @@
 import unittest
+from unittest.mock import MagicMock
 
 from parameterized import parameterized
 from openstack_query.queries.server_query import ServerQuery
 from enums.query.props.server_properties import ServerProperties
+from enums.query.query_presets import QueryPresetsString
 
 # pylint:disable=protected-access
 
@@ -19,6 +21,13 @@ class TestServerQuery(unittest.TestCase):
         super().setUp()
         self.instance = ServerQuery()
 
+    def test_runner_given(self):
+        """
+        Tests that a runner given is used instead of a new ServerRunner
+        """
+        runner = MagicMock()
+        self.assertIs(ServerQuery(runner).runner, runner)
+
     @parameterized.expand(
         [(f"test {prop.name.lower()}", prop) for prop in ServerProperties]
     )
@@ -28,3 +37,32 @@ class TestServerQuery(unittest.TestCase):
         """
         prop_handler = self.instance._get_prop_handler()
         prop_handler.check_supported(prop)
+
+    def test_run_with_limit(self):
+        """
+        Tests that a ServerQuery runs without a limit by default, and passes a limit set on it to its runner
+        """
+        self.instance.runner = MagicMock()
+        self.instance.runner.run.return_value = []
+        self.instance.run("test-account")
+        self.assertIsNone(self.instance.runner.run.call_args.kwargs["limit"])
+
+        self.instance.limit(5).run("test-account")
+        self.assertEqual(self.instance.runner.run.call_args.kwargs["limit"], 5)
+
+    @parameterized.expand(
+        [
+            ("any in", QueryPresetsString.ANY_IN),
+            ("not any in", QueryPresetsString.NOT_ANY_IN),
+        ]
+    )
+    def test_any_in_excludes_list_props(self, _, preset):
+        """
+        Tests that the any in presets are supported for string properties, but not for list-valued ones
+        """
+        string_handler = self.instance._get_client_side_handlers().string_handler
+        self.assertTrue(
+            string_handler.check_supported(preset, ServerProperties.SERVER_NAME)
+        )
+        for prop in (ServerProperties.FLAVOR_ID, ServerProperties.IMAGE_ID):
+            self.assertFalse(string_handler.check_supported(preset, prop))
@@ -0,0 +1,196 @@
+import os
+import stat
+import tempfile
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from nose.tools import raises
+from openstack.compute.v2.server import Server
+
+from openstack_query.runners.query_checkpoint import QueryCheckpoint
+from exceptions.parse_query_error import ParseQueryError
+from structs.query.server_record import ServerRecord
+
+
+class QueryCheckpointTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that QueryCheckpoint functions expectedly.
+    """
+
+    def setUp(self):
+        """
+        Setup for tests
+        """
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.checkpoint_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(
+            patch.object(QueryCheckpoint, "CHECKPOINT_DIR", self.checkpoint_dir)
+        )
+        self.instance = QueryCheckpoint(Server, {"status": "ERROR"})
+
+    def test_progress(self):
+        """
+        Tests that servers added to a project set the marker,
+        and are returned once the project is completed
+        """
+        self.assertIsNone(self.instance.marker("project1"))
+        server = Server.existing(id="server1")
+        self.instance.add("project1", server)
+        self.assertEqual(self.instance.partial("project1"), [server])
+        self.assertEqual(self.instance.marker("project1"), "server1")
+
+        self.assertFalse(self.instance.is_completed("project1"))
+        self.instance.complete("project1")
+        self.assertTrue(self.instance.is_completed("project1"))
+        self.assertEqual(self.instance.completed("project1"), [server])
+        self.assertIsNone(self.instance.marker("project1"))
+
+    def test_save_and_load(self):
+        """
+        Tests that a saved checkpoint can be loaded by its token with the same progress
+        """
+        self.instance.add("project1", Server.existing(id="server1", name="test"))
+        self.instance.complete("project1")
+        self.instance.add("project2", Server.existing(id="server2"))
+        token = self.instance.save()
+
+        res = QueryCheckpoint.load(token, Server, {"status": "ERROR"})
+        self.assertEqual(res.resume_token, token)
+        self.assertEqual(res.completed("project1")[0].name, "test")
+        self.assertIsInstance(res.completed("project1")[0], Server)
+        self.assertEqual(res.marker("project2"), "server2")
+
+        res.discard()
+        with self.assertRaises(ParseQueryError):
+            QueryCheckpoint.load(token, Server, {"status": "ERROR"})
+
+    def test_written_as_listed(self):
+        """
+        Tests that progress is written after every interval of servers and every completed project,
+        without the checkpoint being saved - so a killed query can be resumed
+        """
+        checkpoint = QueryCheckpoint(Server, resume_token="token", interval=2)
+        checkpoint.add("project1", Server.existing(id="server1"))
+        checkpoint.complete("project1")
+        for i in range(2, 6):
+            checkpoint.add("project2", Server.existing(id=f"server{i}"))
+
+        res = QueryCheckpoint.load("token", Server)
+        self.assertEqual(
+            [server.id for server in res.completed("project1")], ["server1"]
+        )
+        self.assertEqual(res.marker("project2"), "server5")
+        checkpoint.add("project2", Server.existing(id="server6"))
+        self.assertEqual(
+            QueryCheckpoint.load("token", Server).marker("project2"), "server5"
+        )
+
+    def test_load_truncated(self):
+        """
+        Tests that a line left half written when a query was killed is ignored, and removed
+        so the resumed query can append to the checkpoint
+        """
+        checkpoint = QueryCheckpoint(Server, resume_token="token", interval=1)
+        checkpoint.add("project1", Server.existing(id="server1"))
+        with open(
+            os.path.join(self.checkpoint_dir, "token.ndjson"),
+            "a",
+            encoding="utf-8",
+        ) as file:
+            file.write('{"project": "project1", "resou')
+
+        res = QueryCheckpoint.load("token", Server)
+        self.assertEqual(res.marker("project1"), "server1")
+        res.add("project1", Server.existing(id="server2"))
+        res.save()
+        self.assertEqual(
+            QueryCheckpoint.load("token", Server).marker("project1"), "server2"
+        )
+
+    def test_permissions(self):
+        """
+        Tests that the checkpoint directory is created readable only by the current user,
+        and checkpoints are only readable and writable by them
+        """
+        directory = os.path.join(self.checkpoint_dir, "checkpoints")
+        with patch.object(QueryCheckpoint, "CHECKPOINT_DIR", directory):
+            token = self.instance.save()
+        self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.join(directory, f"{token}.ndjson")).st_mode),
+            0o600,
+        )
+
+    def test_purge(self):
+        """
+        Tests that checkpoints not written for the retention period are removed
+        """
+        token = self.instance.save()
+        path = os.path.join(self.checkpoint_dir, f"{token}.ndjson")
+        QueryCheckpoint.purge(retention=60)
+        self.assertTrue(os.path.exists(path))
+        os.utime(path, (0, 0))
+        QueryCheckpoint.purge(retention=60)
+        self.assertFalse(os.path.exists(path))
+
+    def test_open(self):
+        """
+        Tests that opening a token with no saved checkpoint starts a new one saved under it,
+        and opening it again loads it
+        """
+        checkpoint = QueryCheckpoint.open("nightly", Server)
+        self.assertEqual(checkpoint.resume_token, "nightly")
+        checkpoint.add("project1", Server.existing(id="server1"))
+        checkpoint.save()
+        self.assertEqual(
+            QueryCheckpoint.open("nightly", Server).marker("project1"), "server1"
+        )
+        self.assertIsNotNone(QueryCheckpoint.open(None, Server).resume_token)
+
+    @raises(ParseQueryError)
+    def test_invalid_token(self):
+        """
+        Tests that a token which cannot be used as a file name raises an error
+        """
+        QueryCheckpoint.open("../token", Server)
+
+    def test_save_and_load_raw(self):
+        """
+        Tests that a checkpoint of lightweight records is saved and loaded as records,
+        and cannot be resumed by a query listing Server objects
+        """
+        checkpoint = QueryCheckpoint(ServerRecord, raw=True)
+        record = ServerRecord(id="server1", name="test")
+        checkpoint.add("project1", record)
+        token = checkpoint.save()
+
+        res = QueryCheckpoint.load(token, ServerRecord, raw=True)
+        self.assertEqual(res.partial("project1"), [record])
+        self.assertEqual(res.marker("project1"), "server1")
+
+        with self.assertRaises(ParseQueryError):
+            QueryCheckpoint.load(token, Server)
+
+    @raises(ParseQueryError)
+    def test_load_mismatched_filters(self):
+        """
+        Tests that a checkpoint cannot be resumed with different filters
+        """
+        token = self.instance.save()
+        QueryCheckpoint.load(token, Server, {"status": "ACTIVE"})
+
+    @raises(ParseQueryError)
+    def test_load_unknown_token(self):
+        """
+        Tests that loading a token with no saved checkpoint raises an error
+        """
+        QueryCheckpoint.load("unknown", Server)
+
+    def test_discard_unsaved(self):
+        """
+        Tests that discarding a checkpoint which was never saved does nothing
+        """
+        self.instance.discard()
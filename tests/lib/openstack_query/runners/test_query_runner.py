@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
+from openstack_query.query_profile import QueryProfile
 from openstack_query.runners.query_runner import QueryRunner
 
 # pylint:disable=protected-access
@@ -46,6 +47,7 @@ class QueryRunnerTests(unittest.TestCase):
         mock_apply_client_side_filter.assert_called_once_with(
             ["openstack-resource-1", "openstack-resource-2"],
             mock_client_side_filter_func,
+            None,
         )
         mock_client_side_filter_func.assert_not_called()
         self.assertEqual(["openstack-resource-1"], res)
@@ -108,10 +110,204 @@ class QueryRunnerTests(unittest.TestCase):
         mock_apply_filter_func.assert_called_once_with(
             ["parsed-openstack-resource-1", "parsed-openstack-resource-2"],
             mock_client_side_filter_func,
+            None,
         )
 
         self.assertEqual(["parsed-openstack-resource-1"], res)
 
+    @patch("openstack_query.runners.query_runner.QueryRunner._run_query")
+    def test_run_with_limit(self, mock_run_query):
+        """
+        Tests that run method functions expectedly - with limit set
+        method should stop pulling resources once enough have passed the client side filter
+        """
+        pulled = []
+
+        def _lazy_resources():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        mock_run_query.return_value = _lazy_resources()
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            client_side_filter_func=lambda item: item % 2 == 1,
+            limit=3,
+            arg1="val1",
+        )
+        mock_run_query.assert_called_once_with(self.conn, None, arg1="val1")
+        self.assertEqual(res, [1, 3, 5])
+        self.assertEqual(pulled, list(range(6)))
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._iter_query")
+    def test_run_with_limit_no_filter(self, mock_iter_query):
+        """
+        Tests that run method functions expectedly - with limit set and no client side filter
+        method should use the limit as the page size
+        """
+        mock_iter_query.return_value = iter(["resource-1", "resource-2", "resource-3"])
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+
+        res = self.instance.run(cloud_account=mock_cloud_domain, limit=2)
+        mock_iter_query.assert_called_once_with(self.conn, None, page_size=2)
+        self.assertEqual(res, ["resource-1", "resource-2"])
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._iter_query")
+    def test_iter_run(self, mock_iter_query):
+        """
+        Tests that iter_run method functions expectedly
+        method should yield resources which pass the client side filter as they are listed by _iter_query,
+        counting them in the profile given
+        """
+        pulled = []
+
+        def _iter_query(_conn, _filters, **_):
+            for i in range(5):
+                pulled.append(i)
+                yield i
+
+        mock_iter_query.side_effect = _iter_query
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+        profile = QueryProfile()
+
+        res = self.instance.iter_run(
+            mock_cloud_domain, lambda item: item % 2 == 0, profile=profile, arg1="val1"
+        )
+        mock_iter_query.assert_not_called()
+        self.assertEqual(next(res), 0)
+        self.assertEqual(pulled, [0])
+        self.assertEqual(list(res), [2, 4])
+        mock_iter_query.assert_called_once_with(self.conn, None, arg1="val1")
+        self.assertEqual(profile.items_scanned, 5)
+        self.assertEqual(profile.items_returned, 3)
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._parse_subset")
+    def test_run_with_subset_and_limit(self, mock_parse_subset):
+        """
+        Tests that run method functions expectedly - with limit and 'from_subset' set
+        method should filter the subset and then return at most limit resources
+        """
+        mock_parse_subset.return_value = [1, 2, 3, 4, 5]
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            client_side_filter_func=lambda item: item > 1,
+            from_subset=[1, 2, 3, 4, 5],
+            limit=2,
+        )
+        self.assertEqual(res, [2, 3])
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._run_query")
+    def test_run_with_profile(self, mock_run_query):
+        """
+        Tests that run method records stage timings, API calls and items scanned and returned
+        in the profile given
+        """
+        mock_run_query.return_value = [1, 2, 3, 4]
+        self.conn.session.request.return_value.status_code = 200
+        self.conn.session.request.return_value.headers = {}
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+
+        def _run_query(conn, _filters):
+            conn.session.request(
+                "url", "GET", endpoint_filter={"service_type": "compute"}
+            )
+            return mock_run_query.return_value
+
+        mock_run_query.side_effect = _run_query
+        profile = QueryProfile()
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            client_side_filter_func=lambda item: item > 2,
+            profile=profile,
+        )
+        self.assertEqual(res, [3, 4])
+        self.assertEqual(profile.items_scanned, 4)
+        self.assertEqual(profile.items_returned, 2)
+        self.assertEqual(profile.api_calls.by_service()["compute"]["calls"], 1)
+        self.assertEqual(set(profile.stages), {"fetch", "client_side_filter"})
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._run_query")
+    def test_run_with_limit_and_profile(self, mock_run_query):
+        """
+        Tests that run method only counts the resources pulled as scanned when a limit is set
+        """
+        mock_run_query.return_value = iter(range(100))
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+
+        profile = QueryProfile()
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            client_side_filter_func=lambda item: item % 2 == 1,
+            limit=3,
+            profile=profile,
+        )
+        self.assertEqual(res, [1, 3, 5])
+        self.assertEqual(profile.items_scanned, 6)
+        self.assertEqual(profile.items_returned, 3)
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._run_query")
+    def test_run_shares_fetch(self, mock_run_query):
+        """
+        Tests that run method fetches through the runner's SingleFlight, keyed by runner, cloud,
+        server-side filters and extra kwargs
+        """
+        mock_single_flight = MagicMock()
+        mock_single_flight.do.return_value = ["openstack-resource-1"]
+        self.instance._single_flight = mock_single_flight
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "PROD"
+
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            server_side_filters={"status": "ERROR"},
+            from_projects=["project1"],
+        )
+        key, fetch = mock_single_flight.do.call_args.args
+        self.assertEqual(
+            key,
+            (
+                "QueryRunner",
+                "prod",
+                (("status", "ERROR"),),
+                (("from_projects", ("project1",)),),
+            ),
+        )
+        self.assertEqual(res, ["openstack-resource-1"])
+
+        mock_run_query.assert_not_called()
+        fetch()
+        mock_run_query.assert_called_once_with(
+            self.conn, {"status": "ERROR"}, from_projects=["project1"]
+        )
+
+    @patch("openstack_query.runners.query_runner.QueryRunner._run_query")
+    def test_run_unhashable_kwargs_not_shared(self, mock_run_query):
+        """
+        Tests that run method fetches directly when the kwargs cannot be used as a key
+        """
+        mock_single_flight = MagicMock()
+        self.instance._single_flight = mock_single_flight
+        mock_cloud_domain = MagicMock()
+        mock_cloud_domain.name = "test"
+        mock_run_query.return_value = ["openstack-resource-1"]
+
+        res = self.instance.run(
+            cloud_account=mock_cloud_domain,
+            from_projects=[bytearray(b"project1")],
+        )
+        mock_single_flight.do.assert_not_called()
+        self.assertEqual(res, ["openstack-resource-1"])
+
     def test_apply_filter_func(self):
         """
         Tests that apply_filter_func method functions expectedly
@@ -126,3 +322,27 @@ class QueryRunnerTests(unittest.TestCase):
             mock_items, mock_client_side_filter_func
         )
         self.assertEqual(["openstack-resource-2"], res)
+
+    def test_apply_filter_func_vectorised(self):
+        """
+        Tests that apply_filter_func method uses the vectorised filter function's mask when given one,
+        and falls back to the filter function when the vectorised one returns None
+        """
+        mock_client_side_filter_func = MagicMock()
+        mock_items = ["openstack-resource-1", "openstack-resource-2"]
+
+        # a NumPy boolean mask [False, True]
+        mock_mask = MagicMock()
+        mock_mask.nonzero.return_value = ([1],)
+
+        res = self.instance._apply_client_side_filter(
+            mock_items, mock_client_side_filter_func, lambda items: mock_mask
+        )
+        self.assertEqual(["openstack-resource-2"], res)
+        mock_client_side_filter_func.assert_not_called()
+
+        mock_client_side_filter_func.side_effect = [True, False]
+        res = self.instance._apply_client_side_filter(
+            mock_items, mock_client_side_filter_func, lambda items: None
+        )
+        self.assertEqual(["openstack-resource-1"], res)
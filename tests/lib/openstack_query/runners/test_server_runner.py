@@ -1,14 +1,20 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import Mock, MagicMock, call, patch
 from nose.tools import raises
+from parameterized import parameterized
 
+from openstack_query.runners.query_checkpoint import QueryCheckpoint
 from openstack_query.runners.server_runner import ServerRunner
 
-from openstack.exceptions import ResourceNotFound
+from openstack.exceptions import HttpException, ResourceNotFound
 from openstack.compute.v2.server import Server
 from openstack.identity.v3.project import Project
 
+from enums.query.props.server_properties import ServerProperties
 from exceptions.parse_query_error import ParseQueryError
+from exceptions.query_interrupted_error import QueryInterruptedError
 
 # pylint:disable=protected-access
 
@@ -102,17 +108,53 @@ class ServerRunnerTests(unittest.TestCase):
             "project2": ["server3", "server4"],
         }
 
-        res = self.instance._run_query(
-            self.conn, filter_kwargs=None, from_projects=["project-id1", "project-id2"]
-        )
+        with patch(
+            "openstack_query.runners.server_runner.QueryCheckpoint"
+        ) as mock_checkpoint:
+            res = self.instance._run_query(
+                self.conn,
+                filter_kwargs=None,
+                from_projects=["project-id1", "project-id2"],
+            )
         mock_get_projects.assert_called_once_with(
             self.conn, ["project-id1", "project-id2"]
         )
+        mock_checkpoint.open.assert_not_called()
         mock_run_query_on_projects.assert_called_once_with(
-            self.conn, ["project1", "project2"], None
+            self.conn,
+            ["project1", "project2"],
+            None,
+            None,
+            None,
         )
         self.assertEqual(res, ["server1", "server2", "server3", "server4"])
 
+    @patch("openstack_query.runners.server_runner.QueryCheckpoint")
+    @patch("openstack_query.runners.server_runner.ServerRunner._get_projects")
+    @patch("openstack_query.runners.server_runner.ServerRunner._run_query_on_projects")
+    def test_run_query_with_resume_token(
+        self, mock_run_query_on_projects, mock_get_projects, mock_checkpoint
+    ):
+        """
+        Tests _run_query method works expectedly - when resume_token extra param set
+        method should open the checkpoint saved under it and run the query with it
+        """
+        mock_run_query_on_projects.return_value = {"project1": ["server1"]}
+        res = self.instance._run_query(
+            self.conn, filter_kwargs={"status": "ERROR"}, resume_token="token"
+        )
+        mock_checkpoint.open.assert_called_once_with(
+            "token", Server, {"status": "ERROR"}, raw=False
+        )
+        mock_run_query_on_projects.assert_called_once_with(
+            self.conn,
+            mock_get_projects.return_value,
+            {"status": "ERROR"},
+            mock_checkpoint.open.return_value,
+            None,
+        )
+        self.assertEqual(res, ["server1"])
+
     @patch("openstack_query.runners.server_runner.ServerRunner._run_query_on_project")
     def test_run_query_from_projects(self, mock_run_query_on_project):
         """
@@ -132,7 +174,10 @@ class ServerRunnerTests(unittest.TestCase):
 
         res = self.instance._run_query_on_projects(self.conn, mock_project_list)
         mock_run_query_on_project.assert_has_calls(
-            [call(self.conn, project1, None), call(self.conn, project2, None)]
+            [
+                call(self.conn, project1, None, None, None),
+                call(self.conn, project2, None, None, None),
+            ]
         )
         self.assertEqual(
             res,
@@ -156,6 +201,238 @@ class ServerRunnerTests(unittest.TestCase):
         )
         self.assertEqual(res, [{"id": "server1"}, {"id": "server2"}])
 
+    def test_run_query_on_project_lazy(self):
+        """
+        Tests _iter_query_on_project works expectedly
+        method should return the conn.compute.servers generator without consuming it, passing page_size as Nova's limit
+        """
+        mock_project = {"id": "project1"}
+        res = self.instance._iter_query_on_project(
+            self.conn, mock_project, {"status": "ERROR"}, page_size=50
+        )
+        self.conn.compute.servers.assert_called_once_with(
+            all_projects=False,
+            project_id="project1",
+            all_tenants=True,
+            status="ERROR",
+            limit=50,
+        )
+        self.assertEqual(res, self.conn.compute.servers.return_value)
+
+    @patch("openstack_query.runners.server_runner.ServerRunner._get_projects")
+    def test_iter_query_stops_early(self, mock_get_projects):
+        """
+        Tests _iter_query works expectedly
+        method should only list servers from the next project once the previous project's servers are consumed
+        """
+        mock_get_projects.return_value = [{"id": "project1"}, {"id": "project2"}]
+        self.conn.compute.servers.side_effect = [
+            iter(["server1", "server2"]),
+            iter(["server3"]),
+        ]
+
+        res = self.instance._iter_query(
+            self.conn, None, page_size=2, from_projects=["project1", "project2"]
+        )
+        self.assertEqual(next(res), "server1")
+        mock_get_projects.assert_called_once_with(self.conn, ["project1", "project2"])
+        self.conn.compute.servers.assert_called_once_with(
+            all_projects=False, project_id="project1", all_tenants=True, limit=2
+        )
+        self.assertEqual(list(res), ["server2", "server3"])
+
+    def test_run_query_interrupted_and_resumed(self):
+        """
+        Tests that servers listed before a failure are saved, and that resuming only lists
+        the remaining servers - continuing the interrupted project from its last server
+        """
+        projects = [Project.existing(id="project1"), Project.existing(id="project2")]
+        server1 = Server.existing(id="server1", project_id="project1")
+        server2 = Server.existing(id="server2", project_id="project2")
+        server3 = Server.existing(id="server3", project_id="project2")
+
+        def _failing_listing():
+            yield server2
+            raise ConnectionError("token expired")
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir, patch.object(
+            QueryCheckpoint, "CHECKPOINT_DIR", checkpoint_dir
+        ):
+            self.conn.compute.servers.side_effect = [
+                iter([server1]),
+                _failing_listing(),
+            ]
+            with self.assertRaises(QueryInterruptedError) as err:
+                self.instance._run_query(
+                    self.conn, from_projects=projects, resume_token="nightly"
+                )
+            self.assertEqual(err.exception.resume_token, "nightly")
+
+            self.conn.compute.servers.reset_mock()
+            self.conn.compute.servers.side_effect = [iter([server3])]
+            res = self.instance._run_query(
+                self.conn,
+                from_projects=projects,
+                resume_token=err.exception.resume_token,
+            )
+            self.assertEqual(os.listdir(checkpoint_dir), [])
+
+        self.conn.compute.servers.assert_called_once_with(
+            all_projects=False,
+            project_id="project2",
+            all_tenants=True,
+            marker="server2",
+        )
+        self.assertEqual(
+            [server.id for server in res], ["server1", "server2", "server3"]
+        )
+
+    @parameterized.expand(
+        [
+            ("without a resume token", None, ConnectionError),
+            ("query error", "nightly", ParseQueryError),
+        ]
+    )
+    def test_run_query_errors_not_wrapped(self, _, resume_token, error):
+        """
+        Tests that listing errors are raised unchanged if no resume_token is given, or if they are not transient
+        """
+        projects = [Project.existing(id="project1")]
+        self.conn.compute.servers.side_effect = error("failed")
+        with tempfile.TemporaryDirectory() as checkpoint_dir, patch.object(
+            QueryCheckpoint, "CHECKPOINT_DIR", checkpoint_dir
+        ):
+            with self.assertRaises(error):
+                self.instance._run_query(
+                    self.conn, from_projects=projects, resume_token=resume_token
+                )
+            if not resume_token:
+                self.assertEqual(os.listdir(checkpoint_dir), [])
+
+    def test_run_query_killed_and_resumed(self):
+        """
+        Tests that servers are saved as they are listed, so a query given a resume_token can be
+        resumed with it after being killed - and that a KeyboardInterrupt is not turned into a
+        QueryInterruptedError
+        """
+        projects = [Project.existing(id="project1"), Project.existing(id="project2")]
+        server1 = Server.existing(id="server1", project_id="project1")
+        server2 = Server.existing(id="server2", project_id="project2")
+
+        def _killed_listing():
+            raise KeyboardInterrupt
+            yield  # pylint:disable=unreachable
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir, patch.object(
+            QueryCheckpoint, "CHECKPOINT_DIR", checkpoint_dir
+        ):
+            self.conn.compute.servers.side_effect = [
+                iter([server1]),
+                _killed_listing(),
+            ]
+            with self.assertRaises(KeyboardInterrupt):
+                self.instance._run_query(
+                    self.conn, from_projects=projects, resume_token="nightly"
+                )
+
+            self.conn.compute.servers.reset_mock()
+            self.conn.compute.servers.side_effect = [iter([server2])]
+            res = self.instance._run_query(
+                self.conn, from_projects=projects, resume_token="nightly"
+            )
+
+        self.conn.compute.servers.assert_called_once_with(
+            all_projects=False, project_id="project2", all_tenants=True
+        )
+        self.assertEqual([server.id for server in res], ["server1", "server2"])
+
+    @patch("openstack_query.runners.server_runner.ServerRunner._iter_raw_servers")
+    def test_run_query_on_project_lightweight(self, mock_iter_raw_servers):
+        """
+        Tests _iter_query_on_project works expectedly - with required_props set
+        method should list raw servers, only requesting details when properties other than ID and name are needed
+        """
+        mock_project = {"id": "project1"}
+        expected_filters = {"project_id": "project1", "all_tenants": True}
+
+        self.instance._iter_query_on_project(
+            self.conn,
+            mock_project,
+            required_props={ServerProperties.SERVER_ID, ServerProperties.SERVER_NAME},
+        )
+        mock_iter_raw_servers.assert_called_once_with(
+            self.conn, expected_filters, details=False
+        )
+
+        mock_iter_raw_servers.reset_mock()
+        res = self.instance._iter_query_on_project(
+            self.conn,
+            mock_project,
+            required_props={ServerProperties.SERVER_ID, ServerProperties.USER_ID},
+        )
+        mock_iter_raw_servers.assert_called_once_with(
+            self.conn, expected_filters, details=True
+        )
+        self.conn.compute.servers.assert_not_called()
+        self.assertEqual(res, mock_iter_raw_servers.return_value)
+
+    def test_iter_raw_servers(self):
+        """
+        Tests _iter_raw_servers works expectedly
+        method should request pages of servers from Nova, following 'next' links using the last server as marker,
+        and return dictionaries keyed by Server attribute names
+        """
+        page1 = MagicMock(status_code=200)
+        page1.json.return_value = {
+            "servers": [{"id": "server1", "created": "2020", "tenant_id": "project1"}],
+            "servers_links": [{"rel": "next", "href": "..."}],
+        }
+        page2 = MagicMock(status_code=200)
+        page2.json.return_value = {"servers": [{"id": "server2", "name": "test"}]}
+        self.conn.compute.get.side_effect = [page1, page2]
+
+        with patch.object(Server, "_get_microversion", return_value="2.70"):
+            res = list(
+                self.instance._iter_raw_servers(
+                    self.conn, {"project_id": "project1", "all_tenants": True}, True
+                )
+            )
+
+        self.conn.compute.get.assert_has_calls(
+            [
+                call(
+                    "/servers/detail",
+                    params={"project_id": "project1", "all_tenants": True},
+                    microversion="2.70",
+                ),
+                call(
+                    "/servers/detail",
+                    params={
+                        "project_id": "project1",
+                        "all_tenants": True,
+                        "marker": "server1",
+                    },
+                    microversion="2.70",
+                ),
+            ]
+        )
+        self.assertEqual(res[0]["created_at"], "2020")
+        self.assertEqual(res[0]["project_id"], "project1")
+        self.assertIsNone(res[0]["name"])
+        self.assertEqual(res[1]["name"], "test")
+
+    def test_iter_raw_servers_error(self):
+        """
+        Tests _iter_raw_servers raises an openstacksdk exception when Nova returns an error
+        """
+        self.conn.compute.get.return_value = MagicMock(
+            status_code=403, headers={}, reason="Forbidden"
+        )
+        with patch.object(Server, "_get_microversion", return_value=None):
+            with self.assertRaises(HttpException):
+                list(self.instance._iter_raw_servers(self.conn, {}, False))
+        self.assertEqual(self.conn.compute.get.call_args.args, ("/servers",))
+
     def test_parse_subset(self):
         """
         Tests _parse_subset works expectedly
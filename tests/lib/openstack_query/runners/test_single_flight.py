@@ -0,0 +1,226 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from nose.tools import raises
+
+from openstack.compute.v2.server import Server
+
+from openstack_query.runners.single_flight import (
+    LOCK_FILE_RETENTION,
+    SingleFlight,
+    _dump_resources,
+    _load_resources,
+)
+from structs.query.server_record import ServerRecord
+
+
+class SingleFlightTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that SingleFlight coalesces concurrent fetches expectedly.
+    """
+
+    def setUp(self):
+        """
+        Setup for tests
+        """
+        super().setUp()
+        self.instance = SingleFlight()
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def _blocking_fetch(self, result):
+        """
+        Returns a mock fetch function which blocks until self.release is set
+        """
+
+        def _fetch():
+            self.started.set()
+            self.release.wait(5)
+            return result
+
+        return MagicMock(side_effect=_fetch)
+
+    def _run_concurrently(self, instances, key, fetches):
+        """
+        Starts a leader fetch, then followers while it is in flight, and returns each caller's result
+        """
+        results = [None] * len(fetches)
+        errors = [None] * len(fetches)
+
+        def _caller(i):
+            try:
+                results[i] = instances[i].do(key, fetches[i])
+            except RuntimeError as err:
+                errors[i] = err
+
+        threads = [
+            threading.Thread(target=_caller, args=(i,)) for i in range(len(fetches))
+        ]
+        threads[0].start()
+        self.started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # give followers time to find the fetch in flight before it finishes
+        time.sleep(0.3)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_fetches_shared(self):
+        """
+        Tests that callers with the same key while a fetch is in flight share its result
+        """
+        leader_fetch = self._blocking_fetch(["server1", "server2"])
+        follower_fetch = MagicMock()
+        fetches = [leader_fetch] + [follower_fetch] * 3
+
+        results, _ = self._run_concurrently([self.instance] * 4, "key", fetches)
+
+        leader_fetch.assert_called_once()
+        follower_fetch.assert_not_called()
+        self.assertEqual(results, [["server1", "server2"]] * 4)
+        # each caller gets its own list
+        self.assertEqual(len({id(result) for result in results}), 4)
+
+    def test_different_keys_not_shared(self):
+        """
+        Tests that fetches with different keys are run separately
+        """
+        self.assertEqual(self.instance.do("key1", lambda: ["a"]), ["a"])
+        self.assertEqual(self.instance.do("key2", lambda: ["b"]), ["b"])
+
+    def test_sequential_fetches_not_shared(self):
+        """
+        Tests that a fetch is only shared while in flight - later callers fetch again
+        """
+        fetch = MagicMock(return_value=["a"])
+        self.instance.do("key", fetch)
+        self.instance.do("key", fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_results_reused_within_ttl(self):
+        """
+        Tests that with a ttl, a finished fetch's result is reused until it expires or is cleared
+        """
+        instance = SingleFlight(ttl=0.2)
+        fetch = MagicMock(return_value=["a"])
+
+        first = instance.do("key", fetch)
+        first.append("changed by the first caller")
+        second = instance.do("key", fetch)
+        self.assertEqual(second, ["a"])
+        self.assertIsNot(first, second)
+        fetch.assert_called_once()
+
+        time.sleep(0.3)
+        instance.do("key", fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+        instance.clear()
+        instance.do("key", fetch)
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_errors_not_kept_for_ttl(self):
+        """
+        Tests that with a ttl, a failed fetch is not reused by the next call
+        """
+        instance = SingleFlight(ttl=60)
+        with self.assertRaises(RuntimeError):
+            instance.do("key", MagicMock(side_effect=RuntimeError("token expired")))
+        self.assertEqual(instance.do("key", lambda: ["a"]), ["a"])
+
+    def test_error_shared(self):
+        """
+        Tests that callers waiting on a fetch which fails get the same error, and the next call fetches again
+        """
+
+        def _failing_fetch():
+            self.started.set()
+            self.release.wait(5)
+            raise RuntimeError("token expired")
+
+        _, errors = self._run_concurrently(
+            [self.instance] * 2, "key", [_failing_fetch, MagicMock()]
+        )
+        self.assertIsNotNone(errors[0])
+        self.assertIs(errors[0], errors[1])
+        self.assertEqual(self.instance.do("key", lambda: ["a"]), ["a"])
+
+    def test_cross_process(self):
+        """
+        Tests that with a lock directory, a fetch running in another SingleFlight (e.g. in another process)
+        is waited on and its saved result used
+        """
+        with tempfile.TemporaryDirectory() as lock_dir:
+            leader_fetch = self._blocking_fetch(
+                [Server.existing(id="server1", name="test")]
+            )
+            follower_fetch = MagicMock()
+            results, _ = self._run_concurrently(
+                [SingleFlight(lock_dir), SingleFlight(lock_dir)],
+                ("ServerRunner", "prod"),
+                [leader_fetch, follower_fetch],
+            )
+
+            follower_fetch.assert_not_called()
+            self.assertEqual(results[1][0].name, "test")
+            self.assertIsInstance(results[1][0], Server)
+
+            # once no longer in flight, the saved result is not reused
+            SingleFlight(lock_dir).do(("ServerRunner", "prod"), follower_fetch)
+            follower_fetch.assert_called_once()
+
+    def test_dump_and_load_resources(self):
+        """
+        Tests that openstacksdk resources and lightweight records can be saved and rebuilt
+        """
+        resources = [
+            Server.existing(id="server1", tenant_id="project1"),
+            ServerRecord(id="server2", project_id="project2"),
+        ]
+        res = _load_resources(_dump_resources(resources))
+        self.assertIsInstance(res[0], Server)
+        self.assertEqual(res[0].project_id, "project1")
+        self.assertEqual(res[1], resources[1])
+
+    @raises(ValueError)
+    def test_load_resources_unknown_class(self):
+        """
+        Tests that saved results are only rebuilt as known resource classes
+        """
+        _load_resources([{"cls": "os:system", "attrs": {}}])
+
+    def test_cross_process_purges_old_files(self):
+        """
+        Tests that lock and result files in the lock directory which haven't been used for
+        LOCK_FILE_RETENTION are removed, and recent ones are kept
+        """
+        with tempfile.TemporaryDirectory() as lock_dir:
+            instance = SingleFlight(lock_dir)
+            instance.do("old", lambda: [ServerRecord(id="server1")])
+            old_files = os.listdir(lock_dir)
+            expired = time.time() - LOCK_FILE_RETENTION - 1
+            for name in old_files:
+                os.utime(os.path.join(lock_dir, name), (expired, expired))
+
+            instance.do("new", lambda: [ServerRecord(id="server2")])
+            remaining = os.listdir(lock_dir)
+            self.assertEqual(len(remaining), 2)
+            self.assertFalse(set(old_files) & set(remaining))
+
+    def test_expired_results_purged(self):
+        """
+        Tests that results which have expired are dropped when another result is kept,
+        even if their key is never requested again
+        """
+        instance = SingleFlight(ttl=0.1)
+        instance.do("key1", lambda: ["a"])
+        time.sleep(0.2)
+        instance.do("key2", lambda: ["b"])
+        # pylint:disable=protected-access
+        self.assertEqual(list(instance._results), ["key2"])
@@ -0,0 +1,142 @@
+import unittest
+from unittest.mock import NonCallableMock
+
+from enums.query.query_aggregations import QueryAggregations
+from openstack_query.aggregator import QueryAggregator
+from openstack_query.handlers.prop_handler import PropHandler
+from structs.query.query_aggregate_details import QueryAggregateDetails
+from tests.lib.openstack_query.mocks.mocked_props import MockProperties
+
+
+class QueryAggregatorTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that QueryAggregator class methods function expectedly
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup for tests
+        """
+        super().setUp()
+        self.prop_handler = PropHandler(
+            {
+                MockProperties.PROP_1: lambda item: item.status,
+                MockProperties.PROP_2: lambda item: item.size,
+                MockProperties.PROP_3: lambda item: item.flavor,
+            }
+        )
+        self.items = [
+            NonCallableMock(status="ACTIVE", size=10, flavor="small"),
+            NonCallableMock(status="ACTIVE", size=30, flavor="large"),
+            NonCallableMock(status="ACTIVE", size=20, flavor="small"),
+            NonCallableMock(status="SHUTOFF", size=5, flavor="small"),
+        ]
+
+    def _aggregate(self, *aggregations, group_by=None):
+        """
+        Helper to run all items through an aggregator and return its results
+        """
+        instance = QueryAggregator(self.prop_handler, list(aggregations), group_by)
+        instance.add_all(self.items)
+        return instance.results()
+
+    def test_count_no_group(self):
+        """
+        Tests that counting without grouping returns a single row
+        """
+        res = self._aggregate(QueryAggregateDetails(QueryAggregations.COUNT))
+        self.assertEqual(res, [{"count": 4}])
+
+    def test_count_no_items(self):
+        """
+        Tests that counting no items without grouping still returns a single row
+        """
+        instance = QueryAggregator(
+            self.prop_handler, [QueryAggregateDetails(QueryAggregations.COUNT)]
+        )
+        self.assertEqual(instance.results(), [{"count": 0}])
+
+    def test_count_grouped(self):
+        """
+        Tests that counting with grouping returns a row per group
+        """
+        res = self._aggregate(
+            QueryAggregateDetails(QueryAggregations.COUNT),
+            group_by=MockProperties.PROP_1,
+        )
+        self.assertEqual(
+            res,
+            [{"prop_1": "ACTIVE", "count": 3}, {"prop_1": "SHUTOFF", "count": 1}],
+        )
+
+    def test_sum_min_max_grouped(self):
+        """
+        Tests that sum, min and max are calculated on raw property values per group
+        """
+        res = self._aggregate(
+            QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2),
+            QueryAggregateDetails(QueryAggregations.MIN, MockProperties.PROP_2),
+            QueryAggregateDetails(QueryAggregations.MAX, MockProperties.PROP_2),
+            group_by=MockProperties.PROP_1,
+        )
+        self.assertEqual(
+            res,
+            [
+                {
+                    "prop_1": "ACTIVE",
+                    "sum_prop_2": 60,
+                    "min_prop_2": 10,
+                    "max_prop_2": 30,
+                },
+                {
+                    "prop_1": "SHUTOFF",
+                    "sum_prop_2": 5,
+                    "min_prop_2": 5,
+                    "max_prop_2": 5,
+                },
+            ],
+        )
+
+    def test_top_k(self):
+        """
+        Tests that top-k returns the k most common values with their counts
+        """
+        res = self._aggregate(
+            QueryAggregateDetails(QueryAggregations.TOP_K, MockProperties.PROP_3, k=1)
+        )
+        self.assertEqual(res, [{"top_1_prop_3": [("small", 3)]}])
+
+    def test_missing_props_skipped(self):
+        """
+        Tests that resources without a property are counted but left out of sum/min/max,
+        and that a group with no values outputs 'Not Found'
+        """
+        self.items = [NonCallableMock(spec=["status"], status="ERROR")]
+        res = self._aggregate(
+            QueryAggregateDetails(QueryAggregations.COUNT),
+            QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2),
+            QueryAggregateDetails(QueryAggregations.TOP_K, MockProperties.PROP_3),
+            group_by=MockProperties.PROP_1,
+        )
+        self.assertEqual(
+            res,
+            [
+                {
+                    "prop_1": "ERROR",
+                    "count": 1,
+                    "sum_prop_2": "Not Found",
+                    "top_10_prop_3": [],
+                }
+            ],
+        )
+
+    def test_group_missing_prop(self):
+        """
+        Tests that resources without the group by property are grouped under 'Not Found'
+        """
+        self.items.append(NonCallableMock(spec=["size"], size=1))
+        res = self._aggregate(
+            QueryAggregateDetails(QueryAggregations.COUNT),
+            group_by=MockProperties.PROP_1,
+        )
+        self.assertIn({"prop_1": "Not Found", "count": 1}, res)
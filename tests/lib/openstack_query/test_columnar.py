@@ -0,0 +1,54 @@
+import unittest
+
+from openstack_query.columnar import (
+    isin_mask,
+    numpy_available,
+    to_column,
+    to_datetime64,
+    to_float,
+)
+
+
+@unittest.skipUnless(numpy_available(), "NumPy is not installed")
+class ColumnarTests(unittest.TestCase):
+    """
+    Runs various tests to ensure resources are converted into columns expectedly
+    """
+
+    def test_to_column(self):
+        """
+        Tests that to_column marks resources where the property could not be found
+        """
+
+        def prop_func(item):
+            if item is None:
+                raise AttributeError
+            return item["name"]
+
+        column, present = to_column([{"name": "a"}, None, {"name": None}], prop_func)
+        self.assertEqual(column.tolist(), ["a", None, None])
+        self.assertEqual(present.tolist(), [True, False, True])
+
+    def test_isin_mask(self):
+        """
+        Tests that isin_mask finds values by their codes, and gives up on unhashable values
+        """
+        column, _ = to_column(["a", "b", None, "a"], lambda item: item)
+        self.assertEqual(
+            isin_mask(column, ["a", "c"]).tolist(), [True, False, False, True]
+        )
+        self.assertEqual(
+            isin_mask(column, [None]).tolist(), [False, False, True, False]
+        )
+        self.assertIsNone(isin_mask(column, [["a"]]))
+
+    def test_to_datetime64_and_float(self):
+        """
+        Tests that missing values become NaT or NaN
+        """
+        column, _ = to_column(["2023-06-04T10:30:00Z", None], lambda item: item)
+        self.assertEqual(str(to_datetime64(column)[0]), "2023-06-04T10:30:00")
+        self.assertEqual(str(to_datetime64(column)[1]), "NaT")
+
+        column, _ = to_column([1, None, 2.5], lambda item: item)
+        self.assertEqual(str(to_float(column).tolist()), "[1.0, nan, 2.5]")
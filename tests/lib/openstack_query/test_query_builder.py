@@ -7,6 +7,7 @@ from nose.tools import raises
 from exceptions.parse_query_error import ParseQueryError
 from exceptions.query_preset_mapping_error import QueryPresetMappingError
 from exceptions.query_property_mapping_error import QueryPropertyMappingError
+from structs.query.query_preset_details import QueryPresetDetails
 
 from tests.lib.openstack_query.mocks.mocked_query_presets import MockQueryPresets
 from tests.lib.openstack_query.mocks.mocked_props import MockProperties
@@ -82,6 +83,15 @@ class QueryBuilderTests(unittest.TestCase):
 
         self.assertEqual(self.instance._client_side_filter, mock_client_filter_func)
         self.assertEqual(self.instance._server_side_filters, mock_server_filters)
+        self.assertEqual(self.instance.filter_props, {MockProperties.PROP_1})
+        self.assertEqual(
+            self.instance.preset_details,
+            QueryPresetDetails(
+                preset=MockQueryPresets.ITEM_1,
+                prop=MockProperties.PROP_1,
+                args=mock_kwargs,
+            ),
+        )
 
     @raises(ParseQueryError)
     def test_parse_where_filter_already_set(self):
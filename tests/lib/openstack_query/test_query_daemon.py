@@ -0,0 +1,202 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from unittest.mock import MagicMock, patch
+
+from enums.cloud_domains import CloudDomains
+from exceptions.parse_query_error import ParseQueryError
+from exceptions.query_daemon_error import QueryDaemonError
+from exceptions.query_daemon_unavailable_error import QueryDaemonUnavailableError
+from openstack_query.managers.server_manager import ServerManager
+from openstack_query.query_daemon import QueryDaemon
+from openstack_query.query_daemon_client import (
+    QueryDaemonClient,
+    _rebuild_error,
+    run_query,
+)
+from openstack_query.runners.server_runner import ServerRunner
+from openstack_query.runners.single_flight import SingleFlight
+from tests.benchmarks.synthetic_cloud import SyntheticCloud, SyntheticCloudSpec
+
+
+class QueryDaemonTests(unittest.TestCase):
+    """
+    Runs queries through a query daemon serving a synthetic cloud, over a real Unix socket
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.cloud = SyntheticCloud(
+            SyntheticCloudSpec(projects=3, servers=50, users=5, images=1, fips=1)
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.directory = stack.enter_context(tempfile.TemporaryDirectory())
+        self.socket_path = os.path.join(self.directory, "query.sock")
+        stack.enter_context(
+            QueryDaemon(self.socket_path, connection_cls=self.cloud.connection_cls)
+        )
+        self.client = QueryDaemonClient(self.socket_path)
+        self.cloud.accounting = type(self.cloud.accounting)()
+        self.query = {
+            "search_mode": True,
+            "property_to_search_by": "server_status",
+            "values": ["ERROR", "SHUTOFF"],
+            "properties_to_select": ["server_id", "server_name"],
+            "output_type": "to_list",
+        }
+
+    def test_query_matches_in_process(self):
+        """
+        Tests that a query run by the daemon returns the same results as running it in-process
+        """
+        manager = ServerManager(
+            CloudDomains.DEV,
+            runner=ServerRunner(
+                connection_cls=self.cloud.connection_cls, single_flight=SingleFlight()
+            ),
+        )
+        expected = manager.search_by_property(**self.query)
+
+        res = self.client.run("server", "search_by_property", "dev", **self.query)
+        self.assertEqual(res, expected)
+
+    def test_listings_reused_between_queries(self):
+        """
+        Tests that a second query listing the same servers reuses the first query's listing
+        """
+        self.client.run("server", "search_by_property", "dev", **self.query)
+        calls = self.cloud.accounting.total_requests
+        self.client.run(
+            "server",
+            "search_by_regex",
+            "dev",
+            property_to_search_by="server_name",
+            pattern="jupyter-[0-9]+",
+            properties_to_select=["server_id"],
+            output_type="to_list",
+        )
+        self.assertEqual(self.cloud.accounting.total_requests, calls)
+
+    def test_query_errors_raised_as_original_type(self):
+        """
+        Tests that an error a query fails with is raised again in the client
+        """
+        with self.assertRaises(ParseQueryError):
+            self.client.run(
+                "server",
+                "search_by_property",
+                "dev",
+                **{**self.query, "property_to_search_by": "invalid"},
+            )
+        with self.assertRaises(ValueError):
+            self.client.run("server", "_build_and_run_query", "dev")
+
+    def test_query_written_to_file(self):
+        """
+        Tests that a query written to a file by the daemon returns a reference to the file, with a relative
+        path resolved against the client's working directory
+        """
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            res = self.client.run(
+                "server",
+                "search_by_property",
+                "dev",
+                **{**self.query, "output_type": "to_ndjson", "output_path": "out"},
+            )
+        finally:
+            os.chdir(cwd)
+        path = os.path.join(self.directory, "out")
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), res["rows"])
+        self.assertEqual(res["path"], path)
+
+    def test_run_query_falls_back_for_objects(self):
+        """
+        Tests that queries returning openstack objects are run in-process instead
+        """
+        fallback = MagicMock()
+        res = run_query(
+            "server",
+            "search_by_property",
+            "dev",
+            {**self.query, "output_type": "to_object_list"},
+            fallback,
+            socket_path=self.socket_path,
+        )
+        self.assertEqual(res, fallback.return_value)
+
+    def test_refuses_to_start_on_socket_in_use(self):
+        """
+        Tests that a second daemon can't take over the socket of one which is running
+        """
+        with self.assertRaises(RuntimeError):
+            QueryDaemon(self.socket_path)
+
+
+class QueryDaemonClientTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that the query daemon client falls back expectedly
+    """
+
+    def test_run_query_falls_back_without_daemon(self):
+        """
+        Tests that queries are run in-process if no daemon is listening on the socket
+        """
+        fallback = MagicMock()
+        with tempfile.TemporaryDirectory() as directory:
+            res = run_query(
+                "server",
+                "search_all",
+                "dev",
+                {},
+                fallback,
+                socket_path=os.path.join(directory, "missing.sock"),
+            )
+        self.assertEqual(res, fallback.return_value)
+
+    def test_run_query_in_process_without_socket(self):
+        """
+        Tests that queries are run in-process if no daemon socket is configured
+        """
+        fallback = MagicMock()
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(
+                run_query("server", "search_all", "dev", {}, fallback),
+                fallback.return_value,
+            )
+
+    def test_unserialisable_query_not_sent(self):
+        """
+        Tests that a query with kwargs which can't be sent raises QueryDaemonUnavailableError
+        """
+        with self.assertRaises(QueryDaemonUnavailableError):
+            QueryDaemonClient("unused.sock").run(
+                "server", "search_all", "dev", output_type=object()
+            )
+
+    def test_rebuild_error(self):
+        """
+        Tests that errors are rebuilt as builtins or pack exceptions, and anything else as QueryDaemonError
+        """
+        self.assertIsInstance(
+            _rebuild_error({"type": "builtins:KeyError", "message": "a"}), KeyError
+        )
+        self.assertIsInstance(
+            _rebuild_error(
+                {"type": "exceptions.parse_query_error:ParseQueryError", "message": ""}
+            ),
+            ParseQueryError,
+        )
+        err = _rebuild_error(
+            {"type": "openstack.exceptions:HttpException", "message": "a"}
+        )
+        self.assertIsInstance(err, QueryDaemonError)
+        self.assertEqual(str(err), "openstack.exceptions:HttpException: a")
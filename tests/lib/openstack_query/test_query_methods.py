@@ -1,14 +1,20 @@
 import unittest
-from unittest.mock import MagicMock, NonCallableMock
+from unittest.mock import MagicMock, NonCallableMock, patch
 from openstack_query.query_methods import QueryMethods
+from openstack_query.query_profile import QueryProfile
 
 from nose.tools import raises
+from parameterized import parameterized
 
 from exceptions.parse_query_error import ParseQueryError
+from enums.query.query_aggregations import QueryAggregations
+from structs.query.query_aggregate_details import QueryAggregateDetails
+from structs.query.query_preset_details import QueryPresetDetails
 from tests.lib.openstack_query.mocks.mocked_query_presets import MockQueryPresets
 from tests.lib.openstack_query.mocks.mocked_props import MockProperties
 
 
+# pylint:disable=too-many-public-methods
 class QueryMethodsTests(unittest.TestCase):
     def setUp(self) -> None:
         """
@@ -18,6 +24,7 @@ class QueryMethodsTests(unittest.TestCase):
         self.mock_builder = MagicMock()
         self.mock_runner = MagicMock()
         self.mock_output = MagicMock()
+        self.mock_output.aggregations = []
         self.instance = QueryMethods(
             self.mock_builder,
             self.mock_runner,
@@ -102,6 +109,26 @@ class QueryMethodsTests(unittest.TestCase):
         )
         self.assertEqual(res, self.instance)
 
+    @raises(ParseQueryError)
+    def test_aggregate_invalid(self):
+        """
+        Tests aggregate method works expectedly - with no inputs
+        method raises ParseQueryError when given no aggregations
+        """
+        self.instance.aggregate()
+
+    def test_aggregate(self):
+        """
+        Tests aggregate method works expectedly
+        method should forward aggregations and group_by to parse_aggregate in QueryOutput object
+        """
+        mock_aggregation = NonCallableMock()
+        res = self.instance.aggregate(mock_aggregation, group_by=MockProperties.PROP_1)
+        self.mock_output.parse_aggregate.assert_called_once_with(
+            mock_aggregation, group_by=MockProperties.PROP_1
+        )
+        self.assertEqual(res, self.instance)
+
     def test_run(self):
         """
         Tests that run method works expectedly
@@ -115,6 +142,7 @@ class QueryMethodsTests(unittest.TestCase):
 
         mock_query_output = MagicMock()
         self.instance.output = mock_query_output
+        mock_query_output.aggregations = []
 
         mock_client_filter_func = MagicMock()
         mock_query_builder.client_side_filter = mock_client_filter_func
@@ -127,12 +155,221 @@ class QueryMethodsTests(unittest.TestCase):
 
         res = self.instance.run("test-account")
         mock_query_runner.run.assert_called_once_with(
-            "test-account", mock_client_filter_func, mock_server_filters, None
+            "test-account",
+            mock_client_filter_func,
+            mock_server_filters,
+            None,
+            vectorised_filter_func=None,
+            limit=None,
+            profile=None,
         )
         mock_query_output.generate_output.assert_called_once_with(mock_query_results)
 
         self.assertEqual(res, self.instance)
 
+    def test_run_vectorised(self):
+        """
+        Tests that run method forwards the vectorised filter function when vectorise is set
+        """
+        mock_query_builder = MagicMock()
+        self.instance.builder = mock_query_builder
+        mock_query_runner = MagicMock()
+        self.instance.runner = mock_query_runner
+
+        self.instance.run("test-account", vectorise=True, arg1="val1")
+        mock_query_runner.run.assert_called_once_with(
+            "test-account",
+            mock_query_builder.client_side_filter,
+            mock_query_builder.server_side_filters,
+            None,
+            vectorised_filter_func=mock_query_builder.vectorised_filter,
+            limit=None,
+            profile=None,
+            arg1="val1",
+        )
+
+    def test_run_lightweight(self):
+        """
+        Tests that run method passes the properties needed for output and filtering to the query runner
+        when lightweight is set
+        """
+        self.mock_output.required_props = {MockProperties.PROP_1}
+        self.mock_builder.filter_props = {MockProperties.PROP_2}
+
+        self.instance.run("test-account", lightweight=True)
+        self.assertEqual(
+            self.mock_runner.run.call_args.kwargs["required_props"],
+            {MockProperties.PROP_1, MockProperties.PROP_2},
+        )
+
+    def test_run_aggregate(self):
+        """
+        Tests that run method streams resources from the query runner into the output when aggregations
+        are set, without keeping them
+        """
+        self.mock_output.aggregations = [QueryAggregateDetails(QueryAggregations.COUNT)]
+
+        res = self.instance.run("test-account", arg1="val1")
+        self.mock_runner.iter_run.assert_called_once_with(
+            "test-account",
+            self.mock_builder.client_side_filter,
+            self.mock_builder.server_side_filters,
+            None,
+            arg1="val1",
+        )
+        self.mock_runner.run.assert_not_called()
+        self.mock_output.generate_output.assert_called_once_with(
+            self.mock_runner.iter_run.return_value
+        )
+        self.assertEqual(res.to_list(as_objects=True), [])
+
+    def test_run_aggregate_with_limit(self):
+        """
+        Tests that run method lists resources with the query runner as usual when aggregations are set
+        along with a limit
+        """
+        self.mock_output.aggregations = [QueryAggregateDetails(QueryAggregations.COUNT)]
+
+        self.instance.limit(5).run("test-account")
+        self.mock_runner.iter_run.assert_not_called()
+        self.mock_output.generate_output.assert_called_once_with(
+            self.mock_runner.run.return_value
+        )
+
+    @raises(ParseQueryError)
+    def test_limit_invalid(self):
+        """
+        Tests limit method raises ParseQueryError when given a limit less than 1
+        """
+        self.instance.limit(0)
+
+    def test_run_with_limit(self):
+        """
+        Tests that run method forwards the limit set by limit() to the query runner object
+        """
+        res = self.instance.limit(50)
+        self.assertEqual(res, self.instance)
+
+        self.instance.run("test-account")
+        self.mock_runner.run.assert_called_once_with(
+            "test-account",
+            self.mock_builder.client_side_filter,
+            self.mock_builder.server_side_filters,
+            None,
+            vectorised_filter_func=None,
+            limit=50,
+            profile=None,
+        )
+
+    def test_run_with_profile(self):
+        """
+        Tests that run method passes a QueryProfile to the query runner when profile is set,
+        recording the strategy and time taken to generate output
+        """
+        self.mock_builder.server_side_filters = None
+        self.mock_output.aggregations = []
+        self.mock_output.selected_props = set()
+        self.assertIsNone(self.instance.profile)
+
+        self.instance.run("test-account", profile=True)
+        profile = self.mock_runner.run.call_args.kwargs["profile"]
+        self.assertIsInstance(profile, QueryProfile)
+        self.assertEqual(self.instance.profile, profile)
+        self.assertEqual(profile.strategy, "full listing, filtered client-side")
+        self.assertIn("generate_output", profile.stages)
+
+        self.instance.run("test-account")
+        self.assertIsNone(self.instance.profile)
+
+    def _setup_explain(self, server_filters=None):
+        """
+        Helper to set up the builder and output mocks for explain with a where() and select() already called
+        """
+        self.mock_builder.server_side_filters = server_filters
+        self.mock_builder.preset_details = QueryPresetDetails(
+            preset=MockQueryPresets.ITEM_1,
+            prop=MockProperties.PROP_1,
+            args={"arg1": "val1"},
+        )
+        self.mock_builder.filter_props = {MockProperties.PROP_1}
+        self.mock_output.aggregations = []
+        self.mock_output.selected_props = {MockProperties.PROP_2}
+        self.mock_output.required_props = {MockProperties.PROP_2}
+
+    @patch("openstack_query.query_methods.numpy_available")
+    def test_explain_client_side(self, mock_numpy_available):
+        """
+        Tests that explain describes a query filtered client-side, vectorised if NumPy is available
+        """
+        mock_numpy_available.return_value = True
+        self._setup_explain()
+
+        self.assertEqual(
+            self.instance.explain(vectorise=True),
+            {
+                "server_side_filters": {},
+                "client_side_filter": {
+                    "preset": MockQueryPresets.ITEM_1.name,
+                    "prop": MockProperties.PROP_1.name,
+                    "args": {"arg1": "val1"},
+                },
+                "client_side_filter_applied": True,
+                "vectorised": True,
+                "strategy": "full listing, filtered client-side (vectorised where possible)",
+                "limit": None,
+                "output": {"select": [MockProperties.PROP_2.name]},
+            },
+        )
+        mock_numpy_available.return_value = False
+        self.assertFalse(self.instance.explain(vectorise=True)["vectorised"])
+
+    def test_explain_server_side_with_limit(self):
+        """
+        Tests that explain describes a limited query filtered server-side - the client-side filter is not applied
+        and the limit is used as the page size
+        """
+        self._setup_explain(server_filters={"filter1": "val1"})
+        self.instance.limit(5)
+
+        res = self.instance.explain(lightweight=True)
+        self.assertEqual(res["server_side_filters"], {"filter1": "val1"})
+        self.assertFalse(res["client_side_filter_applied"])
+        self.assertEqual(res["limit"], 5)
+        self.assertEqual(
+            res["strategy"],
+            "lazy listing, stopping after 5 results with a page size of 5, filtered server-side, "
+            f"listing only {', '.join(sorted([MockProperties.PROP_1.name, MockProperties.PROP_2.name]))}",
+        )
+
+    def test_explain_aggregate(self):
+        """
+        Tests that explain describes aggregations to output, and a query with no where() set
+        """
+        self.mock_builder.server_side_filters = None
+        self.mock_builder.client_side_filter = None
+        self.mock_builder.preset_details = None
+        self.mock_output.aggregations = [
+            QueryAggregateDetails(QueryAggregations.COUNT),
+            QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2),
+        ]
+        self.mock_output.aggregate_group_by = MockProperties.PROP_1
+
+        res = self.instance.explain()
+        self.assertIsNone(res["client_side_filter"])
+        self.assertEqual(
+            res["strategy"], "streamed listing, aggregated as resources are listed"
+        )
+        self.assertEqual(
+            res["output"],
+            {
+                "aggregate": [
+                    {"aggregation": "COUNT", "prop": None},
+                    {"aggregation": "SUM", "prop": MockProperties.PROP_2.name},
+                ],
+                "group_by": MockProperties.PROP_1.name,
+            },
+        )
+
     def test_to_list_as_objects_false(self):
         """
         Tests that to_list method functions expectedly
@@ -176,3 +413,21 @@ class QueryMethodsTests(unittest.TestCase):
         self.instance.output = mock_query_output
         self.instance.output.to_html.return_value = "html-out"
         self.assertEqual(self.instance.to_html(), "html-out")
+
+    @parameterized.expand(
+        [
+            ("ndjson", "to_ndjson"),
+            ("csv", "to_csv"),
+            ("json", "to_json"),
+        ]
+    )
+    def test_streamed_output(self, _, method):
+        """
+        Tests that to_ndjson, to_csv and to_json methods call the same QueryOutput method with the destination
+        given and return the reference to what was written
+        """
+        mock_query_output = MagicMock()
+        self.instance.output = mock_query_output
+        res = getattr(self.instance, method)("out-path")
+        getattr(mock_query_output, method).assert_called_once_with("out-path")
+        self.assertEqual(res, getattr(mock_query_output, method).return_value)
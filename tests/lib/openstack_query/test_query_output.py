@@ -1,14 +1,23 @@
+import io
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call
 from openstack_query.query_output import QueryOutput
 
 from nose.tools import raises
+from parameterized import parameterized
+from enums.query.query_aggregations import NUMERIC_AGGREGATIONS, QueryAggregations
+from exceptions.parse_query_error import ParseQueryError
 from exceptions.query_property_mapping_error import QueryPropertyMappingError
+from structs.query.query_aggregate_details import QueryAggregateDetails
 from tests.lib.openstack_query.mocks.mocked_props import MockProperties
 
 # pylint:disable=protected-access
 
 
+# pylint:disable=too-many-public-methods
 class QueryOutputTests(unittest.TestCase):
     """
     Runs various tests to ensure that QueryOutput class methods function expectedly
@@ -67,7 +76,79 @@ class QueryOutputTests(unittest.TestCase):
 
         self.assertEqual(expected_out, res)
 
-    @patch("openstack_query.query_output.tabulate")
+    def test_to_ndjson(self):
+        """
+        Tests that to_ndjson writes one JSON object per result to a stream, and returns a reference to it
+        """
+        self.instance._results = [{"prop_1": "a", "prop_2": 1}, {"prop_1": "b"}]
+        stream = io.StringIO()
+        res = self.instance.to_ndjson(stream)
+        self.assertEqual(
+            stream.getvalue(), '{"prop_1": "a", "prop_2": 1}\n{"prop_1": "b"}\n'
+        )
+        self.assertEqual(res, {"path": None, "format": "ndjson", "rows": 2})
+
+    def test_to_csv(self):
+        """
+        Tests that to_csv writes a header row of property names and one row per result
+        """
+        self.instance._results = [
+            {"prop_1": "a", "prop_2": "x,y"},
+            {"prop_1": "b", "prop_2": None},
+        ]
+        stream = io.StringIO()
+        self.instance.to_csv(stream)
+        self.assertEqual(
+            stream.getvalue().splitlines(), ["prop_1,prop_2", 'a,"x,y"', "b,"]
+        )
+
+    def test_to_csv_no_results(self):
+        """
+        Tests that to_csv writes nothing when there are no results
+        """
+        stream = io.StringIO()
+        res = self.instance.to_csv(stream)
+        self.assertEqual(stream.getvalue(), "")
+        self.assertEqual(res["rows"], 0)
+
+    def test_to_json(self):
+        """
+        Tests that to_json writes results as a JSON array, including when there are none
+        """
+        for results in ([], [{"prop_1": "a"}, {"prop_1": "b"}]):
+            self.instance._results = results
+            stream = io.StringIO()
+            self.instance.to_json(stream)
+            self.assertEqual(json.loads(stream.getvalue()), results)
+
+    def test_to_ndjson_path(self):
+        """
+        Tests that results written to a file path are moved into place once written, and the reference
+        returned holds the absolute path
+        """
+        self.instance._results = [{"prop_1": "a"}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.ndjson")
+            res = self.instance.to_ndjson(path)
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(file.read(), '{"prop_1": "a"}\n')
+            self.assertEqual(os.listdir(directory), ["out.ndjson"])
+        self.assertEqual(res, {"path": path, "format": "ndjson", "rows": 1})
+
+    def test_to_ndjson_path_error(self):
+        """
+        Tests that no file is left behind if writing results to a file path fails
+        """
+        self.instance._results = [{"prop_1": "a"}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.ndjson")
+            with patch("openstack_query.query_output.json.dumps") as mock_dumps:
+                mock_dumps.side_effect = ValueError
+                with self.assertRaises(ValueError):
+                    self.instance.to_ndjson(path)
+            self.assertEqual(os.listdir(directory), [])
+
+    @patch("tabulate.tabulate")
     def test_generate_table(self, mock_tabulate):
         """
         Tests that generate_table function works expectedly
@@ -137,6 +218,105 @@ class QueryOutputTests(unittest.TestCase):
         self.mock_prop_handler.check_supported.return_value = False
         self.instance._check_prop_valid(MockProperties.PROP_1)
 
+    @patch("openstack_query.query_output.QueryOutput._check_prop_valid")
+    def test_parse_aggregate(self, mock_check_prop_valid):
+        """
+        Tests that parse_aggregate works expectedly
+        method should check each aggregated prop and the group_by prop, and store them
+        """
+        count = QueryAggregateDetails(QueryAggregations.COUNT)
+        total = QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2)
+        self.instance.parse_aggregate(count, total, group_by=MockProperties.PROP_1)
+
+        mock_check_prop_valid.assert_has_calls(
+            [call(MockProperties.PROP_2), call(MockProperties.PROP_1)]
+        )
+        self.assertEqual(self.instance._aggregations, [count, total])
+        self.assertEqual(self.instance._aggregate_group_by, MockProperties.PROP_1)
+
+    def test_required_props(self):
+        """
+        Tests that required_props returns selected, aggregated and grouped by properties
+        """
+        self.instance._props = {MockProperties.PROP_1}
+        self.instance._aggregations = [
+            QueryAggregateDetails(QueryAggregations.COUNT),
+            QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2),
+        ]
+        self.instance._aggregate_group_by = MockProperties.PROP_3
+        self.assertEqual(
+            self.instance.required_props,
+            {MockProperties.PROP_1, MockProperties.PROP_2, MockProperties.PROP_3},
+        )
+
+    @raises(ParseQueryError)
+    def test_parse_aggregate_missing_prop(self):
+        """
+        Tests that parse_aggregate raises an error when an aggregation other than COUNT has no prop
+        """
+        self.instance.parse_aggregate(QueryAggregateDetails(QueryAggregations.MAX))
+
+    @parameterized.expand(
+        [(aggregation.name, aggregation) for aggregation in NUMERIC_AGGREGATIONS]
+    )
+    def test_parse_aggregate_not_numeric(self, _, aggregation):
+        """
+        Tests that parse_aggregate raises an error when summing or comparing a property which isn't numeric
+        """
+        with self.assertRaises(ParseQueryError):
+            self.instance.parse_aggregate(
+                QueryAggregateDetails(aggregation, MockProperties.PROP_1)
+            )
+
+    @patch("openstack_query.query_output.QueryOutput._check_prop_valid")
+    def test_parse_aggregate_group_by_consistent(self, _):
+        """
+        Tests that aggregations can be added over several calls, but only with the same group_by
+        """
+        count = QueryAggregateDetails(QueryAggregations.COUNT)
+        total = QueryAggregateDetails(QueryAggregations.SUM, MockProperties.PROP_2)
+        self.instance.parse_aggregate(count, group_by=MockProperties.PROP_1)
+        self.instance.parse_aggregate(total, group_by=MockProperties.PROP_1)
+        self.assertEqual(self.instance._aggregations, [count, total])
+
+        for group_by in (MockProperties.PROP_3, None):
+            with self.assertRaises(ParseQueryError):
+                self.instance.parse_aggregate(count, group_by=group_by)
+        self.assertEqual(self.instance._aggregations, [count, total])
+        self.assertEqual(self.instance._aggregate_group_by, MockProperties.PROP_1)
+
+    @raises(ParseQueryError)
+    def test_parse_aggregate_invalid_k(self):
+        """
+        Tests that parse_aggregate raises an error when TOP_K is given k less than 1
+        """
+        self.instance.parse_aggregate(
+            QueryAggregateDetails(QueryAggregations.TOP_K, MockProperties.PROP_1, k=0)
+        )
+
+    @patch("openstack_query.query_output.QueryAggregator")
+    @patch("openstack_query.query_output.QueryOutput._parse_property")
+    def test_generate_output_aggregated(self, mock_parse_property, mock_aggregator):
+        """
+        Tests that generate_output streams items through a QueryAggregator when aggregations are set
+        and does not build a row per item
+        """
+        count = QueryAggregateDetails(QueryAggregations.COUNT)
+        self.instance._aggregations = [count]
+        self.instance._aggregate_group_by = MockProperties.PROP_1
+
+        res = self.instance.generate_output(["item-1", "item-2"])
+
+        mock_aggregator.assert_called_once_with(
+            self.mock_prop_handler, [count], MockProperties.PROP_1
+        )
+        mock_aggregator.return_value.add_all.assert_called_once_with(
+            ["item-1", "item-2"]
+        )
+        mock_parse_property.assert_not_called()
+        self.assertEqual(res, mock_aggregator.return_value.results.return_value)
+        self.assertEqual(self.instance.results, res)
+
     def test_generate_output_no_items(self):
         """
         Tests that parse_properties function works expectedly - no openstack items
@@ -0,0 +1,125 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from openstack_query.query_profile import QueryProfile
+
+
+class QueryProfileTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that QueryProfile class methods function expectedly
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup for tests
+        """
+        super().setUp()
+        self.instance = QueryProfile()
+
+    @patch("openstack_query.query_profile.time")
+    def test_stage(self, mock_time):
+        """
+        Tests that stage adds the time spent inside it to the named stage, including when an error is raised
+        """
+        mock_time.perf_counter.side_effect = [1.0, 3.0, 5.0, 5.5]
+        with self.instance.stage("fetch"):
+            pass
+        with self.assertRaises(ValueError):
+            with self.instance.stage("fetch"):
+                raise ValueError
+        self.assertEqual(self.instance.stages["fetch"], 2.5)
+
+    def test_count_scanned(self):
+        """
+        Tests that count_scanned passes items through lazily, counting each one
+        """
+        items = self.instance.count_scanned(iter([1, 2, 3]))
+        self.assertEqual(next(items), 1)
+        self.assertEqual(self.instance.items_scanned, 1)
+        self.assertEqual(list(items), [2, 3])
+        self.assertEqual(self.instance.items_scanned, 3)
+
+    def test_instrument(self):
+        """
+        Tests that instrument counts requests made through a connection's session per service type,
+        only while inside it
+        """
+        conn = MagicMock()
+        request = conn.session.request
+        request.return_value.status_code = 200
+        request.return_value.headers = {}
+
+        with self.instance.instrument(conn):
+            res = conn.session.request(
+                "/servers", "GET", endpoint_filter={"service_type": "compute"}
+            )
+            conn.session.request(
+                "/projects", "GET", endpoint_filter={"service_type": "identity"}
+            )
+        conn.session.request("/servers", "GET")
+
+        self.assertEqual(res, request.return_value)
+        self.assertEqual(
+            {
+                service: calls["calls"]
+                for service, calls in self.instance.api_calls.by_service().items()
+            },
+            {"compute": 1, "identity": 1},
+        )
+
+    def test_instrument_shared_connection(self):
+        """
+        Tests that profiles of queries sharing a connection only count their own requests, and
+        the connection's session is only wrapped once however many queries are profiled
+        """
+        conn = MagicMock()
+        conn.session.request.return_value.status_code = 200
+        conn.session.request.return_value.headers = {}
+        other = QueryProfile()
+        requested = threading.Event()
+
+        def _other_query():
+            with other.instrument(conn):
+                conn.session.request("/servers", "GET")
+                requested.set()
+
+        with self.instance.instrument(conn):
+            wrapped = conn.session.request
+            thread = threading.Thread(target=_other_query)
+            thread.start()
+            requested.wait(5)
+            thread.join(5)
+        with self.instance.instrument(conn):
+            self.assertIs(conn.session.request, wrapped)
+            conn.session.request("/servers", "GET")
+
+        self.assertEqual(self.instance.api_calls.total_requests, 1)
+        self.assertEqual(other.api_calls.total_requests, 1)
+
+    def test_to_dict(self):
+        """
+        Tests that to_dict returns the profile with calls and time per service and the total requests made
+        """
+        self.instance.strategy = "full listing"
+        self.instance.stages["fetch"] = 1.5
+        for _ in range(3):
+            self.instance.api_calls.record("compute", "GET", "/servers", 0.5, "200")
+        self.instance.api_calls.record("identity", "GET", "/projects", 0.25, "200")
+        self.instance.items_scanned = 10
+        self.instance.items_returned = 2
+
+        self.assertEqual(
+            self.instance.to_dict(),
+            {
+                "strategy": "full listing",
+                "stages": {"fetch": 1.5},
+                "api_calls": {
+                    "compute": {"calls": 3, "seconds": 1.5},
+                    "identity": {"calls": 1, "seconds": 0.25},
+                },
+                "requests": 4,
+                "items_scanned": 10,
+                "items_returned": 2,
+            },
+        )
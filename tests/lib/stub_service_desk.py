@@ -0,0 +1,97 @@
+import base64
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+# pylint:disable=too-many-instance-attributes
+class StubServiceDesk:
+    """
+    A minimal local stand-in for the Jira Service Desk request API, used to test TicketDispatcher over real HTTP.
+    Creates a ticket for every authenticated POST, recording when each arrived and how many were handled at
+    once. Responses for a ticket can be overridden with a queue of status codes, keyed by its summary
+    """
+
+    def __init__(self, email: str = "user@example.com", api_key: str = "key"):
+        self.tickets: List[Dict] = []
+        self.connections = 0
+        self.request_times: List[float] = []
+        self.max_in_flight = 0
+        self.injected_statuses: Dict[str, List[int]] = defaultdict(list)
+        # seconds each request takes to answer
+        self.latency = 0.0
+        self._credentials = base64.b64encode(f"{email}:{api_key}".encode()).decode()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/rest/servicedeskapi/request"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        desk = self
+
+        # the handler shares the desk's state, so reaches into its private members
+        # pylint:disable=protected-access
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with desk._lock:
+                    desk.connections += 1
+
+            # pylint: disable=redefined-builtin
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body=None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            # pylint: disable=invalid-name
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with desk._lock:
+                    desk.request_times.append(time.monotonic())
+                    desk._in_flight += 1
+                    desk.max_in_flight = max(desk.max_in_flight, desk._in_flight)
+                try:
+                    time.sleep(desk.latency)
+                    self._reply(*desk._create(self.headers, body))
+                finally:
+                    with desk._lock:
+                        desk._in_flight -= 1
+
+        return Handler
+
+    def _create(self, headers, body: Dict):
+        if headers.get("Authorization") != f"Basic {self._credentials}":
+            return 401, {"errorMessage": "Unauthorized"}
+        summary = body["requestFieldValues"]["summary"]
+        with self._lock:
+            injected = self.injected_statuses[summary]
+            if injected:
+                return (injected.pop(0),)
+            self.tickets.append(body)
+            return 201, {"issueKey": f"TEST-{len(self.tickets)}"}
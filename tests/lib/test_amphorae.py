@@ -0,0 +1,167 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from amphorae import (
+    find_unreachable,
+    get_amphorae,
+    ping_ip,
+    probe_ips,
+    DEV_URL,
+    PROD_URL,
+)
+
+
+# pylint:disable=too-few-public-methods
+class FakeProber:
+    """
+    Fake prober which records calls and takes a fixed time to reply
+    """
+
+    def __init__(self, down=(), delay=0.05):
+        self.down = set(down)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, ip: str, timeout: float) -> bool:
+        self.calls.append(ip)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return ip not in self.down
+
+
+class AmphoraeTests(unittest.TestCase):
+    """
+    Runs various tests to ensure amphorae are listed and probed expectedly
+    """
+
+    @patch("amphorae.requests")
+    @patch("amphorae.OpenstackConnection")
+    def test_get_amphorae(self, mock_connection, mock_requests):
+        """
+        Tests that the correct URL is used for each cloud
+        """
+        conn = mock_connection.return_value.__enter__.return_value
+        for cloud, url in (("dev-admin", DEV_URL), ("prod-admin", PROD_URL)):
+            get_amphorae(cloud)
+            mock_requests.get.assert_called_with(
+                url, headers={"X-Auth-Token": conn.auth_token}, timeout=300
+            )
+
+    @patch("amphorae.asyncio.create_subprocess_exec")
+    def test_ping_ip(self, mock_exec):
+        """
+        Tests that ping_ip runs a single ping and checks its return code
+        """
+        process = MagicMock()
+        process.wait = AsyncMock(return_value=0)
+        mock_exec.return_value = process
+
+        self.assertTrue(asyncio.run(ping_ip("10.0.0.1", 1)))
+        self.assertEqual(
+            mock_exec.call_args.args, ("ping", "-q", "-c", "1", "-W", "1", "10.0.0.1")
+        )
+
+    @patch("amphorae.asyncio.create_subprocess_exec")
+    def test_ping_ip_killed_on_timeout(self, mock_exec):
+        """
+        Tests that a ping still running when probe_ips times it out is killed, once the timeout given
+        """
+        process = MagicMock()
+        process.returncode = None
+        exited = asyncio.Event()
+
+        async def _wait():
+            await exited.wait()
+            return 1
+
+        process.wait = _wait
+        process.kill.side_effect = exited.set
+        mock_exec.return_value = process
+
+        start = time.perf_counter()
+        self.assertEqual(probe_ips(["10.0.0.1"], timeout=0.01), {"10.0.0.1": False})
+        self.assertLess(time.perf_counter() - start, 0.5)
+        process.kill.assert_called_once()
+
+    def test_probe_ips_concurrently(self):
+        """
+        Tests that probes run concurrently - 200 probes taking 0.05s each should take
+        well under the 10s it would take to probe them serially
+        """
+        ips = [f"10.0.{i // 256}.{i % 256}" for i in range(200)]
+        prober = FakeProber(down={ips[0]})
+
+        start = time.perf_counter()
+        res = probe_ips(ips, prober, max_concurrent=50)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual(len(prober.calls), 200)
+        self.assertLessEqual(prober.max_in_flight, 50)
+        self.assertFalse(res[ips[0]])
+        self.assertTrue(all(res[ip] for ip in ips[1:]))
+
+    def test_probe_ips_timeout(self):
+        """
+        Tests that a probe which hangs is treated as down
+        """
+        prober = FakeProber(delay=5)
+        self.assertEqual(
+            probe_ips(["10.0.0.1"], prober, timeout=0.01), {"10.0.0.1": False}
+        )
+        self.assertEqual({}, probe_ips([], prober))
+
+    def test_find_unreachable(self):
+        """
+        Tests that only failed targets are re-probed, after the retry interval, until they reach the
+        failure threshold
+        """
+        prober = FakeProber(down={"10.0.0.2"}, delay=0)
+        sleep = MagicMock()
+        res = find_unreachable(
+            {"amp1": "10.0.0.1", "amp2": "10.0.0.2"},
+            failure_threshold=3,
+            retry_interval=5,
+            prober=prober,
+            sleep=sleep,
+        )
+        self.assertEqual(res, {"amp2"})
+        self.assertEqual(prober.calls.count("10.0.0.1"), 1)
+        self.assertEqual(prober.calls.count("10.0.0.2"), 3)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [5, 5])
+
+    def test_find_unreachable_recovers(self):
+        """
+        Tests that a target which responds to a retry is not reported
+        """
+        prober = FakeProber(down={"10.0.0.1"}, delay=0)
+        sleep = MagicMock(side_effect=lambda _: prober.down.clear())
+        res = find_unreachable({"amp1": "10.0.0.1"}, prober=prober, sleep=sleep)
+        self.assertEqual(res, set())
+        self.assertEqual(prober.calls, ["10.0.0.1", "10.0.0.1"])
+
+    def test_find_unreachable_without_ip(self):
+        """
+        Tests that targets without an IP are neither probed nor reported
+        """
+        prober = FakeProber(delay=0)
+        res = find_unreachable(
+            {"amp1": "10.0.0.1", "amp2": None}, prober=prober, sleep=MagicMock()
+        )
+        self.assertEqual(res, set())
+        self.assertEqual(prober.calls, ["10.0.0.1"])
+
+    @patch("amphorae.asyncio.create_subprocess_exec")
+    def test_find_unreachable_without_ping(self, mock_exec):
+        """
+        Tests that a missing ping binary is raised rather than every target being reported as down
+        """
+        mock_exec.side_effect = FileNotFoundError("ping")
+        with self.assertRaises(FileNotFoundError):
+            find_unreachable({"amp1": "10.0.0.1"}, sleep=MagicMock())
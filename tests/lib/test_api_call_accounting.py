@@ -0,0 +1,202 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from keystoneauth1.exceptions.http import NotFound
+from parameterized import parameterized
+
+from openstack_api.api_call_accounting import ApiCallAccounting, normalise_endpoint
+
+
+class ApiCallAccountingTests(unittest.TestCase):
+    """
+    Runs various tests to ensure that ApiCallAccounting class methods function expectedly
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup for tests
+        """
+        super().setUp()
+        self.instance = ApiCallAccounting()
+        self.session = MagicMock()
+        self.request = self.session.request
+        self.request.return_value.status_code = 200
+        self.request.return_value.headers = {"Content-Length": "120"}
+
+    @parameterized.expand(
+        [
+            ("relative path", "/servers/detail", "/servers/detail"),
+            (
+                "uuid",
+                "/servers/0a1b2c3d-0000-4000-8000-00000000000a/action",
+                "/servers/{id}/action",
+            ),
+            (
+                "keystone id with query",
+                "https://keystone:5000/v3/projects/0123456789abcdef0123456789abcdef?domain_id=x",
+                "/v3/projects/{id}",
+            ),
+            ("integer", "/os-hypervisors/12", "/os-hypervisors/{id}"),
+        ]
+    )
+    def test_normalise_endpoint(self, _, url, expected):
+        """
+        Tests that normalise_endpoint replaces resource IDs in a URL's path so requests are counted together
+        """
+        self.assertEqual(normalise_endpoint(url), expected)
+
+    def test_instrument_counts_requests(self):
+        """
+        Tests that requests made through an instrumented session are counted per service, method and endpoint,
+        along with status codes and bytes sent and received
+        """
+        self.instance.instrument(self.session)
+        for server_id in ("0a1b2c3d-0000-4000-8000-00000000000a", "12"):
+            res = self.session.request(
+                f"/servers/{server_id}",
+                "get",
+                endpoint_filter={"service_type": "compute"},
+            )
+        self.session.request(
+            "/servers",
+            "POST",
+            endpoint_filter={"service_type": "compute"},
+            json={"server": {}},
+        )
+
+        self.assertEqual(res, self.request.return_value)
+        self.assertEqual(self.request.call_count, 3)
+        counters = self.instance.to_dict()
+        self.assertEqual(
+            set(counters), {"compute GET /servers/{id}", "compute POST /servers"}
+        )
+        self.assertEqual(counters["compute GET /servers/{id}"]["requests"], 2)
+        self.assertEqual(counters["compute GET /servers/{id}"]["statuses"], {"200": 2})
+        self.assertEqual(counters["compute GET /servers/{id}"]["bytes_received"], 240)
+        self.assertEqual(
+            counters["compute POST /servers"]["bytes_sent"], len('{"server": {}}')
+        )
+        self.assertEqual(self.instance.total_requests, 3)
+        self.assertEqual(self.instance.by_service()["compute"]["calls"], 3)
+
+    def test_instrument_counts_errors(self):
+        """
+        Tests that requests which raise are counted by their HTTP status, or as errors if no response was received
+        """
+        self.request.side_effect = [NotFound(), ConnectionError()]
+        self.instance.instrument(self.session)
+
+        with self.assertRaises(NotFound):
+            self.session.request("/images/1", "GET")
+        with self.assertRaises(ConnectionError):
+            self.session.request("/images/1", "GET")
+
+        self.assertEqual(
+            self.instance.to_dict()["unknown GET /images/{id}"]["statuses"],
+            {"404": 1, "error": 1},
+        )
+
+    @patch("openstack_api.api_call_accounting.time")
+    def test_latency_buckets(self, mock_time):
+        """
+        Tests that request latencies are counted in cumulative histogram buckets
+        """
+        mock_time.perf_counter.side_effect = [0, 0.003, 0, 0.2, 0, 20]
+        self.instance.instrument(self.session)
+        for _ in range(3):
+            self.session.request("/flavors", "GET")
+
+        buckets = self.instance.to_dict()["unknown GET /flavors"]["latency_buckets"]
+        self.assertEqual(buckets["0.005"], 1)
+        self.assertEqual(buckets["0.1"], 1)
+        self.assertEqual(buckets["0.25"], 2)
+        self.assertEqual(buckets["10.0"], 2)
+        self.assertEqual(buckets["+Inf"], 3)
+
+    def test_write_textfile(self):
+        """
+        Tests that write_textfile writes counters in the Prometheus textfile format
+        """
+        self.instance.record("compute", "GET", "/servers/detail", 0.2, "200", 0, 100)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "openstack_api.prom")
+            self.instance.write_textfile(path)
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                ["openstack_api.prom", "openstack_api.prom.lock"],
+            )
+
+        labels = 'service="compute",method="GET",endpoint="/servers/detail"'
+        self.assertIn("# TYPE openstack_api_requests_total counter", text)
+        self.assertIn(f'openstack_api_requests_total{{{labels},status="200"}} 1', text)
+        self.assertIn(
+            f'openstack_api_request_duration_seconds_bucket{{{labels},le="0.25"}} 1',
+            text,
+        )
+        self.assertIn(
+            f'openstack_api_request_duration_seconds_bucket{{{labels},le="0.1"}} 0',
+            text,
+        )
+        self.assertIn(f"openstack_api_response_bytes_total{{{labels}}} 100", text)
+
+    def test_write_textfile_adds_to_totals(self):
+        """
+        Tests that write_textfile adds to the totals already in the file, e.g. written by another process,
+        and only adds what was counted since it last wrote
+        """
+        other = ApiCallAccounting()
+        other.record("compute", "GET", "/servers/detail", 0.2, "200")
+        other.record("identity", "GET", "/projects", 0.2, "200")
+        self.instance.record("compute", "GET", "/servers/detail", 0.2, "200")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "openstack_api.prom")
+            other.write_textfile(path)
+            self.instance.write_textfile(path)
+            self.instance.record("compute", "GET", "/servers/detail", 0.2, "200")
+            self.instance.write_textfile(path)
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+
+        labels = 'service="compute",method="GET",endpoint="/servers/detail"'
+        self.assertIn(f'openstack_api_requests_total{{{labels},status="200"}} 3', text)
+        self.assertIn(
+            f"openstack_api_request_duration_seconds_count{{{labels}}} 3", text
+        )
+        self.assertIn(
+            'openstack_api_requests_total{service="identity",method="GET",'
+            'endpoint="/projects",status="200"} 1',
+            text,
+        )
+        self.assertEqual(text.count("# TYPE openstack_api_requests_total counter"), 1)
+
+    def test_prometheus_labels_escaped(self):
+        """
+        Tests that backslashes, double quotes and newlines in label values are escaped
+        """
+        self.instance.record("com\npute", "GET", '/servers/a"b\\c', 0.2, "200")
+        self.assertIn(
+            'openstack_api_requests_total{service="com\\npute",method="GET",'
+            'endpoint="/servers/a\\"b\\\\c",status="200"} 1',
+            self.instance.to_prometheus(),
+        )
+
+    def test_instrument_twice(self):
+        """
+        Tests that instrumenting a session again, by the same or another accounting, does not wrap it again
+        and each accounting counts every request once
+        """
+        other = ApiCallAccounting()
+        self.instance.instrument(self.session)
+        wrapped = self.session.request
+        self.instance.instrument(self.session)
+        other.instrument(self.session)
+        with self.instance.counting(self.session):
+            self.session.request("/servers", "GET")
+
+        self.assertIs(self.session.request, wrapped)
+        self.assertEqual(self.instance.total_requests, 1)
+        self.assertEqual(other.total_requests, 1)
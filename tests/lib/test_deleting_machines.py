@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from deleting_machines import (
+    UPDATED_AT_FORMAT,
+    filter_already_ticketed,
+    get_deleting_machines,
+)
+
+
+def _minutes_ago(minutes: int) -> str:
+    return (datetime.utcnow() - timedelta(minutes=minutes)).strftime(UPDATED_AT_FORMAT)
+
+
+def _entry(server_id: str):
+    return {
+        "dataTitle": {"id": server_id, "action": "DELETING"},
+        "dataBody": {"id": server_id},
+    }
+
+
+class DeletingMachinesTests(unittest.TestCase):
+    """
+    Runs various tests to ensure stuck deleting servers are found expectedly
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.conn = MagicMock()
+
+    def test_get_deleting_machines_single_listing(self):
+        """
+        Tests that a single server-side filtered listing is made and that
+        servers are not fetched individually
+        """
+        self.conn.compute.servers.return_value = []
+        self.assertEqual([], get_deleting_machines(self.conn, minutes=10))
+
+        self.conn.compute.servers.assert_called_once()
+        kwargs = self.conn.compute.servers.call_args.kwargs
+        self.assertTrue(kwargs["all_projects"])
+        self.assertEqual(kwargs["status"], "DELETING")
+        changes_before = datetime.strptime(kwargs["changes_before"], UPDATED_AT_FORMAT)
+        self.assertAlmostEqual(
+            (datetime.utcnow() - changes_before).total_seconds(), 600, delta=5
+        )
+        self.conn.compute.get_server.assert_not_called()
+        self.conn.identity.projects.assert_not_called()
+
+    def test_get_deleting_machines_rechecks_locally(self):
+        """
+        Tests that servers are re-checked locally in case the server-side filters are ignored
+        """
+        self.conn.compute.servers.return_value = [
+            {"id": "stuck", "status": "DELETING", "updated_at": _minutes_ago(11)},
+            {"id": "recent", "status": "DELETING", "updated_at": _minutes_ago(1)},
+            {"id": "active", "status": "ACTIVE", "updated_at": _minutes_ago(60)},
+        ]
+        self.assertEqual(
+            get_deleting_machines(self.conn, minutes=10), [_entry("stuck")]
+        )
+
+    def test_filter_already_ticketed(self):
+        """
+        Tests that servers dispatched on a previous poll are not returned again,
+        and that servers which are no longer stuck are forgotten
+        """
+        new_entries, ticketed = filter_already_ticketed(
+            [_entry("server1"), _entry("server2")], {"server1", "resolved"}
+        )
+        self.assertEqual(new_entries, [_entry("server2")])
+        self.assertEqual(ticketed, {"server1", "server2"})
+
+    def test_filter_already_ticketed_nothing_found(self):
+        """
+        Tests that the cache is emptied when no servers are stuck
+        """
+        new_entries, ticketed = filter_already_ticketed([], {"server1"})
+        self.assertEqual(new_entries, [])
+        self.assertEqual(ticketed, set())
@@ -79,3 +79,32 @@ def test_openstack_connection_connects_second_time():
             pass
         with OpenstackConnection("a"):
             assert patched_connect.call_count == 2
+
+
+def test_openstack_connection_instruments_session():
+    """
+    Tests that an accounting object given is used to count requests made through the connection's session
+    """
+    accounting = mock.MagicMock()
+    with mock.patch("openstack_api.openstack_connection.connect"):
+        connection = OpenstackConnection("a", accounting=accounting)
+        with connection as instance:
+            accounting.instrument.assert_called_once_with(instance.session)
+    assert connection.accounting == accounting
+
+
+def test_openstack_connection_writes_metrics_file():
+    """
+    Tests that request counters are written to the metrics file, from the environment if not given,
+    when the connection closes
+    """
+    with mock.patch("openstack_api.openstack_connection.connect"), mock.patch(
+        "openstack_api.openstack_connection.default_accounting"
+    ) as patched_default, mock.patch.dict(
+        "os.environ", {"OPENSTACK_API_METRICS_FILE": "metrics.prom"}
+    ):
+        with OpenstackConnection("a"):
+            patched_default.return_value.write_textfile.assert_not_called()
+        patched_default.return_value.write_textfile.assert_called_once_with(
+            "metrics.prom"
+        )
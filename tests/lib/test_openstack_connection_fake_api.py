@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from openstack.exceptions import HttpException, NotFoundException
+
+from openstack_api.openstack_volume_snapshot import OpenstackVolumeSnapshot
+from tests.benchmarks.fake_openstack_api import FakeOpenstackApi
+from tests.benchmarks.synthetic_cloud import SyntheticCloud, SyntheticCloudSpec
+
+
+class OpenstackConnectionFakeApiTests(unittest.TestCase):
+    """
+    Runs the real OpenstackConnection and openstacksdk against a local fake Openstack API,
+    checking authentication, pagination and error handling over real HTTP
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.cloud = SyntheticCloud(
+            SyntheticCloudSpec(
+                projects=3,
+                servers=25,
+                users=5,
+                images=5,
+                fips=5,
+                snapshots=5,
+                page_size=10,
+            )
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.api = stack.enter_context(FakeOpenstackApi(self.cloud))
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        clouds_yaml = os.path.join(directory, "clouds.yaml")
+        self.api.write_clouds_yaml(clouds_yaml)
+        stack.enter_context(
+            patch.dict(os.environ, {"OS_CLIENT_CONFIG_FILE": clouds_yaml})
+        )
+
+    def test_lists_servers_a_page_at_a_time(self):
+        """
+        Tests that servers are listed by following Nova's next page links, and the requests are counted
+        """
+        with self.api.connection_cls("dev") as conn:
+            servers = list(conn.compute.servers(all_projects=True))
+
+        self.assertEqual(
+            [server.id for server in servers],
+            [server.id for server in self.cloud.servers],
+        )
+        self.assertEqual(servers[0].project_id, self.cloud.servers[0].project_id)
+        self.assertEqual(self.api.requests["GET /compute/v2.1/servers/detail"], 3)
+        self.assertEqual(self.api.accounting.by_service()["compute"]["calls"], 3)
+
+    def test_filters_servers_server_side(self):
+        """
+        Tests that server listings are filtered by project as Nova does
+        """
+        project_id = self.cloud.projects[0].id
+        with self.api.connection_cls("dev") as conn:
+            servers = list(conn.compute.servers(project_id=project_id))
+
+        self.assertEqual(
+            {server.id for server in servers},
+            {server.id for server in self.cloud.servers_by_project[project_id]},
+        )
+
+    def test_deleted_resources_are_not_found(self):
+        """
+        Tests that resources the synthetic cloud lists as deleted can't be fetched
+        """
+        self.cloud.deleted_ids.add(self.cloud.images[0].id)
+        try:
+            with self.api.connection_cls("dev") as conn:
+                self.assertEqual(
+                    conn.image.get_image(self.cloud.images[1].id).owner,
+                    self.cloud.images[1].owner,
+                )
+                with self.assertRaises(NotFoundException):
+                    conn.image.get_image(self.cloud.images[0].id)
+        finally:
+            self.cloud.deleted_ids.discard(self.cloud.images[0].id)
+
+    def test_injected_errors_are_raised(self):
+        """
+        Tests that a status code injected for a path is returned in place of the response
+        """
+        self.api.injected_statuses["/network/v2.0/floatingips"] = [503]
+        with self.api.connection_cls("dev") as conn:
+            with self.assertRaises(HttpException):
+                list(conn.network.ips())
+            self.assertEqual(len(list(conn.network.ips())), len(self.cloud.fips))
+
+    def test_find_stale_snapshots(self):
+        """
+        Tests that stale snapshots are found by listing Cinder snapshots and Keystone projects
+        """
+        threshold = datetime.utcnow() - timedelta(days=30)
+        expected = {
+            snapshot.id
+            for snapshot in self.cloud.snapshots
+            if datetime.strptime(snapshot.updated_at, "%Y-%m-%dT%H:%M:%SZ") < threshold
+        }
+
+        stale = OpenstackVolumeSnapshot(self.api.connection_cls).find_stale_snapshots(
+            "dev", days=30
+        )
+
+        self.assertEqual({entry["dataBody"]["id"] for entry in stale}, expected)
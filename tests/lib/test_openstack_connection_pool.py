@@ -0,0 +1,70 @@
+from unittest import mock
+
+from nose.tools import raises
+
+from exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from openstack_api.openstack_connection_pool import OpenstackConnectionPool
+
+
+def test_pooled_connection_reused():
+    """
+    Tests that a connection is made once per cloud, and left open when the context manager exits
+    """
+    with mock.patch(
+        "openstack_api.openstack_connection_pool.connect"
+    ) as patched_connect:
+        pool = OpenstackConnectionPool()
+        with pool.connection_cls("a") as first:
+            pass
+        with pool.connection_cls(" a ") as second:
+            pass
+        with pool.connection_cls("b"):
+            pass
+
+        assert first is second
+        assert patched_connect.call_args_list == [
+            mock.call(cloud="a"),
+            mock.call(cloud="b"),
+        ]
+        patched_connect.return_value.close.assert_not_called()
+
+
+def test_pool_close():
+    """
+    Tests that closing the pool closes its connections, and the next use connects again
+    """
+    with mock.patch(
+        "openstack_api.openstack_connection_pool.connect"
+    ) as patched_connect:
+        pool = OpenstackConnectionPool()
+        with pool.connection_cls("a"):
+            pass
+        pool.close()
+        patched_connect.return_value.close.assert_called_once()
+        with pool.connection_cls("a"):
+            pass
+        assert patched_connect.call_count == 2
+
+
+def test_pool_instruments_session():
+    """
+    Tests that an accounting object given is used to count requests made through each connection once
+    """
+    accounting = mock.MagicMock()
+    with mock.patch("openstack_api.openstack_connection_pool.connect"):
+        pool = OpenstackConnectionPool(accounting)
+        with pool.connection_cls("a") as conn:
+            pass
+        with pool.connection_cls("a"):
+            pass
+    accounting.instrument.assert_called_once_with(conn.session)
+
+
+@raises(MissingMandatoryParamError)
+def test_pool_throws_for_empty_cloud_name():
+    """
+    Tests an empty string will throw for the cloud name
+    """
+    with mock.patch("openstack_api.openstack_connection_pool.connect"):
+        with OpenstackConnectionPool().connection_cls(" "):
+            pass
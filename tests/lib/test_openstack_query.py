@@ -100,6 +100,25 @@ class OpenstackQueryTests(unittest.TestCase):
             items, [lambda item: item > 2, lambda item: item < 4]
         ) == [3]
 
+    @patch("openstack_api.openstack_query.datetime", wraps=datetime)
+    def test_age_histogram(self, mock_datetime):
+        """
+        Tests age_histogram counts items into the right age bins, leaving out items older than the last edge
+        or with no timestamp
+        """
+        mock_datetime.datetime.now.return_value = datetime.datetime(2021, 8, 1)
+        items = [
+            {"id": "1", "created_at": "2021-07-30T00:00:00Z"},
+            {"id": "2", "created_at": "2020-06-28T14:00:00Z"},
+            {"id": "3", "created_at": "2021-06-28T14:00:00Z"},
+            {"id": "4", "created_at": None},
+        ]
+        assert self.instance.age_histogram(items, "created_at", [0, 30, 90, 365]) == [
+            1,
+            1,
+            0,
+        ]
+
     def test_parse_properties(self):
         """
         Tests parse_properties works as expected
@@ -0,0 +1,138 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, NonCallableMock
+
+from openstack_api.openstack_volume_snapshot import OpenstackVolumeSnapshot
+
+
+class OpenstackVolumeSnapshotTests(unittest.TestCase):
+    """
+    Runs various tests to ensure we are using the Openstack
+    block storage module in the expected way
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.mocked_connection = MagicMock()
+        self.instance = OpenstackVolumeSnapshot(self.mocked_connection)
+        self.api = self.mocked_connection.return_value.__enter__.return_value
+        self.api.identity.projects.return_value = [
+            {"id": "project-id1", "name": "project1"},
+            {"id": "project-id2", "name": "project2"},
+        ]
+
+    @staticmethod
+    def _days_ago(days: int, date_time_format="%Y-%m-%dT%H:%M:%S.%f") -> str:
+        return (datetime.utcnow() - timedelta(days=days)).strftime(date_time_format)
+
+    def test_find_stale_snapshots_single_listing(self):
+        """
+        Tests that snapshots and projects are each listed once, cloud-wide
+        """
+        cloud = NonCallableMock()
+        self.api.block_storage.snapshots.return_value = []
+
+        self.assertEqual([], list(self.instance.find_stale_snapshots(cloud, 30)))
+
+        self.mocked_connection.assert_called_once_with(cloud)
+        self.api.identity.projects.assert_called_once_with()
+        self.api.block_storage.snapshots.assert_called_once_with(
+            details=True, all_projects=True
+        )
+        self.api.get_project.assert_not_called()
+
+    def test_find_stale_snapshots_single_project(self):
+        """
+        Tests that the listing is filtered server-side when a project is given
+        """
+        self.api.block_storage.snapshots.return_value = []
+        list(self.instance.find_stale_snapshots("test", 30, project_id="project-id1"))
+        self.api.block_storage.snapshots.assert_called_once_with(
+            details=True, all_projects=True, project_id="project-id1"
+        )
+
+    def test_find_stale_snapshots_applies_age_threshold(self):
+        """
+        Tests that only snapshots unchanged for longer than the threshold are returned,
+        regardless of which calendar month they were changed in
+        """
+        stale = self._days_ago(31)
+        self.api.block_storage.snapshots.return_value = [
+            {
+                "id": "snap1",
+                "name": "stale",
+                "updated_at": stale,
+                "created_at": self._days_ago(60),
+                "project_id": "project-id1",
+            },
+            {
+                "id": "snap2",
+                "name": "fresh",
+                "updated_at": self._days_ago(29),
+                "created_at": self._days_ago(60),
+                "project_id": "project-id1",
+            },
+        ]
+
+        res = list(self.instance.find_stale_snapshots("test", 30))
+        self.assertEqual(
+            res,
+            [
+                {
+                    "dataTitle": {"name": "project1"},
+                    "dataBody": {
+                        "name": "stale",
+                        "id": "snap1",
+                        "updated": stale,
+                        "project_id": "project-id1",
+                    },
+                }
+            ],
+        )
+
+    def test_find_stale_snapshots_never_updated(self):
+        """
+        Tests that the creation time is used when a snapshot has never been updated
+        and that timestamps without fractional seconds are accepted
+        """
+        created = self._days_ago(40, "%Y-%m-%dT%H:%M:%S")
+        self.api.block_storage.snapshots.return_value = [
+            {
+                "id": "snap1",
+                "name": "snap",
+                "updated_at": None,
+                "created_at": created,
+                "project_id": "project-id2",
+            },
+        ]
+
+        res = list(self.instance.find_stale_snapshots("test", 30))
+        self.assertEqual(res[0]["dataTitle"], {"name": "project2"})
+        self.assertEqual(res[0]["dataBody"]["updated"], created)
+
+    def test_find_stale_snapshots_unknown_project(self):
+        """
+        Tests that the project ID is used as the name when the project no longer exists
+        """
+        self.api.block_storage.snapshots.return_value = [
+            {
+                "id": "snap1",
+                "name": "snap",
+                "updated_at": self._days_ago(40),
+                "created_at": self._days_ago(40),
+                "project_id": "deleted-project",
+            },
+        ]
+
+        res = list(self.instance.find_stale_snapshots("test", 30))
+        self.assertEqual(res[0]["dataTitle"], {"name": "deleted-project"})
+
+    def test_find_stale_snapshots_bad_timestamp(self):
+        """
+        Tests that an unrecognised timestamp raises an error
+        """
+        self.api.block_storage.snapshots.return_value = [
+            {"updated_at": "yesterday", "created_at": None, "project_id": "x"}
+        ]
+        with self.assertRaises(ValueError):
+            list(self.instance.find_stale_snapshots("test", 30))
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from parameterized import parameterized
+
+from request_retry import SafeRetry
+
+
+class SafeRetryTests(unittest.TestCase):
+    """
+    Runs various tests to ensure requests are only retried when it can't repeat a change
+    """
+
+    @parameterized.expand(
+        [
+            ("GET", 503, True),
+            ("GET", 429, True),
+            ("POST", 429, True),
+            ("POST", 503, False),
+            ("DELETE", 502, False),
+            ("GET", 404, False),
+        ]
+    )
+    def test_is_retry(self, method, status, expected):
+        """
+        Tests that server errors are only retried for safe methods, and rate limiting for any method
+        """
+        self.assertEqual(SafeRetry(total=3).is_retry(method, status), expected)
+
+    def test_before_retry_called_for_each_retry(self):
+        """
+        Tests that before_retry is kept when the policy is incremented, and called before each retry
+        """
+        before_retry = MagicMock()
+        retry = SafeRetry(total=3, backoff_factor=0, before_retry=before_retry)
+        with patch("time.sleep"):
+            retry.sleep()
+            retry.increment("POST", "/", error=ConnectionError()).sleep()
+        self.assertEqual(before_retry.call_count, 2)
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import time
+import unittest
+from contextlib import ExitStack
+from unittest.mock import MagicMock, patch
+
+from nose.tools import raises
+
+from exceptions.item_not_found_error import ItemNotFoundError
+from result_store import (
+    HANDLE_KEY,
+    STORE_DIR_ENV,
+    THRESHOLD_ENV,
+    ResultStore,
+    is_handle,
+    summarise,
+)
+
+
+class ResultStoreTests(unittest.TestCase):
+    """
+    Runs various tests to ensure large results are offloaded and loaded back expectedly
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.directory = stack.enter_context(tempfile.TemporaryDirectory())
+        self.instance = ResultStore(root=self.directory, threshold=100)
+        self.tickets_info = {
+            "title": "Server {p[id]} is stuck",
+            "server_list": [
+                {"dataTitle": {"id": str(i)}, "dataBody": {"id": str(i)}}
+                for i in range(50)
+            ],
+        }
+
+    def test_small_result_returned_inline(self):
+        """
+        Tests that results no larger than the threshold are returned unchanged
+        """
+        result = {"server_list": []}
+        self.assertIs(self.instance.offload(result), result)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unserialisable_result_returned_inline(self):
+        """
+        Tests that results which can't be serialised as JSON are returned unchanged
+        """
+        result = [MagicMock()] * 100
+        self.assertIs(self.instance.offload(result), result)
+
+    def test_offload_and_resolve(self):
+        """
+        Tests that large results are written compressed and replaced by a handle and summary, which
+        resolve loads back
+        """
+        handle = self.instance.offload(self.tickets_info)
+        self.assertTrue(is_handle(handle))
+        self.assertEqual(
+            handle["summary"],
+            {"title": "Server {p[id]} is stuck", "server_list": {"items": 50}},
+        )
+        (name,) = os.listdir(self.directory)
+        self.assertEqual(name, f"{handle[HANDLE_KEY]}.json.gz")
+        self.assertLess(
+            os.path.getsize(os.path.join(self.directory, name)), handle["bytes"]
+        )
+        self.assertEqual(ResultStore(self.directory).resolve(handle), self.tickets_info)
+
+    def test_resolve_inline_result(self):
+        """
+        Tests that resolve returns results which weren't offloaded unchanged
+        """
+        self.assertIs(self.instance.resolve(self.tickets_info), self.tickets_info)
+
+    @raises(ItemNotFoundError)
+    def test_resolve_expired(self):
+        """
+        Tests that resolving a handle to a result which no longer exists raises an error
+        """
+        self.instance.resolve({HANDLE_KEY: "0" * 32})
+
+    @raises(ValueError)
+    def test_resolve_invalid_handle(self):
+        """
+        Tests that a handle which isn't an ID made by offload is refused, rather than read as a path
+        """
+        self.instance.resolve({HANDLE_KEY: "../../etc/passwd"})
+
+    def test_old_results_purged(self):
+        """
+        Tests that results older than the retention period are removed when another result is offloaded
+        """
+        old = self.instance.offload(self.tickets_info)
+        path = os.path.join(self.directory, f"{old[HANDLE_KEY]}.json.gz")
+        expired = time.time() - self.instance.retention - 1
+        os.utime(path, (expired, expired))
+
+        new = self.instance.offload(self.tickets_info)
+        self.assertEqual(os.listdir(self.directory), [f"{new[HANDLE_KEY]}.json.gz"])
+
+    def test_not_offloaded_without_store(self):
+        """
+        Tests that results are returned unchanged if no store directory is configured, and handles
+        can't be resolved
+        """
+        handle = self.instance.offload(self.tickets_info)
+        with patch.dict(os.environ, clear=True):
+            store = ResultStore(threshold=100)
+            self.assertIs(store.offload(self.tickets_info), self.tickets_info)
+            with self.assertRaises(ItemNotFoundError):
+                store.resolve(handle)
+
+    def test_root_from_environment(self):
+        """
+        Tests that the store directory defaults to the OPENSTACK_RESULT_STORE_DIR environment variable
+        """
+        with patch.dict(os.environ, {STORE_DIR_ENV: self.directory}):
+            self.assertEqual(ResultStore().root, self.directory)
+
+    def test_threshold_from_environment(self):
+        """
+        Tests that the threshold defaults to the OPENSTACK_RESULT_OFFLOAD_BYTES environment variable
+        """
+        with patch.dict(os.environ, {THRESHOLD_ENV: "10"}):
+            self.assertEqual(ResultStore(self.directory).threshold, 10)
+
+
+def test_summarise():
+    """
+    Tests that summarise counts items in lists and dictionaries, and truncates long strings
+    """
+    assert summarise([1, 2, 3]) == {"items": 3}
+    assert summarise({"a": {"b": 1}, "c": 1, "d": "x" * 300}) == {
+        "a": {"items": 1},
+        "c": 1,
+        "d": "x" * 200 + "...",
+    }
+    assert summarise("text") == {"type": "str"}
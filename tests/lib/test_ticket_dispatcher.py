@@ -0,0 +1,177 @@
+import unittest
+from contextlib import ExitStack
+from unittest.mock import MagicMock
+
+from ticket_dispatcher import TicketDispatcher, TokenBucket
+from tests.lib.stub_service_desk import StubServiceDesk
+
+
+def _tickets_info(count: int):
+    return {
+        "title": "Server {p[id]} is stuck",
+        "body": "Server id: {p[id]}",
+        "server_list": [
+            {"dataTitle": {"id": str(i)}, "dataBody": {"id": str(i)}}
+            for i in range(count)
+        ],
+    }
+
+
+class TicketDispatcherTests(unittest.TestCase):
+    """
+    Runs TicketDispatcher against a local stub service desk to check connection reuse, concurrency,
+    rate limiting, retries and per-ticket results over real HTTP
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.desk_context = ExitStack()
+        self.addCleanup(self.desk_context.close)
+        self.desk = self.desk_context.enter_context(StubServiceDesk())
+
+    def _dispatcher(self, **kwargs) -> TicketDispatcher:
+        kwargs = {
+            "max_concurrent": 4,
+            "requests_per_second": 1000,
+            "backoff_factor": 0,
+            **kwargs,
+        }
+        return TicketDispatcher("user@example.com", "key", url=self.desk.url, **kwargs)
+
+    def test_create_tickets(self):
+        """
+        Tests that a ticket is created for every entry, over a bounded, reused set of connections,
+        with the result of each returned in order
+        """
+        self.desk.latency = 0.01
+        with self._dispatcher() as dispatcher:
+            res = dispatcher.create_tickets(_tickets_info(40), "sd", "rt")
+
+        self.assertEqual(len(self.desk.tickets), 40)
+        self.assertEqual(
+            [ticket["summary"] for ticket in res],
+            [f"Server {i} is stuck" for i in range(40)],
+        )
+        self.assertTrue(all(ticket["created"] for ticket in res))
+        self.assertEqual(
+            {ticket["issue_key"] for ticket in res}, {f"TEST-{i}" for i in range(1, 41)}
+        )
+        self.assertLessEqual(self.desk.connections, 4)
+        self.assertLessEqual(self.desk.max_in_flight, 4)
+        self.assertIn(
+            {
+                "requestFieldValues": {
+                    "summary": "Server 0 is stuck",
+                    "description": "Server id: 0",
+                },
+                "serviceDeskId": "sd",
+                "requestTypeId": "rt",
+            },
+            self.desk.tickets,
+        )
+
+    def test_rate_limited(self):
+        """
+        Tests that tickets are created no faster than the rate given, after the initial burst
+        """
+        with self._dispatcher(requests_per_second=50) as dispatcher:
+            dispatcher.create_tickets(_tickets_info(60), "sd", "rt")
+
+        times = self.desk.request_times
+        # 50 tokens are available at once, the other 10 take at least 0.2 seconds to refill
+        self.assertGreaterEqual(times[-1] - times[0], 0.15)
+
+    def test_retries_rate_limited(self):
+        """
+        Tests that 429 responses are retried until the ticket is created
+        """
+        self.desk.injected_statuses["Server 1 is stuck"] = [429, 429]
+        with self._dispatcher() as dispatcher:
+            res = dispatcher.create_tickets(_tickets_info(3), "sd", "rt")
+
+        self.assertTrue(all(ticket["created"] for ticket in res))
+        self.assertEqual(len(self.desk.tickets), 3)
+
+    def test_server_errors_not_retried(self):
+        """
+        Tests that 5xx responses are not retried, as the ticket may have been created anyway
+        """
+        self.desk.injected_statuses["Server 0 is stuck"] = [503]
+        with self._dispatcher() as dispatcher:
+            (res,) = dispatcher.create_tickets(_tickets_info(1), "sd", "rt")
+
+        self.assertEqual(res["status"], 503)
+        self.assertEqual(len(self.desk.request_times), 1)
+
+    def test_retries_rate_limited_by_bucket(self):
+        """
+        Tests that each retry takes a token, so retries are no faster than the rate given
+        """
+        self.desk.injected_statuses["Server 0 is stuck"] = [429, 429]
+        with self._dispatcher(requests_per_second=2) as dispatcher:
+            (res,) = dispatcher.create_tickets(_tickets_info(1), "sd", "rt")
+
+        self.assertTrue(res["created"])
+        times = self.desk.request_times
+        self.assertEqual(len(times), 3)
+        # 2 tokens are available at once, the third takes 0.5 seconds to refill
+        self.assertGreaterEqual(times[-1] - times[0], 0.45)
+
+    def test_failures_reported_per_ticket(self):
+        """
+        Tests that every ticket is attempted, and tickets which fail are reported with their status
+        """
+        self.desk.injected_statuses["Server 1 is stuck"] = [400]
+        self.desk.injected_statuses["Server 2 is stuck"] = [503]
+        with self._dispatcher() as dispatcher:
+            res = dispatcher.create_tickets(_tickets_info(4), "sd", "rt")
+
+        self.assertEqual(
+            [ticket["created"] for ticket in res], [True, False, False, True]
+        )
+        self.assertEqual([ticket["status"] for ticket in res], [201, 400, 503, 201])
+        self.assertIsNone(res[0]["error"])
+
+    def test_unauthorised(self):
+        """
+        Tests that tickets sent with the wrong credentials are reported as failed
+        """
+        with TicketDispatcher(
+            "user@example.com", "wrong", url=self.desk.url
+        ) as dispatcher:
+            (res,) = dispatcher.create_tickets(_tickets_info(1), "sd", "rt")
+        self.assertFalse(res["created"])
+        self.assertEqual(res["status"], 401)
+
+    def test_connection_error(self):
+        """
+        Tests that a ticket which can't be sent is reported as failed with the error
+        """
+        self.desk_context.close()
+        with self._dispatcher(retries=0) as dispatcher:
+            (res,) = dispatcher.create_tickets(_tickets_info(1), "sd", "rt")
+        self.assertFalse(res["created"])
+        self.assertIsNone(res["status"])
+        self.assertIsNotNone(res["error"])
+
+
+def test_token_bucket_waits_when_empty():
+    """
+    Tests that the token bucket lets a burst of calls through, then spaces them out at the rate given
+    """
+    now = [0.0]
+    sleep = MagicMock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    sleep.assert_not_called()
+
+    bucket.acquire()
+    bucket.acquire()
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+    now[0] = 10.0
+    sleep.reset_mock()
+    bucket.acquire()
+    sleep.assert_not_called()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from ticket_index import INDEX_FILE_ENV, TicketIndex, fingerprint
+
+TITLE = "Server {p[id]} is stuck"
+
+# poll_interval of the weekly sensors, e.g. sensors/openstack.loadbalancers.yaml
+WEEKLY_POLL_INTERVAL = 604800
+
+
+def _entry(i: str):
+    return {"dataTitle": {"id": i}, "dataBody": {"id": i}}
+
+
+def _tickets_info(*ids: str):
+    return {"title": TITLE, "body": "", "server_list": [_entry(i) for i in ids]}
+
+
+class TicketIndexTests(unittest.TestCase):
+    """
+    Runs various tests to ensure issues already ticketed are remembered between runs expectedly
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.directory = stack.enter_context(tempfile.TemporaryDirectory())
+        self.now = 1000.0
+        self.path = os.path.join(self.directory, "index.json")
+
+    def _index(self) -> TicketIndex:
+        return TicketIndex(self.path, ttl=100, clock=lambda: self.now)
+
+    def _record(self, *ids: str) -> None:
+        with self._index() as index:
+            for i in ids:
+                index.record(TITLE, _entry(i), f"TEST-{i}")
+
+    def _new_ids(self, *ids: str):
+        with self._index() as index:
+            new_entries, _ = index.filter_new(_tickets_info(*ids))
+        return [entry["dataTitle"]["id"] for entry in new_entries]
+
+    def _index_other_title(self):
+        with self._index() as index:
+            index.record("Other", _entry("b"))
+
+    def test_known_issues_skipped(self):
+        """
+        Tests that issues recorded on a previous run are skipped, and others are new
+        """
+        self._record("a", "b")
+        with self._index() as index:
+            new_entries, known_entries = index.filter_new(_tickets_info("a", "b", "c"))
+        self.assertEqual(new_entries, _tickets_info("c")["server_list"])
+        self.assertEqual(known_entries, _tickets_info("a", "b")["server_list"])
+
+    def test_fingerprint_uses_title_template(self):
+        """
+        Tests that the same values reported with a different title template are a different issue
+        """
+        self.assertNotEqual(
+            fingerprint(TITLE, _entry("a")), fingerprint("Other {p[id]}", _entry("a"))
+        )
+        self.assertEqual(
+            fingerprint(TITLE, {"dataTitle": {"id": "a", "b": 1}}),
+            fingerprint(TITLE, {"dataTitle": {"b": 1, "id": "a"}}),
+        )
+
+    def test_fingerprint_uses_body_id(self):
+        """
+        Tests that resources reported with the same title values but different IDs in the body are
+        different issues, e.g. two snapshots with the same name in a project
+        """
+        title = "Snapshot {p[name]} in {p[project_name]} is old"
+        data_title = {"name": "backup", "project_name": "project"}
+        self.assertNotEqual(
+            fingerprint(title, {"dataTitle": data_title, "dataBody": {"id": "1"}}),
+            fingerprint(title, {"dataTitle": data_title, "dataBody": {"id": "2"}}),
+        )
+        self.assertEqual(
+            fingerprint(title, {"dataTitle": data_title, "dataBody": {"id": "1"}}),
+            fingerprint(
+                title, {"dataTitle": data_title, "dataBody": {"id": "1", "size": 1}}
+            ),
+        )
+
+    def test_issues_expire_after_ttl(self):
+        """
+        Tests that issues not reported for the ttl are forgotten, and those still reported are kept
+        """
+        self._record("a", "b")
+        self.now += 60
+        self.assertEqual(self._new_ids("a"), [])
+        self.now += 60
+        self.assertEqual(self._new_ids("a", "b"), ["b"])
+
+    def test_reported_every_poll_interval_by_default(self):
+        """
+        Tests that with the default ttl, an issue reported again one weekly poll later - even if the poll
+        runs late, or one is missed - is still known
+        """
+        with TicketIndex(self.path, clock=lambda: self.now) as index:
+            index.record(TITLE, _entry("a"))
+        for _ in range(2):
+            self.now += WEEKLY_POLL_INTERVAL + 30
+            with TicketIndex(self.path, clock=lambda: self.now) as index:
+                self.assertEqual(index.filter_new(_tickets_info("a"))[0], [])
+        self.now += 2 * WEEKLY_POLL_INTERVAL + 30
+        with TicketIndex(self.path, clock=lambda: self.now) as index:
+            self.assertEqual(index.filter_new(_tickets_info("a"))[0], [])
+
+    def test_resolve_missing(self):
+        """
+        Tests that issues no longer found are resolved, and ticketed again if they come back
+        """
+        self._record("a", "b")
+        self._index_other_title()
+        with self._index() as index:
+            self.assertEqual(index.resolve_missing(TITLE, [_entry("a")]), 1)
+            self.assertEqual(index.resolve_missing(TITLE, [_entry("a")]), 0)
+        self.assertEqual(self._new_ids("a", "b"), ["b"])
+        with self._index() as index:
+            self.assertTrue(index.is_known(fingerprint("Other", _entry("b"))))
+
+    def test_not_saved_on_error(self):
+        """
+        Tests that changes are discarded if an error is raised while the index is open
+        """
+        with self.assertRaises(ValueError):
+            with self._index() as index:
+                index.record(TITLE, _entry("a"))
+                raise ValueError
+        self.assertEqual(self._new_ids("a"), ["a"])
+
+    def test_path_from_environment(self):
+        """
+        Tests that the index file defaults to the OPENSTACK_TICKET_INDEX_FILE environment variable
+        """
+        with patch.dict(os.environ, {INDEX_FILE_ENV: self.path}):
+            self.assertEqual(TicketIndex().path, self.path)
@@ -1,6 +1,11 @@
 import unittest
 from unittest.mock import MagicMock
 
+from nose.tools import raises
+
+from enums.query.query_output_types import QueryOutputTypes
+from exceptions.parse_query_error import ParseQueryError
+
 from structs.query.query_output_details import QueryOutputDetails
 
 from tests.lib.openstack_query.mocks.mocked_props import MockProperties
@@ -37,3 +42,53 @@ class QueryOutputDetailsTests(unittest.TestCase):
             MOCKED_OUTPUT_DETAILS.properties_to_select
         )
         assert res.output_type == MOCKED_OUTPUT_DETAILS.output_type
+        assert not res.profile
+
+    def test_from_kwargs_profile(self):
+        """
+        tests that from_kwargs static method sets profile when given
+        """
+        res = QueryOutputDetails.from_kwargs(
+            prop_cls=MagicMock(),
+            properties_to_select=[],
+            output_type="to_str",
+            profile=True,
+        )
+        assert res.profile
+
+    def test_from_kwargs_output_path(self):
+        """
+        tests that from_kwargs static method sets output_path when given
+        """
+        res = QueryOutputDetails.from_kwargs(
+            prop_cls=MagicMock(),
+            properties_to_select=[],
+            output_type="to_ndjson",
+            output_path="out.ndjson",
+        )
+        assert res.output_type == QueryOutputTypes.TO_NDJSON
+        assert res.output_path == "out.ndjson"
+
+    def test_from_kwargs_resume_token(self):
+        """
+        tests that from_kwargs static method sets resume_token when given
+        """
+        res = QueryOutputDetails.from_kwargs(
+            prop_cls=MagicMock(),
+            properties_to_select=[],
+            output_type="to_str",
+            resume_token="nightly",
+        )
+        assert res.resume_token == "nightly"
+
+    @raises(ParseQueryError)
+    def test_from_kwargs_streamed_without_output_path(self):
+        """
+        tests that from_kwargs static method raises error for output types written to a file when no
+        output_path is given
+        """
+        QueryOutputDetails.from_kwargs(
+            prop_cls=MagicMock(),
+            properties_to_select=[],
+            output_type="to_csv",
+        )
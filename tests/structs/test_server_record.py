@@ -0,0 +1,79 @@
+import unittest
+
+from nose.tools import raises
+from parameterized import parameterized
+
+from structs.query.server_record import NOVA_SERVER_KEYS, ServerRecord
+
+
+class ServerRecordTests(unittest.TestCase):
+    """
+    This class tests that ServerRecord can be used in place of openstacksdk Server objects
+    """
+
+    def setUp(self) -> None:
+        self.instance = ServerRecord.from_nova(
+            {
+                "id": "server1",
+                "name": "test",
+                "created": "2020-01-01T00:00:00Z",
+                "hostId": "host1",
+                "tenant_id": "project1",
+                "addresses": {"private": []},
+            }
+        )
+
+    def test_fields_match_nova_keys(self):
+        """
+        tests that every record field has a Nova JSON key, in the same order
+        """
+        self.assertEqual(tuple(NOVA_SERVER_KEYS), ServerRecord._fields)
+
+    def test_from_nova(self):
+        """
+        tests that Nova's keys are converted to Server attribute names, missing fields are None
+        and keys which are not needed are dropped
+        """
+        self.assertEqual(
+            self.instance.to_dict(),
+            {
+                "id": "server1",
+                "name": "test",
+                "description": None,
+                "status": None,
+                "created_at": "2020-01-01T00:00:00Z",
+                "updated_at": None,
+                "user_id": None,
+                "host_id": "host1",
+                "project_id": "project1",
+            },
+        )
+
+    def test_getitem(self):
+        """
+        tests that fields can be read by name, as property functions do, or by index
+        """
+        self.assertEqual(self.instance["project_id"], "project1")
+        self.assertEqual(self.instance.host_id, "host1")
+        self.assertEqual(self.instance[0], "server1")
+
+    @parameterized.expand([("unknown", "addresses"), ("tuple method", "count")])
+    @raises(KeyError)
+    def test_getitem_unknown(self, _, key):
+        """
+        tests that reading anything other than a field by name raises KeyError
+        """
+        _ = self.instance[key]
+
+    @raises(AttributeError)
+    def test_immutable(self):
+        """
+        tests that records cannot be changed or given extra attributes
+        """
+        self.instance.extra = "value"
+
+    def test_round_trip(self):
+        """
+        tests that a record can be rebuilt from to_dict()
+        """
+        self.assertEqual(ServerRecord(**self.instance.to_dict()), self.instance)